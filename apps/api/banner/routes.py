@@ -1,9 +1,16 @@
 from asgiref.sync import sync_to_async
-from fastapi import APIRouter, HTTPException, status
+from django.conf import settings
+from fastapi import APIRouter, HTTPException, Request, status
 
-from apps.api.banner.schemas import BannerAccessResponseSchema, BannerSchema
+from apps.api.banner.schemas import (
+    BannerAccessBatchResponseSchema,
+    BannerAccessBatchSchema,
+    BannerAccessResponseSchema,
+    BannerSchema,
+)
 from apps.banner.enums import BannerAccessType
 from apps.banner.helpers import BannerHelper
+from pyaa.fastapi.client import get_client_country_code, get_client_ip_address
 
 router = APIRouter()
 
@@ -19,26 +26,45 @@ async def list_banners(zone: str, language: str = None, site: int = None):
 
 
 @router.get("/access/{token}", response_model=BannerAccessResponseSchema)
-async def track_banner_access(token: str, type: str):
-    from apps.banner.models import BannerAccess
+async def track_banner_access(token: str, type: str, request: Request):
+    banners = await BannerHelper.aget_banners_by_tokens([token])
+    banner = banners.get(BannerHelper.parse_token(token))
 
-    banner = await sync_to_async(BannerHelper.get_banner_by_token)(token)
     if not banner:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Banner not found"
         )
 
-    if type == BannerAccessType.VIEW.value:
-        access_type = BannerAccessType.VIEW
-    elif type == BannerAccessType.CLICK.value:
-        access_type = BannerAccessType.CLICK
-    else:
+    if type not in BannerAccessType.values:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid access type"
         )
 
-    await BannerAccess.objects.acreate(
-        banner=banner, access_type=access_type, ip_address="127.0.0.1", country_code=""
+    tracked = await BannerHelper.atrack_banner_access(
+        banner,
+        BannerAccessType(type),
+        get_client_ip_address(request),
+        country_code=get_client_country_code(request),
     )
 
-    return {"success": True}
+    return {"success": tracked}
+
+
+@router.post("/access", response_model=BannerAccessBatchResponseSchema)
+async def track_banner_accesses(data: BannerAccessBatchSchema, request: Request):
+    if len(data.accesses) > settings.BANNER_ACCESS_BATCH_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Too many accesses"
+        )
+
+    ip_address = get_client_ip_address(request)
+    country_code = get_client_country_code(request)
+
+    results = await BannerHelper.atrack_banner_tokens(
+        [(access.token, access.type) for access in data.accesses],
+        lambda banner, access_type: BannerHelper.build_client_access(
+            banner, access_type, ip_address, country_code=country_code
+        ),
+    )
+
+    return {"results": results}
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Any
 from uuid import UUID
 
-from pydantic import field_serializer
+from pydantic import Field, field_serializer
 
 from pyaa.fastapi.schemas import BaseSchema
 
@@ -25,3 +25,23 @@ class BannerSchema(BaseSchema):
 
 class BannerAccessResponseSchema(BaseSchema):
     success: bool
+
+
+class BannerAccessItemSchema(BaseSchema):
+    token: str
+    type: str
+
+
+class BannerAccessBatchSchema(BaseSchema):
+    accesses: list[BannerAccessItemSchema] = Field(min_length=1)
+
+
+class BannerAccessResultSchema(BaseSchema):
+    token: str
+    type: str
+    success: bool
+    error: str | None = None
+
+
+class BannerAccessBatchResponseSchema(BaseSchema):
+    results: list[BannerAccessResultSchema]
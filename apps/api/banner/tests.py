@@ -1,12 +1,15 @@
 import uuid
+from unittest.mock import patch
 
 import pytest
 from django.contrib.sites.models import Site
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
 from django.utils import timezone
+from fastapi.testclient import TestClient
 
 from apps.banner.enums import BannerAccessType, BannerZone
-from apps.banner.models import Banner
+from apps.banner.models import Banner, BannerAccess
 from apps.language.models import Language
 
 
@@ -91,3 +94,135 @@ def test_track_banner_access_not_found(client):
 def test_track_banner_access_invalid_type(client, banner):
     response = client.get(f"/api/banner/access/{banner.token}?type=invalid")
     assert response.status_code == 400
+
+
+def test_track_banner_accesses_batch(app, client, banner):
+    payload = {
+        "accesses": [
+            {"token": str(banner.token), "type": BannerAccessType.VIEW.value},
+            {"token": str(banner.token), "type": BannerAccessType.CLICK.value},
+            {"token": str(uuid.uuid4()), "type": BannerAccessType.VIEW.value},
+            {"token": str(banner.token), "type": "invalid"},
+        ]
+    }
+
+    with TestClient(app, client=("10.0.0.1", 50000)) as remote_client:
+        response = remote_client.post("/api/banner/access", json=payload)
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["success"] for result in results] == [True, True, False, False]
+    assert results[2]["error"] == "Banner not found"
+    assert results[3]["error"] == "Invalid access type"
+    assert (
+        BannerAccess.objects.filter(banner=banner, ip_address="10.0.0.1").count() == 2
+    )
+
+
+def test_track_banner_accesses_without_client_ip(client, banner):
+    payload = {"accesses": [{"token": str(banner.token), "type": "view"}]}
+
+    response = client.post("/api/banner/access", json=payload)
+
+    assert response.status_code == 200
+    assert response.json()["results"][0]["success"] is False
+
+
+def test_track_banner_accesses_requires_accesses(client):
+    response = client.post("/api/banner/access", json={"accesses": []})
+    assert response.status_code == 422
+
+
+@override_settings(BANNER_ACCESS_BATCH_LIMIT=1)
+def test_track_banner_accesses_too_many(client, banner):
+    payload = {
+        "accesses": [
+            {"token": str(banner.token), "type": "view"},
+            {"token": str(banner.token), "type": "click"},
+        ]
+    }
+
+    response = client.post("/api/banner/access", json=payload)
+    assert response.status_code == 400
+
+
+@override_settings(BANNER_ACCESS_INTERVAL=3600)
+def test_track_banner_access_records_client_once(app, client, banner):
+    url = f"/api/banner/access/{banner.token}?type={BannerAccessType.VIEW.value}"
+
+    with TestClient(app, client=("10.0.0.1", 50000)) as remote_client:
+        first = remote_client.get(url, headers={"CF-IPCountry": "br"})
+        second = remote_client.get(url, headers={"CF-IPCountry": "br"})
+
+    assert first.json()["success"] is True
+    assert second.json()["success"] is False
+
+    access = BannerAccess.objects.get(banner=banner)
+    assert access.ip_address == "10.0.0.1"
+    assert access.country_code == "BR"
+
+
+@override_settings(BANNER_ACCESS_BUFFER_ENABLED=True, BANNER_ACCESS_DEDUPE="bloom")
+def test_track_banner_access_uses_buffer(app, client, banner):
+    from apps.banner.buffer import BannerAccessBuffer
+    from apps.banner.dedupe import banner_access_dedupe
+
+    buffer = BannerAccessBuffer()
+    banner_access_dedupe.reset()
+    url = f"/api/banner/access/{banner.token}?type={BannerAccessType.CLICK.value}"
+
+    with patch("apps.banner.helpers.banner_access_buffer", buffer), patch.object(
+        BannerAccessBuffer, "start"
+    ), TestClient(app, client=("10.0.0.2", 50000)) as remote_client:
+        assert remote_client.get(url).json()["success"] is True
+        assert remote_client.get(url).json()["success"] is False
+
+    banner_access_dedupe.reset()
+
+    assert len(buffer) == 1
+    assert BannerAccess.objects.count() == 0
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "banner-api-tests",
+        }
+    },
+    CACHE_LOCAL_SYNC_INTERVAL=3600,
+    BANNER_ACCESS_BUFFER_ENABLED=True,
+    BANNER_ACCESS_DEDUPE="bloom",
+)
+def test_track_banner_access_without_query(app, client, banner):
+    from django.db.backends.utils import CursorWrapper
+
+    from apps.banner.buffer import BannerAccessBuffer
+    from apps.banner.dedupe import banner_access_dedupe
+
+    buffer = BannerAccessBuffer()
+    banner_access_dedupe.reset()
+    url = f"/api/banner/access/{banner.token}?type={BannerAccessType.VIEW.value}"
+    execute = CursorWrapper.execute
+    queries = []
+
+    def record_execute(cursor, sql, params=None):
+        queries.append(sql)
+        return execute(cursor, sql, params)
+
+    with patch("apps.banner.helpers.banner_access_buffer", buffer), patch.object(
+        BannerAccessBuffer, "start"
+    ), TestClient(app, client=("10.0.0.3", 50000)) as remote_client:
+        # the first access loads the schedule index
+        assert remote_client.get(url).json()["success"] is True
+
+        with patch.object(CursorWrapper, "execute", record_execute):
+            response = remote_client.get(
+                f"/api/banner/access/{banner.token}?type={BannerAccessType.CLICK.value}"
+            )
+
+    banner_access_dedupe.reset()
+
+    assert response.json()["success"] is True
+    assert queries == []
+    assert len(buffer) == 2
@@ -1,17 +1,30 @@
 from asgiref.sync import sync_to_async
 from django.db import transaction
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 
 from apps.api.auth.dependencies import require_permission
 from apps.api.content.schemas import ContentCreateSchema, ContentSchema
 from apps.content.helpers import ContentHelper
-from apps.content.models import Content
+from apps.content.models import Content, ContentCategory
+from pyaa.fastapi.conditional import get_not_modified_response
 
 router = APIRouter()
 
 
 @router.get("/{tag}", response_model=ContentSchema)
-async def get_content_by_tag(tag: str):
+async def get_content_by_tag(tag: str, request: Request, response: Response):
+    not_modified = await get_not_modified_response(
+        request,
+        response,
+        [
+            Content.objects.filter(tag=tag),
+            ContentCategory.objects.filter(contents__tag=tag),
+        ],
+    )
+
+    if not_modified:
+        return not_modified
+
     content = await sync_to_async(ContentHelper.get_content)(content_tag=tag)
     if not content:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
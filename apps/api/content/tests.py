@@ -72,6 +72,32 @@ def test_get_content_by_tag(client, content):
     assert data["content"] == "Test content text"
 
 
+def test_get_content_by_tag_sends_validators(client, content):
+    response = client.get("/api/content/test-content")
+    assert response.status_code == 200
+    assert "etag" in response.headers
+    assert "last-modified" in response.headers
+
+
+def test_get_content_by_tag_not_modified(client, content):
+    etag = client.get("/api/content/test-content").headers["etag"]
+
+    response = client.get("/api/content/test-content", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_get_content_by_tag_modified_after_update(client, content):
+    etag = client.get("/api/content/test-content").headers["etag"]
+
+    content.title = "Updated Content"
+    content.save()
+
+    response = client.get("/api/content/test-content", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Updated Content"
+
+
 def test_get_content_by_tag_not_found(client):
     response = client.get("/api/content/non-existent")
     assert response.status_code == 404
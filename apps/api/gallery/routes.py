@@ -1,5 +1,5 @@
 from asgiref.sync import sync_to_async
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 
 from apps.api.gallery.schemas import (
     GalleryListSchema,
@@ -8,13 +8,30 @@ from apps.api.gallery.schemas import (
     PaginatedGalleryListResponse,
 )
 from apps.gallery.helpers import GalleryHelper
-from apps.gallery.models import Gallery
+from apps.gallery.models import Gallery, GalleryPhoto
+from pyaa.helpers.cache import CacheHelper
+from pyaa.fastapi.conditional import get_not_modified_response
 
 router = APIRouter()
 
 
 @router.get("", response_model=PaginatedGalleryListResponse)
-async def list_galleries(limit: int = Query(100, ge=1), offset: int = Query(0, ge=0)):
+async def list_galleries(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1),
+    offset: int = Query(0, ge=0),
+):
+    not_modified = await get_not_modified_response(
+        request,
+        response,
+        [Gallery.objects.filter(active=True), GalleryPhoto.objects.all()],
+        tags=[CacheHelper.model_tag(GalleryPhoto)],
+    )
+
+    if not_modified:
+        return not_modified
+
     queryset = (
         Gallery.objects.filter(active=True)
         .select_related("language")
@@ -46,7 +63,20 @@ async def list_galleries(limit: int = Query(100, ge=1), offset: int = Query(0, g
 
 
 @router.get("/{tag}", response_model=GallerySchema)
-async def get_gallery_by_tag(tag: str):
+async def get_gallery_by_tag(tag: str, request: Request, response: Response):
+    not_modified = await get_not_modified_response(
+        request,
+        response,
+        [
+            Gallery.objects.filter(tag=tag),
+            GalleryPhoto.objects.filter(gallery__tag=tag),
+        ],
+        tags=[CacheHelper.model_tag(GalleryPhoto)],
+    )
+
+    if not_modified:
+        return not_modified
+
     gallery = await sync_to_async(GalleryHelper.get_gallery)(gallery_tag=tag)
     if not gallery:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
@@ -127,3 +127,10 @@ def test_get_gallery_with_photos(client, site, language):
     assert len(data["photos"]) == 1
     assert data["photos"][0]["caption"] == "Test Photo"
     assert data["photos"][0]["main"] is True
+
+
+def test_get_gallery_by_tag_not_modified(client, gallery1):
+    etag = client.get("/api/gallery/gallery-1").headers["etag"]
+
+    response = client.get("/api/gallery/gallery-1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
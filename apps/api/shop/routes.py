@@ -1,15 +1,18 @@
 from asgiref.sync import sync_to_async
 from django.contrib.sites.models import Site
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 
 from apps.api.shop.schemas import PlanSchema
 from apps.shop.models import Plan
+from pyaa.fastapi.conditional import get_not_modified_response
 
 router = APIRouter()
 
 
 @router.get("/plan", response_model=list[PlanSchema])
 async def list_plans(
+    request: Request,
+    response: Response,
     gateway: str | None = None,
     site: int | None = None,
     active: bool | None = None,
@@ -26,6 +29,14 @@ async def list_plans(
         List of plans matching the filters
     """
 
+    # the filters are part of the etag through the query string
+    not_modified = await get_not_modified_response(
+        request, response, [Plan.objects.all()]
+    )
+
+    if not_modified:
+        return not_modified
+
     def _get_plans():
         queryset = Plan.objects.all()
 
@@ -276,3 +276,17 @@ def test_plan_with_all_optional_fields_null(client, site):
     assert data[0]["frequencyType"] is None
     assert data[0]["bonus"] is None
     assert data[0]["description"] is None
+
+
+def test_list_plans_not_modified(client, stripe_plan):
+    etag = client.get("/api/shop/plan").headers["etag"]
+
+    response = client.get("/api/shop/plan", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_list_plans_etag_varies_on_filters(client, stripe_plan):
+    etag = client.get("/api/shop/plan").headers["etag"]
+
+    response = client.get("/api/shop/plan?active=true", headers={"If-None-Match": etag})
+    assert response.status_code == 200
@@ -0,0 +1,43 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from pyaa.fastapi.client import get_client_country_code, get_client_ip_address
+
+
+@pytest.fixture
+def client_app():
+    # minimal app that echoes the client read from the asgi scope
+    app = FastAPI()
+
+    @app.get("/client")
+    async def get_client(request: Request):
+        return {
+            "ip": get_client_ip_address(request),
+            "country": get_client_country_code(request),
+        }
+
+    return app
+
+
+def test_client_ip_from_scope(client_app):
+    with TestClient(client_app, client=("8.8.8.8", 50000)) as test_client:
+        response = test_client.get("/client", headers={"CF-IPCountry": "br"})
+
+    assert response.json() == {"ip": "8.8.8.8", "country": "br"}
+
+
+def test_client_ip_from_forwarded_header(client_app):
+    with TestClient(client_app, client=("10.0.0.1", 50000)) as test_client:
+        response = test_client.get(
+            "/client", headers={"X-Forwarded-For": "1.1.1.1, 10.0.0.1"}
+        )
+
+    assert response.json() == {"ip": "1.1.1.1", "country": None}
+
+
+def test_client_without_valid_ip(client_app):
+    with TestClient(client_app) as test_client:
+        response = test_client.get("/client")
+
+    assert response.json()["ip"] is None
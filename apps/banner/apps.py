@@ -6,3 +6,14 @@ class BannerAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.banner"
     verbose_name = _("apps.banner.description")
+
+    def ready(self):
+        from apps.banner.models import Banner
+        from apps.banner.schedule import banner_schedule_index
+        from apps.language.models import Language
+        from pyaa.helpers.cache import CacheHelper
+
+        CacheHelper.watch_model(Banner)
+
+        banner_schedule_index.watch(Banner)
+        banner_schedule_index.watch(Language)
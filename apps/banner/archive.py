@@ -0,0 +1,229 @@
+import csv
+import gzip
+import io
+import re
+from datetime import date
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.banner.models import BannerAccess, BannerAccessWatermark
+
+BANNER_ACCESS_ARCHIVE_PREFIX = "banner-access"
+
+BANNER_ACCESS_ARCHIVE_FIELDS = [
+    "id",
+    "banner_id",
+    "customer_id",
+    "access_type",
+    "ip_address",
+    "country_code",
+    "created_at",
+]
+
+
+class BannerAccessArchive:
+    """
+    Moves old banner accesses out of the access table into gzip compressed csv files,
+    one folder per month (banner-access/2025-01/<first id>-<last id>.csv.gz) in the
+    BANNER_ACCESS_ARCHIVE_STORAGE storage, and reads them back.
+
+    Only rolled up accesses are archived, so the reports keep their totals.
+    """
+
+    @staticmethod
+    def get_storage():
+        return storages[settings.BANNER_ACCESS_ARCHIVE_STORAGE]
+
+    @staticmethod
+    def archive(days=None, batch_size=None):
+        """
+        Archives the rolled up accesses older than the retention days in batches, each
+        batch written and deleted in its own transaction.
+        Returns the number of archived accesses.
+        """
+        days = days or settings.BANNER_ACCESS_RETENTION_DAYS
+        batch_size = batch_size or settings.BANNER_ACCESS_ARCHIVE_BATCH_SIZE
+        created_before = timezone.now() - timezone.timedelta(days=days)
+
+        watermark = (
+            BannerAccessWatermark.objects.filter(pk=1)
+            .values_list("last_access_id", flat=True)
+            .first()
+        )
+
+        if not watermark:
+            return 0
+
+        accesses = BannerAccess.objects.filter(
+            id__lte=watermark, created_at__lt=created_before
+        )
+
+        archived = 0
+
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    accesses.order_by("id").values(*BANNER_ACCESS_ARCHIVE_FIELDS)[
+                        :batch_size
+                    ]
+                )
+
+                if not rows:
+                    return archived
+
+                BannerAccessArchive.write_rows(rows)
+
+                accesses.filter(id__gte=rows[0]["id"], id__lte=rows[-1]["id"]).delete()
+
+                archived += len(rows)
+
+    @staticmethod
+    def write_rows(rows):
+        months = {}
+
+        for row in rows:
+            month = timezone.localtime(row["created_at"]).strftime("%Y-%m")
+            months.setdefault(month, []).append(row)
+
+        storage = BannerAccessArchive.get_storage()
+
+        for month, month_rows in months.items():
+            name = (
+                f"{BANNER_ACCESS_ARCHIVE_PREFIX}/{month}/"
+                f"{month_rows[0]['id']:012d}-{month_rows[-1]['id']:012d}.csv.gz"
+            )
+
+            # a batch retried after a failed delete writes the same file again
+            if storage.exists(name):
+                storage.delete(name)
+
+            storage.save(name, ContentFile(BannerAccessArchive.encode(month_rows)))
+
+    @staticmethod
+    def encode(rows):
+        content = io.StringIO()
+        writer = csv.DictWriter(content, fieldnames=BANNER_ACCESS_ARCHIVE_FIELDS)
+        writer.writeheader()
+
+        for row in rows:
+            writer.writerow({**row, "created_at": row["created_at"].isoformat()})
+
+        return gzip.compress(content.getvalue().encode())
+
+    @staticmethod
+    def list_months():
+        storage = BannerAccessArchive.get_storage()
+
+        if not storage.exists(BANNER_ACCESS_ARCHIVE_PREFIX):
+            return []
+
+        months, _ = storage.listdir(BANNER_ACCESS_ARCHIVE_PREFIX)
+
+        return sorted(months)
+
+    @staticmethod
+    def get_overlapping_files(files):
+        """
+        Returns the files whose id range overlaps the range of another file.
+        A batch retried after a failed delete, with other batch boundaries,
+        writes some of its accesses again in a file of another range.
+        """
+        ranges = []
+
+        for name in files:
+            match = re.match(r"(\d+)-(\d+)", name)
+
+            if match:
+                ranges.append((int(match[1]), int(match[2]), name))
+
+        ranges.sort()
+        overlapping = set()
+
+        for index, (first, last, name) in enumerate(ranges):
+            for other_first, other_last, other_name in ranges[index + 1 :]:
+                if other_first > last:
+                    break
+
+                overlapping.update((name, other_name))
+
+        return overlapping
+
+    @staticmethod
+    def read_month(month):
+        """
+        Yields the archived accesses of a month (YYYY-MM) as dicts, each access once.
+        """
+        storage = BannerAccessArchive.get_storage()
+        folder = f"{BANNER_ACCESS_ARCHIVE_PREFIX}/{month}"
+
+        _, files = storage.listdir(folder)
+
+        # ids are only tracked for the files that can repeat accesses
+        overlapping = BannerAccessArchive.get_overlapping_files(files)
+        seen = set()
+
+        for name in sorted(files):
+            with storage.open(f"{folder}/{name}", "rb") as file:
+                content = gzip.decompress(file.read()).decode()
+
+            for row in csv.DictReader(io.StringIO(content)):
+                row["id"] = int(row["id"])
+
+                if name in overlapping:
+                    if row["id"] in seen:
+                        continue
+
+                    seen.add(row["id"])
+
+                row["banner_id"] = int(row["banner_id"])
+                row["customer_id"] = (
+                    int(row["customer_id"]) if row["customer_id"] else None
+                )
+                row["country_code"] = row["country_code"] or None
+                row["created_at"] = parse_datetime(row["created_at"])
+
+                yield row
+
+    @staticmethod
+    def get_daily_accesses(day_gte, day_lte, banner_ids=None):
+        """
+        Returns the archived access totals by banner, day and access type between
+        the days, in the format of BannerHelper.get_daily_accesses.
+        """
+        totals = {}
+
+        for month in BannerAccessArchive.list_months():
+            year, number = map(int, month.split("-"))
+
+            if date(year, number, 1) > day_lte or (year, number) < (
+                day_gte.year,
+                day_gte.month,
+            ):
+                continue
+
+            for row in BannerAccessArchive.read_month(month):
+                day = timezone.localdate(row["created_at"])
+
+                if not day_gte <= day <= day_lte:
+                    continue
+
+                if banner_ids is not None and row["banner_id"] not in banner_ids:
+                    continue
+
+                key = (row["banner_id"], day, row["access_type"])
+                totals[key] = totals.get(key, 0) + 1
+
+        return [
+            {
+                "banner_id": banner_id,
+                "day": day,
+                "access_type": access_type,
+                "total": total,
+            }
+            for (banner_id, day, access_type), total in sorted(totals.items())
+        ]
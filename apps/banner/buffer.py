@@ -0,0 +1,143 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BannerAccessBuffer:
+    """
+    In-process write-behind buffer for banner accesses.
+
+    Accesses are deduplicated while queued and stored in batches by a daemon thread,
+    every BANNER_ACCESS_FLUSH_INTERVAL seconds or as soon as BANNER_ACCESS_BUFFER_SIZE
+    accesses are waiting. Pending accesses are also flushed when the process exits.
+
+    A batch that fails to store (e.g. the database is locked) is queued again and
+    retried with an exponential delay, and dropped after BANNER_ACCESS_FLUSH_RETRIES
+    failed retries.
+    """
+
+    def __init__(self):
+        self.accesses = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.failures = 0
+
+    def add(self, access):
+        """
+        Queues an unsaved access.
+        Returns False if the same access is already queued.
+        """
+        from apps.banner.helpers import BannerHelper
+
+        key = BannerHelper.get_access_key(access)
+
+        with self.lock:
+            if key in self.accesses:
+                return False
+
+            self.accesses[key] = access
+            full = len(self.accesses) >= settings.BANNER_ACCESS_BUFFER_SIZE
+
+            self.start()
+
+        # while retrying, the flusher waits for its delay even when full
+        if full and not self.failures:
+            self.wakeup.set()
+
+        return True
+
+    def flush(self):
+        """
+        Stores the queued accesses and returns how many were stored.
+        """
+        from apps.banner.helpers import BannerHelper
+
+        with self.lock:
+            accesses = list(self.accesses.values())
+            self.accesses = {}
+
+        if not accesses:
+            return 0
+
+        try:
+            stored = len(BannerHelper.store_banner_accesses(accesses))
+        except Exception:
+            self.failures += 1
+
+            if self.failures > settings.BANNER_ACCESS_FLUSH_RETRIES:
+                logger.exception(f"Failed to store {len(accesses)} banner accesses")
+                self.failures = 0
+                return 0
+
+            logger.warning(
+                f"Failed to store {len(accesses)} banner accesses, retry {self.failures}",
+                exc_info=True,
+            )
+
+            self.requeue(accesses)
+            return 0
+
+        self.failures = 0
+
+        return stored
+
+    def requeue(self, accesses):
+        from apps.banner.helpers import BannerHelper
+
+        with self.lock:
+            # accesses queued meanwhile are kept, the failed batch goes first
+            queued = self.accesses
+            self.accesses = {
+                BannerHelper.get_access_key(access): access for access in accesses
+            }
+
+            for key, access in queued.items():
+                self.accesses.setdefault(key, access)
+
+    def get_flush_delay(self):
+        return settings.BANNER_ACCESS_FLUSH_INTERVAL * 2**self.failures
+
+    @staticmethod
+    def get_max_queue_time():
+        """
+        Returns the seconds an access can wait before its batch is stored or
+        dropped, the flush interval plus the doubled delays of every retry.
+        """
+        return settings.BANNER_ACCESS_FLUSH_INTERVAL * (
+            2 ** (settings.BANNER_ACCESS_FLUSH_RETRIES + 1) - 1
+        )
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+
+        self.thread = threading.Thread(
+            target=self.run,
+            name="banner-access-buffer",
+            daemon=True,
+        )
+        self.thread.start()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.get_flush_delay())
+            self.wakeup.clear()
+            self.flush()
+
+            # the thread keeps its own connection, respect CONN_MAX_AGE like requests do
+            close_old_connections()
+
+    def __len__(self):
+        with self.lock:
+            return len(self.accesses)
+
+
+banner_access_buffer = BannerAccessBuffer()
+
+atexit.register(banner_access_buffer.flush)
@@ -0,0 +1,182 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+BANNER_ACCESS_DEDUPE_DATABASE = "database"
+BANNER_ACCESS_DEDUPE_CACHE = "cache"
+BANNER_ACCESS_DEDUPE_BLOOM = "bloom"
+
+BANNER_ACCESS_DEDUPE_KEY_PREFIX = "banner-access"
+
+
+class BloomFilter:
+    """
+    Fixed size bloom filter sized for a capacity and a false positive rate.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(
+            8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        )
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def get_positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        # double hashing, k positions from two hashes
+        return [(first + index * second) % self.size for index in range(self.hashes)]
+
+    def __contains__(self, key):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.get_positions(key)
+        )
+
+    def add(self, key):
+        for position in self.get_positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+
+class RotatingBloomFilter:
+    """
+    Two bloom filter generations of one interval each.
+
+    Keys are looked up in both generations and added to the current one, and the
+    older generation is dropped when the current one is one interval old, so a key
+    is remembered between one and two intervals with constant memory.
+    """
+
+    def __init__(self, capacity, error_rate, interval):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.current = BloomFilter(capacity, error_rate)
+        self.previous = BloomFilter(capacity, error_rate)
+        self.rotated_at = time.monotonic()
+
+    def rotate(self, now):
+        elapsed = now - self.rotated_at
+
+        if elapsed < self.interval:
+            return
+
+        # after two idle intervals both generations are stale
+        self.previous = (
+            self.current
+            if elapsed < self.interval * 2
+            else BloomFilter(self.capacity, self.error_rate)
+        )
+        self.current = BloomFilter(self.capacity, self.error_rate)
+        self.rotated_at = now
+
+    def add(self, key):
+        """
+        Adds the key and returns False if it was already seen.
+        """
+        with self.lock:
+            self.rotate(time.monotonic())
+
+            if key in self.current or key in self.previous:
+                return False
+
+            self.current.add(key)
+
+            return True
+
+
+class BannerAccessDedupe:
+    """
+    Store for the BANNER_ACCESS_INTERVAL check, so tracking does not query the
+    access table.
+
+    BANNER_ACCESS_DEDUPE selects the backend: "database" keeps the exists query on
+    the access table, "cache" adds one entry per banner, ip and access type to the
+    BANNER_ACCESS_DEDUPE_CACHE_ALIAS cache with the interval as timeout, and "bloom"
+    uses a rotating bloom filter per process, bounded in memory but approximate
+    (false positives skip BANNER_ACCESS_BLOOM_ERROR_RATE of the accesses, and each
+    worker process counts an ip once per interval).
+
+    The cache backend is exact only with a cache whose add is atomic and sized for
+    one entry per access (e.g. redis or memcached), the file based cache checks and
+    sets in two steps and culls its entries.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom = None
+
+    def is_enabled(self):
+        return settings.BANNER_ACCESS_DEDUPE != BANNER_ACCESS_DEDUPE_DATABASE
+
+    def claim(self, access):
+        """
+        Returns True if the access is the first of its ip in the interval.
+        Always True with the database backend, which checks when storing.
+        """
+        backend = settings.BANNER_ACCESS_DEDUPE
+        key = self.build_key(access)
+
+        if backend == BANNER_ACCESS_DEDUPE_CACHE:
+            # only the first caller in the interval creates the entry, when the
+            # cache backend adds atomically
+            return self.get_cache().add(key, 1, settings.BANNER_ACCESS_INTERVAL)
+
+        if backend == BANNER_ACCESS_DEDUPE_BLOOM:
+            return self.get_bloom().add(key)
+
+        return True
+
+    async def aclaim(self, access):
+        """
+        Async version of claim, the bloom filter is in memory and does not block.
+        """
+        if settings.BANNER_ACCESS_DEDUPE == BANNER_ACCESS_DEDUPE_CACHE:
+            return await self.get_cache().aadd(
+                self.build_key(access), 1, settings.BANNER_ACCESS_INTERVAL
+            )
+
+        return self.claim(access)
+
+    def get_cache(self):
+        return caches[settings.BANNER_ACCESS_DEDUPE_CACHE_ALIAS]
+
+    def get_bloom(self):
+        options = (
+            settings.BANNER_ACCESS_BLOOM_CAPACITY,
+            settings.BANNER_ACCESS_BLOOM_ERROR_RATE,
+            settings.BANNER_ACCESS_INTERVAL,
+        )
+
+        with self.lock:
+            bloom = self.bloom
+
+            if bloom is None or options != (
+                bloom.capacity,
+                bloom.error_rate,
+                bloom.interval,
+            ):
+                bloom = self.bloom = RotatingBloomFilter(*options)
+
+            return bloom
+
+    def reset(self):
+        with self.lock:
+            self.bloom = None
+
+    @staticmethod
+    def build_key(access):
+        return (
+            f"{BANNER_ACCESS_DEDUPE_KEY_PREFIX}:{access.banner_id}:"
+            f"{access.access_type}:{access.ip_address}"
+        )
+
+
+banner_access_dedupe = BannerAccessDedupe()
@@ -1,14 +1,28 @@
 import ipaddress
+import uuid
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.core.cache import cache
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
 from django.utils import timezone
 from django.utils.translation import get_language
 from ipware import get_client_ip
 
-from apps.banner.models import Banner, BannerAccess
+from apps.banner.archive import BannerAccessArchive
+from apps.banner.buffer import banner_access_buffer
+from apps.banner.dedupe import banner_access_dedupe
+from apps.banner.enums import BannerAccessType
+from apps.banner.models import (
+    Banner,
+    BannerAccess,
+    BannerAccessRollup,
+    BannerAccessWatermark,
+)
+from apps.banner.schedule import banner_schedule_index
+from apps.language.models import Language
+from pyaa.helpers.cache import CacheHelper
 
 
 class BannerHelper:
@@ -24,14 +38,31 @@ class BannerHelper:
         if site_id is None:
             site_id = settings.SITE_ID
 
+        # answered from the in-process schedule index, which is exact at every
+        # start and end date and is cleared when a banner or language changes
+        if banner_schedule_index.is_enabled():
+            return banner_schedule_index.get_banners(zone, site_id, language)
+
         # create cache key based on parameters
         cache_key = f"banners-{zone}-{site_id}-{language}"
 
-        # try to get from cache first
-        cached_banners = cache.get(cache_key)
-        if cached_banners is not None:
-            return cached_banners
+        # without the index, only one caller queries the banners when the shared
+        # cached list is missing or stale, and it is kept until a banner changes
+        # or the zone schedule changes
+        return CacheHelper.get_or_compute(
+            cache_key,
+            lambda: BannerHelper.query_banners(zone, site_id, language),
+            timeout=lambda banners: BannerHelper.get_schedule_timeout(
+                Banner.objects.filter(active=True, zone=zone), timezone.now()
+            ),
+            tags=[
+                CacheHelper.model_tag(Banner),
+                CacheHelper.model_tag(Language),
+            ],
+        )
 
+    @staticmethod
+    def query_banners(zone, site_id, language):
         # get current datetime for date filtering
         now = timezone.now()
 
@@ -54,7 +85,7 @@ class BannerHelper:
         )
 
         # get banners with all conditions
-        banners = (
+        return list(
             Banner.objects.filter(**filter_kwargs)
             .filter(date_filter)
             .filter(site_filter)
@@ -63,21 +94,55 @@ class BannerHelper:
             .select_related("language", "site")
         )
 
-        # cache for 1 hour
-        cache.set(cache_key, banners, timeout=3600)
+    @staticmethod
+    def get_banners_timeout(zone):
+        """
+        Returns the seconds the banners of the zone stay the same, until a banner
+        starts or ends, for caches of pages showing them.
+        """
+        if banner_schedule_index.is_enabled():
+            return banner_schedule_index.get_timeout()
 
-        return banners
+        return BannerHelper.get_schedule_timeout(
+            Banner.objects.filter(active=True, zone=zone), timezone.now()
+        )
+
+    @staticmethod
+    def get_schedule_timeout(queryset, now):
+        """
+        Returns the cache timeout for banner lookups, capped at the next moment
+        a banner of the queryset starts or ends.
+        """
+        timeout = settings.CACHE_TAGGED_TIMEOUT
+
+        boundaries = queryset.aggregate(
+            next_start_at=Min("start_at", filter=Q(start_at__gt=now)),
+            next_end_at=Min("end_at", filter=Q(end_at__gte=now)),
+        )
+
+        for boundary in boundaries.values():
+            if boundary:
+                seconds = int((boundary - now).total_seconds()) + 1
+                timeout = min(timeout, seconds)
+
+        return timeout
 
     @staticmethod
     def get_banner_by_token(token):
         # create cache key
         cache_key = f"banner-token-{token}"
 
-        # try to get from cache first
-        cached_banner = cache.get(cache_key)
-        if cached_banner is not None:
-            return cached_banner
+        # cache until the banner changes or its schedule ends
+        return CacheHelper.get_or_compute(
+            cache_key,
+            lambda: BannerHelper.query_banner_by_token(token),
+            timeout=BannerHelper.get_banner_timeout,
+            tags=lambda banner: [CacheHelper.model_tag(Banner, banner.pk)],
+            local=True,
+        )
 
+    @staticmethod
+    def query_banner_by_token(token):
         # get current datetime for date filtering
         now = timezone.now()
 
@@ -85,18 +150,25 @@ class BannerHelper:
         date_filter = Q(start_at__isnull=True) | Q(start_at__lte=now)
         date_filter &= Q(end_at__isnull=True) | Q(end_at__gte=now)
 
-        banner = (
+        return (
             Banner.objects.filter(token=token, active=True)
             .filter(date_filter)
             .select_related("language", "site")
             .first()
         )
 
-        if banner:
-            # cache for 1 hour
-            cache.set(cache_key, banner, timeout=3600)
+    @staticmethod
+    def get_banner_timeout(banner):
+        """
+        Returns the cache timeout for a single banner, capped at its end date.
+        """
+        timeout = settings.CACHE_TAGGED_TIMEOUT
+
+        if banner.end_at:
+            seconds = int((banner.end_at - timezone.now()).total_seconds()) + 1
+            timeout = min(timeout, seconds)
 
-        return banner
+        return timeout
 
     @staticmethod
     def track_banner_access(request, banner, access_type):
@@ -104,61 +176,581 @@ class BannerHelper:
         Track banner access with IP-based interval checking and customer tracking.
         Returns True if access was tracked, False if skipped due to interval check.
 
+        With BANNER_ACCESS_BUFFER_ENABLED the access is queued and stored later in a
+        batch, so True means it was accepted and not a duplicate of a queued access.
+
         :param request: The HTTP request object
         :param banner: The Banner object being accessed
         :param access_type: BannerAccessType (VIEW or CLICK)
         :return: bool indicating if access was tracked
         """
+        access = BannerHelper.build_banner_access(request, banner, access_type)
+
+        if not access or not banner_access_dedupe.claim(access):
+            return False
+
+        if settings.BANNER_ACCESS_BUFFER_ENABLED:
+            return banner_access_buffer.add(access)
+
+        return BannerHelper.store_banner_access(access)
+
+    @staticmethod
+    def build_banner_access(request, banner, access_type):
+        """
+        Returns an unsaved access for the request or None when the client ip is unknown.
+        """
         # get client ip
         client_ip, _ = get_client_ip(request)
-        if not client_ip:
-            return False
+
+        access = BannerHelper.build_client_access(
+            banner,
+            access_type,
+            client_ip,
+            country_code=request.META.get("HTTP_CF_IPCOUNTRY"),
+        )
+
+        # get customer if logged in
+        if access and request.user.is_authenticated and request.user.has_customer():
+            access.customer = request.user.customer
+
+        return access
+
+    @staticmethod
+    def build_client_access(
+        banner, access_type, ip_address, customer=None, country_code=None
+    ):
+        """
+        Returns an unsaved access of a client or None when its ip is missing or invalid.
+        The country code comes from the cloudflare header and is dropped when invalid.
+        """
+        if not ip_address:
+            return None
 
         # validate ip address format
         try:
-            ipaddress.ip_address(client_ip)
+            ipaddress.ip_address(ip_address)
         except ValueError:
             # invalid ip address, skip tracking
-            return False
+            return None
 
-        # get customer if logged in
-        customer = None
-        if request.user.is_authenticated and request.user.has_customer():
-            customer = request.user.customer
+        country_code = (country_code or "").upper()
 
-        # calculate interval window
+        if len(country_code) != 2:
+            country_code = None
+
+        return BannerAccess(
+            banner=banner,
+            ip_address=ip_address,
+            customer=customer,
+            access_type=access_type,
+            country_code=country_code,
+            created_at=timezone.now(),
+        )
+
+    @staticmethod
+    def get_banners_by_tokens(tokens):
+        """
+        Returns the active and scheduled banners of the tokens keyed by token,
+        from the schedule index or with one query. Invalid tokens are ignored.
+        """
+        tokens = BannerHelper.parse_tokens(tokens)
+
+        if banner_schedule_index.is_enabled():
+            return banner_schedule_index.get_banners_by_tokens(tokens)
+
+        banners = BannerHelper.query_banners_by_tokens(tokens)
+        return {banner.token: banner for banner in banners}
+
+    @staticmethod
+    async def aget_banners_by_tokens(tokens):
+        """
+        Async version of get_banners_by_tokens.
+
+        A fresh schedule index answers on the event loop without a query, it is
+        synced or loaded from a thread, and the async orm is only used without it.
+        """
+        tokens = BannerHelper.parse_tokens(tokens)
+
+        if banner_schedule_index.is_enabled():
+            banners = banner_schedule_index.peek_banners_by_tokens(tokens)
+
+            if banners is None:
+                banners = await sync_to_async(
+                    banner_schedule_index.get_banners_by_tokens
+                )(tokens)
+
+            return banners
+
+        banners = BannerHelper.query_banners_by_tokens(tokens)
+        return {banner.token: banner async for banner in banners}
+
+    @staticmethod
+    def query_banners_by_tokens(tokens):
+        if not tokens:
+            return Banner.objects.none()
+
+        # get current datetime for date filtering
         now = timezone.now()
-        interval_start = now - timezone.timedelta(
-            seconds=settings.BANNER_ACCESS_INTERVAL
+
+        date_filter = Q(start_at__isnull=True) | Q(start_at__lte=now)
+        date_filter &= Q(end_at__isnull=True) | Q(end_at__gte=now)
+
+        return Banner.objects.filter(token__in=tokens, active=True).filter(date_filter)
+
+    @staticmethod
+    def parse_tokens(tokens):
+        return {token for token in map(BannerHelper.parse_token, tokens) if token}
+
+    @staticmethod
+    def parse_token(token):
+        try:
+            return uuid.UUID(str(token))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def track_banner_tokens(items, build_access):
+        """
+        Tracks a batch of (token, access type) items of one client.
+
+        Banners are resolved with one query and the accesses are recorded together,
+        with one transaction or one buffered enqueue. build_access(banner, access_type)
+        returns the unsaved access of the client.
+        Returns one result per item with the token, type, success and error.
+        """
+        banners = BannerHelper.get_banners_by_tokens(token for token, _ in items)
+        results, accesses = BannerHelper.build_token_accesses(
+            items, banners, build_access
         )
 
-        # get country code from cloudflare header
-        country_code = request.META.get("HTTP_CF_IPCOUNTRY", "").upper()
+        for result, tracked in zip(
+            results, BannerHelper.record_banner_accesses(accesses)
+        ):
+            result["success"] = tracked
 
-        if not country_code or len(country_code) != 2:
-            country_code = None
+        return results
+
+    @staticmethod
+    async def atrack_banner_tokens(items, build_access):
+        """
+        Async version of track_banner_tokens.
+        """
+        banners = await BannerHelper.aget_banners_by_tokens(token for token, _ in items)
+        results, accesses = BannerHelper.build_token_accesses(
+            items, banners, build_access
+        )
+
+        for result, tracked in zip(
+            results, await BannerHelper.arecord_banner_accesses(accesses)
+        ):
+            result["success"] = tracked
+
+        return results
+
+    @staticmethod
+    def build_token_accesses(items, banners, build_access):
+        results = []
+        accesses = []
+
+        for token, access_type in items:
+            result = {"token": token, "type": access_type, "success": False}
+            banner = banners.get(BannerHelper.parse_token(token))
+            access = None
+
+            if access_type not in BannerAccessType.values:
+                result["error"] = "Invalid access type"
+            elif not banner:
+                result["error"] = "Banner not found"
+            else:
+                access = build_access(banner, BannerAccessType(access_type))
+
+            results.append(result)
+            accesses.append(access)
+
+        return results, accesses
+
+    @staticmethod
+    async def atrack_banner_access(banner, access_type, ip_address, country_code=None):
+        """
+        Async version of track_banner_access for a client outside django views.
+
+        With BANNER_ACCESS_BUFFER_ENABLED and the bloom dedupe store the access
+        never waits on the database nor takes a thread, and with the database
+        dedupe store (the prod settings) the check is done by the buffer flush.
+        The cache dedupe takes a thread unless its backend has a native async add,
+        and without the buffer the access is stored from a thread.
+        """
+        access = BannerHelper.build_client_access(
+            banner, access_type, ip_address, country_code=country_code
+        )
+
+        tracked = await BannerHelper.arecord_banner_accesses([access])
+
+        return tracked[0]
+
+    @staticmethod
+    def record_banner_accesses(accesses):
+        """
+        Records a batch of unsaved accesses, None items are skipped.
+        Returns whether each access was tracked.
+        """
+        claimed = [
+            access is not None and banner_access_dedupe.claim(access)
+            for access in accesses
+        ]
+
+        return BannerHelper.store_claimed_accesses(accesses, claimed)
+
+    @staticmethod
+    async def arecord_banner_accesses(accesses):
+        """
+        Async version of record_banner_accesses.
+        """
+        claimed = [
+            access is not None and await banner_access_dedupe.aclaim(access)
+            for access in accesses
+        ]
+
+        # the buffer is in memory, only the direct store needs a thread, and the
+        # database dedupe is done by the direct store
+        if settings.BANNER_ACCESS_BUFFER_ENABLED:
+            return BannerHelper.store_claimed_accesses(accesses, claimed)
+
+        return await sync_to_async(BannerHelper.store_claimed_accesses)(
+            accesses, claimed
+        )
+
+    @staticmethod
+    def store_claimed_accesses(accesses, claimed):
+        if settings.BANNER_ACCESS_BUFFER_ENABLED:
+            return [
+                is_claimed and banner_access_buffer.add(access)
+                for access, is_claimed in zip(accesses, claimed)
+            ]
+
+        stored = BannerHelper.store_banner_accesses(
+            [access for access, is_claimed in zip(accesses, claimed) if is_claimed]
+        )
+
+        stored_ids = {id(access) for access in stored}
+
+        return [id(access) in stored_ids for access in accesses]
+
+    @staticmethod
+    def get_access_key(access):
+        return (access.banner_id, access.ip_address, access.access_type)
+
+    @staticmethod
+    def store_banner_access(access):
+        """
+        Stores a single access unless the same ip accessed the banner within the interval.
+        """
+        # the dedupe store already checked the interval
+        if banner_access_dedupe.is_enabled():
+            access.save()
+            return True
+
+        # calculate interval window
+        interval_start = access.created_at - timezone.timedelta(
+            seconds=settings.BANNER_ACCESS_INTERVAL
+        )
 
         # lock the banner row so concurrent tracking cannot bypass the interval check
         with transaction.atomic():
-            Banner.objects.select_for_update().get(pk=banner.pk)
+            Banner.objects.select_for_update().get(pk=access.banner_id)
 
             has_recent_access = BannerAccess.objects.filter(
-                banner=banner,
-                ip_address=client_ip,
-                access_type=access_type,
+                banner_id=access.banner_id,
+                ip_address=access.ip_address,
+                access_type=access.access_type,
                 created_at__gte=interval_start,
             ).exists()
 
             if has_recent_access:
                 return False
 
-            BannerAccess.objects.create(
-                banner=banner,
-                ip_address=client_ip,
-                customer=customer,
+            access.save()
+
+        return True
+
+    @staticmethod
+    def store_banner_accesses(accesses):
+        """
+        Stores a batch of accesses in one transaction with one lookup and bulk inserts.
+        Accesses repeated within the interval, in the batch or in the table, are skipped.
+        Returns the stored accesses.
+        """
+        if not accesses:
+            return []
+
+        interval = timezone.timedelta(seconds=settings.BANNER_ACCESS_INTERVAL)
+        accesses = sorted(accesses, key=lambda access: access.created_at)
+        banner_ids = {access.banner_id for access in accesses}
+
+        recent = {}
+        stored = []
+
+        with transaction.atomic():
+            # one query for the latest recent access of every key in the batch, unless
+            # the dedupe store already checked the interval
+            if not banner_access_dedupe.is_enabled():
+                # lock the banner rows so concurrent tracking cannot bypass the check
+                list(
+                    Banner.objects.select_for_update()
+                    .filter(pk__in=banner_ids)
+                    .order_by("pk")
+                    .values_list("pk", flat=True)
+                )
+
+                rows = (
+                    BannerAccess.objects.filter(
+                        banner_id__in=banner_ids,
+                        ip_address__in={access.ip_address for access in accesses},
+                        created_at__gte=accesses[0].created_at - interval,
+                    )
+                    .values_list("banner_id", "ip_address", "access_type")
+                    .annotate(last_created_at=Max("created_at"))
+                    .order_by()
+                )
+
+                for banner_id, ip_address, access_type, last_created_at in rows:
+                    recent[(banner_id, ip_address, access_type)] = last_created_at
+
+            for access in accesses:
+                key = BannerHelper.get_access_key(access)
+                last_created_at = recent.get(key)
+
+                if last_created_at and last_created_at >= access.created_at - interval:
+                    continue
+
+                recent[key] = access.created_at
+                stored.append(access)
+
+            BannerAccess.objects.bulk_create(
+                stored, batch_size=settings.BANNER_ACCESS_BATCH_SIZE
+            )
+
+        return stored
+
+    @staticmethod
+    def rollup_banner_accesses(batch_size=None):
+        """
+        Adds the accesses stored after the watermark to the daily rollups, in batches of
+        BANNER_ACCESS_ROLLUP_BATCH_SIZE, and moves the watermark past them.
+        Accesses younger than the rollup delay wait for the next run, so rows
+        committed late or out of id order are not skipped.
+        Returns the number of rolled up accesses.
+        """
+        batch_size = batch_size or settings.BANNER_ACCESS_ROLLUP_BATCH_SIZE
+        created_before = timezone.now() - timezone.timedelta(
+            seconds=BannerHelper.get_rollup_delay()
+        )
+
+        rolled_up = 0
+
+        while True:
+            with transaction.atomic():
+                # the locked watermark keeps concurrent runs from counting twice
+                watermark, _ = (
+                    BannerAccessWatermark.objects.select_for_update().get_or_create(
+                        pk=1
+                    )
+                )
+
+                accesses = BannerAccess.objects.filter(id__gt=watermark.last_access_id)
+
+                first_young_id = accesses.filter(
+                    created_at__gte=created_before
+                ).aggregate(id=Min("id"))["id"]
+
+                if first_young_id:
+                    accesses = accesses.filter(id__lt=first_young_id)
+
+                last_ids = accesses.order_by("id").values_list("id", flat=True)[
+                    batch_size - 1 : batch_size
+                ]
+
+                last_id = (
+                    last_ids[0] if last_ids else accesses.aggregate(id=Max("id"))["id"]
+                )
+
+                if last_id is None:
+                    return rolled_up
+
+                rows = BannerHelper.get_daily_access_rows(
+                    accesses.filter(id__lte=last_id), "country_code"
+                )
+
+                rolled_up += BannerHelper.add_access_rollups(rows)
+
+                watermark.last_access_id = last_id
+                watermark.save()
+
+    @staticmethod
+    def get_rollup_delay():
+        """
+        Returns the seconds before an access can be rolled up. With the buffer,
+        created_at is the queue time, so its batch can be committed as late as
+        the buffer keeps it, on top of BANNER_ACCESS_ROLLUP_DELAY.
+        """
+        delay = settings.BANNER_ACCESS_ROLLUP_DELAY
+
+        if settings.BANNER_ACCESS_BUFFER_ENABLED:
+            delay += banner_access_buffer.get_max_queue_time()
+
+        return delay
+
+    @staticmethod
+    def get_daily_access_rows(accesses, *fields):
+        """
+        Groups the accesses by banner, local day, access type and the given fields.
+        """
+        return (
+            accesses.annotate(
+                day=TruncDate("created_at", tzinfo=timezone.get_current_timezone())
+            )
+            .values("banner_id", "day", "access_type", *fields)
+            .annotate(total=Count("id"))
+            .order_by()
+        )
+
+    @staticmethod
+    def add_access_rollups(rows):
+        """
+        Adds the grouped access totals to the rollups and returns the added total.
+        """
+        totals = {}
+        added = 0
+
+        for row in rows:
+            added += row["total"]
+            key = (
+                row["banner_id"],
+                row["day"],
+                row["access_type"],
+                row["country_code"] or "",
+            )
+            totals[key] = totals.get(key, 0) + row["total"]
+
+        if not totals:
+            return 0
+
+        existing = BannerAccessRollup.objects.filter(
+            banner_id__in={key[0] for key in totals},
+            day__in={key[1] for key in totals},
+        )
+
+        updated = []
+
+        for rollup in existing:
+            key = (
+                rollup.banner_id,
+                rollup.day,
+                rollup.access_type,
+                rollup.country_code,
+            )
+
+            if key in totals:
+                rollup.total += totals.pop(key)
+                updated.append(rollup)
+
+        created = [
+            BannerAccessRollup(
+                banner_id=banner_id,
+                day=day,
                 access_type=access_type,
                 country_code=country_code,
-                created_at=now,
+                total=total,
             )
+            for (banner_id, day, access_type, country_code), total in totals.items()
+        ]
 
-        return True
+        BannerAccessRollup.objects.bulk_update(
+            updated, ["total"], batch_size=settings.BANNER_ACCESS_BATCH_SIZE
+        )
+        BannerAccessRollup.objects.bulk_create(
+            created, batch_size=settings.BANNER_ACCESS_BATCH_SIZE
+        )
+
+        return added
+
+    @staticmethod
+    def get_daily_accesses(day_gte, day_lte, banners=None, archived=False):
+        """
+        Returns the access totals by banner, day and access type between the days.
+
+        Rollups hold the accesses up to the watermark and only the newer accesses are
+        counted from the access table, so totals are current without scanning it.
+        With archived, totals are recounted from the access table and the archive.
+        """
+        if archived:
+            sources = BannerHelper.get_archived_daily_accesses(
+                day_gte, day_lte, banners
+            )
+        else:
+            sources = BannerHelper.get_rolled_up_daily_accesses(
+                day_gte, day_lte, banners
+            )
+
+        totals = {}
+
+        for rows in sources:
+            for row in rows:
+                key = (row["banner_id"], row["day"], row["access_type"])
+                totals[key] = totals.get(key, 0) + row["total"]
+
+        return [
+            {
+                "banner_id": banner_id,
+                "day": day,
+                "access_type": access_type,
+                "total": total,
+            }
+            for (banner_id, day, access_type), total in sorted(totals.items())
+        ]
+
+    @staticmethod
+    def get_rolled_up_daily_accesses(day_gte, day_lte, banners=None):
+        watermark = (
+            BannerAccessWatermark.objects.filter(pk=1)
+            .values_list("last_access_id", flat=True)
+            .first()
+        )
+
+        rollups = BannerAccessRollup.objects.filter(day__gte=day_gte, day__lte=day_lte)
+
+        accesses = BannerAccess.objects.filter(
+            id__gt=watermark or 0,
+            created_at__date__gte=day_gte,
+            created_at__date__lte=day_lte,
+        )
+
+        if banners is not None:
+            rollups = rollups.filter(banner__in=banners)
+            accesses = accesses.filter(banner__in=banners)
+
+        rollup_rows = (
+            rollups.values("banner_id", "day", "access_type")
+            .annotate(total=Sum("total"))
+            .order_by()
+        )
+
+        return rollup_rows, BannerHelper.get_daily_access_rows(accesses)
+
+    @staticmethod
+    def get_archived_daily_accesses(day_gte, day_lte, banners=None):
+        accesses = BannerAccess.objects.filter(
+            created_at__date__gte=day_gte,
+            created_at__date__lte=day_lte,
+        )
+
+        banner_ids = None
+
+        if banners is not None:
+            accesses = accesses.filter(banner__in=banners)
+            banner_ids = set(banners.values_list("id", flat=True))
+
+        return (
+            BannerHelper.get_daily_access_rows(accesses),
+            BannerAccessArchive.get_daily_accesses(day_gte, day_lte, banner_ids),
+        )
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.banner.archive import BannerAccessArchive
+
+
+class Command(BaseCommand):
+    help = "Move rolled up banner accesses older than the retention days to the archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.BANNER_ACCESS_RETENTION_DAYS,
+            help="Number of days the accesses are kept in the access table",
+        )
+
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.BANNER_ACCESS_ARCHIVE_BATCH_SIZE,
+            help="Number of accesses archived per transaction",
+        )
+
+    def handle(self, *args, **options):
+        days = options["days"]
+
+        # the interval check reads the recent accesses from the table
+        if days < 1 or days * 86400 < settings.BANNER_ACCESS_INTERVAL:
+            raise CommandError(
+                "The retention must be at least one day and cover BANNER_ACCESS_INTERVAL"
+            )
+
+        archived = BannerAccessArchive.archive(days, options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} banner accesses"))
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.banner.helpers import BannerHelper
+
+
+class Command(BaseCommand):
+    help = "Add the new banner accesses to the daily rollups read by the reports"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.BANNER_ACCESS_ROLLUP_BATCH_SIZE,
+            help="Number of accesses rolled up per transaction",
+        )
+
+    def handle(self, *args, **options):
+        rolled_up = BannerHelper.rollup_banner_accesses(options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {rolled_up} banner accesses"))
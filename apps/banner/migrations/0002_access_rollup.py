@@ -0,0 +1,109 @@
+# Generated by Django 6.0.7 on 2026-10-18 00:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("banner", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BannerAccessWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                        verbose_name="model.field.id",
+                    ),
+                ),
+                (
+                    "last_access_id",
+                    models.BigIntegerField(
+                        default=0, verbose_name="model.field.last-access-id"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="model.field.updated-at"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "model.banner-access-watermark.name",
+                "verbose_name_plural": "model.banner-access-watermark.name.plural",
+                "db_table": "banner_access_watermark",
+            },
+        ),
+        migrations.CreateModel(
+            name="BannerAccessRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                        verbose_name="model.field.id",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="model.field.day")),
+                (
+                    "access_type",
+                    models.CharField(
+                        choices=[
+                            ("view", "enum.banner-access-type.view"),
+                            ("click", "enum.banner-access-type.click"),
+                        ],
+                        max_length=25,
+                        verbose_name="model.field.access-type",
+                    ),
+                ),
+                (
+                    "country_code",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        max_length=2,
+                        verbose_name="model.field.country-code",
+                    ),
+                ),
+                (
+                    "total",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="model.field.amount"
+                    ),
+                ),
+                (
+                    "banner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="access_rollups",
+                        to="banner.banner",
+                        verbose_name="model.field.banner",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "model.banner-access-rollup.name",
+                "verbose_name_plural": "model.banner-access-rollup.name.plural",
+                "db_table": "banner_access_rollup",
+                "indexes": [
+                    models.Index(fields=["day"], name="banner_access_rollup_day")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("banner", "day", "access_type", "country_code"),
+                        name="banner_access_rollup_unique",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -207,3 +207,86 @@ class BannerAccess(models.Model):
 
     def __str__(self):
         return f"{self.banner.title} - {self.access_type} - {self.get_ip_address()} - {self.created_at}"
+
+
+class BannerAccessRollup(models.Model):
+    class Meta:
+        db_table = "banner_access_rollup"
+        verbose_name = _("model.banner-access-rollup.name")
+        verbose_name_plural = _("model.banner-access-rollup.name.plural")
+
+        indexes = [
+            models.Index(fields=["day"], name="{0}_day".format(db_table)),
+        ]
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["banner", "day", "access_type", "country_code"],
+                name="{0}_unique".format(db_table),
+            ),
+        ]
+
+    id = models.BigAutoField(
+        _("model.field.id"),
+        unique=True,
+        primary_key=True,
+    )
+
+    banner = models.ForeignKey(
+        Banner,
+        on_delete=models.CASCADE,
+        related_name="access_rollups",
+        verbose_name=_("model.field.banner"),
+    )
+
+    day = models.DateField(
+        _("model.field.day"),
+    )
+
+    access_type = models.CharField(
+        _("model.field.access-type"),
+        max_length=25,
+        choices=BannerAccessType.choices,
+    )
+
+    # empty when the country is unknown, so the unique constraint covers it
+    country_code = models.CharField(
+        _("model.field.country-code"),
+        max_length=2,
+        blank=True,
+        default="",
+    )
+
+    total = models.PositiveBigIntegerField(
+        _("model.field.amount"),
+        default=0,
+    )
+
+    def __str__(self):
+        return f"{self.banner.title} - {self.day} - {self.access_type} - {self.total}"
+
+
+class BannerAccessWatermark(models.Model):
+    class Meta:
+        db_table = "banner_access_watermark"
+        verbose_name = _("model.banner-access-watermark.name")
+        verbose_name_plural = _("model.banner-access-watermark.name.plural")
+
+    id = models.BigAutoField(
+        _("model.field.id"),
+        unique=True,
+        primary_key=True,
+    )
+
+    last_access_id = models.BigIntegerField(
+        _("model.field.last-access-id"),
+        default=0,
+    )
+
+    updated_at = models.DateTimeField(
+        _("model.field.updated-at"),
+        auto_now=True,
+    )
+
+    def __str__(self):
+        return str(self.last_access_id)
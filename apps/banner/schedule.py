@@ -0,0 +1,256 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from apps.banner.models import Banner
+from apps.language.models import Language
+from pyaa.helpers.cache import CacheHelper
+
+
+class BannerScheduleIndex:
+    """
+    Per-process index of the active banners, keyed zone -> site -> language.
+
+    Every active banner that did not end yet is loaded once, and the index of the
+    banners shown right now is rebuilt in memory at the next moment a banner starts
+    or ends, so lookups never query the database and schedules are exact.
+    The banners are reloaded on banner and language writes (other workers notice
+    the tag versions bumped by CacheHelper.watch_model) and once per tagged timeout.
+    Banners are shared between threads, so they must be treated as read-only.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tags = [CacheHelper.model_tag(Banner), CacheHelper.model_tag(Language)]
+        self.clear()
+
+    def is_enabled(self):
+        # follows the local cache tier, a dummy shared cache disables it
+        return CacheHelper.is_local_enabled()
+
+    def get_banners(self, zone, site_id, language, now=None):
+        now = now or timezone.now()
+
+        with self.lock:
+            self.refresh(now)
+
+            key = (zone, site_id, language)
+            banners = self.results.get(key)
+
+            if banners is None:
+                banners = self.results[key] = self.find(zone, site_id, language)
+
+        return list(banners)
+
+    def get_timeout(self, now=None):
+        """
+        Returns the seconds until the next banner starts or ends, capped at
+        CACHE_TAGGED_TIMEOUT, for caches of pages showing banners.
+        """
+        now = now or timezone.now()
+
+        with self.lock:
+            self.refresh(now)
+            boundary = self.boundary
+
+        timeout = settings.CACHE_TAGGED_TIMEOUT
+
+        if boundary:
+            timeout = min(timeout, int((boundary - now).total_seconds()) + 1)
+
+        return timeout
+
+    def get_banners_by_tokens(self, tokens, now=None):
+        """
+        Returns the banners shown at now among the parsed tokens, keyed by token.
+        """
+        now = now or timezone.now()
+
+        with self.lock:
+            self.refresh(now)
+            return self.find_tokens(tokens)
+
+    def peek_banners_by_tokens(self, tokens, now=None):
+        """
+        Same as get_banners_by_tokens without blocking, for the event loop.
+        Returns None when the index must be synced or loaded or another thread
+        holds it, so the caller refreshes it from a thread.
+        """
+        now = now or timezone.now()
+
+        if not self.lock.acquire(blocking=False):
+            return None
+
+        try:
+            if not self.is_fresh():
+                return None
+
+            if self.boundary is not None and now >= self.boundary:
+                self.build(now)
+
+            return self.find_tokens(tokens)
+        finally:
+            self.lock.release()
+
+    def is_fresh(self):
+        if self.banners is None:
+            return False
+
+        monotonic = time.monotonic()
+
+        return (
+            monotonic - self.synced_at < settings.CACHE_LOCAL_SYNC_INTERVAL
+            and monotonic - self.loaded_at < settings.CACHE_TAGGED_TIMEOUT
+        )
+
+    def refresh(self, now):
+        monotonic = time.monotonic()
+
+        if (
+            self.banners is not None
+            and monotonic - self.synced_at >= settings.CACHE_LOCAL_SYNC_INTERVAL
+        ):
+            self.synced_at = monotonic
+
+            if CacheHelper.get_tag_versions(self.tags) != self.versions:
+                self.banners = None
+
+        if (
+            self.banners is None
+            or monotonic - self.loaded_at >= settings.CACHE_TAGGED_TIMEOUT
+        ):
+            self.load(now)
+            self.build(now)
+        elif self.boundary is not None and now >= self.boundary:
+            self.build(now)
+
+    def load(self, now):
+        # versions are read first, so a write during the query reloads again
+        self.versions = CacheHelper.get_tag_versions(self.tags)
+        self.loaded_at = self.synced_at = time.monotonic()
+
+        self.banners = list(
+            Banner.objects.filter(active=True)
+            .filter(Q(end_at__isnull=True) | Q(end_at__gte=now))
+            .order_by("sort_order", "pk")
+            .select_related("language", "site")
+        )
+
+    def build(self, now):
+        """
+        Indexes the banners shown at now and finds the next start or end boundary.
+        """
+        zones = {}
+        tokens = {}
+        boundary = None
+        banners = []
+
+        for banner in self.banners:
+            if banner.end_at and banner.end_at < now:
+                continue
+
+            banners.append(banner)
+
+            if banner.start_at and banner.start_at > now:
+                boundary = min(boundary or banner.start_at, banner.start_at)
+                continue
+
+            if banner.end_at:
+                # banners are shown until end_at included
+                end = banner.end_at + timedelta(microseconds=1)
+                boundary = min(boundary or end, end)
+
+            tokens[banner.token] = banner
+            languages = zones.setdefault(banner.zone, {}).setdefault(banner.site_id, {})
+
+            for code in self.get_language_codes(banner.language):
+                languages.setdefault(code, []).append(banner)
+
+        self.banners = banners
+        self.zones = zones
+        self.tokens = tokens
+        self.boundary = boundary
+        self.results = {}
+
+    def find_tokens(self, tokens):
+        return {token: self.tokens[token] for token in tokens if token in self.tokens}
+
+    def find(self, zone, site_id, language):
+        sites = self.zones.get(zone, {})
+        banners = {}
+
+        # banners of the site or of every site, in the language or in every language
+        for site in (site_id, None):
+            languages = sites.get(site, {})
+
+            for code in (language, None):
+                for banner in languages.get(code, []):
+                    banners[banner.pk] = banner
+
+        return sorted(
+            banners.values(), key=lambda banner: (banner.sort_order, banner.pk)
+        )
+
+    def get_language_codes(self, language):
+        if language is None:
+            return [None]
+
+        return {
+            code
+            for code in (language.code_iso_language, language.code_iso_639_1)
+            if code
+        }
+
+    def clear(self):
+        with self.lock:
+            self.banners = None
+            self.zones = {}
+            self.tokens = {}
+            self.results = {}
+            self.boundary = None
+            self.versions = None
+            self.loaded_at = None
+            self.synced_at = None
+
+    def watch(self, model):
+        """
+        Clears the index on every save and delete of model, again after commit,
+        so readers cannot load uncommitted state into it.
+        """
+        label = model._meta.label_lower
+
+        def invalidate(sender, **kwargs):
+            self.clear()
+            transaction.on_commit(self.clear)
+
+        post_save.connect(
+            invalidate,
+            sender=model,
+            weak=False,
+            dispatch_uid=f"banner-schedule-save-{label}",
+        )
+
+        post_delete.connect(
+            invalidate,
+            sender=model,
+            weak=False,
+            dispatch_uid=f"banner-schedule-delete-{label}",
+        )
+
+
+banner_schedule_index = BannerScheduleIndex()
+
+
+def clear_banner_schedule_on_setting_changed(setting, **kwargs):
+    if setting.startswith("CACHE"):
+        banner_schedule_index.clear()
+
+
+setting_changed.connect(clear_banner_schedule_on_setting_changed)
@@ -0,0 +1,201 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.banner.archive import BANNER_ACCESS_ARCHIVE_FIELDS, BannerAccessArchive
+from apps.banner.enums import BannerAccessType, BannerZone
+from apps.banner.helpers import BannerHelper
+from apps.banner.models import Banner, BannerAccess
+
+
+class BannerAccessArchiveTest(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, ignore_errors=True)
+
+        storages = {
+            **settings.STORAGES,
+            "archive": {
+                "BACKEND": "django.core.files.storage.FileSystemStorage",
+                "OPTIONS": {"location": self.location},
+            },
+        }
+
+        overrides = override_settings(
+            STORAGES=storages,
+            BANNER_ACCESS_INTERVAL=3600,
+            BANNER_ACCESS_RETENTION_DAYS=30,
+            BANNER_ACCESS_ROLLUP_DELAY=0,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        Site.objects.clear_cache()
+
+        self.banner = Banner.objects.create(
+            site=Site.objects.get_current(),
+            title="Archived Banner",
+            image="banner.jpg",
+            zone=BannerZone.HOME,
+        )
+
+    def create_access(self, days_ago, access_type=BannerAccessType.VIEW, **kwargs):
+        access = BannerAccess.objects.create(
+            banner=self.banner,
+            access_type=access_type,
+            ip_address="10.0.0.1",
+            **kwargs,
+        )
+
+        created_at = timezone.now() - timedelta(days=days_ago)
+        BannerAccess.objects.filter(pk=access.pk).update(created_at=created_at)
+
+        return access
+
+    def test_archive_moves_old_rolled_up_accesses(self):
+        old = self.create_access(60, country_code="BR")
+        recent = self.create_access(1)
+        BannerHelper.rollup_banner_accesses()
+
+        # not rolled up yet, it stays in the table
+        pending = self.create_access(60)
+
+        self.assertEqual(BannerAccessArchive.archive(), 1)
+        self.assertEqual(
+            set(BannerAccess.objects.values_list("id", flat=True)),
+            {recent.id, pending.id},
+        )
+
+        month = timezone.localtime(timezone.now() - timedelta(days=60))
+        self.assertEqual(BannerAccessArchive.list_months(), [month.strftime("%Y-%m")])
+
+        rows = list(BannerAccessArchive.read_month(month.strftime("%Y-%m")))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], old.id)
+        self.assertEqual(rows[0]["banner_id"], self.banner.id)
+        self.assertEqual(rows[0]["country_code"], "BR")
+        self.assertIsNone(rows[0]["customer_id"])
+        self.assertTrue(timezone.is_aware(rows[0]["created_at"]))
+
+    def test_archive_runs_in_batches(self):
+        for _ in range(5):
+            self.create_access(40)
+
+        BannerHelper.rollup_banner_accesses()
+
+        self.assertEqual(BannerAccessArchive.archive(batch_size=2), 5)
+        self.assertEqual(BannerAccess.objects.count(), 0)
+
+        month = BannerAccessArchive.list_months()[0]
+        self.assertEqual(len(list(BannerAccessArchive.read_month(month))), 5)
+
+    def test_archive_without_watermark_keeps_accesses(self):
+        self.create_access(60)
+
+        self.assertEqual(BannerAccessArchive.archive(), 0)
+        self.assertEqual(BannerAccessArchive.list_months(), [])
+
+    def test_write_rows_again_replaces_file(self):
+        self.create_access(60)
+        rows = list(BannerAccess.objects.values(*BANNER_ACCESS_ARCHIVE_FIELDS))
+
+        BannerAccessArchive.write_rows(rows)
+        BannerAccessArchive.write_rows(rows)
+
+        month = BannerAccessArchive.list_months()[0]
+        self.assertEqual(len(list(BannerAccessArchive.read_month(month))), 1)
+
+    def test_retried_batch_with_other_boundaries_is_read_once(self):
+        for _ in range(3):
+            self.create_access(60)
+
+        rows = list(
+            BannerAccess.objects.order_by("id").values(*BANNER_ACCESS_ARCHIVE_FIELDS)
+        )
+
+        # the first batch was written but not deleted, the retry has one more row
+        BannerAccessArchive.write_rows(rows[:2])
+        BannerAccessArchive.write_rows(rows)
+
+        month = BannerAccessArchive.list_months()[0]
+
+        self.assertEqual(
+            [row["id"] for row in BannerAccessArchive.read_month(month)],
+            [rows[0]["id"], rows[1]["id"], rows[2]["id"]],
+        )
+
+    def test_overlapping_files(self):
+        self.assertEqual(
+            BannerAccessArchive.get_overlapping_files(
+                [
+                    "000000000001-000000000005.csv.gz",
+                    "000000000003-000000000006.csv.gz",
+                    "000000000007-000000000009.csv.gz",
+                ]
+            ),
+            {"000000000001-000000000005.csv.gz", "000000000003-000000000006.csv.gz"},
+        )
+
+    def test_daily_accesses_with_archive(self):
+        self.create_access(45, BannerAccessType.VIEW)
+        self.create_access(45, BannerAccessType.CLICK)
+        BannerHelper.rollup_banner_accesses()
+        BannerAccessArchive.archive()
+
+        self.create_access(45, BannerAccessType.VIEW)
+
+        day = timezone.localdate() - timedelta(days=45)
+        expected = [
+            {
+                "banner_id": self.banner.id,
+                "day": day,
+                "access_type": BannerAccessType.CLICK,
+                "total": 1,
+            },
+            {
+                "banner_id": self.banner.id,
+                "day": day,
+                "access_type": BannerAccessType.VIEW,
+                "total": 2,
+            },
+        ]
+
+        # rollups and the archive recount agree
+        for archived in (False, True):
+            self.assertEqual(
+                BannerHelper.get_daily_accesses(
+                    day, day, Banner.objects.all(), archived=archived
+                ),
+                expected,
+            )
+
+        self.assertEqual(
+            BannerAccessArchive.get_daily_accesses(day, day, banner_ids=set()), []
+        )
+        self.assertEqual(
+            BannerAccessArchive.get_daily_accesses(
+                day + timedelta(days=1), day + timedelta(days=1)
+            ),
+            [],
+        )
+
+    def test_command_archives_accesses(self):
+        self.create_access(60)
+        BannerHelper.rollup_banner_accesses()
+
+        out = StringIO()
+        call_command("archive_banner_accesses", "--days=30", stdout=out)
+
+        self.assertIn("Archived 1 banner accesses", out.getvalue())
+
+    def test_command_rejects_retention_shorter_than_interval(self):
+        with self.assertRaises(CommandError):
+            call_command("archive_banner_accesses", "--days=0")
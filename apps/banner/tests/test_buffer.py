@@ -0,0 +1,196 @@
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from django.contrib.sites.models import Site
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from apps.banner.buffer import BannerAccessBuffer
+from apps.banner.enums import BannerAccessType, BannerZone
+from apps.banner.helpers import BannerHelper
+from apps.banner.models import Banner, BannerAccess
+from apps.language import models as language_models
+
+
+@override_settings(
+    BANNER_ACCESS_INTERVAL=3600,
+    BANNER_ACCESS_BUFFER_SIZE=100,
+    BANNER_ACCESS_FLUSH_INTERVAL=60,
+    BANNER_ACCESS_BATCH_SIZE=2,
+)
+class BannerAccessBufferTest(TestCase):
+    fixtures = ["apps/language/fixtures/initial.json"]
+
+    def setUp(self):
+        self.site = Site.objects.get_current()
+        self.language = language_models.Language.objects.first()
+        self.factory = RequestFactory()
+
+        self.banner = Banner.objects.create(
+            site=self.site,
+            language=self.language,
+            title="Buffered Banner",
+            image="banner.jpg",
+            zone=BannerZone.HOME,
+            sort_order=1,
+            active=True,
+        )
+
+        self.buffer = BannerAccessBuffer()
+
+        # the flusher thread is not started, flushes are explicit
+        patcher = patch.object(BannerAccessBuffer, "start")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def build_access(
+        self, ip_address, access_type=BannerAccessType.VIEW, created_at=None
+    ):
+        return BannerAccess(
+            banner=self.banner,
+            ip_address=ip_address,
+            access_type=access_type,
+            created_at=created_at or timezone.now(),
+        )
+
+    def build_request(self, ip_address):
+        request = self.factory.get("/", REMOTE_ADDR=ip_address)
+        request.user = Mock()
+        request.user.is_authenticated = False
+        return request
+
+    def test_add_skips_queued_duplicates(self):
+        self.assertTrue(self.buffer.add(self.build_access("10.0.0.1")))
+        self.assertFalse(self.buffer.add(self.build_access("10.0.0.1")))
+        self.assertTrue(
+            self.buffer.add(self.build_access("10.0.0.1", BannerAccessType.CLICK))
+        )
+
+        self.assertEqual(len(self.buffer), 2)
+
+    def test_add_wakes_flusher_when_full(self):
+        with override_settings(BANNER_ACCESS_BUFFER_SIZE=2):
+            self.buffer.add(self.build_access("10.0.0.1"))
+            self.assertFalse(self.buffer.wakeup.is_set())
+
+            self.buffer.add(self.build_access("10.0.0.2"))
+            self.assertTrue(self.buffer.wakeup.is_set())
+
+    def test_flush_stores_batch(self):
+        for index in range(5):
+            self.buffer.add(self.build_access(f"10.0.0.{index}"))
+
+        with self.assertNumQueries(7):
+            # the savepoint, the banner lock, one lookup and three inserts of two rows
+            stored = self.buffer.flush()
+
+        self.assertEqual(stored, 5)
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(BannerAccess.objects.filter(banner=self.banner).count(), 5)
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_flush_skips_accesses_stored_within_interval(self):
+        BannerAccess.objects.create(
+            banner=self.banner,
+            ip_address="10.0.0.1",
+            access_type=BannerAccessType.VIEW,
+        )
+
+        self.buffer.add(self.build_access("10.0.0.1"))
+        self.buffer.add(self.build_access("10.0.0.2"))
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(
+            BannerAccess.objects.filter(
+                banner=self.banner, ip_address="10.0.0.1"
+            ).count(),
+            1,
+        )
+
+    def test_failed_flush_is_stored_on_the_next_flush(self):
+        self.buffer.add(self.build_access("10.0.0.1"))
+        self.buffer.add(self.build_access("10.0.0.2"))
+
+        store_banner_accesses = BannerHelper.store_banner_accesses
+        calls = []
+
+        def fail_once(accesses):
+            calls.append(accesses)
+
+            if len(calls) == 1:
+                raise Exception("database is locked")
+
+            return store_banner_accesses(accesses)
+
+        with patch.object(
+            BannerHelper, "store_banner_accesses", side_effect=fail_once
+        ), self.assertLogs("apps.banner.buffer", level="WARNING"):
+            self.assertEqual(self.buffer.flush(), 0)
+
+            self.assertEqual(len(self.buffer), 2)
+            self.assertEqual(self.buffer.get_flush_delay(), 120)
+
+            self.assertEqual(self.buffer.flush(), 2)
+
+        self.assertEqual(self.buffer.failures, 0)
+        self.assertEqual(BannerAccess.objects.filter(banner=self.banner).count(), 2)
+
+    @override_settings(BANNER_ACCESS_FLUSH_RETRIES=1)
+    def test_flush_drops_batch_after_retries(self):
+        self.buffer.add(self.build_access("10.0.0.1"))
+
+        with patch.object(
+            BannerHelper, "store_banner_accesses", side_effect=Exception("boom")
+        ):
+            self.assertEqual(self.buffer.flush(), 0)
+            self.assertEqual(len(self.buffer), 1)
+
+            with self.assertLogs("apps.banner.buffer", level="ERROR"):
+                self.assertEqual(self.buffer.flush(), 0)
+
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(self.buffer.failures, 0)
+
+    def test_add_does_not_wake_flusher_while_retrying(self):
+        self.buffer.failures = 1
+
+        with override_settings(BANNER_ACCESS_BUFFER_SIZE=1):
+            self.buffer.add(self.build_access("10.0.0.1"))
+
+        self.assertFalse(self.buffer.wakeup.is_set())
+
+    def test_store_banner_accesses_dedupes_within_batch(self):
+        now = timezone.now()
+
+        accesses = [
+            self.build_access("10.0.0.1", created_at=now - timedelta(hours=3)),
+            self.build_access("10.0.0.1", created_at=now - timedelta(minutes=30)),
+            self.build_access("10.0.0.1", created_at=now),
+        ]
+
+        # the first and the second access are more than one interval apart
+        stored = BannerHelper.store_banner_accesses(accesses)
+
+        self.assertEqual(stored, accesses[:2])
+        self.assertEqual(BannerHelper.store_banner_accesses([]), [])
+
+    def test_track_banner_access_uses_buffer(self):
+        with override_settings(BANNER_ACCESS_BUFFER_ENABLED=True), patch(
+            "apps.banner.helpers.banner_access_buffer", self.buffer
+        ):
+            request = self.build_request("10.0.0.1")
+
+            self.assertTrue(
+                BannerHelper.track_banner_access(
+                    request, self.banner, BannerAccessType.VIEW
+                )
+            )
+            self.assertFalse(
+                BannerHelper.track_banner_access(
+                    request, self.banner, BannerAccessType.VIEW
+                )
+            )
+
+        self.assertEqual(BannerAccess.objects.count(), 0)
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(BannerAccess.objects.count(), 1)
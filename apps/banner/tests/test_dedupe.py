@@ -0,0 +1,208 @@
+import asyncio
+from unittest.mock import Mock, patch
+
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from apps.banner.buffer import BannerAccessBuffer
+from apps.banner.dedupe import (
+    BannerAccessDedupe,
+    BloomFilter,
+    RotatingBloomFilter,
+    banner_access_dedupe,
+)
+from apps.banner.enums import BannerAccessType, BannerZone
+from apps.banner.helpers import BannerHelper
+from apps.banner.models import Banner, BannerAccess
+from apps.language import models as language_models
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "banner-dedupe-tests",
+    }
+}
+
+
+class BloomFilterTest(SimpleTestCase):
+    def test_added_keys_are_found(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+
+        for index in range(1000):
+            bloom.add(f"key-{index}")
+
+        self.assertTrue(all(f"key-{index}" in bloom for index in range(1000)))
+
+    def test_false_positive_rate_is_bounded(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+
+        for index in range(1000):
+            bloom.add(f"key-{index}")
+
+        false_positives = sum(f"other-{index}" in bloom for index in range(10000))
+
+        # expected around 100, allow for hash variance
+        self.assertLess(false_positives, 300)
+
+    def test_rotating_filter_forgets_after_two_intervals(self):
+        with patch("apps.banner.dedupe.time.monotonic", return_value=0):
+            bloom = RotatingBloomFilter(capacity=100, error_rate=0.01, interval=60)
+            self.assertTrue(bloom.add("key"))
+            self.assertFalse(bloom.add("key"))
+
+        # still remembered in the previous generation
+        with patch("apps.banner.dedupe.time.monotonic", return_value=90):
+            self.assertFalse(bloom.add("key"))
+
+        with patch("apps.banner.dedupe.time.monotonic", return_value=150):
+            self.assertTrue(bloom.add("key"))
+
+    def test_rotating_filter_drops_both_generations_when_idle(self):
+        with patch("apps.banner.dedupe.time.monotonic", return_value=0):
+            bloom = RotatingBloomFilter(capacity=100, error_rate=0.01, interval=60)
+            bloom.add("key")
+
+        with patch("apps.banner.dedupe.time.monotonic", return_value=130):
+            self.assertTrue(bloom.add("key"))
+
+
+@override_settings(BANNER_ACCESS_INTERVAL=3600, CACHES=LOCMEM_CACHES)
+class BannerAccessDedupeTest(TestCase):
+    fixtures = ["apps/language/fixtures/initial.json"]
+
+    def setUp(self):
+        self.site = Site.objects.get_current()
+        self.language = language_models.Language.objects.first()
+        self.factory = RequestFactory()
+
+        self.banner = Banner.objects.create(
+            site=self.site,
+            language=self.language,
+            title="Dedupe Banner",
+            image="banner.jpg",
+            zone=BannerZone.HOME,
+            sort_order=1,
+            active=True,
+        )
+
+        banner_access_dedupe.reset()
+
+    def tearDown(self):
+        cache.clear()
+        banner_access_dedupe.reset()
+
+    def build_access(self, ip_address, access_type=BannerAccessType.VIEW):
+        return BannerAccess(
+            banner=self.banner,
+            ip_address=ip_address,
+            access_type=access_type,
+            created_at=timezone.now(),
+        )
+
+    def track(self, ip_address):
+        request = self.factory.get("/", REMOTE_ADDR=ip_address)
+        request.user = Mock()
+        request.user.is_authenticated = False
+
+        return BannerHelper.track_banner_access(
+            request, self.banner, BannerAccessType.VIEW
+        )
+
+    def test_database_backend_always_claims(self):
+        dedupe = BannerAccessDedupe()
+
+        with override_settings(BANNER_ACCESS_DEDUPE="database"):
+            self.assertFalse(dedupe.is_enabled())
+            self.assertTrue(dedupe.claim(self.build_access("10.0.0.1")))
+            self.assertTrue(dedupe.claim(self.build_access("10.0.0.1")))
+
+    def test_cache_backend_claims_once_per_interval(self):
+        dedupe = BannerAccessDedupe()
+
+        with override_settings(BANNER_ACCESS_DEDUPE="cache"):
+            self.assertTrue(dedupe.claim(self.build_access("10.0.0.1")))
+            self.assertFalse(dedupe.claim(self.build_access("10.0.0.1")))
+            self.assertTrue(
+                dedupe.claim(self.build_access("10.0.0.1", BannerAccessType.CLICK))
+            )
+
+            # expiring the entry opens a new interval
+            cache.delete(dedupe.build_key(self.build_access("10.0.0.1")))
+            self.assertTrue(dedupe.claim(self.build_access("10.0.0.1")))
+
+    def test_cache_backend_uses_its_cache_alias(self):
+        dedupe = BannerAccessDedupe()
+        caches = {
+            **LOCMEM_CACHES,
+            "dedupe": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "banner-dedupe-alias-tests",
+            },
+        }
+
+        with override_settings(
+            CACHES=caches,
+            BANNER_ACCESS_DEDUPE="cache",
+            BANNER_ACCESS_DEDUPE_CACHE_ALIAS="dedupe",
+        ):
+            access = self.build_access("10.0.0.1")
+
+            self.assertTrue(dedupe.claim(access))
+            self.assertIsNone(cache.get(dedupe.build_key(access)))
+            self.assertEqual(dedupe.get_cache().get(dedupe.build_key(access)), 1)
+
+            dedupe.get_cache().clear()
+
+    def test_bloom_backend_claims_once(self):
+        dedupe = BannerAccessDedupe()
+
+        with override_settings(BANNER_ACCESS_DEDUPE="bloom"):
+            self.assertTrue(dedupe.claim(self.build_access("10.0.0.1")))
+            self.assertFalse(dedupe.claim(self.build_access("10.0.0.1")))
+            self.assertTrue(dedupe.claim(self.build_access("10.0.0.2")))
+
+        # new options build a new filter
+        with override_settings(
+            BANNER_ACCESS_DEDUPE="bloom", BANNER_ACCESS_BLOOM_CAPACITY=10
+        ):
+            self.assertTrue(dedupe.claim(self.build_access("10.0.0.1")))
+
+    def test_async_access_with_bloom_and_buffer_takes_no_thread(self):
+        buffer = BannerAccessBuffer()
+
+        with override_settings(
+            BANNER_ACCESS_DEDUPE="bloom", BANNER_ACCESS_BUFFER_ENABLED=True
+        ), patch("apps.banner.helpers.banner_access_buffer", buffer), patch.object(
+            BannerAccessBuffer, "start"
+        ), patch(
+            "apps.banner.helpers.sync_to_async"
+        ) as mock_sync_to_async:
+            tracked = asyncio.run(
+                BannerHelper.atrack_banner_access(
+                    self.banner, BannerAccessType.VIEW, "10.0.0.1"
+                )
+            )
+
+        self.assertTrue(tracked)
+        self.assertEqual(len(buffer), 1)
+        mock_sync_to_async.assert_not_called()
+
+    def test_track_banner_access_skips_access_table(self):
+        with override_settings(BANNER_ACCESS_DEDUPE="cache"):
+            # the save validation and the insert, no interval query on the access table
+            with self.assertNumQueries(2):
+                self.assertTrue(self.track("10.0.0.1"))
+
+            with self.assertNumQueries(0):
+                self.assertFalse(self.track("10.0.0.1"))
+
+        self.assertEqual(BannerAccess.objects.count(), 1)
+
+    def test_store_banner_accesses_skips_lookup(self):
+        accesses = [self.build_access("10.0.0.1"), self.build_access("10.0.0.2")]
+
+        # the insert within its savepoint, no lock nor lookup
+        with override_settings(BANNER_ACCESS_DEDUPE="bloom"), self.assertNumQueries(3):
+            self.assertEqual(BannerHelper.store_banner_accesses(accesses), accesses)
@@ -12,8 +12,10 @@ from django.utils.translation import override
 from apps.banner.enums import BannerAccessType, BannerZone
 from apps.banner.helpers import BannerHelper
 from apps.banner.models import Banner, BannerAccess
+from apps.banner.schedule import banner_schedule_index
 from apps.customer.models import Customer
 from apps.language import models as language_models
+from pyaa.helpers.cache import CacheHelper
 
 User = get_user_model()
 
@@ -134,11 +136,16 @@ class BannerHelperTest(TestCase):
         self.assertEqual(banners[2].sort_order, 7)  # language_agnostic_banner
 
     def test_get_banners_cache(self):
-        # test that banners are cached
-        with patch("apps.banner.helpers.cache.get") as mock_cache_get:
-            mock_cache_get.return_value = [self.banner_home]
+        # test that banners come from the schedule index when it is enabled
+        with (
+            patch.object(banner_schedule_index, "is_enabled", return_value=True),
+            patch.object(
+                banner_schedule_index, "get_banners", return_value=[self.banner_home]
+            ) as mock_get_banners,
+        ):
             banners = BannerHelper.get_banners(BannerZone.HOME)
             self.assertEqual(banners, [self.banner_home])
+            mock_get_banners.assert_called_once()
 
     def test_get_banner_by_token(self):
         # test getting banner by token
@@ -356,3 +363,88 @@ class BannerHelperBranchTest(TestCase):
 
         self.assertFalse(result)
         self.assertEqual(BannerAccess.objects.filter(banner=self.banner).count(), 0)
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "banner-helper-tests",
+        }
+    }
+)
+class BannerHelperCacheTest(TestCase):
+    fixtures = ["apps/language/fixtures/initial.json"]
+
+    def setUp(self):
+        self.site = Site.objects.get_current()
+
+        self.banner = Banner.objects.create(
+            site=self.site,
+            title="Cached Banner",
+            image="banner.jpg",
+            zone=BannerZone.HOME,
+            active=True,
+        )
+
+    def tearDown(self):
+        cache.clear()
+        CacheHelper.clear_local()
+        banner_schedule_index.clear()
+
+    def test_get_banners_is_invalidated_on_banner_save(self):
+        self.assertEqual(len(BannerHelper.get_banners(BannerZone.HOME)), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.banner.active = False
+            self.banner.save()
+
+        self.assertEqual(len(BannerHelper.get_banners(BannerZone.HOME)), 0)
+
+    def test_get_banner_by_token_is_invalidated_on_banner_delete(self):
+        token = self.banner.token
+        self.assertEqual(BannerHelper.get_banner_by_token(token), self.banner)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.banner.delete()
+
+        self.assertIsNone(BannerHelper.get_banner_by_token(token))
+
+    @override_settings(CACHE_LOCAL_ENABLED=False)
+    def test_get_banners_uses_the_shared_cache_without_the_index(self):
+        self.assertFalse(banner_schedule_index.is_enabled())
+        self.assertEqual(BannerHelper.get_banners(BannerZone.HOME), [self.banner])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(BannerHelper.get_banners(BannerZone.HOME), [self.banner])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.banner.active = False
+            self.banner.save()
+
+        self.assertEqual(BannerHelper.get_banners(BannerZone.HOME), [])
+
+    @override_settings(CACHE_TAGGED_TIMEOUT=86400)
+    def test_get_schedule_timeout_stops_at_next_boundary(self):
+        now = timezone.now()
+
+        Banner.objects.create(
+            title="Scheduled Banner",
+            image="banner.jpg",
+            zone=BannerZone.HOME,
+            start_at=now + timedelta(seconds=120),
+        )
+
+        timeout = BannerHelper.get_schedule_timeout(
+            Banner.objects.filter(zone=BannerZone.HOME), now
+        )
+
+        self.assertEqual(timeout, 121)
+
+    @override_settings(CACHE_TAGGED_TIMEOUT=86400)
+    def test_get_schedule_timeout_without_boundaries(self):
+        timeout = BannerHelper.get_schedule_timeout(
+            Banner.objects.filter(zone=BannerZone.HOME), timezone.now()
+        )
+
+        self.assertEqual(timeout, 86400)
@@ -0,0 +1,162 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.sites.models import Site
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.banner.enums import BannerAccessType, BannerZone
+from apps.banner.helpers import BannerHelper
+from apps.banner.models import (
+    Banner,
+    BannerAccess,
+    BannerAccessRollup,
+    BannerAccessWatermark,
+)
+
+
+@override_settings(BANNER_ACCESS_ROLLUP_DELAY=60, BANNER_ACCESS_ROLLUP_BATCH_SIZE=100)
+class BannerAccessRollupTest(TestCase):
+    def setUp(self):
+        Site.objects.clear_cache()
+        self.site = Site.objects.get_current()
+
+        self.banner = Banner.objects.create(
+            site=self.site,
+            title="Rollup Banner",
+            image="banner.jpg",
+            zone=BannerZone.HOME,
+        )
+
+        self.today = timezone.localdate()
+        self.yesterday = self.today - timedelta(days=1)
+
+    def create_access(self, access_type, days_ago=0, country_code=None, seconds=0):
+        access = BannerAccess.objects.create(
+            banner=self.banner,
+            access_type=access_type,
+            ip_address="10.0.0.1",
+            country_code=country_code,
+        )
+
+        # created_at is set on insert, move it to the wanted moment
+        created_at = timezone.now() - timedelta(days=days_ago, seconds=seconds or 120)
+        BannerAccess.objects.filter(pk=access.pk).update(created_at=created_at)
+
+        return access
+
+    def get_totals(self):
+        return {
+            (rollup.day, rollup.access_type, rollup.country_code): rollup.total
+            for rollup in BannerAccessRollup.objects.all()
+        }
+
+    def test_rollup_groups_by_day_type_and_country(self):
+        self.create_access(BannerAccessType.VIEW, country_code="BR")
+        self.create_access(BannerAccessType.VIEW, country_code="BR")
+        self.create_access(BannerAccessType.VIEW)
+        self.create_access(BannerAccessType.CLICK, days_ago=1)
+
+        self.assertEqual(BannerHelper.rollup_banner_accesses(), 4)
+
+        self.assertEqual(
+            self.get_totals(),
+            {
+                (self.today, BannerAccessType.VIEW, "BR"): 2,
+                (self.today, BannerAccessType.VIEW, ""): 1,
+                (self.yesterday, BannerAccessType.CLICK, ""): 1,
+            },
+        )
+
+    def test_rollup_is_incremental_from_watermark(self):
+        self.create_access(BannerAccessType.VIEW)
+        BannerHelper.rollup_banner_accesses()
+
+        last = self.create_access(BannerAccessType.VIEW)
+
+        self.assertEqual(BannerHelper.rollup_banner_accesses(), 1)
+        self.assertEqual(BannerHelper.rollup_banner_accesses(), 0)
+        self.assertEqual(
+            self.get_totals(), {(self.today, BannerAccessType.VIEW, ""): 2}
+        )
+        self.assertEqual(BannerAccessWatermark.objects.get().last_access_id, last.id)
+
+    def test_rollup_waits_for_young_accesses(self):
+        old = self.create_access(BannerAccessType.VIEW)
+        self.create_access(BannerAccessType.VIEW, seconds=10)
+        self.create_access(BannerAccessType.VIEW)
+
+        # the old access after the young one waits too, the watermark cannot skip ids
+        self.assertEqual(BannerHelper.rollup_banner_accesses(), 1)
+        self.assertEqual(BannerAccessWatermark.objects.get().last_access_id, old.id)
+
+    @override_settings(
+        BANNER_ACCESS_BUFFER_ENABLED=True,
+        BANNER_ACCESS_FLUSH_INTERVAL=5,
+        BANNER_ACCESS_FLUSH_RETRIES=3,
+    )
+    def test_rollup_waits_for_the_buffer_to_store_accesses(self):
+        # created_at is the queue time, a retried batch is stored up to 75 seconds later
+        self.assertEqual(BannerHelper.get_rollup_delay(), 135)
+
+        old = self.create_access(BannerAccessType.VIEW, seconds=140)
+        self.create_access(BannerAccessType.VIEW, seconds=120)
+
+        self.assertEqual(BannerHelper.rollup_banner_accesses(), 1)
+        self.assertEqual(BannerAccessWatermark.objects.get().last_access_id, old.id)
+
+    def test_rollup_runs_in_batches(self):
+        for _ in range(5):
+            self.create_access(BannerAccessType.CLICK)
+
+        self.assertEqual(BannerHelper.rollup_banner_accesses(batch_size=2), 5)
+
+        self.assertEqual(
+            self.get_totals(), {(self.today, BannerAccessType.CLICK, ""): 5}
+        )
+
+    def test_get_daily_accesses_adds_accesses_after_watermark(self):
+        self.create_access(BannerAccessType.VIEW)
+        self.create_access(BannerAccessType.VIEW, days_ago=1)
+        BannerHelper.rollup_banner_accesses()
+
+        self.create_access(BannerAccessType.VIEW)
+        self.create_access(BannerAccessType.CLICK, days_ago=5)
+
+        rows = BannerHelper.get_daily_accesses(
+            self.yesterday, self.today, Banner.objects.all()
+        )
+
+        self.assertEqual(
+            rows,
+            [
+                {
+                    "banner_id": self.banner.id,
+                    "day": self.yesterday,
+                    "access_type": BannerAccessType.VIEW,
+                    "total": 1,
+                },
+                {
+                    "banner_id": self.banner.id,
+                    "day": self.today,
+                    "access_type": BannerAccessType.VIEW,
+                    "total": 2,
+                },
+            ],
+        )
+
+        self.assertEqual(
+            BannerHelper.get_daily_accesses(
+                self.yesterday, self.today, Banner.objects.none()
+            ),
+            [],
+        )
+
+    def test_command_reports_rolled_up_accesses(self):
+        self.create_access(BannerAccessType.VIEW)
+
+        out = StringIO()
+        call_command("rollup_banner_accesses", stdout=out)
+
+        self.assertIn("Rolled up 1 banner accesses", out.getvalue())
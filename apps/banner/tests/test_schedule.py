@@ -0,0 +1,196 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.banner.enums import BannerZone
+from apps.banner.helpers import BannerHelper
+from apps.banner.models import Banner
+from apps.banner.schedule import BannerScheduleIndex, banner_schedule_index
+from apps.language import models as language_models
+from pyaa.helpers.cache import CacheHelper
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "banner-schedule-tests",
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BannerScheduleIndexTest(TestCase):
+    fixtures = ["apps/language/fixtures/initial.json"]
+
+    def setUp(self):
+        self.site = Site.objects.get_current()
+        self.english = language_models.Language.objects.get(code_iso_639_1="en")
+        self.portuguese = language_models.Language.objects.get(code_iso_639_1="pt")
+        self.now = timezone.now()
+        self.index = BannerScheduleIndex()
+
+    def tearDown(self):
+        cache.clear()
+        CacheHelper.clear_local()
+        banner_schedule_index.clear()
+
+    def create_banner(self, title, **kwargs):
+        kwargs.setdefault("zone", BannerZone.HOME)
+        kwargs.setdefault("active", True)
+
+        return Banner.objects.create(title=title, image="banner.jpg", **kwargs)
+
+    def get_titles(self, zone=BannerZone.HOME, site_id=None, language="en", now=None):
+        banners = self.index.get_banners(
+            zone, site_id or self.site.id, language, now=now or self.now
+        )
+
+        return [banner.title for banner in banners]
+
+    def test_filters_by_zone_site_and_language(self):
+        other_site = Site.objects.create(domain="other.example.com", name="Other")
+
+        self.create_banner("Global", sort_order=3)
+        self.create_banner("Site", site=self.site, sort_order=1)
+        self.create_banner("Other site", site=other_site)
+        self.create_banner("English", language=self.english, sort_order=2)
+        self.create_banner("Portuguese", language=self.portuguese, sort_order=2)
+        self.create_banner("Signin", zone=BannerZone.SIGNIN)
+        self.create_banner("Inactive", active=False)
+
+        self.assertEqual(self.get_titles(), ["Site", "English", "Global"])
+        self.assertEqual(
+            self.get_titles(language="en-us"), ["Site", "English", "Global"]
+        )
+        self.assertEqual(
+            self.get_titles(language="pt"), ["Site", "Portuguese", "Global"]
+        )
+        self.assertEqual(self.get_titles(zone=BannerZone.SIGNIN), ["Signin"])
+
+    def test_matches_query_banners(self):
+        self.create_banner("Global")
+        self.create_banner("Site", site=self.site, language=self.english)
+        self.create_banner("Ended", end_at=self.now - timedelta(days=1))
+        self.create_banner("Scheduled", start_at=self.now + timedelta(days=1))
+
+        now = timezone.now()
+
+        self.assertEqual(
+            self.index.get_banners(BannerZone.HOME, self.site.id, "en", now=now),
+            BannerHelper.query_banners(BannerZone.HOME, self.site.id, "en"),
+        )
+
+    def test_lookups_do_not_query(self):
+        self.create_banner("Global")
+        self.get_titles()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_titles(), ["Global"])
+            self.assertEqual(self.get_titles(language="pt"), ["Global"])
+
+    def test_refreshes_at_schedule_boundaries(self):
+        self.create_banner("Always")
+        self.create_banner("Starting", start_at=self.now + timedelta(seconds=60))
+        self.create_banner("Ending", end_at=self.now + timedelta(seconds=120))
+
+        self.assertEqual(self.get_titles(), ["Always", "Ending"])
+        self.assertEqual(self.index.boundary, self.now + timedelta(seconds=60))
+
+        # the index is rebuilt from memory, without a query
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.get_titles(now=self.now + timedelta(seconds=59)),
+                ["Always", "Ending"],
+            )
+            self.assertEqual(
+                self.get_titles(now=self.now + timedelta(seconds=60)),
+                ["Always", "Starting", "Ending"],
+            )
+            self.assertEqual(
+                self.get_titles(now=self.now + timedelta(seconds=120)),
+                ["Always", "Starting", "Ending"],
+            )
+            self.assertEqual(
+                self.get_titles(now=self.now + timedelta(seconds=121)),
+                ["Always", "Starting"],
+            )
+
+        self.assertIsNone(self.index.boundary)
+
+    def test_finds_banners_by_token(self):
+        banner = self.create_banner("Global")
+        scheduled = self.create_banner(
+            "Scheduled", start_at=self.now + timedelta(seconds=60)
+        )
+        tokens = {banner.token, scheduled.token}
+
+        # nothing is answered before the index is loaded
+        self.assertIsNone(self.index.peek_banners_by_tokens(tokens, now=self.now))
+
+        self.assertEqual(
+            self.index.get_banners_by_tokens(tokens, now=self.now),
+            {banner.token: banner},
+        )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.index.peek_banners_by_tokens(
+                    tokens, now=self.now + timedelta(seconds=60)
+                ),
+                {banner.token: banner, scheduled.token: scheduled},
+            )
+
+        # a due sync is left to a thread
+        synced_at = self.index.synced_at + settings.CACHE_LOCAL_SYNC_INTERVAL
+
+        with patch("apps.banner.schedule.time.monotonic", return_value=synced_at):
+            self.assertIsNone(self.index.peek_banners_by_tokens(tokens))
+
+    def test_is_cleared_on_banner_write(self):
+        banner = self.create_banner("Global")
+
+        with patch.object(banner_schedule_index, "clear") as clear:
+            with self.captureOnCommitCallbacks(execute=True):
+                banner.save()
+
+        # cleared right away and again after commit
+        self.assertEqual(clear.call_count, 2)
+
+    def test_is_reloaded_when_another_worker_writes(self):
+        banner = self.create_banner("Global")
+        self.assertEqual(self.get_titles(), ["Global"])
+
+        # a write seen only through the shared tag versions
+        Banner.objects.filter(pk=banner.pk).update(active=False)
+        CacheHelper.invalidate_tags(CacheHelper.model_tag(Banner))
+
+        synced_at = self.index.synced_at + 1
+
+        with patch("apps.banner.schedule.time.monotonic", return_value=synced_at):
+            self.assertEqual(self.get_titles(), [])
+
+    def test_helper_uses_the_index(self):
+        banner = self.create_banner("Global")
+
+        with self.assertNumQueries(1):
+            self.assertEqual(BannerHelper.get_banners(BannerZone.HOME), [banner])
+            self.assertEqual(BannerHelper.get_banners(BannerZone.HOME), [banner])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            banner.delete()
+
+        self.assertEqual(BannerHelper.get_banners(BannerZone.HOME), [])
+
+    def test_is_disabled_with_dummy_cache(self):
+        with override_settings(
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+            }
+        ):
+            self.assertFalse(banner_schedule_index.is_enabled())
+
+        self.assertTrue(banner_schedule_index.is_enabled())
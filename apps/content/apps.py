@@ -6,3 +6,10 @@ class ContentAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.content"
     verbose_name = _("apps.content.description")
+
+    def ready(self):
+        from apps.content.models import ContentCategory, Content
+        from pyaa.helpers.cache import CacheHelper
+
+        CacheHelper.watch_model(ContentCategory)
+        CacheHelper.watch_model(Content)
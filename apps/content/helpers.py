@@ -1,9 +1,10 @@
 from django.contrib.sites.models import Site
-from django.core.cache import cache
 from django.db import models
 from django.utils.translation import get_language
 
-from apps.content.models import Content
+from apps.content.models import Content, ContentCategory
+from apps.language.models import Language
+from pyaa.helpers.cache import CacheHelper
 
 
 class ContentHelper:
@@ -26,13 +27,6 @@ class ContentHelper:
                 user_language = user_language.lower()
             cache_key = f"content-by-tag-{content_tag}-{user_language}-{site_id}"
 
-        # try to get from cache first
-        if cache_key:
-            cached_content = cache.get(cache_key)
-
-            if cached_content is not None:
-                return cached_content
-
         # define filter criteria based on passed parameters (id or tag)
         filter_kwargs = {"active": True}
 
@@ -42,18 +36,26 @@ class ContentHelper:
         # if content_id is provided, ignore language and return the content directly
         if content_id:
             filter_kwargs["id"] = content_id
-            content = (
-                Content.objects.filter(**filter_kwargs)
-                .filter(site_filter)
-                .select_related("category", "language")
-                .first()
-            )
 
-            if content:
-                # cache for 1 hour
-                cache.set(cache_key, content, timeout=3600)
+            def query_content():
+                return (
+                    Content.objects.filter(**filter_kwargs)
+                    .filter(site_filter)
+                    .select_related("category", "language")
+                    .first()
+                )
 
-            return content
+            # cache until the content or its related data changes
+            return CacheHelper.get_or_compute(
+                cache_key,
+                query_content,
+                tags=[
+                    CacheHelper.model_tag(Content, content_id),
+                    CacheHelper.model_tag(ContentCategory),
+                    CacheHelper.model_tag(Language),
+                ],
+                local=True,
+            )
 
         # if content_tag is provided, apply language priority logic
         elif content_tag:
@@ -66,38 +68,45 @@ class ContentHelper:
             filter_kwargs["tag"] = content_tag
 
             # filter content based on language priority (user's language, then en-us, then any language)
-            content = (
-                Content.objects.filter(**filter_kwargs)
-                .filter(site_filter)
-                .select_related("category", "language")
-                .order_by(
-                    models.Case(
-                        # check both code_iso_639_1 and code_iso_language for the user's language
-                        models.When(
-                            models.Q(language__code_iso_language=user_language)
-                            | models.Q(language__code_iso_639_1=user_language),
-                            then=0,
-                        ),
-                        # fallback to 'en-us' by checking both code_iso_639_1 and code_iso_language
-                        models.When(
-                            models.Q(language__code_iso_language="en-us")
-                            | models.Q(language__code_iso_639_1="en"),
-                            then=1,
-                        ),
-                        # lastly, consider global content (language=None)
-                        models.When(language__isnull=True, then=2),
-                        # default to the highest number if no match is found
-                        default=models.Value(3),
-                        output_field=models.IntegerField(),
+            def query_content():
+                return (
+                    Content.objects.filter(**filter_kwargs)
+                    .filter(site_filter)
+                    .select_related("category", "language")
+                    .order_by(
+                        models.Case(
+                            # check both code_iso_639_1 and code_iso_language for the user's language
+                            models.When(
+                                models.Q(language__code_iso_language=user_language)
+                                | models.Q(language__code_iso_639_1=user_language),
+                                then=0,
+                            ),
+                            # fallback to 'en-us' by checking both code_iso_639_1 and code_iso_language
+                            models.When(
+                                models.Q(language__code_iso_language="en-us")
+                                | models.Q(language__code_iso_639_1="en"),
+                                then=1,
+                            ),
+                            # lastly, consider global content (language=None)
+                            models.When(language__isnull=True, then=2),
+                            # default to the highest number if no match is found
+                            default=models.Value(3),
+                            output_field=models.IntegerField(),
+                        )
                     )
+                    .first()
                 )
-                .first()
-            )
 
-            if content:
-                # cache for 1 hour
-                cache.set(cache_key, content, timeout=3600)
-
-            return content
+            # cache until any content or its related data changes
+            return CacheHelper.get_or_compute(
+                cache_key,
+                query_content,
+                tags=[
+                    CacheHelper.model_tag(Content),
+                    CacheHelper.model_tag(ContentCategory),
+                    CacheHelper.model_tag(Language),
+                ],
+                local=True,
+            )
         else:
             raise ValueError("content_id or content_tag must be provided.")
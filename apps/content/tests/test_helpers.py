@@ -2,12 +2,14 @@ from unittest.mock import patch
 
 from django.contrib.sites.models import Site
 from django.core.cache import cache
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils import translation
 from django.utils.translation import activate, deactivate
 
 from apps.content.helpers import ContentHelper
 from apps.content.models import Content
 from apps.language.models import Language
+from pyaa.helpers.cache import CacheHelper
 
 
 class ContentHelperTest(TestCase):
@@ -159,3 +161,63 @@ class ContentHelperBranchTest(TestCase):
         with patch("apps.content.helpers.get_language", return_value=None):
             result = ContentHelper.get_content(content_tag="branch-content")
             self.assertEqual(result, self.content)
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "content-helper-tests",
+        }
+    }
+)
+class ContentHelperCacheTest(TestCase):
+    fixtures = ["apps/language/fixtures/initial.json"]
+
+    def setUp(self):
+        self.content = Content.objects.create(
+            title="Cached Content",
+            tag="cached-content",
+            content="<p>Cached</p>",
+            active=True,
+        )
+
+    def tearDown(self):
+        cache.clear()
+        CacheHelper.clear_local()
+
+    def test_get_content_by_id_is_invalidated_on_save(self):
+        self.assertEqual(
+            ContentHelper.get_content(content_id=self.content.id).title,
+            "Cached Content",
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.content.title = "Updated Content"
+            self.content.save()
+
+        self.assertEqual(
+            ContentHelper.get_content(content_id=self.content.id).title,
+            "Updated Content",
+        )
+
+    def test_get_content_by_tag_is_invalidated_on_new_content(self):
+        language = Language.objects.get(code_iso_language="en-us")
+
+        with translation.override("en-us"):
+            self.assertEqual(
+                ContentHelper.get_content(content_tag="cached-content"), self.content
+            )
+
+            with self.captureOnCommitCallbacks(execute=True):
+                english = Content.objects.create(
+                    title="English Content",
+                    language=language,
+                    tag="cached-content",
+                    content="<p>English</p>",
+                    active=True,
+                )
+
+            self.assertEqual(
+                ContentHelper.get_content(content_tag="cached-content"), english
+            )
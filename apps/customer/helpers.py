@@ -250,6 +250,11 @@ class CustomerHelper:
             language=language,
         )
 
+    @staticmethod
+    def get_email_group_key(customer):
+        # notifications of a customer sent together are coalesced into one email
+        return f"customer:{customer.pk}"
+
     @staticmethod
     def send_credits_email(customer, amount, object_type=None, plan=None):
         """
@@ -331,6 +336,7 @@ class CustomerHelper:
             context=context,
             reply_to=[settings.DEFAULT_TO_EMAIL],
             language=language,
+            group_key=CustomerHelper.get_email_group_key(customer),
         )
 
     @staticmethod
@@ -397,6 +403,7 @@ class CustomerHelper:
             context=context,
             reply_to=[settings.DEFAULT_TO_EMAIL],
             language=language,
+            group_key=CustomerHelper.get_email_group_key(customer),
         )
 
     @staticmethod
@@ -443,6 +450,7 @@ class CustomerHelper:
             context=context,
             reply_to=[settings.DEFAULT_TO_EMAIL],
             language=language,
+            group_key=CustomerHelper.get_email_group_key(customer),
         )
 
     @staticmethod
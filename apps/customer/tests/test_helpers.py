@@ -3,11 +3,14 @@ from unittest.mock import Mock, patch
 
 from django.contrib.auth import get_user_model
 from django.contrib.sites.models import Site
+from django.core import mail
 from django.core.exceptions import ValidationError
 from django.test import TestCase, override_settings
 
 from apps.customer.helpers import CustomerHelper
 from apps.customer.models import Customer
+from apps.mailer.helpers import MailerHelper
+from apps.mailer.models import QueuedEmail
 from apps.shop.enums import ObjectType, PaymentGateway, PlanType
 from apps.shop.models import CreditLog, Plan
 
@@ -493,6 +496,24 @@ class CustomerHelperExtraTest(TestCase):
         # bonus email also sent
         self.assertEqual(mock_email.call_count, 2)
 
+    @override_settings(EMAIL_DELIVERY="batch", EMAIL_COALESCE_WINDOW=0)
+    @patch("apps.mailer.helpers.async_task", return_value="task-1")
+    def test_add_credits_with_plan_and_bonus_sends_one_email(self, mock_async_task):
+        plan = make_plan(credits=100, bonus=20)
+        customer = self.make_customer("plan-email@example.com")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomerHelper.add_credits(customer, plan=plan)
+
+        # the credits and bonus notifications are coalesced
+        self.assertEqual(QueuedEmail.objects.count(), 1)
+
+        MailerHelper.drain()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["plan-email@example.com"])
+        self.assertEqual(mail.outbox[0].alternatives[0][0].count("<h2"), 2)
+
     @patch("apps.customer.helpers.CustomerHelper.send_credits_email")
     def test_add_credits_with_plan_no_bonus(self, mock_email):
         plan = make_plan(credits=100, bonus=0)
@@ -6,3 +6,10 @@ class GalleryAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.gallery"
     verbose_name = _("apps.gallery.description")
+
+    def ready(self):
+        from apps.gallery.models import Gallery, GalleryPhoto
+        from pyaa.helpers.cache import CacheHelper
+
+        CacheHelper.watch_model(Gallery)
+        CacheHelper.watch_model(GalleryPhoto, parents=["gallery"])
@@ -1,9 +1,10 @@
 from django.contrib.sites.models import Site
-from django.core.cache import cache
 from django.db import models
 from django.utils.translation import get_language
 
-from apps.gallery.models import Gallery
+from apps.gallery.models import Gallery, GalleryPhoto
+from apps.language.models import Language
+from pyaa.helpers.cache import CacheHelper
 
 
 class GalleryHelper:
@@ -26,13 +27,6 @@ class GalleryHelper:
                 user_language = user_language.lower()
             cache_key = f"gallery-by-tag-{gallery_tag}-{user_language}-{site_id}"
 
-        # try to get from cache first
-        if cache_key:
-            cached_gallery = cache.get(cache_key)
-
-            if cached_gallery is not None:
-                return cached_gallery
-
         filter_kwargs = {"active": True}
 
         # site filtering
@@ -42,19 +36,25 @@ class GalleryHelper:
         if gallery_id:
             filter_kwargs["id"] = gallery_id
 
-            gallery = (
-                Gallery.objects.filter(**filter_kwargs)
-                .filter(site_filter)
-                .select_related("language")
-                .prefetch_related("gallery_photos")
-                .first()
-            )
-
-            if gallery:
-                # cache for 1 hour
-                cache.set(cache_key, gallery, timeout=3600)
+            def query_gallery():
+                return (
+                    Gallery.objects.filter(**filter_kwargs)
+                    .filter(site_filter)
+                    .select_related("language")
+                    .prefetch_related("gallery_photos")
+                    .first()
+                )
 
-            return gallery
+            # cache until the gallery or its related data changes
+            return CacheHelper.get_or_compute(
+                cache_key,
+                query_gallery,
+                tags=[
+                    CacheHelper.model_tag(Gallery, gallery_id),
+                    CacheHelper.model_tag(Language),
+                ],
+                local=True,
+            )
 
         # if gallery_tag is provided, apply language priority logic (check both code_iso_639_1 and code_iso_language)
         elif gallery_tag:
@@ -66,40 +66,47 @@ class GalleryHelper:
             filter_kwargs["tag"] = gallery_tag
 
             # filter gallery based on language priority (user's language, then en-us, then global galleries)
-            gallery = (
-                Gallery.objects.filter(**filter_kwargs)
-                .filter(site_filter)
-                .select_related("language")
-                .prefetch_related("gallery_photos")
-                .order_by(
-                    models.Case(
-                        # give priority to galleries in the user's language, checking both code_iso_639_1 and code_iso_language
-                        models.When(
-                            models.Q(language__code_iso_language=user_language)
-                            | models.Q(language__code_iso_639_1=user_language),
-                            then=0,
-                        ),
-                        # fallback to 'en-us' by checking both code_iso_639_1 and code_iso_language
-                        models.When(
-                            models.Q(language__code_iso_language="en-us")
-                            | models.Q(language__code_iso_639_1="en"),
-                            then=1,
-                        ),
-                        # lastly, consider global galleries (language=None)
-                        models.When(language__isnull=True, then=2),
-                        # default to the highest number if no match is found
-                        default=models.Value(3),
-                        output_field=models.IntegerField(),
+            def query_gallery():
+                return (
+                    Gallery.objects.filter(**filter_kwargs)
+                    .filter(site_filter)
+                    .select_related("language")
+                    .prefetch_related("gallery_photos")
+                    .order_by(
+                        models.Case(
+                            # give priority to galleries in the user's language, checking both code_iso_639_1 and code_iso_language
+                            models.When(
+                                models.Q(language__code_iso_language=user_language)
+                                | models.Q(language__code_iso_639_1=user_language),
+                                then=0,
+                            ),
+                            # fallback to 'en-us' by checking both code_iso_639_1 and code_iso_language
+                            models.When(
+                                models.Q(language__code_iso_language="en-us")
+                                | models.Q(language__code_iso_639_1="en"),
+                                then=1,
+                            ),
+                            # lastly, consider global galleries (language=None)
+                            models.When(language__isnull=True, then=2),
+                            # default to the highest number if no match is found
+                            default=models.Value(3),
+                            output_field=models.IntegerField(),
+                        )
                     )
+                    .first()
                 )
-                .first()
-            )
 
-            if gallery:
-                # cache for 1 hour
-                cache.set(cache_key, gallery, timeout=3600)
-
-            return gallery
+            # cache until any gallery or its related data changes
+            return CacheHelper.get_or_compute(
+                cache_key,
+                query_gallery,
+                tags=[
+                    CacheHelper.model_tag(Gallery),
+                    CacheHelper.model_tag(GalleryPhoto),
+                    CacheHelper.model_tag(Language),
+                ],
+                local=True,
+            )
         else:
             raise ValueError("gallery_id or gallery_tag must be provided.")
 
@@ -6,3 +6,9 @@ class LanguageAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.language"
     verbose_name = _("apps.language.description")
+
+    def ready(self):
+        from apps.language.models import Language
+        from pyaa.helpers.cache import CacheHelper
+
+        CacheHelper.watch_model(Language)
@@ -0,0 +1,100 @@
+from django.contrib import admin
+from django.utils.translation import gettext_lazy as _
+
+from apps.mailer.helpers import MailerHelper
+from apps.mailer.models import QueuedEmail
+from pyaa.mixins import EstimatedCountAdminMixin
+
+
+class QueuedEmailAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
+    list_display = (
+        "id",
+        "to",
+        "subject",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "sent_at",
+    )
+
+    list_display_links = (
+        "id",
+        "to",
+        "subject",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "sent_at",
+    )
+
+    list_filter = (
+        "status",
+        "created_at",
+    )
+
+    search_fields = ("to", "subject")
+
+    ordering = ("-id",)
+
+    actions = ["retry_emails"]
+
+    fieldsets = (
+        (
+            _("admin.fieldsets.general"),
+            {
+                "fields": (
+                    "to",
+                    "subject",
+                    "status",
+                )
+            },
+        ),
+        (
+            _("admin.fieldsets.details"),
+            {
+                "fields": (
+                    "attempts",
+                    "error",
+                )
+            },
+        ),
+        (
+            _("admin.fieldsets.important-dates"),
+            {
+                "fields": (
+                    "next_attempt_at",
+                    "sent_at",
+                    "created_at",
+                    "updated_at",
+                ),
+            },
+        ),
+    )
+
+    readonly_fields = [
+        "to",
+        "subject",
+        "status",
+        "attempts",
+        "error",
+        "next_attempt_at",
+        "sent_at",
+        "created_at",
+        "updated_at",
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def retry_emails(self, request, queryset):
+        count = MailerHelper.retry(queryset)
+
+        self.message_user(request, _("admin.queued-email.retried") % {"count": count})
+
+    retry_emails.short_description = _("admin.action.retry-emails")
+
+
+admin.site.register(QueuedEmail, QueuedEmailAdmin)
@@ -0,0 +1,12 @@
+from django.db.models.enums import TextChoices
+from django.utils.translation import gettext_lazy as _
+
+
+class QueuedEmailStatus(TextChoices):
+    PENDING = "pending", _("enum.queued-email-status.pending")
+    SENT = "sent", _("enum.queued-email-status.sent")
+    FAILED = "failed", _("enum.queued-email-status.failed")
+
+    @classmethod
+    def get_choices(cls):
+        return tuple((i.name, i.value) for i in cls)
@@ -0,0 +1,350 @@
+import logging
+import pickle
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import Min
+from django.template.loader import render_to_string
+from django.utils import timezone, translation
+from django.utils.translation import gettext_lazy as _
+from django_q.models import Schedule
+from django_q.tasks import async_task, schedule
+
+from apps.mailer.enums import QueuedEmailStatus
+from apps.mailer.models import QueuedEmail
+from pyaa.helpers.email import EmailHelper
+
+logger = logging.getLogger(__name__)
+
+MAILER_DRAIN_KEY = "mailer-drain-scheduled"
+MAILER_DRAIN_FUNC = "apps.mailer.helpers.MailerHelper.drain"
+
+# layout of the sections of a coalesced email
+EMAIL_PART_LAYOUT = "emails/layouts/part.html"
+
+# errors of a lost connection, the message is sent again over a new one
+CONNECTION_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+class MailerHelper:
+    @staticmethod
+    @transaction.atomic
+    def queue(
+        subject,
+        to,
+        template,
+        context=None,
+        attachments=None,
+        from_email=None,
+        reply_to=None,
+        language=None,
+        group_key=None,
+    ):
+        """
+        Queue an email, rendered and sent by a drain task scheduled after commit.
+        Uses the same parameters as EmailHelper.send_email.
+
+        Emails with the same group key and recipients (e.g. the notifications of
+        a customer) queued within EMAIL_COALESCE_WINDOW seconds are stored and
+        sent as one email, with a section per notification.
+        """
+        part = {
+            "subject": subject,
+            "to": to,
+            "template": template,
+            "context": context,
+            "attachments": attachments,
+            "from_email": from_email,
+            "reply_to": reply_to,
+            "language": language,
+        }
+
+        recipients = ", ".join(to)
+
+        if group_key:
+            # claimed emails have no group key, they are not extended anymore
+            email = (
+                QueuedEmail.objects.filter(
+                    group_key=group_key,
+                    to=recipients,
+                    status=QueuedEmailStatus.PENDING,
+                )
+                .order_by("-id")
+                .first()
+            )
+
+            if email and MailerHelper.extend(email, part):
+                return email
+
+        next_attempt_at = timezone.now()
+
+        if group_key:
+            # wait for the other notifications of the group
+            next_attempt_at += timedelta(seconds=settings.EMAIL_COALESCE_WINDOW)
+
+        email = QueuedEmail.objects.create(
+            to=recipients,
+            subject=MailerHelper.get_subject([part]),
+            payload=pickle.dumps([part], pickle.HIGHEST_PROTOCOL),
+            group_key=group_key,
+            next_attempt_at=next_attempt_at,
+        )
+
+        # the drain task runs after commit, so the worker finds the email
+        transaction.on_commit(MailerHelper.schedule_drain)
+
+        return email
+
+    @staticmethod
+    def extend(email, part):
+        """
+        Add a part to a grouped email, returning if it was added. The email is
+        changed by one conditional update, only while no drain claimed it and
+        no other part was added since it was read.
+        """
+        parts = pickle.loads(email.payload) + [part]
+        subject = MailerHelper.get_subject(parts)
+        payload = pickle.dumps(parts, pickle.HIGHEST_PROTOCOL)
+        updated_at = timezone.now()
+
+        extended = QueuedEmail.objects.filter(
+            pk=email.pk,
+            group_key=email.group_key,
+            status=QueuedEmailStatus.PENDING,
+            updated_at=email.updated_at,
+        ).update(subject=subject, payload=payload, updated_at=updated_at)
+
+        if extended:
+            email.subject = subject
+            email.payload = payload
+            email.updated_at = updated_at
+
+        return extended == 1
+
+    @staticmethod
+    def get_subject(parts):
+        """
+        Returns the subject of the email of the parts, in the language of the first.
+        """
+        subject = parts[0]["subject"] if len(parts) == 1 else _("email.digest.subject")
+
+        with translation.override(parts[0]["language"] or translation.get_language()):
+            return str(subject)[:255]
+
+    @staticmethod
+    def schedule_drain():
+        # one drain task at a time, it sends every due email
+        if not cache.add(MAILER_DRAIN_KEY, True, settings.EMAIL_BATCH_LEASE):
+            return None
+
+        task_id = async_task(MailerHelper.drain)
+
+        logger.info(f"Queued email drain scheduled with task_id: {task_id}")
+
+        return task_id
+
+    @staticmethod
+    def drain():
+        """
+        Send the due queued emails in batches of EMAIL_BATCH_SIZE, each batch
+        over one connection. Returns the sent and failed counts.
+        """
+        # emails queued from now on schedule another drain
+        cache.delete(MAILER_DRAIN_KEY)
+
+        stats = {"sent": 0, "failed": 0}
+
+        while emails := MailerHelper.claim_batch():
+            MailerHelper.send_batch(emails, stats)
+
+        # grouped emails due within their window are sent by a scheduled drain
+        next_attempt_at = QueuedEmail.objects.filter(
+            status=QueuedEmailStatus.PENDING,
+            group_key__isnull=False,
+            next_attempt_at__lte=timezone.now()
+            + timedelta(seconds=settings.EMAIL_COALESCE_WINDOW),
+        ).aggregate(next_attempt_at=Min("next_attempt_at"))["next_attempt_at"]
+
+        if next_attempt_at is not None:
+            MailerHelper.schedule_drain_at(next_attempt_at)
+
+        return stats
+
+    @staticmethod
+    def schedule_drain_at(next_run):
+        """
+        Schedule a drain at the time a grouped email is due, instead of waiting
+        for it in the worker.
+        """
+        # a drain scheduled before then sends the email too
+        if Schedule.objects.filter(
+            func=MAILER_DRAIN_FUNC, next_run__lte=next_run
+        ).exists():
+            return None
+
+        schedule_id = schedule(
+            MAILER_DRAIN_FUNC, schedule_type=Schedule.ONCE, next_run=next_run
+        ).pk
+
+        logger.info(f"Queued email drain scheduled at {next_run}: {schedule_id}")
+
+        return schedule_id
+
+    @staticmethod
+    def claim_batch():
+        """
+        Return the next due emails, leased for EMAIL_BATCH_LEASE seconds so other
+        drains skip them, and a lost worker leaves them due again after the lease.
+        """
+        now = timezone.now()
+        lease = now + timedelta(seconds=settings.EMAIL_BATCH_LEASE)
+
+        emails = QueuedEmail.objects.filter(
+            status=QueuedEmailStatus.PENDING, next_attempt_at__lte=now
+        ).order_by("next_attempt_at", "id")[: settings.EMAIL_BATCH_SIZE]
+
+        return [email for email in emails if MailerHelper.claim(email, now, lease)]
+
+    @staticmethod
+    def claim(email, now, lease):
+        """
+        Lease a due email with one conditional update, returning if it was
+        claimed. It fails when another drain claimed the email or a part was
+        added to it since it was read (row locks do nothing on sqlite).
+        """
+        claimed = QueuedEmail.objects.filter(
+            pk=email.pk,
+            status=QueuedEmailStatus.PENDING,
+            next_attempt_at__lte=now,
+            updated_at=email.updated_at,
+        ).update(group_key=None, next_attempt_at=lease, updated_at=now)
+
+        if claimed:
+            email.group_key = None
+            email.next_attempt_at = lease
+            email.updated_at = now
+
+        return claimed == 1
+
+    @staticmethod
+    def send_batch(emails, stats):
+        connection = get_connection()
+
+        try:
+            for email in emails:
+                MailerHelper.send_queued_email(email, connection, stats)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def send_queued_email(email, connection, stats):
+        try:
+            message = MailerHelper.build_message(
+                pickle.loads(email.payload), connection
+            )
+            MailerHelper.send_message(message, connection)
+        except Exception as e:
+            logger.warning(f"Queued email {email.pk} to {email.to} failed: {e}")
+
+            MailerHelper.retry_later(email, e)
+            stats["failed"] += 1
+            return
+
+        QueuedEmail.objects.filter(pk=email.pk).update(
+            status=QueuedEmailStatus.SENT,
+            attempts=email.attempts + 1,
+            error=None,
+            sent_at=timezone.now(),
+        )
+        stats["sent"] += 1
+
+    @staticmethod
+    def build_message(parts, connection=None):
+        """
+        Returns the email message of the queued parts. Many parts are rendered
+        as sections of one email, in the language of the first part.
+        """
+        if len(parts) == 1:
+            return EmailHelper.build_email(**parts[0], connection=connection)
+
+        first = parts[0]
+        attachments = []
+        sections = []
+
+        with translation.override(first["language"] or translation.get_language()):
+            for part in parts:
+                # the part templates render only their content with this layout
+                context = {**(part["context"] or {}), "email_layout": EMAIL_PART_LAYOUT}
+                sections.append(render_to_string(part["template"], context))
+                attachments.extend(part["attachments"] or [])
+
+        return EmailHelper.build_email(
+            subject=_("email.digest.subject"),
+            to=first["to"],
+            template="emails/digest.html",
+            context={"subject": _("email.digest.subject"), "sections": sections},
+            attachments=attachments,
+            from_email=first["from_email"],
+            reply_to=first["reply_to"],
+            language=first["language"],
+            connection=connection,
+        )
+
+    @staticmethod
+    def send_message(message, connection):
+        """
+        Send a message over the open connection, reconnecting once when the
+        connection was lost (e.g. closed by the server while idle).
+        """
+        try:
+            # the connection stays open between messages, the backend only
+            # closes the connections it opens in send_messages
+            connection.open()
+            connection.send_messages([message])
+        except CONNECTION_ERRORS:
+            connection.close()
+            connection.open()
+            connection.send_messages([message])
+
+    @staticmethod
+    def retry_later(email, error):
+        """
+        Store the failed attempt, with an exponential delay before the next one,
+        and fail the email after EMAIL_MAX_ATTEMPTS attempts.
+        """
+        attempts = email.attempts + 1
+        delay = settings.EMAIL_RETRY_DELAY * 2 ** (attempts - 1)
+
+        QueuedEmail.objects.filter(pk=email.pk).update(
+            status=(
+                QueuedEmailStatus.FAILED
+                if attempts >= settings.EMAIL_MAX_ATTEMPTS
+                else QueuedEmailStatus.PENDING
+            ),
+            attempts=attempts,
+            error=str(error),
+            next_attempt_at=timezone.now() + timedelta(seconds=delay),
+        )
+
+    @staticmethod
+    def retry(queryset):
+        """
+        Queue failed emails again, with new attempts.
+        """
+        count = queryset.filter(status=QueuedEmailStatus.FAILED).update(
+            status=QueuedEmailStatus.PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
+
+        transaction.on_commit(MailerHelper.schedule_drain)
+
+        return count
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.mailer.helpers import MailerHelper
+
+
+class Command(BaseCommand):
+    help = "Send the due queued emails, including the ones waiting for a retry"
+
+    def handle(self, *args, **options):
+        stats = MailerHelper.drain()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sent {stats['sent']} queued emails ({stats['failed']} failed)"
+            )
+        )
@@ -0,0 +1,100 @@
+# Generated by Django 6.0.7 on 2026-10-18 02:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="QueuedEmail",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                        verbose_name="model.field.id",
+                    ),
+                ),
+                ("to", models.TextField(verbose_name="model.field.to")),
+                (
+                    "subject",
+                    models.CharField(
+                        max_length=255, verbose_name="model.field.subject"
+                    ),
+                ),
+                ("payload", models.BinaryField(verbose_name="model.field.payload")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "enum.queued-email-status.pending"),
+                            ("sent", "enum.queued-email-status.sent"),
+                            ("failed", "enum.queued-email-status.failed"),
+                        ],
+                        default="pending",
+                        max_length=25,
+                        verbose_name="model.field.status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="model.field.attempts"
+                    ),
+                ),
+                (
+                    "error",
+                    models.TextField(
+                        blank=True, null=True, verbose_name="model.field.error"
+                    ),
+                ),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="model.field.next-attempt-at",
+                    ),
+                ),
+                (
+                    "sent_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="model.field.sent-at"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="model.field.created-at"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="model.field.updated-at"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "model.queued-email.name",
+                "verbose_name_plural": "model.queued-email.name.plural",
+                "db_table": "mailer_queued_email",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "next_attempt_at"],
+                        name="mailer_queued_email_due",
+                    ),
+                    models.Index(
+                        fields=["created_at"], name="mailer_queued_email_created_at"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.7 on 2026-10-18 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailer", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="queuedemail",
+            name="group_key",
+            field=models.CharField(
+                blank=True,
+                max_length=100,
+                null=True,
+                verbose_name="model.field.group-key",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="queuedemail",
+            index=models.Index(
+                fields=["group_key", "status"], name="mailer_queued_email_group"
+            ),
+        ),
+    ]
@@ -0,0 +1,100 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from apps.mailer.enums import QueuedEmailStatus
+
+
+class QueuedEmail(models.Model):
+    class Meta:
+        db_table = "mailer_queued_email"
+        verbose_name = _("model.queued-email.name")
+        verbose_name_plural = _("model.queued-email.name.plural")
+
+        indexes = [
+            # due emails, drained in batches
+            models.Index(
+                fields=["status", "next_attempt_at"],
+                name="{0}_due".format(db_table),
+            ),
+            # pending emails of a group, extended by the next notifications
+            models.Index(
+                fields=["group_key", "status"],
+                name="{0}_group".format(db_table),
+            ),
+            models.Index(
+                fields=["created_at"],
+                name="{0}_created_at".format(db_table),
+            ),
+        ]
+
+    id = models.BigAutoField(
+        _("model.field.id"),
+        unique=True,
+        primary_key=True,
+    )
+
+    to = models.TextField(
+        _("model.field.to"),
+    )
+
+    subject = models.CharField(
+        _("model.field.subject"),
+        max_length=255,
+    )
+
+    # pickled list of EmailHelper.build_email arguments, one per coalesced
+    # notification, rendered when sent
+    payload = models.BinaryField(
+        _("model.field.payload"),
+    )
+
+    # cleared when the email is claimed to be sent
+    group_key = models.CharField(
+        _("model.field.group-key"),
+        max_length=100,
+        blank=True,
+        null=True,
+    )
+
+    status = models.CharField(
+        _("model.field.status"),
+        max_length=25,
+        choices=QueuedEmailStatus.choices,
+        default=QueuedEmailStatus.PENDING,
+    )
+
+    attempts = models.PositiveIntegerField(
+        _("model.field.attempts"),
+        default=0,
+    )
+
+    error = models.TextField(
+        _("model.field.error"),
+        blank=True,
+        null=True,
+    )
+
+    next_attempt_at = models.DateTimeField(
+        _("model.field.next-attempt-at"),
+        default=timezone.now,
+    )
+
+    sent_at = models.DateTimeField(
+        _("model.field.sent-at"),
+        blank=True,
+        null=True,
+    )
+
+    created_at = models.DateTimeField(
+        _("model.field.created-at"),
+        auto_now_add=True,
+    )
+
+    updated_at = models.DateTimeField(
+        _("model.field.updated-at"),
+        auto_now=True,
+    )
+
+    def __str__(self):
+        return f"{self.to} - {self.subject}"
@@ -0,0 +1,248 @@
+import pickle
+import smtplib
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.core import mail
+from django.core.mail import get_connection
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django_q.models import Schedule
+
+from apps.mailer.enums import QueuedEmailStatus
+from apps.mailer.helpers import MAILER_DRAIN_FUNC, MailerHelper
+from apps.mailer.models import QueuedEmail
+
+
+@override_settings(
+    EMAIL_COALESCE_WINDOW=0,
+    EMAIL_BATCH_SIZE=2,
+    EMAIL_MAX_ATTEMPTS=2,
+    EMAIL_RETRY_DELAY=60,
+)
+@patch("pyaa.helpers.email.render_to_string", return_value="<p>Body</p>")
+class MailerHelperTest(TestCase):
+    def queue(self, to="user@example.com", subject="Subject", group_key=None):
+        return MailerHelper.queue(
+            subject=subject,
+            to=[to],
+            template="emails/dummy.html",
+            group_key=group_key,
+        )
+
+    @patch("apps.mailer.helpers.async_task", return_value="task-1")
+    def test_queue_schedules_a_drain_on_commit(self, mock_async_task, mock_render):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            email = self.queue()
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(email.status, QueuedEmailStatus.PENDING)
+        self.assertEqual(email.to, "user@example.com")
+        self.assertEqual(email.subject, "Subject")
+        mock_async_task.assert_called_once_with(MailerHelper.drain)
+        self.assertEqual(len(mail.outbox), 0)
+
+    @patch("apps.mailer.helpers.async_task", return_value="task-1")
+    def test_rolled_back_email_is_not_scheduled(self, mock_async_task, mock_render):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    self.queue()
+                    raise ValueError("rollback")
+            except ValueError:
+                pass
+
+        self.assertEqual(len(callbacks), 0)
+        self.assertFalse(QueuedEmail.objects.exists())
+        mock_async_task.assert_not_called()
+
+    @patch("apps.mailer.helpers.get_connection", wraps=get_connection)
+    def test_drain_sends_each_batch_over_one_connection(
+        self, mock_get_connection, mock_render
+    ):
+        for number in range(3):
+            self.queue(f"user{number}@example.com")
+
+        stats = MailerHelper.drain()
+
+        self.assertEqual(stats, {"sent": 3, "failed": 0})
+        self.assertEqual(mock_get_connection.call_count, 2)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ["user0@example.com", "user1@example.com", "user2@example.com"],
+        )
+        self.assertFalse(
+            QueuedEmail.objects.exclude(status=QueuedEmailStatus.SENT).exists()
+        )
+
+    @patch("apps.mailer.helpers.async_task", return_value="task-1")
+    def test_queue_coalesces_emails_of_a_group(self, mock_async_task, mock_render):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            first = self.queue(subject="First", group_key="customer:1")
+            second = self.queue(subject="Second", group_key="customer:1")
+            other = self.queue(subject="Other", group_key="customer:2")
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertNotEqual(first.pk, other.pk)
+        self.assertEqual(len(callbacks), 2)
+        self.assertEqual(QueuedEmail.objects.count(), 2)
+        self.assertEqual(second.subject, "Updates on your account")
+        self.assertEqual(
+            [part["subject"] for part in pickle.loads(second.payload)],
+            ["First", "Second"],
+        )
+
+    def test_drain_sends_a_coalesced_email_once(self, mock_render):
+        self.queue(subject="First", group_key="customer:1")
+        self.queue(subject="Second", group_key="customer:1")
+
+        with patch(
+            "apps.mailer.helpers.render_to_string",
+            side_effect=["<p>First part</p>", "<p>Second part</p>"],
+        ):
+            stats = MailerHelper.drain()
+
+        self.assertEqual(stats, {"sent": 1, "failed": 0})
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "Updates on your account")
+
+        # the digest template got the rendered sections
+        context = mock_render.call_args[0][1]
+        self.assertEqual(
+            context["sections"], ["<p>First part</p>", "<p>Second part</p>"]
+        )
+
+    def test_claimed_email_is_not_extended(self, mock_render):
+        first = self.queue(group_key="customer:1")
+        MailerHelper.claim_batch()
+
+        second = self.queue(group_key="customer:1")
+
+        self.assertNotEqual(first.pk, second.pk)
+
+    def test_email_claimed_by_another_drain_is_not_claimed_again(self, mock_render):
+        self.queue()
+        email = QueuedEmail.objects.get()
+
+        # another drain claims the email after it was read
+        self.assertEqual(len(MailerHelper.claim_batch()), 1)
+
+        now = timezone.now()
+        self.assertFalse(MailerHelper.claim(email, now, now))
+
+    def test_email_extended_after_it_was_read_is_not_claimed(self, mock_render):
+        self.queue(subject="First", group_key="customer:1")
+        email = QueuedEmail.objects.get()
+
+        # a part is added after the drain read the email
+        self.queue(subject="Second", group_key="customer:1")
+
+        now = timezone.now()
+        self.assertFalse(MailerHelper.claim(email, now, now))
+
+        claimed = MailerHelper.claim_batch()
+
+        self.assertEqual(
+            [part["subject"] for part in pickle.loads(claimed[0].payload)],
+            ["First", "Second"],
+        )
+
+    def test_email_claimed_after_it_was_read_is_not_extended(self, mock_render):
+        first = self.queue(subject="First", group_key="customer:1")
+        email = QueuedEmail.objects.get()
+
+        # a drain claims the email before the part is added
+        MailerHelper.claim_batch()
+
+        self.assertFalse(MailerHelper.extend(email, {"subject": "Second"}))
+        self.assertEqual(len(pickle.loads(QueuedEmail.objects.get().payload)), 1)
+
+        second = self.queue(subject="Second", group_key="customer:1")
+
+        self.assertNotEqual(first.pk, second.pk)
+
+    @override_settings(EMAIL_COALESCE_WINDOW=10)
+    def test_drain_schedules_a_drain_for_the_window_of_grouped_emails(
+        self, mock_render
+    ):
+        email = self.queue(group_key="customer:1")
+
+        self.assertGreater(email.next_attempt_at, timezone.now())
+
+        stats = MailerHelper.drain()
+        MailerHelper.drain()
+
+        self.assertEqual(stats, {"sent": 0, "failed": 0})
+
+        # one drain runs when the window ends, the worker does not wait for it
+        drain = Schedule.objects.get(func=MAILER_DRAIN_FUNC)
+        self.assertEqual(drain.schedule_type, Schedule.ONCE)
+        self.assertEqual(drain.next_run, email.next_attempt_at)
+
+        QueuedEmail.objects.update(next_attempt_at=timezone.now())
+
+        self.assertEqual(MailerHelper.drain(), {"sent": 1, "failed": 0})
+
+    def test_drain_skips_emails_not_due(self, mock_render):
+        email = self.queue()
+        QueuedEmail.objects.filter(pk=email.pk).update(
+            next_attempt_at=timezone.now() + timedelta(minutes=5)
+        )
+
+        stats = MailerHelper.drain()
+
+        self.assertEqual(stats, {"sent": 0, "failed": 0})
+        self.assertEqual(len(mail.outbox), 0)
+
+    @patch("apps.mailer.helpers.MailerHelper.send_message")
+    def test_failed_email_is_retried_later_then_failed(
+        self, mock_send_message, mock_render
+    ):
+        mock_send_message.side_effect = smtplib.SMTPRecipientsRefused({})
+        email = self.queue()
+
+        stats = MailerHelper.drain()
+        email.refresh_from_db()
+
+        self.assertEqual(stats, {"sent": 0, "failed": 1})
+        self.assertEqual(email.status, QueuedEmailStatus.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+
+        QueuedEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        MailerHelper.drain()
+        email.refresh_from_db()
+
+        self.assertEqual(email.status, QueuedEmailStatus.FAILED)
+        self.assertEqual(email.attempts, 2)
+
+    @patch("apps.mailer.helpers.async_task", return_value="task-1")
+    def test_retry_queues_failed_emails_again(self, mock_async_task, mock_render):
+        email = self.queue()
+        QueuedEmail.objects.filter(pk=email.pk).update(
+            status=QueuedEmailStatus.FAILED, attempts=2
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            count = MailerHelper.retry(QueuedEmail.objects.all())
+
+        email.refresh_from_db()
+
+        self.assertEqual(count, 1)
+        self.assertEqual(email.status, QueuedEmailStatus.PENDING)
+        self.assertEqual(email.attempts, 0)
+        mock_async_task.assert_called_once()
+
+    def test_send_message_reconnects_when_the_connection_was_lost(self, mock_render):
+        connection = MagicMock()
+        connection.send_messages.side_effect = [
+            smtplib.SMTPServerDisconnected("lost"),
+            1,
+        ]
+
+        MailerHelper.send_message("message", connection)
+
+        self.assertEqual(connection.send_messages.call_count, 2)
+        connection.close.assert_called_once()
+        self.assertEqual(connection.open.call_count, 2)
@@ -1,26 +1,45 @@
-import csv
-
-from django.contrib import admin
-from django.http import HttpResponse
+from django.contrib import admin, messages
+from django.contrib.auth import get_permission_codename
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
 from django.utils.translation import gettext_lazy as _
 
-from apps.newsletter.models import NewsletterEntry
+from apps.newsletter.campaign import NewsletterCampaignHelper
+from apps.newsletter.enums import NewsletterCampaignStatus
+from apps.newsletter.forms import NewsletterImportForm
+from apps.newsletter.helpers import NewsletterHelper
+from apps.newsletter.models import (
+    NewsletterCampaign,
+    NewsletterDelivery,
+    NewsletterEntry,
+)
+from pyaa.mixins import EstimatedCountAdminMixin, StreamingExportAdminMixin
+
 
+class NewsletterEntryAdmin(StreamingExportAdminMixin, admin.ModelAdmin):
+    change_list_template = "admin/newsletter/newsletterentry/change_list.html"
 
-class NewsletterEntryAdmin(admin.ModelAdmin):
     list_display = (
         "id",
         "email",
+        "language",
+        "unsubscribed_at",
         "created_at",
     )
 
     list_display_links = (
         "id",
         "email",
+        "language",
+        "unsubscribed_at",
         "created_at",
     )
 
     list_filter = [
+        "language",
+        "unsubscribed_at",
         "created_at",
     ]
 
@@ -28,25 +47,25 @@ class NewsletterEntryAdmin(admin.ModelAdmin):
 
     ordering = ("-id",)
 
-    readonly_fields = ("created_at",)
+    readonly_fields = ("unsubscribed_at", "created_at")
 
     search_fields = [
         "email",
     ]
 
-    actions = ["export_as_csv"]
+    export_fields = ("id", "email", "created_at")
 
     fieldsets = (
         (
             _("admin.fieldsets.general"),
             {
-                "fields": ("email",),
+                "fields": ("email", "language"),
             },
         ),
         (
             _("admin.fieldsets.important-dates"),
             {
-                "fields": ("created_at",),
+                "fields": ("unsubscribed_at", "created_at"),
             },
         ),
     )
@@ -57,27 +76,210 @@ class NewsletterEntryAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         return False
 
-    def export_as_csv(self, request, queryset):
-        meta = self.model._meta
-        field_names = ["id", "email", "created_at"]
+    def has_import_permission(self, request):
+        # entries are not added one by one, the add permission allows imports
+        codename = get_permission_codename("add", self.opts)
+        return request.user.has_perm(f"{self.opts.app_label}.{codename}")
+
+    def get_urls(self):
+        info = self.opts.app_label, self.opts.model_name
+
+        return [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="%s_%s_import" % info,
+            ),
+        ] + super().get_urls()
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {
+            **(extra_context or {}),
+            "has_import_permission": self.has_import_permission(request),
+        }
+
+        return super().changelist_view(request, extra_context=extra_context)
+
+    def import_view(self, request):
+        """Import the emails of an uploaded csv file"""
+        if not self.has_import_permission(request):
+            raise PermissionDenied
+
+        form = NewsletterImportForm(request.POST or None, request.FILES or None)
+
+        if request.method == "POST" and form.is_valid():
+            stats = NewsletterHelper.import_csv(form.cleaned_data["file"])
+
+            self.message_user(
+                request,
+                _("admin.newsletter-import.success") % stats,
+                messages.SUCCESS,
+            )
+
+            info = self.opts.app_label, self.opts.model_name
+            return redirect(reverse("admin:%s_%s_changelist" % info))
 
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = (
-            f"attachment; filename={meta.verbose_name_plural}.csv"
+        context = {
+            **self.admin_site.each_context(request),
+            "title": _("admin.newsletter-import.title"),
+            "opts": self.opts,
+            "form": form,
+        }
+
+        return TemplateResponse(
+            request, "admin/newsletter/newsletterentry/import.html", context
         )
 
-        # bom for excel
-        response.write("\ufeff".encode("utf-8"))
 
-        writer = csv.writer(response)
-        writer.writerow(field_names)
+class NewsletterCampaignAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "title",
+        "status",
+        "progress",
+        "created_at",
+    )
+
+    list_display_links = (
+        "id",
+        "title",
+        "status",
+        "progress",
+        "created_at",
+    )
+
+    list_filter = [
+        "status",
+        "created_at",
+    ]
+
+    list_per_page = 20
+
+    ordering = ("-id",)
+
+    search_fields = [
+        "title",
+        "subject",
+    ]
+
+    readonly_fields = (
+        "status",
+        "total_count",
+        "sent_count",
+        "failed_count",
+        "started_at",
+        "finished_at",
+        "created_at",
+        "updated_at",
+    )
+
+    actions = ["start_campaigns", "pause_campaigns"]
+
+    fieldsets = (
+        (
+            _("admin.fieldsets.general"),
+            {
+                "fields": (
+                    "title",
+                    "subject",
+                    "content",
+                ),
+            },
+        ),
+        (
+            _("admin.fieldsets.details"),
+            {
+                "fields": (
+                    "status",
+                    "total_count",
+                    "sent_count",
+                    "failed_count",
+                ),
+            },
+        ),
+        (
+            _("admin.fieldsets.important-dates"),
+            {
+                "fields": (
+                    "started_at",
+                    "finished_at",
+                    "created_at",
+                    "updated_at",
+                ),
+            },
+        ),
+    )
+
+    def get_readonly_fields(self, request, obj=None):
+        # the email of a started campaign is not changed
+        if obj and obj.status != NewsletterCampaignStatus.DRAFT:
+            return ("title", "subject", "content") + self.readonly_fields
+
+        return self.readonly_fields
+
+    def progress(self, obj):
+        return f"{obj.sent_count + obj.failed_count} / {obj.total_count}"
+
+    progress.short_description = _("model.field.progress")
+
+    def start_campaigns(self, request, queryset):
+        for campaign in queryset:
+            NewsletterCampaignHelper.start(campaign)
+
+        self.message_user(request, _("admin.newsletter-campaign.started"))
+
+    start_campaigns.short_description = _("admin.action.start-campaign")
+
+    def pause_campaigns(self, request, queryset):
+        for campaign in queryset:
+            NewsletterCampaignHelper.pause(campaign)
+
+        self.message_user(request, _("admin.newsletter-campaign.paused"))
+
+    pause_campaigns.short_description = _("admin.action.pause-campaign")
+
+
+class NewsletterDeliveryAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
+    list_display = (
+        "id",
+        "campaign",
+        "email",
+        "language",
+        "status",
+        "sent_at",
+    )
+
+    list_display_links = (
+        "id",
+        "campaign",
+        "email",
+        "language",
+        "status",
+        "sent_at",
+    )
+
+    list_filter = [
+        "status",
+        "campaign",
+    ]
+
+    list_select_related = ["campaign"]
+
+    ordering = ("-id",)
 
-        for obj in queryset:
-            writer.writerow([getattr(obj, field) for field in field_names])
+    search_fields = [
+        "email",
+    ]
 
-        return response
+    readonly_fields = [field.name for field in NewsletterDelivery._meta.fields]
 
-    export_as_csv.short_description = _("admin.action.export-as-csv")
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 admin.site.register(NewsletterEntry, NewsletterEntryAdmin)
+admin.site.register(NewsletterCampaign, NewsletterCampaignAdmin)
+admin.site.register(NewsletterDelivery, NewsletterDeliveryAdmin)
@@ -0,0 +1,463 @@
+import logging
+import smtplib
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone, translation
+from django_q.models import Schedule
+from django_q.tasks import async_task, schedule
+
+from apps.newsletter.enums import NewsletterCampaignStatus, NewsletterDeliveryStatus
+from apps.newsletter.models import (
+    NewsletterCampaign,
+    NewsletterDelivery,
+    NewsletterEntry,
+)
+from pyaa.helpers.email import EmailHelper
+
+logger = logging.getLogger(__name__)
+
+# replaced by the unsubscribe url of each delivery in the email rendered once
+UNSUBSCRIBE_URL_PLACEHOLDER = "__unsubscribe_url__"
+
+# errors of a single recipient, the connection is still usable,
+# an invalid address or a refused recipient
+RECIPIENT_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    ValueError,
+)
+
+
+class NewsletterCampaignHelper:
+    @staticmethod
+    @transaction.atomic
+    def start(campaign):
+        """
+        Start a draft campaign or resume a paused one. The deliveries are
+        created and the batches sent by django-q tasks, the chain of a previous
+        start stops after its running batch.
+        """
+        campaign = NewsletterCampaign.objects.select_for_update().get(pk=campaign.pk)
+
+        if campaign.status == NewsletterCampaignStatus.DRAFT:
+            campaign.started_at = timezone.now()
+        elif campaign.status != NewsletterCampaignStatus.PAUSED:
+            return campaign
+
+        campaign.status = NewsletterCampaignStatus.SENDING
+        campaign.task_token = uuid.uuid4()
+        campaign.attempts = 0
+        campaign.save()
+
+        # schedule after commit, so the worker finds the campaign sending
+        if campaign.total_count:
+            transaction.on_commit(lambda: NewsletterCampaignHelper.schedule(campaign))
+        else:
+            transaction.on_commit(
+                lambda: async_task(
+                    NewsletterCampaignHelper.prepare, campaign.pk, campaign.task_token
+                )
+            )
+
+        return campaign
+
+    @staticmethod
+    def prepare(campaign_id, task_token):
+        """
+        Create the pending delivery of each newsletter entry, then schedule the
+        first batch. It is the first task of a started campaign, run again when
+        a campaign paused before it finished is resumed.
+        """
+        campaign = NewsletterCampaign.objects.get(pk=campaign_id)
+
+        if (
+            campaign.status != NewsletterCampaignStatus.SENDING
+            or campaign.task_token != task_token
+        ):
+            return campaign
+
+        total_count = NewsletterCampaignHelper.create_deliveries(campaign)
+
+        if NewsletterCampaign.objects.filter(
+            pk=campaign.pk,
+            status=NewsletterCampaignStatus.SENDING,
+            task_token=task_token,
+        ).update(total_count=total_count):
+            NewsletterCampaignHelper.schedule(campaign)
+
+        campaign.refresh_from_db()
+
+        return campaign
+
+    @staticmethod
+    def pause(campaign):
+        """
+        Pause a sending campaign, the running batch finishes and no other starts.
+        """
+        return NewsletterCampaign.objects.filter(
+            pk=campaign.pk, status=NewsletterCampaignStatus.SENDING
+        ).update(status=NewsletterCampaignStatus.PAUSED)
+
+    @staticmethod
+    def create_deliveries(campaign):
+        """
+        Create the pending deliveries of the subscribed newsletter entries, in
+        batches. Deliveries created before are kept, so it can run again.
+        """
+        batch_size = settings.NEWSLETTER_CAMPAIGN_BATCH_SIZE
+        entries = (
+            NewsletterEntry.objects.filter(unsubscribed_at__isnull=True)
+            .order_by("id")
+            .values_list("email", "language", "token")
+        )
+        batch = []
+
+        for email, language, token in entries.iterator(chunk_size=batch_size):
+            batch.append(
+                NewsletterDelivery(
+                    campaign=campaign, email=email, language=language, token=token
+                )
+            )
+
+            if len(batch) >= batch_size:
+                NewsletterDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+
+        NewsletterDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+
+        return campaign.deliveries.count()
+
+    @staticmethod
+    def schedule(campaign, delay=None):
+        """
+        Schedule the next batch of the campaign task chain, after a delay in seconds.
+        """
+        if delay:
+            task_id = schedule(
+                "apps.newsletter.campaign.NewsletterCampaignHelper.send_batch",
+                campaign.pk,
+                campaign.task_token,
+                schedule_type=Schedule.ONCE,
+                next_run=timezone.now() + timedelta(seconds=delay),
+            ).pk
+        else:
+            task_id = async_task(
+                NewsletterCampaignHelper.send_batch, campaign.pk, campaign.task_token
+            )
+
+        logger.info(f"Newsletter campaign {campaign.pk} batch scheduled: {task_id}")
+
+        return task_id
+
+    @staticmethod
+    def get_claimable_deliveries(campaign):
+        """
+        Return the pending deliveries of the campaign that no task is sending.
+        """
+        return campaign.deliveries.filter(
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=timezone.now()),
+            status=NewsletterDeliveryStatus.PENDING,
+        )
+
+    @staticmethod
+    def send_batch(campaign_id, task_token):
+        """
+        Send the next NEWSLETTER_CAMPAIGN_BATCH_SIZE pending deliveries of a
+        campaign over one mail connection, then schedule the next batch.
+
+        Only the chain of the last start sends batches, the chain of a paused
+        and resumed campaign stops. Each delivery is claimed before it is sent
+        and its status stored after, so a batch interrupted by a connection
+        error or a lost worker is resumed from the deliveries still pending.
+        A batch stopped by an error is retried with backoff, up to
+        NEWSLETTER_CAMPAIGN_MAX_ATTEMPTS times, then the campaign is paused.
+        """
+        campaign = NewsletterCampaign.objects.get(pk=campaign_id)
+
+        if (
+            campaign.status != NewsletterCampaignStatus.SENDING
+            or campaign.task_token != task_token
+        ):
+            return campaign
+
+        batch_size = settings.NEWSLETTER_CAMPAIGN_BATCH_SIZE
+        deliveries = list(
+            NewsletterCampaignHelper.get_claimable_deliveries(campaign).order_by("id")[
+                :batch_size
+            ]
+        )
+
+        stats = {"sent": 0, "failed": 0}
+
+        owned = NewsletterCampaign.objects.filter(
+            pk=campaign.pk,
+            status=NewsletterCampaignStatus.SENDING,
+            task_token=task_token,
+        )
+
+        failed = False
+
+        try:
+            NewsletterCampaignHelper.send_deliveries(
+                campaign, NewsletterCampaignHelper.skip_unsubscribed(deliveries), stats
+            )
+        except Exception as e:
+            logger.warning(f"Newsletter campaign {campaign.pk} batch failed: {e}")
+            failed = True
+
+        # the counts of an interrupted batch are stored too
+        NewsletterCampaign.objects.filter(pk=campaign.pk).update(
+            sent_count=F("sent_count") + stats["sent"],
+            failed_count=F("failed_count") + stats["failed"],
+        )
+
+        if failed:
+            return NewsletterCampaignHelper.retry(campaign, owned)
+
+        if campaign.attempts:
+            owned.update(attempts=0)
+
+        if not campaign.deliveries.filter(
+            status=NewsletterDeliveryStatus.PENDING
+        ).exists():
+            owned.update(
+                status=NewsletterCampaignStatus.SENT,
+                finished_at=timezone.now(),
+            )
+        elif owned.exists():
+            # deliveries claimed by another task are retried after their lease
+            NewsletterCampaignHelper.schedule(
+                campaign,
+                delay=None if deliveries else settings.NEWSLETTER_CAMPAIGN_LEASE,
+            )
+
+        campaign.refresh_from_db()
+
+        return campaign
+
+    @staticmethod
+    def skip_unsubscribed(deliveries):
+        """
+        Mark the deliveries of entries unsubscribed or removed after the campaign
+        started as unsubscribed, and return the others.
+        """
+        if not deliveries:
+            return deliveries
+
+        subscribed = set(
+            NewsletterEntry.objects.filter(
+                token__in=[delivery.token for delivery in deliveries if delivery.token],
+                unsubscribed_at__isnull=True,
+            ).values_list("token", flat=True)
+        )
+
+        skipped = [
+            delivery.pk for delivery in deliveries if delivery.token not in subscribed
+        ]
+
+        if skipped:
+            NewsletterDelivery.objects.filter(
+                pk__in=skipped, status=NewsletterDeliveryStatus.PENDING
+            ).update(status=NewsletterDeliveryStatus.UNSUBSCRIBED)
+
+        return [delivery for delivery in deliveries if delivery.token in subscribed]
+
+    @staticmethod
+    def retry(campaign, owned):
+        """
+        Schedule a failed batch again after NEWSLETTER_CAMPAIGN_RETRY_DELAY
+        seconds, doubled on each attempt, or pause the campaign after
+        NEWSLETTER_CAMPAIGN_MAX_ATTEMPTS attempts.
+        """
+        if campaign.attempts + 1 >= settings.NEWSLETTER_CAMPAIGN_MAX_ATTEMPTS:
+            logger.error(
+                f"Newsletter campaign {campaign.pk} paused after {campaign.attempts + 1} failed batches"
+            )
+
+            owned.update(status=NewsletterCampaignStatus.PAUSED, attempts=0)
+        elif owned.update(attempts=F("attempts") + 1):
+            NewsletterCampaignHelper.schedule(
+                campaign,
+                delay=settings.NEWSLETTER_CAMPAIGN_RETRY_DELAY * 2**campaign.attempts,
+            )
+
+        campaign.refresh_from_db()
+
+        return campaign
+
+    @staticmethod
+    def send_deliveries(campaign, deliveries, stats):
+        """
+        Send the deliveries over one reused connection, at most
+        NEWSLETTER_CAMPAIGN_RATE_LIMIT messages per second, counting the sent
+        and failed ones in stats.
+        """
+        if not deliveries:
+            return stats
+
+        rendered = {}
+        site = Site.objects.get_current()
+
+        rate_limit = settings.NEWSLETTER_CAMPAIGN_RATE_LIMIT
+        interval = 1 / rate_limit if rate_limit > 0 else 0
+        started_at = time.monotonic()
+
+        with get_connection() as connection:
+            for index, delivery in enumerate(deliveries):
+                # the email is rendered once per language
+                language = delivery.language or settings.LANGUAGE_CODE
+
+                if language not in rendered:
+                    rendered[language] = NewsletterCampaignHelper.render(
+                        campaign, language
+                    )
+
+                subject, html_message, text_message = rendered[language]
+                unsubscribe_url = NewsletterCampaignHelper.get_unsubscribe_url(
+                    site, delivery
+                )
+
+                message = EmailMultiAlternatives(
+                    subject=subject,
+                    body=text_message.replace(
+                        UNSUBSCRIBE_URL_PLACEHOLDER, unsubscribe_url
+                    ),
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=[delivery.email],
+                    connection=connection,
+                    # one click unsubscribe of the mail clients, rfc 8058
+                    headers={
+                        "List-Unsubscribe": f"<{unsubscribe_url}>",
+                        "List-Unsubscribe-Post": "List-Unsubscribe=One-Click",
+                    },
+                )
+                message.attach_alternative(
+                    html_message.replace(UNSUBSCRIBE_URL_PLACEHOLDER, unsubscribe_url),
+                    "text/html",
+                )
+
+                # wait for the slot of the message within the rate limit
+                delay = started_at + index * interval - time.monotonic()
+
+                if delay > 0:
+                    time.sleep(delay)
+
+                # a delivery claimed by another task meanwhile is skipped
+                if not NewsletterCampaignHelper.claim(delivery):
+                    continue
+
+                # other errors stop the batch, its deliveries stay pending
+                try:
+                    connection.send_messages([message])
+                except RECIPIENT_ERRORS as e:
+                    if NewsletterCampaignHelper.retry_later(delivery, e):
+                        continue
+
+                    logger.warning(
+                        f"Newsletter campaign {campaign.pk} failed for {delivery.email}: {e}"
+                    )
+
+                    NewsletterDelivery.objects.filter(pk=delivery.pk).update(
+                        status=NewsletterDeliveryStatus.FAILED,
+                        error=str(e),
+                    )
+                    stats["failed"] += 1
+                    continue
+                except Exception:
+                    NewsletterDelivery.objects.filter(pk=delivery.pk).update(
+                        next_attempt_at=None
+                    )
+                    raise
+
+                NewsletterDelivery.objects.filter(pk=delivery.pk).update(
+                    status=NewsletterDeliveryStatus.SENT,
+                    sent_at=timezone.now(),
+                )
+                stats["sent"] += 1
+
+        return stats
+
+    @staticmethod
+    def claim(delivery):
+        """
+        Lease a pending delivery for NEWSLETTER_CAMPAIGN_LEASE seconds, with a
+        conditional update, returning if it was claimed.
+        """
+        now = timezone.now()
+
+        return (
+            NewsletterDelivery.objects.filter(
+                Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now),
+                pk=delivery.pk,
+                status=NewsletterDeliveryStatus.PENDING,
+            ).update(
+                next_attempt_at=now
+                + timedelta(seconds=settings.NEWSLETTER_CAMPAIGN_LEASE)
+            )
+            == 1
+        )
+
+    @staticmethod
+    def is_permanent_error(error):
+        """
+        Return if a recipient error is permanent, an invalid address or 5xx replies.
+        """
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return all(code >= 500 for code, _ in error.recipients.values())
+
+        return True
+
+    @staticmethod
+    def retry_later(delivery, error):
+        """
+        Keep a delivery with a transient recipient error pending, retried after
+        NEWSLETTER_CAMPAIGN_RETRY_DELAY seconds, up to NEWSLETTER_CAMPAIGN_MAX_ATTEMPTS
+        attempts. Return if it is retried.
+        """
+        if NewsletterCampaignHelper.is_permanent_error(error):
+            return False
+
+        if delivery.attempts + 1 >= settings.NEWSLETTER_CAMPAIGN_MAX_ATTEMPTS:
+            return False
+
+        NewsletterDelivery.objects.filter(pk=delivery.pk).update(
+            attempts=F("attempts") + 1,
+            error=str(error),
+            next_attempt_at=timezone.now()
+            + timedelta(seconds=settings.NEWSLETTER_CAMPAIGN_RETRY_DELAY),
+        )
+
+        return True
+
+    @staticmethod
+    def get_unsubscribe_url(site, delivery):
+        """
+        Return the unsubscribe url of a delivery, with the token of its entry.
+        """
+        unsubscribe_path = reverse(
+            "newsletter_unsubscribe", kwargs={"token": delivery.token}
+        )
+
+        return f"https://{site.domain}{unsubscribe_path}"
+
+    @staticmethod
+    def render(campaign, language):
+        """
+        Return the subject, html and text of the campaign email in a language,
+        with a placeholder for the unsubscribe url.
+        """
+        with translation.override(language):
+            html_message = render_to_string(
+                "emails/newsletter/campaign.html",
+                {"campaign": campaign, "unsubscribe_url": UNSUBSCRIBE_URL_PLACEHOLDER},
+            )
+
+        return campaign.subject, html_message, EmailHelper.html_to_text(html_message)
@@ -0,0 +1,24 @@
+from django.db.models.enums import TextChoices
+from django.utils.translation import gettext_lazy as _
+
+
+class NewsletterCampaignStatus(TextChoices):
+    DRAFT = "draft", _("enum.newsletter-campaign-status.draft")
+    SENDING = "sending", _("enum.newsletter-campaign-status.sending")
+    PAUSED = "paused", _("enum.newsletter-campaign-status.paused")
+    SENT = "sent", _("enum.newsletter-campaign-status.sent")
+
+    @classmethod
+    def get_choices(cls):
+        return tuple((i.name, i.value) for i in cls)
+
+
+class NewsletterDeliveryStatus(TextChoices):
+    PENDING = "pending", _("enum.newsletter-delivery-status.pending")
+    SENT = "sent", _("enum.newsletter-delivery-status.sent")
+    FAILED = "failed", _("enum.newsletter-delivery-status.failed")
+    UNSUBSCRIBED = "unsubscribed", _("enum.newsletter-delivery-status.unsubscribed")
+
+    @classmethod
+    def get_choices(cls):
+        return tuple((i.name, i.value) for i in cls)
@@ -12,3 +12,10 @@ class NewsletterForm(forms.Form):
             }
         ),
     )
+
+
+class NewsletterImportForm(forms.Form):
+    file = forms.FileField(
+        label=_("model.field.file"),
+        help_text=_("admin.newsletter-import.help"),
+    )
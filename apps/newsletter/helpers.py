@@ -1,4 +1,11 @@
+import csv
+import io
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
 from django.db import transaction
+from django.utils import timezone
 
 from apps.newsletter.models import NewsletterEntry
 
@@ -6,16 +13,152 @@ from apps.newsletter.models import NewsletterEntry
 class NewsletterHelper:
     @staticmethod
     @transaction.atomic
-    def subscribe(email):
+    def subscribe(email, language=None):
         """
         Subscribe an email to the newsletter.
-        If the email already exists, it will not raise an error.
+        The email is stored lowercase and matched with an exact lookup, so
+        it is not subscribed twice by the form and the csv import.
+        If the email already exists, it will not raise an error, and it is
+        subscribed again when it was unsubscribed.
 
         :param email: The email to subscribe
+        :param language: The language code of the campaigns sent to the email
         :return: The newsletter object
         """
+        email = email.strip().lower()
+
         newsletter, _ = NewsletterEntry.objects.get_or_create(
             email=email,
-            defaults={"email": email},
+            defaults={"language": language or ""},
         )
+
+        if newsletter.unsubscribed_at:
+            newsletter.unsubscribed_at = None
+            newsletter.save(update_fields=["unsubscribed_at"])
+
         return newsletter
+
+    @staticmethod
+    def unsubscribe(entry):
+        """
+        Unsubscribe a newsletter entry from the next campaigns.
+        The entry is kept, so a csv import does not subscribe it again.
+
+        :param entry: The newsletter entry of the unsubscribe link
+        :return: True if it was subscribed
+        """
+        return (
+            NewsletterEntry.objects.filter(
+                pk=entry.pk, unsubscribed_at__isnull=True
+            ).update(unsubscribed_at=timezone.now())
+            == 1
+        )
+
+    @staticmethod
+    def normalize_email(email):
+        """
+        Return the trimmed lowercase email, or None when it is not valid.
+        """
+        email = (email or "").strip().lower()
+
+        try:
+            validate_email(email)
+        except ValidationError:
+            return None
+
+        return email
+
+    @staticmethod
+    def read_emails(file):
+        """
+        Yield the emails of a csv text stream, row by row.
+        The email column is the one named "email" in the header, or the first one.
+        """
+        reader = csv.reader(file)
+        column = 0
+
+        for number, row in enumerate(reader):
+            if not row:
+                continue
+
+            if number == 0:
+                names = [name.strip().lower() for name in row]
+
+                if "email" in names:
+                    column = names.index("email")
+                    continue
+
+            yield row[column] if column < len(row) else ""
+
+    @staticmethod
+    def import_csv(file, batch_size=None, progress=None):
+        """
+        Import the emails of a csv file to the newsletter.
+
+        The file is a binary or text stream, parsed while it is read. Emails are
+        normalized and deduplicated in memory, then inserted in batches with
+        bulk_create, ignoring the ones that already exist. Progress is called
+        with the stats after each batch.
+
+        :param file: The csv file
+        :param batch_size: Emails inserted per query, NEWSLETTER_IMPORT_BATCH_SIZE by default
+        :param progress: Optional callable receiving the stats dict
+        :return: The stats dict with rows, created, existing, duplicated and invalid counts
+        """
+        if batch_size is None:
+            batch_size = settings.NEWSLETTER_IMPORT_BATCH_SIZE
+
+        if not isinstance(file, io.TextIOBase):
+            file = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+
+        stats = {"rows": 0, "created": 0, "existing": 0, "duplicated": 0, "invalid": 0}
+        seen = set()
+        batch = []
+
+        for value in NewsletterHelper.read_emails(file):
+            stats["rows"] += 1
+            email = NewsletterHelper.normalize_email(value)
+
+            if email is None:
+                stats["invalid"] += 1
+                continue
+
+            if email in seen:
+                stats["duplicated"] += 1
+                continue
+
+            seen.add(email)
+            batch.append(email)
+
+            if len(batch) >= batch_size:
+                NewsletterHelper.import_batch(batch, stats)
+                batch = []
+
+                if progress:
+                    progress(stats)
+
+        if batch:
+            NewsletterHelper.import_batch(batch, stats)
+
+            if progress:
+                progress(stats)
+
+        return stats
+
+    @staticmethod
+    @transaction.atomic
+    def import_batch(emails, stats):
+        # emails are stored lowercase, so the indexed lookup matches them
+        entries = NewsletterEntry.objects.filter(email__in=emails)
+        before = entries.count()
+
+        NewsletterEntry.objects.bulk_create(
+            [NewsletterEntry(email=email) for email in emails],
+            ignore_conflicts=True,
+        )
+
+        # rows inserted meanwhile by another subscription are counted as created
+        created = entries.count() - before
+
+        stats["created"] += created
+        stats["existing"] += len(emails) - created
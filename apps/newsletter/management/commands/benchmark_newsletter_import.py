@@ -0,0 +1,82 @@
+import io
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.newsletter.helpers import NewsletterHelper
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput of the batched newsletter import and one "
+        "subscribe per email, rolled back at the end"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=100000,
+            help="Emails imported in batches (default: 100000)",
+        )
+
+        parser.add_argument(
+            "--subscribe-rows",
+            type=int,
+            default=1000,
+            help="Emails subscribed one by one, 0 to skip (default: 1000)",
+        )
+
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.NEWSLETTER_IMPORT_BATCH_SIZE,
+            help="Number of emails inserted per query",
+        )
+
+    def handle(self, *args, **options):
+        if options["rows"] < 1 or options["batch_size"] < 1:
+            raise CommandError("Rows and batch size must be at least 1")
+
+        file = self.build_csv(options["rows"])
+
+        with transaction.atomic():
+            started_at = time.perf_counter()
+            stats = NewsletterHelper.import_csv(file, batch_size=options["batch_size"])
+            elapsed = time.perf_counter() - started_at
+
+            self.write_result(
+                f"import ({options['batch_size']})", stats["rows"], elapsed
+            )
+
+            if options["subscribe_rows"] > 0:
+                started_at = time.perf_counter()
+
+                for index in range(options["subscribe_rows"]):
+                    NewsletterHelper.subscribe(
+                        f"benchmark-subscribe{index}@example.com"
+                    )
+
+                elapsed = time.perf_counter() - started_at
+
+                self.write_result("subscribe", options["subscribe_rows"], elapsed)
+
+            # the benchmark leaves the table untouched
+            transaction.set_rollback(True)
+
+    def build_csv(self, rows):
+        lines = ["email"]
+
+        for index in range(rows):
+            # every 10th email repeats the previous one, as in real lists
+            number = index - 1 if index % 10 == 9 else index
+            lines.append(f"benchmark{number}@example.com")
+
+        return io.StringIO("\n".join(lines))
+
+    def write_result(self, mode, rows, elapsed):
+        self.stdout.write(
+            f"{mode}: {rows} rows in {elapsed:.3f} s, {rows / elapsed:.0f} rows per second"
+        )
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.newsletter.helpers import NewsletterHelper
+
+
+class Command(BaseCommand):
+    help = "Import newsletter emails from a csv file, in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "file",
+            help="CSV file with an email column, or the emails in the first column",
+        )
+
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.NEWSLETTER_IMPORT_BATCH_SIZE,
+            help="Number of emails inserted per query",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("The batch size must be at least 1")
+
+        try:
+            file = open(options["file"], encoding="utf-8-sig", newline="")
+        except OSError as e:
+            raise CommandError(f"Unable to open the file: {e}")
+
+        with file:
+            stats = NewsletterHelper.import_csv(
+                file, batch_size=options["batch_size"], progress=self.progress
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {stats['created']} newsletter emails "
+                f"({stats['existing']} existing, {stats['duplicated']} duplicated, "
+                f"{stats['invalid']} invalid)"
+            )
+        )
+
+    def progress(self, stats):
+        self.stdout.write(f"{stats['rows']} rows read, {stats['created']} created")
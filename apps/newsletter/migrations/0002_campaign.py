@@ -0,0 +1,203 @@
+# Generated by Django 6.0.7 on 2026-10-18 01:56
+
+import django.db.models.deletion
+import tinymce.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsletter", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="newsletterentry",
+            name="language",
+            field=models.CharField(
+                blank=True,
+                default="",
+                max_length=10,
+                verbose_name="model.field.language",
+            ),
+        ),
+        migrations.CreateModel(
+            name="NewsletterCampaign",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "title",
+                    models.CharField(max_length=255, verbose_name="model.field.title"),
+                ),
+                (
+                    "subject",
+                    models.CharField(
+                        max_length=255, verbose_name="model.field.subject"
+                    ),
+                ),
+                (
+                    "content",
+                    tinymce.models.HTMLField(verbose_name="model.field.content"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("draft", "enum.newsletter-campaign-status.draft"),
+                            ("sending", "enum.newsletter-campaign-status.sending"),
+                            ("paused", "enum.newsletter-campaign-status.paused"),
+                            ("sent", "enum.newsletter-campaign-status.sent"),
+                        ],
+                        default="draft",
+                        max_length=25,
+                        verbose_name="model.field.status",
+                    ),
+                ),
+                (
+                    "total_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="model.field.total-count"
+                    ),
+                ),
+                (
+                    "sent_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="model.field.sent-count"
+                    ),
+                ),
+                (
+                    "failed_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="model.field.failed-count"
+                    ),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="model.field.started-at"
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="model.field.finished-at"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="model.field.created-at"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="model.field.updated-at"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "model.newsletter-campaign.name",
+                "verbose_name_plural": "model.newsletter-campaign.name.plural",
+                "db_table": "newsletter_campaign",
+                "indexes": [
+                    models.Index(fields=["status"], name="newsletter_campaign_status"),
+                    models.Index(
+                        fields=["created_at"], name="newsletter_campaign_created_at"
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="NewsletterDelivery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "email",
+                    models.EmailField(max_length=254, verbose_name="model.field.email"),
+                ),
+                (
+                    "language",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        max_length=10,
+                        verbose_name="model.field.language",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "enum.newsletter-delivery-status.pending"),
+                            ("sent", "enum.newsletter-delivery-status.sent"),
+                            ("failed", "enum.newsletter-delivery-status.failed"),
+                        ],
+                        default="pending",
+                        max_length=25,
+                        verbose_name="model.field.status",
+                    ),
+                ),
+                (
+                    "error",
+                    models.TextField(
+                        blank=True, null=True, verbose_name="model.field.error"
+                    ),
+                ),
+                (
+                    "sent_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="model.field.sent-at"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="model.field.created-at"
+                    ),
+                ),
+                (
+                    "campaign",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="deliveries",
+                        to="newsletter.newslettercampaign",
+                        verbose_name="model.field.campaign",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "model.newsletter-delivery.name",
+                "verbose_name_plural": "model.newsletter-delivery.name.plural",
+                "db_table": "newsletter_delivery",
+                "indexes": [
+                    models.Index(
+                        fields=["campaign", "status", "id"],
+                        name="newsletter_delivery_status",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("campaign", "email"), name="newsletter_delivery_unique"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.7 on 2026-10-18 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsletter", "0002_campaign"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="newslettercampaign",
+            name="task_token",
+            field=models.UUIDField(
+                blank=True,
+                default=None,
+                editable=False,
+                null=True,
+                verbose_name="model.field.task-token",
+            ),
+        ),
+        migrations.AddField(
+            model_name="newsletterdelivery",
+            name="next_attempt_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="model.field.next-attempt-at"
+            ),
+        ),
+    ]
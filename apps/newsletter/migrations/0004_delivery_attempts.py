@@ -0,0 +1,20 @@
+# Generated by Django 6.0.7 on 2026-10-18 02:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsletter", "0003_delivery_claim"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="newsletterdelivery",
+            name="attempts",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="model.field.attempts"
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.7 on 2026-10-18 14:10
+
+from django.db import migrations
+
+
+def lowercase_emails(apps, schema_editor):
+    NewsletterEntry = apps.get_model("newsletter", "NewsletterEntry")
+
+    kept = {}
+    deleted = []
+    updated = []
+
+    # the oldest entry of each email is kept, its case variants are removed
+    for pk, email in (
+        NewsletterEntry.objects.order_by("id").values_list("id", "email").iterator()
+    ):
+        if email.lower() in kept:
+            deleted.append(pk)
+            continue
+
+        kept[email.lower()] = pk
+
+        if email != email.lower():
+            updated.append(pk)
+
+    for index in range(0, len(deleted), 500):
+        NewsletterEntry.objects.filter(pk__in=deleted[index : index + 500]).delete()
+
+    for pk in updated:
+        entry = NewsletterEntry.objects.get(pk=pk)
+        entry.email = entry.email.lower()
+        entry.save(update_fields=["email"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsletter", "0005_campaign_attempts"),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 6.0.7 on 2026-10-18 14:40
+
+import uuid
+
+from django.db import migrations, models
+
+
+def create_tokens(apps, schema_editor):
+    NewsletterEntry = apps.get_model("newsletter", "NewsletterEntry")
+    NewsletterDelivery = apps.get_model("newsletter", "NewsletterDelivery")
+
+    tokens = {}
+
+    for entry in NewsletterEntry.objects.filter(token__isnull=True).iterator():
+        entry.token = tokens[entry.email] = uuid.uuid4()
+        entry.save(update_fields=["token"])
+
+    # pending deliveries of campaigns started before get the token of their entry
+    deliveries = NewsletterDelivery.objects.filter(status="pending", token__isnull=True)
+
+    for pk, email in deliveries.values_list("id", "email").iterator():
+        if email in tokens:
+            NewsletterDelivery.objects.filter(pk=pk).update(token=tokens[email])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("newsletter", "0006_lowercase_emails"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="newsletterentry",
+            name="token",
+            field=models.UUIDField(
+                editable=False, null=True, verbose_name="model.field.token"
+            ),
+        ),
+        migrations.AddField(
+            model_name="newsletterdelivery",
+            name="token",
+            field=models.UUIDField(
+                blank=True,
+                editable=False,
+                null=True,
+                verbose_name="model.field.token",
+            ),
+        ),
+        migrations.RunPython(create_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="newsletterentry",
+            name="token",
+            field=models.UUIDField(
+                default=uuid.uuid4,
+                editable=False,
+                unique=True,
+                verbose_name="model.field.token",
+            ),
+        ),
+        migrations.AddField(
+            model_name="newsletterentry",
+            name="unsubscribed_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="model.field.unsubscribed-at"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="newsletterdelivery",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "enum.newsletter-delivery-status.pending"),
+                    ("sent", "enum.newsletter-delivery-status.sent"),
+                    ("failed", "enum.newsletter-delivery-status.failed"),
+                    ("unsubscribed", "enum.newsletter-delivery-status.unsubscribed"),
+                ],
+                default="pending",
+                max_length=25,
+                verbose_name="model.field.status",
+            ),
+        ),
+    ]
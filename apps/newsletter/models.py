@@ -1,5 +1,10 @@
+import uuid
+
 from django.db import models
 from django.utils.translation import gettext_lazy as _
+from tinymce.models import HTMLField
+
+from apps.newsletter.enums import NewsletterCampaignStatus, NewsletterDeliveryStatus
 
 
 class NewsletterEntry(models.Model):
@@ -25,10 +30,217 @@ class NewsletterEntry(models.Model):
         null=False,
     )
 
+    # language code of the subscription, the default language when empty
+    language = models.CharField(
+        _("model.field.language"),
+        max_length=10,
+        blank=True,
+        default="",
+    )
+
+    # secret of the unsubscribe link of the campaign emails
+    token = models.UUIDField(
+        _("model.field.token"),
+        default=uuid.uuid4,
+        unique=True,
+        editable=False,
+    )
+
+    # unsubscribed entries are kept, so a later import does not subscribe them again
+    unsubscribed_at = models.DateTimeField(
+        _("model.field.unsubscribed-at"),
+        blank=True,
+        null=True,
+    )
+
     created_at = models.DateTimeField(
         _("model.field.created-at"),
         auto_now_add=True,
     )
 
+    def save(self, *args, **kwargs):
+        # emails are stored lowercase, so they are matched with exact lookups
+        self.email = self.email.strip().lower()
+
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.email
+
+
+class NewsletterCampaign(models.Model):
+    class Meta:
+        db_table = "newsletter_campaign"
+        verbose_name = _("model.newsletter-campaign.name")
+        verbose_name_plural = _("model.newsletter-campaign.name.plural")
+        indexes = [
+            models.Index(
+                fields=["status"],
+                name="{0}_status".format(db_table),
+            ),
+            models.Index(
+                fields=["created_at"],
+                name="{0}_created_at".format(db_table),
+            ),
+        ]
+
+    title = models.CharField(
+        _("model.field.title"),
+        max_length=255,
+    )
+
+    subject = models.CharField(
+        _("model.field.subject"),
+        max_length=255,
+    )
+
+    content = HTMLField(
+        _("model.field.content"),
+    )
+
+    status = models.CharField(
+        _("model.field.status"),
+        max_length=25,
+        choices=NewsletterCampaignStatus.choices,
+        default=NewsletterCampaignStatus.DRAFT,
+    )
+
+    total_count = models.PositiveIntegerField(
+        _("model.field.total-count"),
+        default=0,
+    )
+
+    sent_count = models.PositiveIntegerField(
+        _("model.field.sent-count"),
+        default=0,
+    )
+
+    failed_count = models.PositiveIntegerField(
+        _("model.field.failed-count"),
+        default=0,
+    )
+
+    started_at = models.DateTimeField(
+        _("model.field.started-at"),
+        blank=True,
+        null=True,
+    )
+
+    finished_at = models.DateTimeField(
+        _("model.field.finished-at"),
+        blank=True,
+        null=True,
+    )
+
+    # failed batches in a row, retried with backoff
+    attempts = models.PositiveIntegerField(
+        _("model.field.attempts"),
+        default=0,
+    )
+
+    # token of the task chain sending the campaign, a new one on each start
+    task_token = models.UUIDField(
+        _("model.field.task-token"),
+        default=None,
+        editable=False,
+        blank=True,
+        null=True,
+    )
+
+    created_at = models.DateTimeField(
+        _("model.field.created-at"),
+        auto_now_add=True,
+    )
+
+    updated_at = models.DateTimeField(
+        _("model.field.updated-at"),
+        auto_now=True,
+    )
+
+    def __str__(self):
+        return self.title
+
+
+class NewsletterDelivery(models.Model):
+    class Meta:
+        db_table = "newsletter_delivery"
+        verbose_name = _("model.newsletter-delivery.name")
+        verbose_name_plural = _("model.newsletter-delivery.name.plural")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["campaign", "email"],
+                name="newsletter_delivery_unique",
+            ),
+        ]
+        indexes = [
+            # deliveries of a campaign by status, read in batches
+            models.Index(
+                fields=["campaign", "status", "id"],
+                name="newsletter_delivery_status",
+            ),
+        ]
+
+    campaign = models.ForeignKey(
+        NewsletterCampaign,
+        on_delete=models.CASCADE,
+        related_name="deliveries",
+        verbose_name=_("model.field.campaign"),
+    )
+
+    email = models.EmailField(
+        _("model.field.email"),
+    )
+
+    language = models.CharField(
+        _("model.field.language"),
+        max_length=10,
+        blank=True,
+        default="",
+    )
+
+    # token of the entry, for the unsubscribe link of the email
+    token = models.UUIDField(
+        _("model.field.token"),
+        editable=False,
+        blank=True,
+        null=True,
+    )
+
+    status = models.CharField(
+        _("model.field.status"),
+        max_length=25,
+        choices=NewsletterDeliveryStatus.choices,
+        default=NewsletterDeliveryStatus.PENDING,
+    )
+
+    error = models.TextField(
+        _("model.field.error"),
+        blank=True,
+        null=True,
+    )
+
+    attempts = models.PositiveIntegerField(
+        _("model.field.attempts"),
+        default=0,
+    )
+
+    # a pending delivery is not sent again before this time, while a task sends it
+    next_attempt_at = models.DateTimeField(
+        _("model.field.next-attempt-at"),
+        blank=True,
+        null=True,
+    )
+
+    sent_at = models.DateTimeField(
+        _("model.field.sent-at"),
+        blank=True,
+        null=True,
+    )
+
+    created_at = models.DateTimeField(
+        _("model.field.created-at"),
+        auto_now_add=True,
+    )
+
+    def __str__(self):
+        return f"{self.campaign} - {self.email}"
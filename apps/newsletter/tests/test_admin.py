@@ -1,8 +1,16 @@
+from unittest.mock import patch
+
 from django.contrib.admin.sites import AdminSite
+from django.contrib.auth import get_user_model
+from django.contrib.sites.models import Site
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import RequestFactory, TestCase
+from django.urls import reverse
 
-from apps.newsletter.admin import NewsletterEntryAdmin
-from apps.newsletter.models import NewsletterEntry
+from apps.newsletter.admin import NewsletterCampaignAdmin, NewsletterEntryAdmin
+from apps.newsletter.campaign import NewsletterCampaignHelper
+from apps.newsletter.enums import NewsletterCampaignStatus
+from apps.newsletter.models import NewsletterCampaign, NewsletterEntry
 
 
 class NewsletterEntryAdminTest(TestCase):
@@ -28,7 +36,118 @@ class NewsletterEntryAdminTest(TestCase):
         self.assertEqual(response["Content-Type"], "text/csv")
         self.assertIn("attachment", response["Content-Disposition"])
 
-        content = response.content.decode("utf-8")
+        content = b"".join(response.streaming_content).decode("utf-8")
         self.assertIn("first@example.com", content)
         self.assertIn("second@example.com", content)
         self.assertIn("id,email,created_at", content)
+
+    def test_export_as_xlsx_returns_xlsx_response(self):
+        NewsletterEntry.objects.create(email="first@example.com")
+
+        queryset = NewsletterEntry.objects.all()
+        response = self.admin.export_as_xlsx(self.request, queryset)
+        content = b"".join(response.streaming_content)
+
+        self.assertIn("spreadsheetml", response["Content-Type"])
+        self.assertIn(".xlsx", response["Content-Disposition"])
+        self.assertTrue(content.startswith(b"PK"))
+
+
+class NewsletterImportAdminTest(TestCase):
+    def setUp(self):
+        self.url = reverse("admin:newsletter_newsletterentry_import")
+        self.changelist_url = reverse("admin:newsletter_newsletterentry_changelist")
+
+        self.admin_user = get_user_model().objects.create_superuser(
+            username=None,
+            password="adminpass",
+            email="admin@example.com",
+            site=Site.objects.get_current(),
+        )
+
+        self.client.force_login(self.admin_user)
+
+    def test_changelist_links_the_import(self):
+        response = self.client.get(self.changelist_url)
+
+        self.assertContains(response, self.url)
+
+    def test_upload_imports_the_emails(self):
+        file = SimpleUploadedFile(
+            "emails.csv", b"email\nfirst@example.com\nfirst@example.com\n"
+        )
+
+        response = self.client.post(self.url, {"file": file}, follow=True)
+
+        self.assertRedirects(response, self.changelist_url)
+        self.assertEqual(NewsletterEntry.objects.get().email, "first@example.com")
+        self.assertEqual(len(list(response.context["messages"])), 1)
+
+    def test_import_requires_the_add_permission(self):
+        staff = get_user_model().objects.create_user(
+            email="staff@example.com",
+            password="pass",
+            site=Site.objects.get_current(),
+            is_staff=True,
+        )
+        self.client.force_login(staff)
+
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class NewsletterCampaignAdminTest(TestCase):
+    def setUp(self):
+        self.admin = NewsletterCampaignAdmin(NewsletterCampaign, AdminSite())
+        self.url = reverse("admin:newsletter_newslettercampaign_changelist")
+
+        self.admin_user = get_user_model().objects.create_superuser(
+            username=None,
+            password="adminpass",
+            email="admin@example.com",
+            site=Site.objects.get_current(),
+        )
+
+        self.client.force_login(self.admin_user)
+
+        NewsletterEntry.objects.create(email="first@example.com")
+        self.campaign = NewsletterCampaign.objects.create(
+            title="Launch", subject="News", content="<p>Hello</p>"
+        )
+
+    def run_action(self, action):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                self.url,
+                {"action": action, "_selected_action": [self.campaign.pk]},
+            )
+
+    @patch("apps.newsletter.campaign.async_task", return_value="task-1")
+    def test_actions_start_and_pause_campaigns(self, mock_async_task):
+        self.run_action("start_campaigns")
+
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, NewsletterCampaignStatus.SENDING)
+        mock_async_task.assert_called_once_with(
+            NewsletterCampaignHelper.prepare,
+            self.campaign.pk,
+            self.campaign.task_token,
+        )
+
+        # the deliveries are created by the task, not by the request
+        self.assertFalse(self.campaign.deliveries.exists())
+
+        self.run_action("pause_campaigns")
+
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, NewsletterCampaignStatus.PAUSED)
+
+    def test_started_campaign_content_is_readonly(self):
+        request = RequestFactory().get("/admin")
+
+        self.assertNotIn(
+            "content", self.admin.get_readonly_fields(request, self.campaign)
+        )
+
+        self.campaign.status = NewsletterCampaignStatus.SENDING
+
+        self.assertIn("content", self.admin.get_readonly_fields(request, self.campaign))
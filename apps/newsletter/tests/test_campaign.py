@@ -0,0 +1,458 @@
+import socketserver
+import smtplib
+import threading
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+
+from apps.newsletter.campaign import NewsletterCampaignHelper
+from apps.newsletter.enums import NewsletterCampaignStatus, NewsletterDeliveryStatus
+from apps.newsletter.helpers import NewsletterHelper
+from apps.newsletter.models import NewsletterCampaign, NewsletterEntry
+
+
+class SMTPStandInHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 localhost")
+
+        while line := self.rfile.readline().decode():
+            command = line[:4].upper()
+
+            if command in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif command == "RCPT" and "refused" in line:
+                self.reply("550 mailbox unavailable")
+            elif command == "RCPT" and "busy" in line:
+                self.reply("450 mailbox busy")
+            elif command == "DATA":
+                self.reply("354 end data with <CR><LF>.<CR><LF>")
+
+                while self.rfile.readline() != b".\r\n":
+                    pass
+
+                self.server.messages += 1
+                self.reply("250 ok")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                break
+            else:
+                self.reply("250 ok")
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Local smtp server that accepts every message, counting the connections"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPStandInHandler)
+        self.connections = 0
+        self.messages = 0
+
+
+@override_settings(
+    NEWSLETTER_CAMPAIGN_BATCH_SIZE=2,
+    NEWSLETTER_CAMPAIGN_RATE_LIMIT=0,
+)
+class NewsletterCampaignTest(TestCase):
+    def setUp(self):
+        NewsletterEntry.objects.create(email="first@example.com", language="en")
+        NewsletterEntry.objects.create(email="second@example.com", language="pt-br")
+        NewsletterEntry.objects.create(email="third@example.com", language="")
+
+        self.campaign = NewsletterCampaign.objects.create(
+            title="Launch", subject="News", content="<p>Hello</p>"
+        )
+
+    def start(self):
+        with patch(
+            "apps.newsletter.campaign.async_task", return_value="task-1"
+        ) as mock_async_task:
+            with self.captureOnCommitCallbacks(execute=True):
+                campaign = NewsletterCampaignHelper.start(self.campaign)
+
+            # the first task creates the deliveries
+            if mock_async_task.call_args.args[0] == NewsletterCampaignHelper.prepare:
+                campaign = NewsletterCampaignHelper.prepare(
+                    *mock_async_task.call_args.args[1:]
+                )
+
+        return campaign
+
+    def send_batch(self):
+        self.campaign.refresh_from_db()
+
+        return NewsletterCampaignHelper.send_batch(
+            self.campaign.pk, self.campaign.task_token
+        )
+
+    @patch("apps.newsletter.campaign.async_task", return_value="task-1")
+    def test_start_schedules_the_task_creating_the_deliveries(self, mock_async_task):
+        with self.captureOnCommitCallbacks(execute=True):
+            campaign = NewsletterCampaignHelper.start(self.campaign)
+
+        self.assertEqual(campaign.status, NewsletterCampaignStatus.SENDING)
+        self.assertIsNotNone(campaign.started_at)
+        self.assertFalse(campaign.deliveries.exists())
+        mock_async_task.assert_called_once_with(
+            NewsletterCampaignHelper.prepare, campaign.pk, campaign.task_token
+        )
+
+        mock_async_task.reset_mock()
+        campaign = NewsletterCampaignHelper.prepare(campaign.pk, campaign.task_token)
+
+        self.assertEqual(campaign.total_count, 3)
+        self.assertEqual(
+            set(campaign.deliveries.values_list("email", "language")),
+            {
+                ("first@example.com", "en"),
+                ("second@example.com", "pt-br"),
+                ("third@example.com", ""),
+            },
+        )
+        mock_async_task.assert_called_once_with(
+            NewsletterCampaignHelper.send_batch, campaign.pk, campaign.task_token
+        )
+
+    @patch("apps.newsletter.campaign.async_task", return_value="task-1")
+    def test_campaign_paused_before_its_deliveries_is_prepared_on_resume(
+        self, mock_async_task
+    ):
+        with self.captureOnCommitCallbacks(execute=True):
+            campaign = NewsletterCampaignHelper.start(self.campaign)
+
+        NewsletterCampaignHelper.pause(campaign)
+
+        # the first task of the paused chain creates nothing
+        NewsletterCampaignHelper.prepare(campaign.pk, campaign.task_token)
+        self.assertFalse(campaign.deliveries.exists())
+
+        campaign = self.start()
+
+        self.assertEqual(campaign.total_count, 3)
+        self.assertEqual(campaign.deliveries.count(), 3)
+
+    @patch("apps.newsletter.campaign.async_task", return_value="task-1")
+    def test_batches_are_sent_until_the_campaign_is_sent(self, mock_async_task):
+        self.start()
+
+        with patch.object(
+            NewsletterCampaignHelper, "render", wraps=NewsletterCampaignHelper.render
+        ) as render:
+            campaign = self.send_batch()
+
+            self.assertEqual(campaign.sent_count, 2)
+            self.assertEqual(campaign.status, NewsletterCampaignStatus.SENDING)
+            mock_async_task.assert_called_once()
+
+            campaign = self.send_batch()
+
+        self.assertEqual(campaign.status, NewsletterCampaignStatus.SENT)
+        self.assertEqual(campaign.sent_count, 3)
+        self.assertIsNotNone(campaign.finished_at)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].subject, "News")
+        self.assertIn("Hello", mail.outbox[0].body)
+
+        # the empty language is the default one, rendered once per batch
+        self.assertEqual(
+            [call.args[1] for call in render.call_args_list], ["en", "pt-br", "en-us"]
+        )
+        self.assertFalse(
+            campaign.deliveries.exclude(status=NewsletterDeliveryStatus.SENT).exists()
+        )
+
+    def test_paused_campaign_is_not_sent_until_resumed(self):
+        self.start()
+        NewsletterCampaignHelper.pause(self.campaign)
+
+        campaign = self.send_batch()
+
+        self.assertEqual(campaign.status, NewsletterCampaignStatus.PAUSED)
+        self.assertEqual(len(mail.outbox), 0)
+
+        campaign = self.start()
+
+        self.assertEqual(campaign.status, NewsletterCampaignStatus.SENDING)
+        self.assertEqual(campaign.deliveries.count(), 3)
+
+    @patch("apps.newsletter.campaign.async_task", return_value="task-1")
+    def test_resumed_campaign_stops_the_previous_chain(self, mock_async_task):
+        campaign = self.start()
+        NewsletterCampaignHelper.pause(self.campaign)
+        self.start()
+
+        # the batch of the first chain sends nothing and schedules nothing
+        mock_async_task.reset_mock()
+        NewsletterCampaignHelper.send_batch(campaign.pk, campaign.task_token)
+
+        self.assertEqual(len(mail.outbox), 0)
+        mock_async_task.assert_not_called()
+
+        self.send_batch()
+
+        self.assertEqual(len(mail.outbox), 2)
+        mock_async_task.assert_called_once()
+
+    @patch("apps.newsletter.campaign.schedule")
+    @patch("apps.newsletter.campaign.async_task", return_value="task-1")
+    def test_claimed_delivery_is_not_sent_twice(self, mock_async_task, mock_schedule):
+        self.start()
+
+        # the first delivery is being sent by a task of the previous chain
+        claimed = self.campaign.deliveries.order_by("id").first()
+        NewsletterCampaignHelper.claim(claimed)
+
+        campaign = self.send_batch()
+
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ["second@example.com", "third@example.com"],
+        )
+        self.assertEqual(campaign.status, NewsletterCampaignStatus.SENDING)
+        self.assertFalse(NewsletterCampaignHelper.claim(claimed))
+
+        # the claimed delivery is retried after its lease
+        mock_async_task.assert_called_once()
+        self.send_batch()
+
+        self.assertEqual(len(mail.outbox), 2)
+        mock_schedule.assert_called_once()
+        self.assertEqual(
+            mock_schedule.call_args.args[1:], (campaign.pk, campaign.task_token)
+        )
+
+    @patch("apps.newsletter.campaign.schedule")
+    @patch("apps.newsletter.campaign.async_task", return_value="task-1")
+    def test_connection_error_keeps_the_deliveries_pending(
+        self, mock_async_task, mock_schedule
+    ):
+        self.start()
+
+        with patch.object(
+            EmailBackend,
+            "send_messages",
+            side_effect=[1, smtplib.SMTPServerDisconnected("lost")],
+        ):
+            campaign = self.send_batch()
+
+        self.assertEqual(campaign.status, NewsletterCampaignStatus.SENDING)
+        self.assertEqual(campaign.sent_count, 1)
+        self.assertEqual(campaign.attempts, 1)
+        self.assertEqual(
+            campaign.deliveries.filter(status=NewsletterDeliveryStatus.PENDING).count(),
+            2,
+        )
+
+        # the batch is retried after the delay
+        mock_async_task.assert_not_called()
+        mock_schedule.assert_called_once()
+
+        # the next run resumes from the pending deliveries
+        campaign = self.send_batch()
+
+        self.assertEqual(campaign.sent_count, 3)
+        self.assertEqual(campaign.attempts, 0)
+        self.assertEqual(len(mail.outbox), 2)
+
+    @override_settings(NEWSLETTER_CAMPAIGN_RETRY_DELAY=60)
+    def test_failed_batches_back_off_then_pause_the_campaign(self):
+        self.start()
+
+        with patch.object(
+            EmailBackend,
+            "send_messages",
+            side_effect=smtplib.SMTPServerDisconnected("lost"),
+        ), patch.object(NewsletterCampaignHelper, "schedule") as mock_schedule:
+            for _ in range(4):
+                campaign = self.send_batch()
+
+            self.assertEqual(campaign.status, NewsletterCampaignStatus.SENDING)
+            self.assertEqual(campaign.attempts, 4)
+
+            campaign = self.send_batch()
+
+        self.assertEqual(
+            [call.kwargs["delay"] for call in mock_schedule.call_args_list],
+            [60, 120, 240, 480],
+        )
+        self.assertEqual(campaign.status, NewsletterCampaignStatus.PAUSED)
+        self.assertEqual(campaign.attempts, 0)
+        self.assertEqual(
+            campaign.deliveries.filter(status=NewsletterDeliveryStatus.PENDING).count(),
+            3,
+        )
+
+    @override_settings(NEWSLETTER_CAMPAIGN_RATE_LIMIT=4)
+    @patch("apps.newsletter.campaign.time.monotonic", return_value=0)
+    @patch("apps.newsletter.campaign.time.sleep")
+    def test_rate_limit_spaces_the_messages(self, mock_sleep, mock_monotonic):
+        self.start()
+
+        with patch("apps.newsletter.campaign.async_task", return_value="task-1"):
+            self.send_batch()
+
+        mock_sleep.assert_called_once_with(0.25)
+
+    @patch("apps.newsletter.campaign.async_task", return_value="task-1")
+    def test_batch_reuses_one_smtp_connection(self, mock_async_task):
+        NewsletterEntry.objects.create(email="refused@example.com")
+
+        server = SMTPStandIn()
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        with override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=server.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+            NEWSLETTER_CAMPAIGN_BATCH_SIZE=10,
+        ):
+            self.start()
+            campaign = self.send_batch()
+
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(server.messages, 3)
+        self.assertEqual(campaign.status, NewsletterCampaignStatus.SENT)
+        self.assertEqual(campaign.sent_count, 3)
+        self.assertEqual(campaign.failed_count, 1)
+
+        failed = campaign.deliveries.get(status=NewsletterDeliveryStatus.FAILED)
+        self.assertEqual(failed.email, "refused@example.com")
+        self.assertIn("550", failed.error)
+
+    @patch("apps.newsletter.campaign.async_task", return_value="task-1")
+    def test_transient_recipient_error_is_retried_later(self, mock_async_task):
+        NewsletterEntry.objects.create(email="busy@example.com")
+
+        server = SMTPStandIn()
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        with override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=server.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+            NEWSLETTER_CAMPAIGN_BATCH_SIZE=10,
+        ):
+            self.start()
+            campaign = self.send_batch()
+
+        self.assertEqual(campaign.status, NewsletterCampaignStatus.SENDING)
+        self.assertEqual(campaign.sent_count, 3)
+        self.assertEqual(campaign.failed_count, 0)
+
+        busy = campaign.deliveries.get(email="busy@example.com")
+        self.assertEqual(busy.status, NewsletterDeliveryStatus.PENDING)
+        self.assertEqual(busy.attempts, 1)
+        self.assertIn("450", busy.error)
+        self.assertFalse(NewsletterCampaignHelper.claim(busy))
+
+    @override_settings(NEWSLETTER_CAMPAIGN_MAX_ATTEMPTS=2)
+    def test_transient_recipient_error_fails_after_the_max_attempts(self):
+        self.start()
+        delivery = self.campaign.deliveries.order_by("id").first()
+        error = smtplib.SMTPRecipientsRefused({delivery.email: (450, b"busy")})
+
+        self.assertTrue(NewsletterCampaignHelper.retry_later(delivery, error))
+
+        delivery.refresh_from_db()
+        self.assertFalse(NewsletterCampaignHelper.retry_later(delivery, error))
+
+    def test_permanent_errors(self):
+        self.assertTrue(
+            NewsletterCampaignHelper.is_permanent_error(
+                smtplib.SMTPRecipientsRefused({"a@example.com": (550, b"unknown")})
+            )
+        )
+        self.assertFalse(
+            NewsletterCampaignHelper.is_permanent_error(
+                smtplib.SMTPRecipientsRefused({"a@example.com": (421, b"later")})
+            )
+        )
+        self.assertTrue(NewsletterCampaignHelper.is_permanent_error(ValueError()))
+
+    @patch("apps.newsletter.campaign.async_task", return_value="task-1")
+    def test_sender_refused_keeps_the_deliveries_pending(self, mock_async_task):
+        self.start()
+
+        with patch.object(
+            EmailBackend,
+            "send_messages",
+            side_effect=smtplib.SMTPSenderRefused(451, b"later", "from@example.com"),
+        ):
+            with patch("apps.newsletter.campaign.schedule"):
+                self.send_batch()
+
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.failed_count, 0)
+        self.assertEqual(
+            self.campaign.deliveries.filter(
+                status=NewsletterDeliveryStatus.PENDING, next_attempt_at=None
+            ).count(),
+            3,
+        )
+
+    @patch("apps.newsletter.campaign.async_task", return_value="task-1")
+    def test_messages_have_the_unsubscribe_link_of_the_entry(self, mock_async_task):
+        entry = NewsletterEntry.objects.get(email="first@example.com")
+        self.start()
+
+        with self.settings(NEWSLETTER_CAMPAIGN_BATCH_SIZE=3):
+            self.send_batch()
+
+        message = next(
+            message for message in mail.outbox if message.to == ["first@example.com"]
+        )
+        url = f"https://example.com/newsletter/unsubscribe/{entry.token}/"
+
+        self.assertEqual(message.extra_headers["List-Unsubscribe"], f"<{url}>")
+        self.assertEqual(
+            message.extra_headers["List-Unsubscribe-Post"], "List-Unsubscribe=One-Click"
+        )
+        self.assertIn(url, message.body)
+        self.assertIn(f'href="{url}"', message.alternatives[0][0])
+
+    @patch("apps.newsletter.campaign.async_task", return_value="task-1")
+    def test_unsubscribed_entries_are_not_sent(self, mock_async_task):
+        NewsletterHelper.unsubscribe(
+            NewsletterEntry.objects.get(email="first@example.com")
+        )
+
+        campaign = self.start()
+
+        self.assertEqual(campaign.total_count, 2)
+
+        # unsubscribed after the deliveries were created
+        NewsletterHelper.unsubscribe(
+            NewsletterEntry.objects.get(email="second@example.com")
+        )
+
+        with self.settings(NEWSLETTER_CAMPAIGN_BATCH_SIZE=3):
+            campaign = self.send_batch()
+
+        self.assertEqual(campaign.status, NewsletterCampaignStatus.SENT)
+        self.assertEqual(campaign.sent_count, 1)
+        self.assertEqual(
+            [message.to for message in mail.outbox], [["third@example.com"]]
+        )
+        self.assertEqual(
+            campaign.deliveries.get(email="second@example.com").status,
+            NewsletterDeliveryStatus.UNSUBSCRIBED,
+        )
@@ -0,0 +1,57 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from apps.newsletter.models import NewsletterEntry
+
+
+class ImportNewsletterCommandTest(TestCase):
+    def write_csv(self, content):
+        file = tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False, encoding="utf-8"
+        )
+        self.addCleanup(os.remove, file.name)
+
+        with file:
+            file.write(content)
+
+        return file.name
+
+    def test_imports_the_file(self):
+        path = self.write_csv("email\nfirst@example.com\nsecond@example.com\ninvalid\n")
+        out = StringIO()
+
+        call_command("import_newsletter", path, "--batch-size=1", stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "1 rows read, 1 created")
+        self.assertIn("Imported 2 newsletter emails", lines[-1])
+        self.assertIn("1 invalid", lines[-1])
+        self.assertEqual(NewsletterEntry.objects.count(), 2)
+
+    def test_missing_file_is_an_error(self):
+        with self.assertRaises(CommandError):
+            call_command("import_newsletter", "/missing/emails.csv")
+
+
+class BenchmarkNewsletterImportCommandTest(TestCase):
+    def test_compares_import_and_subscribe_and_rolls_back(self):
+        out = StringIO()
+
+        call_command(
+            "benchmark_newsletter_import",
+            "--rows=50",
+            "--subscribe-rows=5",
+            "--batch-size=20",
+            stdout=out,
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith("import (20): 50 rows"))
+        self.assertTrue(lines[1].startswith("subscribe: 5 rows"))
+        self.assertEqual(NewsletterEntry.objects.count(), 0)
@@ -1,4 +1,9 @@
+import io
+from unittest.mock import patch
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from apps.newsletter.helpers import NewsletterHelper
 from apps.newsletter.models import NewsletterEntry
@@ -18,3 +23,123 @@ class NewsletterHelperTest(TestCase):
 
         self.assertEqual(first.pk, second.pk)
         self.assertEqual(NewsletterEntry.objects.count(), 1)
+
+    def test_subscribe_normalizes_the_email(self):
+        first = NewsletterHelper.subscribe(" User@Example.com ")
+        second = NewsletterHelper.subscribe("user@example.COM")
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(first.email, "user@example.com")
+        self.assertEqual(NewsletterEntry.objects.count(), 1)
+
+    def test_subscribe_matches_an_email_saved_with_other_case(self):
+        entry = NewsletterEntry.objects.create(email="User@Example.com")
+
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(
+                NewsletterHelper.subscribe("User@example.com").pk, entry.pk
+            )
+
+        # an exact lookup, which uses the unique index
+        sql = context.captured_queries[1]["sql"]
+        self.assertNotIn("LIKE", sql)
+        self.assertNotIn("UPPER", sql)
+
+        self.assertEqual(NewsletterEntry.objects.count(), 1)
+
+
+class NewsletterImportTest(TestCase):
+    def test_normalize_email(self):
+        self.assertEqual(
+            NewsletterHelper.normalize_email("  User@Example.COM "), "user@example.com"
+        )
+        self.assertIsNone(NewsletterHelper.normalize_email("not-an-email"))
+        self.assertIsNone(NewsletterHelper.normalize_email(None))
+
+    def test_import_reads_the_email_column(self):
+        file = io.BytesIO(
+            "\ufeffname,Email\nFirst,first@example.com\nSecond,second@example.com\n".encode()
+        )
+
+        stats = NewsletterHelper.import_csv(file)
+
+        self.assertEqual(stats["rows"], 2)
+        self.assertEqual(stats["created"], 2)
+        self.assertEqual(
+            set(NewsletterEntry.objects.values_list("email", flat=True)),
+            {"first@example.com", "second@example.com"},
+        )
+
+    def test_import_without_header_reads_the_first_column(self):
+        stats = NewsletterHelper.import_csv(
+            io.StringIO("first@example.com\nsecond@example.com,extra\n")
+        )
+
+        self.assertEqual(stats["created"], 2)
+
+    def test_import_dedupes_and_skips_invalid_and_existing_emails(self):
+        NewsletterHelper.subscribe("existing@example.com")
+
+        file = io.StringIO(
+            "email\n"
+            "new@example.com\n"
+            "NEW@example.com\n"
+            "existing@example.com\n"
+            "invalid\n"
+            "\n"
+            "other@example.com\n"
+        )
+
+        stats = NewsletterHelper.import_csv(file)
+
+        self.assertEqual(
+            stats,
+            {"rows": 5, "created": 2, "existing": 1, "duplicated": 1, "invalid": 1},
+        )
+        self.assertEqual(NewsletterEntry.objects.count(), 3)
+
+    def test_import_inserts_in_batches_and_reports_progress(self):
+        file = io.StringIO("".join(f"user{i}@example.com\n" for i in range(5)))
+        progress = []
+
+        # two counts and an insert per batch, inside savepoints
+        with self.assertNumQueries(15):
+            NewsletterHelper.import_csv(
+                file,
+                batch_size=2,
+                progress=lambda stats: progress.append(stats["created"]),
+            )
+
+        self.assertEqual(progress, [2, 4, 5])
+        self.assertEqual(NewsletterEntry.objects.count(), 5)
+
+    def test_import_matches_emails_saved_with_other_case(self):
+        NewsletterEntry.objects.create(email="Existing@Example.com")
+
+        stats = NewsletterHelper.import_csv(
+            io.StringIO("existing@example.com\nnew@example.com\n")
+        )
+
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(stats["existing"], 1)
+        self.assertEqual(NewsletterEntry.objects.count(), 2)
+
+    def test_import_ignores_emails_subscribed_during_the_batch(self):
+        bulk_create = NewsletterEntry.objects.bulk_create
+
+        def subscribe_and_bulk_create(entries, **kwargs):
+            # the email is subscribed by another request after the first count
+            NewsletterEntry.objects.create(email="raced@example.com")
+            return bulk_create(entries, **kwargs)
+
+        with patch.object(
+            NewsletterEntry.objects,
+            "bulk_create",
+            side_effect=subscribe_and_bulk_create,
+        ):
+            stats = NewsletterHelper.import_csv(
+                io.StringIO("raced@example.com\nnew@example.com\n")
+            )
+
+        self.assertEqual(stats["created"] + stats["existing"], 2)
+        self.assertEqual(NewsletterEntry.objects.count(), 2)
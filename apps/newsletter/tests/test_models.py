@@ -1,3 +1,6 @@
+from importlib import import_module
+
+from django.apps import apps
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import IntegrityError
 from django.test import TestCase
@@ -24,6 +27,36 @@ class NewsletterEntryModelTest(TestCase):
         with self.assertRaises(IntegrityError):
             NewsletterEntry.objects.create(email="user@example.com")
 
+    def test_newsletter_entry_email_is_stored_lowercase(self):
+        entry = NewsletterEntry.objects.create(email=" User@Example.COM ")
+        entry.refresh_from_db()
+
+        self.assertEqual(entry.email, "user@example.com")
+
+    def test_lowercase_emails_migration_keeps_the_oldest_entry(self):
+        migration = import_module("apps.newsletter.migrations.0006_lowercase_emails")
+
+        # bulk inserts skip save, like the rows stored before the migration
+        NewsletterEntry.objects.bulk_create(
+            [
+                NewsletterEntry(email="First@Example.com"),
+                NewsletterEntry(email="first@example.com"),
+                NewsletterEntry(email="FIRST@example.com"),
+                NewsletterEntry(email="Second@Example.com"),
+            ]
+        )
+        first = NewsletterEntry.objects.get(email="First@Example.com")
+
+        migration.lowercase_emails(apps, None)
+
+        self.assertEqual(
+            list(NewsletterEntry.objects.order_by("id").values_list("id", "email")),
+            [
+                (first.pk, "first@example.com"),
+                (first.pk + 3, "second@example.com"),
+            ],
+        )
+
     def test_newsletter_entry_deletion(self):
         entry = NewsletterEntry.objects.create(email="user@example.com")
         entry.delete()
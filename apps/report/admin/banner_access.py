@@ -1,11 +1,13 @@
 from django.contrib import admin
-from django.db.models import Count, Q
+from django.db.models import Max
 from django.utils.translation import gettext as _
 
 from apps.banner.enums import BannerAccessType
-from apps.banner.models import Banner
+from apps.banner.helpers import BannerHelper
+from apps.banner.models import Banner, BannerAccess, BannerAccessWatermark
 from apps.customer import filters
 from apps.report.admin.base_report import BaseReportAdmin
+from apps.report.filters import ArchivedDataFilter
 from apps.report.models import BannerAccessSummary
 
 
@@ -18,44 +20,75 @@ class BannerAccessSummaryAdmin(BaseReportAdmin):
         return _("title.report.banner-access-summary")
 
     def has_chart(self):
-        return False
+        return True
 
     def get_list_filter(self, request):
         return super().get_list_filter(request) + [
             "active",
             ("created_at", filters.CreatedAtFilter),
+            ArchivedDataFilter,
         ]
 
     def get_queryset(self, request):
         return Banner.objects.all()
 
+    def get_data_querysets(self, request):
+        # the watermark changes on every rollup, the raw rows are checked below
+        return super().get_data_querysets(request) + [
+            BannerAccessWatermark.objects.all()
+        ]
+
+    def get_data_version(self, request):
+        # accesses are only added, archiving removes rolled up rows without changing
+        # the totals, so the last access id tells when there are new accesses
+        last_access_id = BannerAccess.objects.aggregate(id=Max("id"))["id"]
+        return f"{super().get_data_version(request)}:{last_access_id}"
+
+    def get_export_columns(self):
+        return [
+            ("title", _("model.field.title")),
+            ("site", _("model.field.site")),
+            ("language", _("model.field.language")),
+            ("total_views", _("model.field.total-views")),
+            ("total_clicks", _("model.field.total-clicks")),
+        ]
+
     def generate_report_data(self, request):
         qs = self.get_queryset(request)
 
-        # get date range and apply filter
+        # get date range as local days, the rollups are daily
         date_gte, date_lte = self.get_date_range("created_at", request)
-        qs = self.apply_date_filter(qs, "accesses__created_at", date_gte, date_lte)
+        day_gte, day_lte = self.get_local_date(date_gte), self.get_local_date(date_lte)
 
         # apply active filter only for the valid boolean values sent by the filter ui
         active_filter = request.GET.get("active__exact")
         if active_filter in {"0", "1"}:
             qs = qs.filter(active=active_filter == "1")
 
-        # group by banner and include site and language as banner info
-        data = list(
-            qs.values("id", "title", "active", "site__name", "language__name")
-            .annotate(
-                total_views=Count(
-                    "accesses",
-                    filter=Q(accesses__access_type=BannerAccessType.VIEW),
-                    distinct=True,
-                ),
-                total_clicks=Count(
-                    "accesses",
-                    filter=Q(accesses__access_type=BannerAccessType.CLICK),
-                    distinct=True,
-                ),
+        # archived months are recounted from the archive files when asked
+        archived = request.GET.get(ArchivedDataFilter.parameter_name) == "1"
+
+        # sum the daily totals by banner and by day
+        totals = {}
+        trend = {}
+
+        for row in BannerHelper.get_daily_accesses(
+            day_gte, day_lte, qs, archived=archived
+        ):
+            metric = (
+                "total_views"
+                if row["access_type"] == BannerAccessType.VIEW
+                else "total_clicks"
             )
+
+            for group, key in ((totals, row["banner_id"]), (trend, row["day"])):
+                group.setdefault(key, {"total_views": 0, "total_clicks": 0})
+                group[key][metric] += row["total"]
+
+        # include site and language as banner info
+        data = list(
+            qs.filter(id__in=totals)
+            .values("id", "title", "active", "site__name", "language__name")
             .order_by("title")
         )
 
@@ -63,8 +96,7 @@ class BannerAccessSummaryAdmin(BaseReportAdmin):
         for item in data:
             item["site"] = item.pop("site__name") or "-"
             item["language"] = item.pop("language__name") or "-"
-            item["total_views"] = item["total_views"] or 0
-            item["total_clicks"] = item["total_clicks"] or 0
+            item.update(totals[item["id"]])
 
         data_footer = {
             "total_views": sum(item["total_views"] for item in data),
@@ -74,5 +106,39 @@ class BannerAccessSummaryAdmin(BaseReportAdmin):
         return {
             "data": data,
             "data_footer": data_footer,
+            "data_trend": [{"day": day, **trend[day]} for day in sorted(trend)],
             "has_data": bool(data),
         }
+
+    def get_chart_data(self, report_data):
+        trend = report_data.get("data_trend")
+        if not trend:
+            return None
+
+        return {
+            "days": [item["day"] for item in trend],
+            "views": [item["total_views"] for item in trend],
+            "clicks": [item["total_clicks"] for item in trend],
+            "views_label": _("model.field.total-views"),
+            "clicks_label": _("model.field.total-clicks"),
+        }
+
+    def draw_chart(self, fig, chart_data):
+        ax = fig.subplots()
+        ax.plot(
+            chart_data["days"],
+            chart_data["views"],
+            marker="o",
+            color="#36ACD9",
+            label=chart_data["views_label"],
+        )
+        ax.plot(
+            chart_data["days"],
+            chart_data["clicks"],
+            marker="o",
+            color="#BA3A7B",
+            label=chart_data["clicks_label"],
+        )
+        ax.legend()
+        ax.grid(alpha=0.3)
+        fig.autofmt_xdate()
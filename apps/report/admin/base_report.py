@@ -1,21 +1,37 @@
 import matplotlib
-import weasyprint
 from django.conf import settings
 from django.contrib import admin
-from django.http import HttpResponse
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
 from django.template.loader import render_to_string
-
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone, translation
+from django.utils.cache import patch_cache_control
+
+from apps.report.charts import REPORT_CHART_CONTENT_TYPES, ReportChartHelper
+from apps.report.enums import ReportExportStatus
+from apps.report.export import ReportExportHelper
 from apps.report.filters import ExportDataFilter
 from apps.report.mixins import DateParserMixin
+from apps.report.models import ReportExport
+from apps.report.snapshot import ReportSnapshotHelper
+from pyaa.helpers.cache import CacheHelper
+from pyaa.helpers.conditional import ConditionalHelper
+from pyaa.helpers.export import EXPORT_CONTENT_TYPES, ExportHelper
+from pyaa.helpers.pdf import PdfHelper
 
 
 class BaseReportAdmin(admin.ModelAdmin, DateParserMixin):
     change_list_template = "admin/report/base-report/view.html"
     show_full_result_count = False
 
-    # default chart settings
-    chart_format = "png"
-    chart_dpi = 300
+    # default chart figure size in inches
+    chart_size = (10, 5)
+
+    # date field of the report range
+    date_field = "created_at"
 
     def has_add_permission(self, request):
         return False
@@ -34,6 +50,10 @@ class BaseReportAdmin(admin.ModelAdmin, DateParserMixin):
         """Indicate if the report supports PDF export"""
         return True
 
+    def has_data_export(self):
+        """Indicate if the report supports CSV and XLSX export"""
+        return bool(self.get_export_columns())
+
     def init_chart_lib(self):
         """Initialize the chart library"""
         matplotlib.use("Agg")
@@ -49,36 +69,150 @@ class BaseReportAdmin(admin.ModelAdmin, DateParserMixin):
     def add_general_context(self, request):
         """Add general context data"""
         return {
-            "font_path": settings.BASE_DIR / "apps/web/static/vendor/fonts",
+            "font_path": settings.PDF_FONT_PATH,
             "report_title": self.get_report_title(),
             "has_pdf_export": self.has_pdf_export(),
+            "has_data_export": self.has_data_export(),
         }
 
     def export_to_pdf(self, context, template_name):
         """Export report to PDF"""
+        response = HttpResponse(
+            self.render_pdf(context, template_name),
+            content_type="application/pdf",
+        )
+
+        response["Content-Disposition"] = (
+            f'inline; filename="{self.get_pdf_filename()}"'
+        )
+
+        return response
+
+    def get_export_columns(self):
+        """Return the (key, label) of the report data columns to export"""
+        return []
+
+    def get_export_rows(self, context):
+        """Yield the exported rows of the report data"""
+        keys = [key for key, _ in self.get_export_columns()]
+
+        for item in context.get("data", []):
+            yield [item.get(key) for key in keys]
+
+    def export_data(self, request, format):
+        """Stream the report data of the snapshot as CSV or XLSX"""
+        context = self.get_report_context(request)
+        header = [label for _, label in self.get_export_columns()]
+
+        return ExportHelper.build_response(
+            header,
+            self.get_export_rows(context),
+            f"{self.__class__.__name__.lower()}-report",
+            format,
+        )
+
+    def render_pdf(self, context, template_name):
+        """Render the report template to PDF bytes"""
         css_path = settings.BASE_DIR / "apps/web/static/admin/css/report-pdf.css"
 
+        # the pdf embeds its chart, in high resolution
+        if context.get("chart_data") is not None:
+            context = {
+                **context,
+                "chart_image": ReportChartHelper.get_data_uri(
+                    self, context["chart_data"], "png", settings.REPORT_CHART_PDF_DPI
+                ),
+            }
+
         html_content = render_to_string(
             template_name,
             context,
         )
 
-        pdf = weasyprint.HTML(string=html_content).write_pdf(
-            stylesheets=[
-                weasyprint.CSS(str(css_path)),
-            ],
-        )
+        return PdfHelper.render(html_content, stylesheets=[css_path])
 
-        response = HttpResponse(
-            pdf,
-            content_type="application/pdf",
+    def get_pdf_filename(self):
+        return f"{self.__class__.__name__.lower()}-report.pdf"
+
+    def export_to_pdf_async(self, request):
+        """
+        Start (or join) the background PDF export of the request filters and
+        render a page that polls its status and downloads the finished file.
+        """
+        export = ReportExportHelper.get_or_create_export(self, request)
+        info = self.opts.app_label, self.opts.model_name
+
+        context = {
+            **self.admin_site.each_context(request),
+            **self.add_general_context(request),
+            "title": self.get_report_title(),
+            "opts": self.opts,
+            "export": export,
+            "status_url": reverse(
+                "admin:%s_%s_export_status" % info, args=[export.token]
+            ),
+            "download_url": reverse(
+                "admin:%s_%s_export_download" % info, args=[export.token]
+            ),
+            "poll_interval": settings.REPORT_EXPORT_POLL_INTERVAL * 1000,
+        }
+
+        return TemplateResponse(request, "admin/report/base/export.html", context)
+
+    def get_export(self, request, token):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+
+        exports = ReportExport.objects.filter(report=self.model._meta.label_lower)
+
+        # the file of an export is only for its creator
+        if not request.user.is_superuser:
+            exports = exports.filter(user=request.user)
+
+        return get_object_or_404(exports, token=token)
+
+    def export_status_view(self, request, token):
+        export = self.get_export(request, token)
+
+        return JsonResponse(
+            {
+                "status": export.status,
+                "status_display": export.get_status_display(),
+            }
         )
 
-        response["Content-Disposition"] = (
-            f'inline; filename="{self.__class__.__name__.lower()}-report.pdf"'
+    def export_download_view(self, request, token):
+        export = self.get_export(request, token)
+
+        if export.status != ReportExportStatus.DONE or not export.file:
+            raise Http404
+
+        return FileResponse(
+            export.file.open("rb"),
+            content_type="application/pdf",
+            filename=self.get_pdf_filename(),
         )
 
-        return response
+    def get_urls(self):
+        info = self.opts.app_label, self.opts.model_name
+
+        return [
+            path(
+                "chart/",
+                self.admin_site.admin_view(self.chart_view),
+                name="%s_%s_chart" % info,
+            ),
+            path(
+                "export/<uuid:token>/status/",
+                self.admin_site.admin_view(self.export_status_view),
+                name="%s_%s_export_status" % info,
+            ),
+            path(
+                "export/<uuid:token>/download/",
+                self.admin_site.admin_view(self.export_download_view),
+                name="%s_%s_export_download" % info,
+            ),
+        ] + super().get_urls()
 
     def get_date_range(self, date_field, request):
         """
@@ -104,34 +238,197 @@ class BaseReportAdmin(admin.ModelAdmin, DateParserMixin):
         )
 
     def changelist_view(self, request, extra_context=None):
-        self.init_chart_lib()
         response = super().changelist_view(request, extra_context=extra_context)
 
         # a redirect response (e.g. invalid filter params) carries no context to enrich
         if not hasattr(response, "context_data"):
             return response
 
-        # add general context data
-        context_data = self.add_general_context(request)
-        response.context_data.update(context_data)
+        export_format = request.GET.get(ExportDataFilter.parameter_name)
 
-        # generate report and chart data from the subclass
-        report_data = self.generate_report_data(request)
-        chart_data = self.generate_chart_data(report_data)
+        if export_format in EXPORT_CONTENT_TYPES and self.has_data_export():
+            return self.export_data(request, export_format)
+
+        # pdf exports are rendered by a background task when enabled
+        is_pdf_export = (
+            self.has_pdf_export()
+            and request.GET.get(ExportDataFilter.parameter_name) == "pdf"
+        )
+
+        if is_pdf_export and settings.REPORT_EXPORT_ASYNC:
+            return self.export_to_pdf_async(request)
 
-        response.context_data.update(report_data)
-        response.context_data["chart_image"] = chart_data
-        response.context_data["has_chart"] = chart_data is not None
+        response.context_data.update(self.get_report_context(request))
 
-        if self.has_pdf_export() and request.GET.get("export-data") == "pdf":
+        if is_pdf_export:
             return self.export_to_pdf(response.context_data, self.pdf_template)
 
         return response
 
+    def get_report_context(self, request, fresh=False):
+        """
+        Return the general context and the report and chart data of the snapshot.
+        With fresh, an outdated snapshot is rebuilt instead of served.
+        """
+        context = self.add_general_context(request)
+        snapshot, is_stale = self.get_snapshot(request, fresh=fresh)
+
+        context.update(snapshot["report_data"])
+        context["chart_data"] = snapshot["chart_data"]
+        context["chart_url"] = self.get_chart_url(request, snapshot["chart_data"])
+        context["has_chart"] = snapshot["chart_data"] is not None
+        context["data_as_of"] = snapshot["created_at"]
+        context["data_is_stale"] = is_stale
+
+        return context
+
+    def get_snapshot(self, request, fresh=False):
+        """
+        Return the snapshot of the request filters and whether it is outdated.
+
+        Snapshots are computed when missing. When the data version changed, the
+        outdated snapshot is served while a django-q task rebuilds it (or it is
+        rebuilt right away when background refresh is disabled).
+        """
+        key = self.get_snapshot_key(request)
+        snapshot = CacheHelper.get(key)
+
+        if snapshot is None:
+            return self.build_snapshot(request), False
+
+        if snapshot["version"] == self.get_data_version(request):
+            return snapshot, False
+
+        if settings.REPORT_SNAPSHOT_REFRESH_ASYNC and not fresh:
+            ReportSnapshotHelper.refresh_async(self, request, key)
+            return snapshot, True
+
+        return self.build_snapshot(request), False
+
+    def build_snapshot(self, request):
+        """Compute and store the report and chart data of the request filters"""
+        # the version is read first, so changes made meanwhile outdate the snapshot
+        version = self.get_data_version(request)
+        report_data = self.generate_report_data(request)
+
+        snapshot = {
+            "report_data": report_data,
+            "chart_data": self.get_chart_data(report_data),
+            "version": version,
+            "created_at": timezone.now(),
+        }
+
+        CacheHelper.set(
+            self.get_snapshot_key(request),
+            snapshot,
+            timeout=settings.REPORT_SNAPSHOT_TIMEOUT,
+        )
+
+        return snapshot
+
+    def get_snapshot_key(self, request):
+        return ReportSnapshotHelper.build_key(self, self.get_snapshot_filters(request))
+
+    def get_snapshot_filters(self, request):
+        """
+        Return the normalized filters of the request.
+        The date range is resolved, so the default month range changes with the month.
+        """
+        range_params = {
+            f"{self.date_field}__range__gte",
+            f"{self.date_field}__range__lte",
+        }
+
+        filters = sorted(
+            (name, sorted(values))
+            for name, values in request.GET.lists()
+            if name not in range_params and name != ExportDataFilter.parameter_name
+        )
+
+        date_gte, date_lte = self.get_date_range(self.date_field, request)
+
+        return [
+            filters,
+            date_gte.isoformat(),
+            date_lte.isoformat(),
+            translation.get_language(),
+        ]
+
+    def get_data_querysets(self, request):
+        """Return the querysets whose changes outdate the report snapshots"""
+        return [self.get_queryset(request)]
+
+    def get_data_version(self, request):
+        """Return the version of the report data, from the data querysets"""
+        version, _ = ConditionalHelper.get_validators(self.get_data_querysets(request))
+        return version
+
     def generate_report_data(self, request):
         """Provide report data"""
         return {}
 
-    def generate_chart_data(self, report_data):
-        """Generate chart from report data"""
+    def get_chart_data(self, report_data):
+        """Provide the chart input data, None when there is no chart"""
         return None
+
+    def draw_chart(self, fig, chart_data):
+        """Draw the chart data on the figure"""
+
+    def get_chart_url(self, request, chart_data):
+        """
+        Return the chart url of the request filters.
+        The hash of the chart data makes it a new url whenever the chart changes.
+        """
+        if chart_data is None:
+            return None
+
+        query = request.GET.copy()
+        query.pop(ExportDataFilter.parameter_name, None)
+        query["format"] = settings.REPORT_CHART_FORMAT
+        query["hash"] = ReportChartHelper.get_hash(chart_data)
+
+        info = self.opts.app_label, self.opts.model_name
+        return f"{reverse('admin:%s_%s_chart' % info)}?{query.urlencode()}"
+
+    def chart_view(self, request):
+        """
+        Serve the screen chart of the filters, at low dpi or as svg.
+        Urls with the current hash are cached by the browser.
+        """
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+
+        format = request.GET.get("format", settings.REPORT_CHART_FORMAT)
+
+        if format not in REPORT_CHART_CONTENT_TYPES:
+            raise Http404
+
+        query = request.GET.copy()
+        chart_hash = query.pop("hash", [None])[0]
+        query.pop("format", None)
+
+        filters_request = ReportSnapshotHelper.build_request(query.urlencode())
+        snapshot, _ = self.get_snapshot(filters_request)
+        chart_data = snapshot["chart_data"]
+
+        if chart_data is None:
+            raise Http404
+
+        response = HttpResponse(
+            ReportChartHelper.render(
+                self, chart_data, format, settings.REPORT_CHART_DPI
+            ),
+            content_type=REPORT_CHART_CONTENT_TYPES[format],
+        )
+
+        if chart_hash == ReportChartHelper.get_hash(chart_data):
+            patch_cache_control(
+                response,
+                private=True,
+                max_age=settings.REPORT_CHART_TIMEOUT,
+                immutable=True,
+            )
+        else:
+            patch_cache_control(response, private=True, no_cache=True)
+
+        return response
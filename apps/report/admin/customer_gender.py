@@ -1,11 +1,6 @@
-import base64
-import io
-
 from django.contrib import admin
 from django.db.models import Count
 from django.utils.translation import gettext as _
-from matplotlib.backends.backend_agg import FigureCanvasAgg
-from matplotlib.figure import Figure
 
 from apps.customer import filters
 from apps.customer.enums import CustomerGender
@@ -17,6 +12,7 @@ from apps.report.models import CustomerGenderSummary
 class CustomerGendeSummaryAdmin(BaseReportAdmin):
     change_list_template = "admin/report/customer-gender-summary/view.html"
     pdf_template = "admin/report/customer-gender-summary/pdf.html"
+    chart_size = (6, 6)
 
     def get_report_title(self):
         return _("title.report.customer-gender-summary")
@@ -29,6 +25,12 @@ class CustomerGendeSummaryAdmin(BaseReportAdmin):
             ("created_at", filters.CreatedAtFilter),
         ]
 
+    def get_export_columns(self):
+        return [
+            ("gender_display", _("model.field.gender")),
+            ("total", _("model.field.amount")),
+        ]
+
     def generate_report_data(self, request):
         qs = self.get_queryset(request)
 
@@ -48,31 +50,30 @@ class CustomerGendeSummaryAdmin(BaseReportAdmin):
 
         return {"data": data, "data_footer": data_footer, "has_data": bool(data)}
 
-    def generate_chart_data(self, report_data):
+    def get_chart_data(self, report_data):
         data = report_data.get("data")
         if not data:
             return None
 
-        labels = [item["gender_display"] for item in data]
-        sizes = [item["total"] for item in data]
         color_map = {
             CustomerGender.MALE: "#36ACD9",
             CustomerGender.FEMALE: "#BA3A7B",
             CustomerGender.NONE: "#000000",
         }
-        colors = [color_map.get(item["gender"], "#000000") for item in data]
 
-        # generate chart with a local figure to avoid the non-thread-safe pyplot global state
-        fig = Figure(figsize=(6, 6))
-        FigureCanvasAgg(fig)
+        return {
+            "labels": [item["gender_display"] for item in data],
+            "sizes": [item["total"] for item in data],
+            "colors": [color_map.get(item["gender"], "#000000") for item in data],
+        }
+
+    def draw_chart(self, fig, chart_data):
         ax = fig.subplots()
-        ax.pie(sizes, labels=labels, autopct="%1.1f%%", startangle=140, colors=colors)
+        ax.pie(
+            chart_data["sizes"],
+            labels=chart_data["labels"],
+            autopct="%1.1f%%",
+            startangle=140,
+            colors=chart_data["colors"],
+        )
         ax.axis("equal")
-
-        buffer = io.BytesIO()
-        fig.savefig(buffer, format=self.chart_format, dpi=self.chart_dpi)
-        buffer.seek(0)
-        chart_image = base64.b64encode(buffer.getvalue()).decode("utf-8")
-        buffer.close()
-
-        return f"data:image/png;base64,{chart_image}"
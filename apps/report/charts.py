@@ -0,0 +1,63 @@
+import base64
+import hashlib
+import io
+import json
+
+from django.conf import settings
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from pyaa.helpers.cache import CacheHelper
+
+REPORT_CHART_KEY_PREFIX = "report-chart"
+
+REPORT_CHART_CONTENT_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+
+class ReportChartHelper:
+    @staticmethod
+    def get_hash(chart_data):
+        """
+        Returns the hash of the chart input data, used in chart urls and cache keys.
+        """
+        data = json.dumps(chart_data, sort_keys=True, default=str)
+        return hashlib.md5(data.encode(), usedforsecurity=False).hexdigest()
+
+    @staticmethod
+    def render(report, chart_data, format, dpi):
+        """
+        Returns the chart image of a report, cached by the hash of its input data,
+        the format and the dpi, so the same chart is drawn once.
+        """
+        label = report.model._meta.label_lower
+        chart_hash = ReportChartHelper.get_hash(chart_data)
+
+        return CacheHelper.get_or_compute(
+            f"{REPORT_CHART_KEY_PREFIX}:{label}:{chart_hash}:{format}:{dpi}",
+            lambda: ReportChartHelper.draw(report, chart_data, format, dpi),
+            timeout=settings.REPORT_CHART_TIMEOUT,
+        )
+
+    @staticmethod
+    def draw(report, chart_data, format, dpi):
+        report.init_chart_lib()
+
+        # a local figure to avoid the non-thread-safe pyplot global state
+        fig = Figure(figsize=report.chart_size)
+        FigureCanvasAgg(fig)
+        report.draw_chart(fig, chart_data)
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=format, dpi=dpi)
+
+        return buffer.getvalue()
+
+    @staticmethod
+    def get_data_uri(report, chart_data, format, dpi):
+        image = ReportChartHelper.render(report, chart_data, format, dpi)
+        content_type = REPORT_CHART_CONTENT_TYPES[format]
+
+        return f"data:{content_type};base64,{base64.b64encode(image).decode('utf-8')}"
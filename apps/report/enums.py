@@ -0,0 +1,13 @@
+from django.db.models.enums import TextChoices
+from django.utils.translation import gettext_lazy as _
+
+
+class ReportExportStatus(TextChoices):
+    PENDING = "pending", _("enum.report-export-status.pending")
+    RUNNING = "running", _("enum.report-export-status.running")
+    DONE = "done", _("enum.report-export-status.done")
+    FAILED = "failed", _("enum.report-export-status.failed")
+
+    @classmethod
+    def get_choices(cls):
+        return tuple((i.name, i.value) for i in cls)
@@ -0,0 +1,136 @@
+import hashlib
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone, translation
+from django_q.tasks import async_task
+
+from apps.report.enums import ReportExportStatus
+from apps.report.filters import ExportDataFilter
+from apps.report.models import ReportExport
+from apps.report.snapshot import ReportSnapshotHelper
+
+logger = logging.getLogger(__name__)
+
+
+class ReportExportHelper:
+    @staticmethod
+    def build_key(report, request):
+        """
+        Returns the export key of a report for the request filters and its data version.
+        """
+        key = f"{report.get_snapshot_key(request)}:{report.get_data_version(request)}"
+        return hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+
+    @staticmethod
+    def get_or_create_export(report, request):
+        """
+        Returns the pdf export of the request filters, scheduling a django-q task
+        that renders it when the user has no finished or running export of the
+        same report, filters and data version.
+        """
+        key = ReportExportHelper.build_key(report, request)
+        now = timezone.now()
+        timeout_at = now - timedelta(seconds=settings.REPORT_EXPORT_TIMEOUT)
+        expired_at = now - timedelta(seconds=settings.REPORT_EXPORT_EXPIRY)
+
+        # unfinished exports not updated within the timeout are considered lost,
+        # finished ones are rendered again once expired
+        user = request.user if request.user.is_authenticated else None
+
+        export = (
+            ReportExport.objects.filter(key=key, user=user)
+            .filter(
+                Q(status=ReportExportStatus.DONE, updated_at__gte=expired_at)
+                | Q(
+                    status__in=[ReportExportStatus.PENDING, ReportExportStatus.RUNNING],
+                    updated_at__gte=timeout_at,
+                )
+            )
+            .order_by("-id")
+            .first()
+        )
+
+        if export:
+            return export
+
+        query = request.GET.copy()
+        query.pop(ExportDataFilter.parameter_name, None)
+
+        export = ReportExport.objects.create(
+            user=user,
+            report=report.model._meta.label_lower,
+            key=key,
+            query_string=query.urlencode(),
+            language=translation.get_language() or "",
+        )
+
+        # schedule after commit, so the worker finds the export
+        transaction.on_commit(lambda: ReportExportHelper.schedule(export))
+
+        return export
+
+    @staticmethod
+    def schedule(export):
+        task_id = async_task(ReportExportHelper.run, export.pk)
+
+        logger.info(f"Report export {export.token} scheduled with task_id: {task_id}")
+
+        return task_id
+
+    @staticmethod
+    def run(export_id):
+        """
+        Renders the pdf of an export and writes it to the export storage.
+        """
+        export = ReportExport.objects.get(pk=export_id)
+
+        if export.status == ReportExportStatus.DONE:
+            return export
+
+        export.status = ReportExportStatus.RUNNING
+        export.save(update_fields=["status", "updated_at"])
+
+        try:
+            report = ReportSnapshotHelper.get_report(export.report)
+            request = ReportSnapshotHelper.build_request(export.query_string)
+
+            with translation.override(export.language or None):
+                context = report.get_report_context(request, fresh=True)
+                pdf = report.render_pdf(context, report.pdf_template)
+
+            export.file.save(f"{export.token}.pdf", ContentFile(pdf), save=False)
+            export.status = ReportExportStatus.DONE
+            export.error = None
+        except Exception as e:
+            logger.exception(f"Report export {export.token} failed")
+
+            export.status = ReportExportStatus.FAILED
+            export.error = str(e)
+
+        export.save()
+
+        return export
+
+    @staticmethod
+    def delete_expired():
+        """
+        Delete the exports not updated within REPORT_EXPORT_EXPIRY seconds and
+        their files. Returns the number of deleted exports.
+        """
+        expired_at = timezone.now() - timedelta(seconds=settings.REPORT_EXPORT_EXPIRY)
+        exports = ReportExport.objects.filter(updated_at__lt=expired_at)
+        count = 0
+
+        for export in exports.iterator():
+            if export.file:
+                export.file.delete(save=False)
+
+            export.delete()
+            count += 1
+
+        return count
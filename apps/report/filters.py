@@ -1,4 +1,5 @@
 from django.contrib.admin import SimpleListFilter
+from django.utils.translation import gettext_lazy as _
 
 
 class ExportDataFilter(SimpleListFilter):
@@ -11,3 +12,15 @@ class ExportDataFilter(SimpleListFilter):
 
     def queryset(self, request, queryset):
         return queryset
+
+
+class ArchivedDataFilter(SimpleListFilter):
+    title = _("filter.archived-data")
+    parameter_name = "archived"
+
+    def lookups(self, request, model_admin):
+        return (("1", _("filter.archived-data.include")),)
+
+    def queryset(self, request, queryset):
+        # the report reads the value, the queryset is not filtered
+        return queryset
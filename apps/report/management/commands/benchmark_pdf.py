@@ -0,0 +1,101 @@
+import time
+
+import weasyprint
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from django.test.utils import override_settings
+
+from pyaa.helpers.pdf import PdfHelper, pdf_renderer_pool
+
+BENCHMARK_TEMPLATE = "admin/report/customer-gender-summary/pdf.html"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the per-pdf latency of fresh weasyprint objects and the renderer pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="PDFs rendered per mode (default: 20)",
+        )
+
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=50,
+            help="Table rows of each pdf (default: 50)",
+        )
+
+        parser.add_argument(
+            "--pool-size",
+            type=int,
+            default=None,
+            help="Renderer worker processes (default: PDF_RENDERER_POOL_SIZE)",
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("Iterations must be at least 1")
+
+        pool_size = options["pool_size"]
+
+        if pool_size is None:
+            pool_size = settings.PDF_RENDERER_POOL_SIZE
+
+        html = render_to_string(
+            BENCHMARK_TEMPLATE,
+            {
+                "font_path": settings.PDF_FONT_PATH,
+                "report_title": "Benchmark",
+                "has_data": True,
+                "data": [
+                    {"gender_display": f"Row {index}", "total": index}
+                    for index in range(options["rows"])
+                ],
+                "data_footer": {"total": sum(range(options["rows"]))},
+            },
+        )
+
+        self.benchmark("fresh", lambda: self.render_fresh(html), options)
+
+        # a new pool, so its startup is measured apart from the renders
+        pdf_renderer_pool.shutdown()
+
+        with override_settings(PDF_RENDERER_POOL_SIZE=pool_size):
+            started_at = time.perf_counter()
+            PdfHelper.render(html)
+            warmup = time.perf_counter() - started_at
+
+            self.benchmark(
+                f"pool ({pool_size})", lambda: PdfHelper.render(html), options
+            )
+
+            pdf_renderer_pool.shutdown()
+
+        self.stdout.write(f"pool warmup: {warmup * 1000:.3f} ms")
+
+    def render_fresh(self, html):
+        # the previous export path, stylesheets parsed again for every pdf
+        return weasyprint.HTML(string=html).write_pdf(
+            stylesheets=[
+                weasyprint.CSS(str(path)) for path in settings.PDF_STYLESHEETS
+            ],
+        )
+
+    def benchmark(self, name, render, options):
+        started_at = time.perf_counter()
+
+        for _ in range(options["iterations"]):
+            render()
+
+        elapsed = time.perf_counter() - started_at
+
+        self.stdout.write(
+            f"{name}: {options['iterations']} pdfs, "
+            f"{elapsed / options['iterations'] * 1000:.3f} ms per pdf"
+        )
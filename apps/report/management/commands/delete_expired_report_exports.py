@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.report.export import ReportExportHelper
+
+
+class Command(BaseCommand):
+    help = "Delete the report exports older than REPORT_EXPORT_EXPIRY and their files"
+
+    def handle(self, *args, **options):
+        deleted = ReportExportHelper.delete_expired()
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} report exports"))
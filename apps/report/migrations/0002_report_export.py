@@ -0,0 +1,128 @@
+# Generated by Django 6.0.7 on 2026-10-18 01:10
+
+import apps.report.models
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("report", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReportExport",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                        verbose_name="model.field.id",
+                    ),
+                ),
+                (
+                    "token",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        unique=True,
+                        verbose_name="model.field.token",
+                    ),
+                ),
+                (
+                    "report",
+                    models.CharField(max_length=100, verbose_name="model.field.report"),
+                ),
+                (
+                    "key",
+                    models.CharField(max_length=32, verbose_name="model.field.key"),
+                ),
+                (
+                    "query_string",
+                    models.TextField(
+                        blank=True, default="", verbose_name="model.field.query-string"
+                    ),
+                ),
+                (
+                    "language",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        max_length=10,
+                        verbose_name="model.field.language",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "enum.report-export-status.pending"),
+                            ("running", "enum.report-export-status.running"),
+                            ("done", "enum.report-export-status.done"),
+                            ("failed", "enum.report-export-status.failed"),
+                        ],
+                        default="pending",
+                        max_length=25,
+                        verbose_name="model.field.status",
+                    ),
+                ),
+                (
+                    "file",
+                    models.FileField(
+                        blank=True,
+                        null=True,
+                        storage=apps.report.models.get_report_export_storage,
+                        upload_to="report/%Y/%m/%d",
+                        verbose_name="model.field.file",
+                    ),
+                ),
+                (
+                    "error",
+                    models.TextField(
+                        blank=True, null=True, verbose_name="model.field.error"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="model.field.created-at"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="model.field.updated-at"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="report_exports",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="model.field.user",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "model.report-export.name",
+                "verbose_name_plural": "model.report-export.name.plural",
+                "db_table": "report_export",
+                "indexes": [
+                    models.Index(fields=["key"], name="report_export_key"),
+                    models.Index(
+                        fields=["created_at"], name="report_export_created_at"
+                    ),
+                ],
+            },
+        ),
+    ]
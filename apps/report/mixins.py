@@ -58,3 +58,13 @@ class DateParserMixin:
         )
 
         return start_of_month, end_of_month
+
+    def get_local_date(self, date):
+        """
+        Get the date of a datetime in the current timezone.
+        Naive datetimes are taken as local.
+        """
+        if timezone.is_naive(date):
+            return date.date()
+
+        return timezone.localdate(date)
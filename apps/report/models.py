@@ -1,7 +1,17 @@
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import storages
+from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from apps.banner.models import Banner
 from apps.customer.models import Customer
+from apps.report.enums import ReportExportStatus
+
+
+def get_report_export_storage():
+    return storages[settings.REPORT_EXPORT_STORAGE]
 
 
 class CustomerGenderSummary(Customer):
@@ -16,3 +26,96 @@ class BannerAccessSummary(Banner):
         proxy = True
         verbose_name = _("model.banner-access-summary.name")
         verbose_name_plural = _("model.banner-access-summary.name")
+
+
+class ReportExport(models.Model):
+    class Meta:
+        db_table = "report_export"
+        verbose_name = _("model.report-export.name")
+        verbose_name_plural = _("model.report-export.name.plural")
+
+        indexes = [
+            models.Index(fields=["key"], name="{0}_key".format(db_table)),
+            models.Index(fields=["created_at"], name="{0}_created_at".format(db_table)),
+        ]
+
+    id = models.BigAutoField(
+        _("model.field.id"),
+        unique=True,
+        primary_key=True,
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="report_exports",
+        verbose_name=_("model.field.user"),
+        blank=True,
+        null=True,
+    )
+
+    token = models.UUIDField(
+        _("model.field.token"),
+        default=uuid.uuid4,
+        editable=False,
+        unique=True,
+    )
+
+    # model label of the report, e.g. report.banneraccesssummary
+    report = models.CharField(
+        _("model.field.report"),
+        max_length=100,
+    )
+
+    # same report, filters and data version, see ReportExportHelper.build_key
+    key = models.CharField(
+        _("model.field.key"),
+        max_length=32,
+    )
+
+    query_string = models.TextField(
+        _("model.field.query-string"),
+        blank=True,
+        default="",
+    )
+
+    language = models.CharField(
+        _("model.field.language"),
+        max_length=10,
+        blank=True,
+        default="",
+    )
+
+    status = models.CharField(
+        _("model.field.status"),
+        max_length=25,
+        choices=ReportExportStatus.choices,
+        default=ReportExportStatus.PENDING,
+    )
+
+    file = models.FileField(
+        _("model.field.file"),
+        upload_to="report/%Y/%m/%d",
+        storage=get_report_export_storage,
+        blank=True,
+        null=True,
+    )
+
+    error = models.TextField(
+        _("model.field.error"),
+        blank=True,
+        null=True,
+    )
+
+    created_at = models.DateTimeField(
+        _("model.field.created-at"),
+        auto_now_add=True,
+    )
+
+    updated_at = models.DateTimeField(
+        _("model.field.updated-at"),
+        auto_now=True,
+    )
+
+    def __str__(self):
+        return f"{self.report} - {self.status} - {self.created_at}"
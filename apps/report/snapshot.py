@@ -0,0 +1,82 @@
+import hashlib
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib import admin
+from django.core.cache import cache
+from django.http import HttpRequest, QueryDict
+from django.utils import translation
+from django_q.tasks import async_task
+
+logger = logging.getLogger(__name__)
+
+REPORT_SNAPSHOT_KEY_PREFIX = "report-snapshot"
+REPORT_SNAPSHOT_LOCK_KEY_PREFIX = "report-snapshot-refresh"
+
+
+class ReportSnapshotHelper:
+    @staticmethod
+    def build_key(report, filters):
+        """
+        Returns the snapshot key of a report for the normalized filters.
+        """
+        label = report.model._meta.label_lower
+        digest = hashlib.md5(repr(filters).encode(), usedforsecurity=False)
+
+        return f"{REPORT_SNAPSHOT_KEY_PREFIX}:{label}:{digest.hexdigest()}"
+
+    @staticmethod
+    def refresh_async(report, request, key):
+        """
+        Schedules a django-q task that rebuilds the snapshot of the request filters.
+        Returns False if a refresh of the snapshot is already scheduled.
+        """
+        lock_key = f"{REPORT_SNAPSHOT_LOCK_KEY_PREFIX}:{key}"
+
+        if not cache.add(lock_key, 1, settings.REPORT_SNAPSHOT_LOCK_TIMEOUT):
+            return False
+
+        task_id = async_task(
+            ReportSnapshotHelper.refresh,
+            report.model._meta.label_lower,
+            request.GET.urlencode(),
+            translation.get_language(),
+            lock_key,
+        )
+
+        logger.info(
+            f"Report snapshot refresh scheduled for {key} with task_id: {task_id}"
+        )
+
+        return True
+
+    @staticmethod
+    def refresh(model_label, query_string, language, lock_key=None):
+        """
+        Rebuilds the snapshot of a report for the filters of the query string.
+        """
+        try:
+            report = ReportSnapshotHelper.get_report(model_label)
+            request = ReportSnapshotHelper.build_request(query_string)
+
+            with translation.override(language):
+                return report.build_snapshot(request)
+        finally:
+            if lock_key:
+                cache.delete(lock_key)
+
+    @staticmethod
+    def get_report(model_label):
+        return admin.site._registry[apps.get_model(model_label)]
+
+    @staticmethod
+    def build_request(query_string):
+        """
+        Returns a request with the report filters, for reports built outside the admin.
+        """
+        request = HttpRequest()
+        request.method = "GET"
+        request.GET = QueryDict(query_string)
+
+        return request
@@ -1,14 +1,21 @@
+from unittest.mock import patch
+
+from django.conf import settings
 from django.contrib.admin.sites import AdminSite
 from django.contrib.auth import get_user_model
 from django.contrib.sites.models import Site
-from django.test import RequestFactory, TestCase
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
 
 from apps.banner.enums import BannerAccessType, BannerZone
+from apps.banner.helpers import BannerHelper
 from apps.banner.models import Banner, BannerAccess
 from apps.customer.enums import CustomerGender
 from apps.customer.models import Customer
 from apps.report.admin.banner_access import BannerAccessSummaryAdmin
 from apps.report.admin.customer_gender import CustomerGendeSummaryAdmin
+from apps.report.charts import ReportChartHelper
+from apps.report.filters import ArchivedDataFilter
 from apps.report.models import BannerAccessSummary, CustomerGenderSummary
 
 User = get_user_model()
@@ -52,15 +59,17 @@ class CustomerGenderSummaryAdminTest(TestCase):
         data = self.admin.generate_report_data(self.request)
         self.assertIn("gender_display", data["data"][0])
 
-    def test_generate_chart_data_returns_base64(self):
-        self.admin.init_chart_lib()
+    def test_pdf_chart_image_returns_base64(self):
         report_data = self.admin.generate_report_data(self.request)
-        chart = self.admin.generate_chart_data(report_data)
+        chart_data = self.admin.get_chart_data(report_data)
+        chart = ReportChartHelper.get_data_uri(
+            self.admin, chart_data, "png", settings.REPORT_CHART_PDF_DPI
+        )
 
         self.assertTrue(chart.startswith("data:image/png;base64,"))
 
-    def test_generate_chart_data_without_data_returns_none(self):
-        self.assertIsNone(self.admin.generate_chart_data({"data": []}))
+    def test_get_chart_data_without_data_returns_none(self):
+        self.assertIsNone(self.admin.get_chart_data({"data": []}))
 
     def test_has_pdf_export_enabled_by_default(self):
         self.assertTrue(self.admin.has_pdf_export())
@@ -132,8 +141,8 @@ class BannerAccessSummaryAdminTest(TestCase):
     def test_report_title(self):
         self.assertTrue(self.admin.get_report_title())
 
-    def test_has_no_chart(self):
-        self.assertFalse(self.admin.has_chart())
+    def test_has_chart(self):
+        self.assertTrue(self.admin.has_chart())
 
     def test_get_queryset_returns_banners(self):
         self.assertIn(self.banner, self.admin.get_queryset(self.request))
@@ -163,3 +172,61 @@ class BannerAccessSummaryAdminTest(TestCase):
     def test_generate_report_data_without_accesses_is_empty(self):
         data = self.admin.generate_report_data(self.request)
         self.assertFalse(data["has_data"])
+
+    def test_generate_report_data_reads_rollups_and_new_accesses(self):
+        self._create_access(BannerAccessType.VIEW)
+        self._create_access(BannerAccessType.CLICK)
+
+        # roll up the existing accesses, the next one is read from the access table
+        with override_settings(BANNER_ACCESS_ROLLUP_DELAY=0):
+            BannerHelper.rollup_banner_accesses()
+
+        self._create_access(BannerAccessType.VIEW)
+
+        data = self.admin.generate_report_data(self.request)
+
+        item = next(item for item in data["data"] if item["id"] == self.banner.id)
+        self.assertEqual(item["total_views"], 2)
+        self.assertEqual(item["total_clicks"], 1)
+        self.assertEqual(
+            data["data_trend"],
+            [{"day": timezone.localdate(), "total_views": 2, "total_clicks": 1}],
+        )
+
+    def test_generate_report_data_applies_active_filter(self):
+        self._create_access(BannerAccessType.VIEW)
+
+        data = self.admin.generate_report_data(
+            self.factory.get("/admin", {"active__exact": "0"})
+        )
+
+        self.assertFalse(data["has_data"])
+        self.assertEqual(data["data_trend"], [])
+
+    def test_pdf_chart_image_returns_trend_image(self):
+        self._create_access(BannerAccessType.VIEW)
+
+        data = self.admin.generate_report_data(self.request)
+        chart = ReportChartHelper.get_data_uri(
+            self.admin,
+            self.admin.get_chart_data(data),
+            "png",
+            settings.REPORT_CHART_PDF_DPI,
+        )
+
+        self.assertTrue(chart.startswith("data:image/png;base64,"))
+        self.assertIsNone(self.admin.get_chart_data({"data_trend": []}))
+
+    def test_generate_report_data_reads_archive_when_asked(self):
+        self._create_access(BannerAccessType.VIEW)
+
+        with patch.object(
+            BannerHelper, "get_daily_accesses", wraps=BannerHelper.get_daily_accesses
+        ) as get_daily_accesses:
+            data = self.admin.generate_report_data(
+                self.factory.get("/admin", {"archived": "1"})
+            )
+
+        self.assertTrue(get_daily_accesses.call_args.kwargs["archived"])
+        self.assertEqual(data["data_footer"]["total_views"], 1)
+        self.assertIn(ArchivedDataFilter, self.admin.get_list_filter(self.request))
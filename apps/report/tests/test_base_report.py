@@ -1,6 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.contrib.sites.models import Site
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from django.contrib.admin.sites import AdminSite
@@ -46,16 +46,17 @@ class BaseReportChangelistViewTest(TestCase):
         self.client.force_login(self.admin_user)
 
     def test_customer_gender_changelist_view(self):
-        # exercises changelist_view -> generate_report_data -> generate_chart_data
+        # exercises changelist_view -> generate_report_data -> get_chart_data
         url = reverse("admin:report_customergendersummary_changelist")
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, 200)
         self.assertTrue(response.context_data["has_data"])
         self.assertTrue(response.context_data["has_chart"])
-        self.assertIsNotNone(response.context_data["chart_image"])
+        self.assertIsNotNone(response.context_data["chart_url"])
         self.assertIn("report_title", response.context_data)
 
+    @override_settings(REPORT_EXPORT_ASYNC=False)
     def test_customer_gender_export_to_pdf(self):
         # exercises export_to_pdf with a real weasyprint render
         url = reverse("admin:report_customergendersummary_changelist")
@@ -65,6 +66,22 @@ class BaseReportChangelistViewTest(TestCase):
         self.assertEqual(response["Content-Type"], "application/pdf")
         self.assertIn("inline", response["Content-Disposition"])
 
+    def test_customer_gender_export_to_csv(self):
+        url = reverse("admin:report_customergendersummary_changelist")
+        response = self.client.get(url, {"export-data": "csv"})
+        content = b"".join(response.streaming_content).decode("utf-8")
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn("attachment", response["Content-Disposition"])
+        self.assertEqual(len(content.splitlines()), 3)
+
+    def test_customer_gender_export_to_xlsx(self):
+        url = reverse("admin:report_customergendersummary_changelist")
+        response = self.client.get(url, {"export-data": "xlsx"})
+
+        self.assertIn("spreadsheetml", response["Content-Type"])
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"PK"))
+
     def test_banner_access_changelist_view(self):
         # banner access report has no chart
         url = reverse("admin:report_banneraccesssummary_changelist")
@@ -72,8 +89,9 @@ class BaseReportChangelistViewTest(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertFalse(response.context_data["has_chart"])
-        self.assertIsNone(response.context_data["chart_image"])
+        self.assertIsNone(response.context_data["chart_url"])
 
+    @override_settings(REPORT_EXPORT_ASYNC=False)
     def test_banner_access_export_to_pdf(self):
         url = reverse("admin:report_banneraccesssummary_changelist")
         response = self.client.get(url, {"export-data": "pdf"})
@@ -96,8 +114,8 @@ class BaseReportAdminDefaultsTest(TestCase):
     def test_default_generate_report_data_is_empty(self):
         self.assertEqual(self.admin.generate_report_data(self.factory.get("/")), {})
 
-    def test_default_generate_chart_data_is_none(self):
-        self.assertIsNone(self.admin.generate_chart_data({}))
+    def test_default_get_chart_data_is_none(self):
+        self.assertIsNone(self.admin.get_chart_data({}))
 
     def test_default_permissions(self):
         request = self.factory.get("/")
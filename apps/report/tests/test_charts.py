@@ -0,0 +1,128 @@
+from unittest.mock import patch
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.customer.enums import CustomerGender
+from apps.customer.models import Customer
+from apps.report.charts import ReportChartHelper
+from apps.report.models import CustomerGenderSummary
+
+User = get_user_model()
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "report-chart-tests",
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReportChartTest(TestCase):
+    fixtures = ["apps/language/fixtures/initial.json"]
+
+    def setUp(self):
+        Site.objects.clear_cache()
+        self.site = Site.objects.get_current()
+        self.report = admin.site._registry[CustomerGenderSummary]
+        self.url = reverse("admin:report_customergendersummary_changelist")
+
+        self.admin_user = User.objects.create_superuser(
+            username=None,
+            password="adminpass",
+            email="admin@example.com",
+            site=self.site,
+        )
+
+        user = User.objects.create_user(
+            email="m1@example.com", password="pass", site=self.site
+        )
+        Customer.objects.create(
+            user=user, site=self.site, language_id=1, gender=CustomerGender.MALE
+        )
+
+        self.client.force_login(self.admin_user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_chart_data(self):
+        return {"labels": ["Male"], "sizes": [1], "colors": ["#36ACD9"]}
+
+    def test_hash_depends_on_the_chart_data(self):
+        chart_data = self.get_chart_data()
+
+        self.assertEqual(
+            ReportChartHelper.get_hash(chart_data),
+            ReportChartHelper.get_hash(self.get_chart_data()),
+        )
+        self.assertNotEqual(
+            ReportChartHelper.get_hash(chart_data),
+            ReportChartHelper.get_hash({**chart_data, "sizes": [2]}),
+        )
+
+    def test_render_is_cached_by_data_format_and_dpi(self):
+        chart_data = self.get_chart_data()
+
+        with patch.object(
+            ReportChartHelper, "draw", wraps=ReportChartHelper.draw
+        ) as draw:
+            png = ReportChartHelper.render(self.report, chart_data, "png", 50)
+            ReportChartHelper.render(self.report, chart_data, "png", 50)
+            svg = ReportChartHelper.render(self.report, chart_data, "svg", 50)
+
+        self.assertEqual(draw.call_count, 2)
+        self.assertTrue(png.startswith(b"\x89PNG"))
+        self.assertIn(b"<svg", svg)
+
+    def test_page_links_the_chart_instead_of_inlining_it(self):
+        response = self.client.get(self.url)
+        chart_url = response.context_data["chart_url"]
+
+        self.assertNotContains(response, "data:image/png;base64")
+        self.assertContains(response, chart_url.replace("&", "&amp;"))
+
+        chart = self.client.get(chart_url)
+
+        self.assertEqual(chart.status_code, 200)
+        self.assertEqual(chart["Content-Type"], "image/svg+xml")
+        self.assertIn("immutable", chart["Cache-Control"])
+        self.assertIn("max-age", chart["Cache-Control"])
+
+    @override_settings(REPORT_CHART_FORMAT="png")
+    def test_png_chart_uses_the_screen_dpi(self):
+        response = self.client.get(self.url)
+
+        with patch.object(
+            ReportChartHelper, "render", return_value=b"\x89PNG"
+        ) as render:
+            chart = self.client.get(response.context_data["chart_url"])
+
+        self.assertEqual(chart["Content-Type"], "image/png")
+        self.assertEqual(render.call_args.args[2:], ("png", 100))
+
+    def test_outdated_chart_url_is_not_cached(self):
+        chart_url = reverse("admin:report_customergendersummary_chart")
+        chart = self.client.get(chart_url, {"format": "svg", "hash": "outdated"})
+
+        self.assertEqual(chart.status_code, 200)
+        self.assertIn("no-cache", chart["Cache-Control"])
+
+    def test_unknown_format_is_not_found(self):
+        chart_url = reverse("admin:report_customergendersummary_chart")
+
+        self.assertEqual(self.client.get(chart_url, {"format": "gif"}).status_code, 404)
+
+    @override_settings(REPORT_EXPORT_ASYNC=False)
+    def test_pdf_embeds_the_high_dpi_chart(self):
+        with patch(
+            "apps.report.admin.base_report.PdfHelper.render", return_value=b"%PDF"
+        ) as render:
+            self.client.get(self.url, {"export-data": "pdf"})
+
+        self.assertIn("data:image/png;base64", render.call_args.args[0])
@@ -0,0 +1,33 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from pyaa.helpers.pdf import pdf_renderer_pool
+
+
+class BenchmarkPdfCommandTest(SimpleTestCase):
+    def tearDown(self):
+        pdf_renderer_pool.shutdown()
+
+    def test_compares_fresh_and_pool_renders(self):
+        out = StringIO()
+
+        call_command(
+            "benchmark_pdf",
+            "--iterations=2",
+            "--rows=3",
+            "--pool-size=1",
+            stdout=out,
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith("fresh: 2 pdfs"))
+        self.assertTrue(lines[1].startswith("pool (1): 2 pdfs"))
+        self.assertTrue(lines[2].startswith("pool warmup:"))
+
+    def test_invalid_iterations_raise_error(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark_pdf", "--iterations=0")
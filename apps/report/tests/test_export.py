@@ -0,0 +1,233 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.contrib.sites.models import Site
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.customer.enums import CustomerGender
+from apps.customer.models import Customer
+from apps.report.enums import ReportExportStatus
+from apps.report.export import ReportExportHelper
+from apps.report.models import ReportExport
+
+User = get_user_model()
+
+
+class ReportExportTest(TestCase):
+    fixtures = ["apps/language/fixtures/initial.json"]
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, ignore_errors=True)
+
+        # the storage of the file field is created when the model is loaded
+        storage = patch.object(
+            ReportExport._meta.get_field("file"),
+            "storage",
+            FileSystemStorage(location=self.location),
+        )
+        storage.start()
+        self.addCleanup(storage.stop)
+
+        Site.objects.clear_cache()
+        self.site = Site.objects.get_current()
+        self.url = reverse("admin:report_customergendersummary_changelist")
+
+        self.admin_user = User.objects.create_superuser(
+            username=None,
+            password="adminpass",
+            email="admin@example.com",
+            site=self.site,
+        )
+
+        self.create_customer("m1@example.com", CustomerGender.MALE)
+        self.client.force_login(self.admin_user)
+
+    def create_customer(self, email, gender):
+        user = User.objects.create_user(email=email, password="pass", site=self.site)
+        return Customer.objects.create(
+            user=user, site=self.site, language_id=1, gender=gender
+        )
+
+    def export(self, **params):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.get(self.url, {"export-data": "pdf", **params})
+
+    @patch("apps.report.export.async_task", return_value="task-1")
+    def test_export_is_scheduled_and_polled(self, mock_async_task):
+        response = self.export()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "admin/report/base/export.html")
+
+        export = ReportExport.objects.get()
+        self.assertEqual(export.status, ReportExportStatus.PENDING)
+        self.assertEqual(export.user, self.admin_user)
+        self.assertNotIn("export-data", export.query_string)
+        mock_async_task.assert_called_once_with(ReportExportHelper.run, export.pk)
+
+        status = self.client.get(response.context["status_url"])
+        self.assertEqual(status.json()["status"], ReportExportStatus.PENDING)
+
+        download = self.client.get(response.context["download_url"])
+        self.assertEqual(download.status_code, 404)
+
+    @patch("apps.report.export.async_task", return_value="task-1")
+    def test_finished_export_is_downloaded(self, mock_async_task):
+        response = self.export()
+
+        export = ReportExportHelper.run(ReportExport.objects.get().pk)
+        self.assertEqual(export.status, ReportExportStatus.DONE)
+
+        status = self.client.get(response.context["status_url"])
+        self.assertEqual(status.json()["status"], ReportExportStatus.DONE)
+
+        download = self.client.get(response.context["download_url"])
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(download["Content-Type"], "application/pdf")
+        self.assertTrue(b"".join(download.streaming_content).startswith(b"%PDF"))
+
+    @patch("apps.report.export.async_task", return_value="task-1")
+    def test_identical_exports_are_deduplicated(self, mock_async_task):
+        self.export()
+        self.export()
+        self.export(
+            **{
+                "created_at__range__gte": "2025-01-01",
+                "created_at__range__lte": "2025-01-31",
+            }
+        )
+
+        self.assertEqual(ReportExport.objects.count(), 2)
+        self.assertEqual(mock_async_task.call_count, 2)
+
+        # new data changes the data version, so a new export is rendered
+        self.create_customer("f1@example.com", CustomerGender.FEMALE)
+        self.export()
+
+        self.assertEqual(ReportExport.objects.count(), 3)
+
+    @patch("apps.report.export.async_task", return_value="task-1")
+    def test_lost_and_failed_exports_are_scheduled_again(self, mock_async_task):
+        self.export()
+
+        export = ReportExport.objects.get()
+        ReportExport.objects.filter(pk=export.pk).update(
+            updated_at=export.updated_at - timedelta(hours=1)
+        )
+
+        self.export()
+        self.assertEqual(ReportExport.objects.count(), 2)
+
+        ReportExport.objects.update(status=ReportExportStatus.FAILED)
+
+        self.export()
+        self.assertEqual(ReportExport.objects.count(), 3)
+
+    @patch("apps.report.export.async_task", return_value="task-1")
+    def test_render_error_marks_the_export_failed(self, mock_async_task):
+        self.export()
+
+        with patch(
+            "apps.report.admin.base_report.BaseReportAdmin.render_pdf",
+            side_effect=RuntimeError("render error"),
+        ):
+            export = ReportExportHelper.run(ReportExport.objects.get().pk)
+
+        self.assertEqual(export.status, ReportExportStatus.FAILED)
+        self.assertEqual(export.error, "render error")
+
+    @patch("apps.report.export.async_task", return_value="task-1")
+    def test_export_of_another_report_is_not_found(self, mock_async_task):
+        self.export()
+
+        export = ReportExport.objects.get()
+        url = reverse(
+            "admin:report_banneraccesssummary_export_status", args=[export.token]
+        )
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    @patch("apps.report.export.async_task", return_value="task-1")
+    def test_expired_export_is_rendered_again(self, mock_async_task):
+        self.export()
+        export = ReportExportHelper.run(ReportExport.objects.get().pk)
+
+        ReportExport.objects.filter(pk=export.pk).update(
+            updated_at=export.updated_at - timedelta(days=2)
+        )
+
+        self.export()
+        self.assertEqual(ReportExport.objects.count(), 2)
+
+    @patch("apps.report.export.async_task", return_value="task-1")
+    def test_expired_exports_are_deleted_with_their_files(self, mock_async_task):
+        self.export()
+        expired = ReportExportHelper.run(ReportExport.objects.get().pk)
+        ReportExport.objects.filter(pk=expired.pk).update(
+            updated_at=expired.updated_at - timedelta(days=2)
+        )
+
+        self.create_customer("f1@example.com", CustomerGender.FEMALE)
+        self.export()
+        recent = ReportExportHelper.run(ReportExport.objects.latest("id").pk)
+
+        out = StringIO()
+        call_command("delete_expired_report_exports", stdout=out)
+
+        self.assertIn("Deleted 1 report exports", out.getvalue())
+        self.assertEqual(list(ReportExport.objects.all()), [recent])
+        self.assertFalse(expired.file.storage.exists(expired.file.name))
+        self.assertTrue(recent.file.storage.exists(recent.file.name))
+
+    @patch("apps.report.export.async_task", return_value="task-1")
+    def test_export_is_only_for_its_creator_and_superusers(self, mock_async_task):
+        response = self.export()
+        ReportExportHelper.run(ReportExport.objects.get().pk)
+
+        staff_user = User.objects.create_user(
+            email="staff@example.com",
+            password="pass",
+            site=self.site,
+            is_staff=True,
+            is_active=True,
+        )
+        staff_user.user_permissions.add(
+            Permission.objects.get(codename="view_customergendersummary")
+        )
+        self.client.force_login(staff_user)
+
+        # the project backend grants no model permissions, the django one does
+        with self.settings(
+            AUTHENTICATION_BACKENDS=[
+                "apps.user.backends.MultiFieldModelBackend",
+                "django.contrib.auth.backends.ModelBackend",
+            ]
+        ):
+            self.assertEqual(
+                self.client.get(response.context["status_url"]).status_code, 404
+            )
+            self.assertEqual(
+                self.client.get(response.context["download_url"]).status_code, 404
+            )
+
+            # the same filters render an export of the user
+            self.export()
+            self.assertEqual(ReportExport.objects.filter(user=staff_user).count(), 1)
+
+        superuser = User.objects.create_superuser(
+            username=None, password="pass", email="super@example.com", site=self.site
+        )
+        self.client.force_login(superuser)
+
+        self.assertEqual(
+            self.client.get(response.context["download_url"]).status_code, 200
+        )
@@ -1,7 +1,7 @@
 from django.test import RequestFactory, TestCase
 
 from apps.banner.models import Banner
-from apps.report.filters import ExportDataFilter
+from apps.report.filters import ArchivedDataFilter, ExportDataFilter
 
 
 class ExportDataFilterTest(TestCase):
@@ -27,3 +27,19 @@ class ExportDataFilterTest(TestCase):
         result = filter_instance.queryset(request, queryset)
 
         self.assertIs(result, queryset)
+
+
+class ArchivedDataFilterTest(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_queryset_is_returned_unchanged(self):
+        request = self.factory.get("/admin", {"archived": "1"})
+        filter_instance = ArchivedDataFilter(
+            request, dict(request.GET.items()), Banner, None
+        )
+
+        queryset = Banner.objects.all()
+
+        self.assertEqual(filter_instance.value(), "1")
+        self.assertIs(filter_instance.queryset(request, queryset), queryset)
@@ -61,3 +61,11 @@ class DateParserMixinTest(TestCase):
         self.assertEqual(start.month, now.month)
         self.assertEqual(end.month, now.month)
         self.assertEqual(start.day, 1)
+
+    def test_get_local_date_with_aware_datetime(self):
+        date = timezone.make_aware(datetime.datetime(2025, 12, 31, 23, 30))
+        self.assertEqual(self.mixin.get_local_date(date), datetime.date(2025, 12, 31))
+
+    def test_get_local_date_with_naive_datetime(self):
+        date = datetime.datetime(2025, 12, 31, 10, 30)
+        self.assertEqual(self.mixin.get_local_date(date), datetime.date(2025, 12, 31))
@@ -0,0 +1,145 @@
+from unittest.mock import patch
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from apps.banner.enums import BannerAccessType, BannerZone
+from apps.banner.models import Banner, BannerAccess
+from apps.customer.enums import CustomerGender
+from apps.customer.models import Customer
+from apps.report.models import BannerAccessSummary, CustomerGenderSummary
+from apps.report.snapshot import ReportSnapshotHelper
+
+User = get_user_model()
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "report-snapshot-tests",
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReportSnapshotTest(TestCase):
+    fixtures = ["apps/language/fixtures/initial.json"]
+
+    def setUp(self):
+        Site.objects.clear_cache()
+        self.site = Site.objects.get_current()
+        self.factory = RequestFactory()
+        self.report = admin.site._registry[CustomerGenderSummary]
+        self.url = reverse("admin:report_customergendersummary_changelist")
+
+        self.admin_user = User.objects.create_superuser(
+            username=None,
+            password="adminpass",
+            email="admin@example.com",
+            site=self.site,
+        )
+
+        self.create_customer("m1@example.com", CustomerGender.MALE)
+        self.client.force_login(self.admin_user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def create_customer(self, email, gender):
+        user = User.objects.create_user(email=email, password="pass", site=self.site)
+        return Customer.objects.create(
+            user=user, site=self.site, language_id=1, gender=gender
+        )
+
+    @override_settings(REPORT_EXPORT_ASYNC=False)
+    def test_repeated_views_and_exports_reuse_the_snapshot(self):
+        with patch.object(
+            self.report, "generate_report_data", wraps=self.report.generate_report_data
+        ) as generate_report_data:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+            pdf = self.client.get(self.url, {"export-data": "pdf"})
+
+        self.assertEqual(generate_report_data.call_count, 1)
+        self.assertEqual(pdf["Content-Type"], "application/pdf")
+        self.assertEqual(
+            first.context_data["data_as_of"], second.context_data["data_as_of"]
+        )
+        self.assertFalse(second.context_data["data_is_stale"])
+        self.assertContains(second, "report-data-as-of")
+
+    @patch("apps.report.snapshot.async_task", return_value="task-1")
+    def test_outdated_snapshot_is_served_while_refreshing(self, mock_async_task):
+        self.client.get(self.url)
+        self.create_customer("f1@example.com", CustomerGender.FEMALE)
+
+        response = self.client.get(self.url)
+        self.assertTrue(response.context_data["data_is_stale"])
+        self.assertEqual(len(response.context_data["data"]), 1)
+
+        # a single refresh is scheduled until it runs
+        self.client.get(self.url)
+        mock_async_task.assert_called_once()
+
+        ReportSnapshotHelper.refresh(*mock_async_task.call_args.args[1:])
+
+        response = self.client.get(self.url)
+        self.assertFalse(response.context_data["data_is_stale"])
+        self.assertEqual(len(response.context_data["data"]), 2)
+
+    @override_settings(REPORT_SNAPSHOT_REFRESH_ASYNC=False)
+    def test_outdated_snapshot_is_rebuilt_without_async_refresh(self):
+        self.client.get(self.url)
+        self.create_customer("f1@example.com", CustomerGender.FEMALE)
+
+        response = self.client.get(self.url)
+
+        self.assertFalse(response.context_data["data_is_stale"])
+        self.assertEqual(len(response.context_data["data"]), 2)
+
+    def test_snapshot_key_normalizes_filters(self):
+        request = self.factory.get(
+            "/",
+            {
+                "created_at__range__gte": "2025-01-01",
+                "created_at__range__lte": "2025-01-31",
+                "export-data": "pdf",
+            },
+        )
+        same_request = self.factory.get(
+            "/",
+            {
+                "created_at__range__lte": "2025-01-31",
+                "created_at__range__gte": "2025-01-01",
+            },
+        )
+        other_request = self.factory.get(
+            "/",
+            {
+                "created_at__range__gte": "2025-02-01",
+                "created_at__range__lte": "2025-02-28",
+            },
+        )
+
+        key = self.report.get_snapshot_key(request)
+
+        self.assertEqual(key, self.report.get_snapshot_key(same_request))
+        self.assertNotEqual(key, self.report.get_snapshot_key(other_request))
+
+    def test_banner_access_version_changes_with_new_accesses(self):
+        report = admin.site._registry[BannerAccessSummary]
+        request = self.factory.get("/")
+        banner = Banner.objects.create(
+            title="Banner", image="banner.jpg", zone=BannerZone.HOME
+        )
+
+        version = report.get_data_version(request)
+
+        BannerAccess.objects.create(
+            banner=banner, access_type=BannerAccessType.VIEW, ip_address="10.0.0.1"
+        )
+
+        self.assertNotEqual(version, report.get_data_version(request))
@@ -9,6 +9,7 @@ from apps.shop import filters, models
 from apps.shop.enums import ObjectType
 from pyaa.helpers.format import FormatHelper
 from pyaa.helpers.status import StatusHelper
+from pyaa.mixins import EstimatedCountAdminMixin, StreamingExportAdminMixin
 
 
 class BaseEventLogInlineAdmin(NonrelatedTabularInline):
@@ -247,7 +248,7 @@ class PlanAdmin(admin.ModelAdmin):
     formatted_price.short_description = _("model.field.price")
 
 
-class SubscriptionAdmin(admin.ModelAdmin):
+class SubscriptionAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
     list_display = (
         "id",
         "token",
@@ -348,7 +349,9 @@ class SubscriptionAdmin(admin.ModelAdmin):
     status_badge.short_description = _("model.field.status")
 
 
-class CreditLogAdmin(admin.ModelAdmin):
+class CreditLogAdmin(
+    StreamingExportAdminMixin, EstimatedCountAdminMixin, admin.ModelAdmin
+):
     list_display = (
         "id",
         "object_id",
@@ -377,6 +380,17 @@ class CreditLogAdmin(admin.ModelAdmin):
     autocomplete_fields = ["customer"]
     readonly_fields = ("created_at",)
 
+    export_fields = (
+        "id",
+        "object_type",
+        "object_id",
+        "customer__user__email",
+        "amount",
+        "is_refund",
+        "description",
+        "created_at",
+    )
+
     fieldsets = (
         (
             _("admin.fieldsets.general"),
@@ -447,7 +461,9 @@ class CreditLogAdmin(admin.ModelAdmin):
                 )
 
 
-class EventLogAdmin(admin.ModelAdmin):
+class EventLogAdmin(
+    StreamingExportAdminMixin, EstimatedCountAdminMixin, admin.ModelAdmin
+):
     list_display = (
         "id",
         "object_id",
@@ -478,6 +494,19 @@ class EventLogAdmin(admin.ModelAdmin):
     readonly_fields = [field.name for field in models.EventLog._meta.fields]
     ordering = ("-id",)
 
+    export_fields = (
+        "id",
+        "object_type",
+        "object_id",
+        "customer__user__email",
+        "event_id",
+        "currency",
+        "amount",
+        "status",
+        "description",
+        "created_at",
+    )
+
     fieldsets = (
         (
             _("admin.fieldsets.general"),
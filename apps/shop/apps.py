@@ -6,3 +6,24 @@ class ShopAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.shop"
     verbose_name = _("apps.shop.description")
+
+    def ready(self):
+        from apps.shop.models import (
+            CreditLog,
+            CreditPurchase,
+            Plan,
+            Product,
+            ProductPurchase,
+            Subscription,
+        )
+        from pyaa.helpers.cache import CacheHelper
+
+        # paginated account lists are cached per query and invalidated on writes
+        CacheHelper.watch_model(CreditLog)
+        CacheHelper.watch_model(CreditPurchase)
+        CacheHelper.watch_model(ProductPurchase)
+        CacheHelper.watch_model(Subscription)
+
+        # public pages are cached and invalidated on writes
+        CacheHelper.watch_model(Plan)
+        CacheHelper.watch_model(Product)
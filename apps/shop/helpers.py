@@ -1,11 +1,11 @@
 from django.conf import settings
-from django.core.cache import cache
 from django.db.models import Q
 from django.utils.translation import get_language
 
 from apps.shop.enums import ObjectType, PaymentGateway
 from apps.shop.gateways import stripe
 from apps.shop.models import CreditPurchase, Plan, ProductPurchase, Subscription
+from pyaa.helpers.cache import CacheHelper
 
 
 class ShopHelper:
@@ -79,80 +79,60 @@ class ShopHelper:
         if plan_type is not None:
             base_filters &= Q(plan_type=plan_type)
 
-        # first, try to fetch plans for the user's language
-        if user_language:
-            # generate cache key for language-specific plans
-            cache_key = f"plans_site_{site_id}_type_{plan_type if plan_type else 'all'}_lang_{user_language}"
+        # general plans (not language-specific) are shared by every language
+        general_cache_key = f"plans_site_{site_id}_type_{plan_type if plan_type else 'all'}_lang_general"
 
-            # attempt to retrieve the plans from cache
-            cached_plans = cache.get(cache_key)
-
-            if cached_plans is not None:
-                return cached_plans
-
-            language_filters = base_filters & (
-                Q(language__code_iso_language=user_language)
-                | Q(language__code_iso_639_1=user_language)
-            )
+        def query_general_plans():
+            general_filters = base_filters & Q(language__isnull=True)
 
-            plans_queryset = (
-                Plan.objects.filter(language_filters)
+            return (
+                Plan.objects.filter(general_filters)
                 .select_related("language")
                 .order_by("sort_order")
+                .all()
             )
 
-            # check if any plans exist before evaluating the queryset
-            if plans_queryset.exists():
-                plans = plans_queryset.all()
-                # store the result in cache with language-specific key
-                cache.set(cache_key, plans, cache_time)
-                return plans
-            else:
-                # if no plans found for the language, fall back to general plans
-                # use a different cache key for general plans (not language-specific)
-                general_cache_key = f"plans_site_{site_id}_type_{plan_type if plan_type else 'all'}_lang_general"
-
-                # attempt to retrieve general plans from cache
-                cached_general_plans = cache.get(general_cache_key)
-
-                if cached_general_plans is not None:
-                    return cached_general_plans
+        # first, try to fetch plans for the user's language
+        if user_language:
+            # generate cache key for language-specific plans
+            cache_key = f"plans_site_{site_id}_type_{plan_type if plan_type else 'all'}_lang_{user_language}"
 
-                general_filters = base_filters & Q(language__isnull=True)
+            def query_language_plans():
+                language_filters = base_filters & (
+                    Q(language__code_iso_language=user_language)
+                    | Q(language__code_iso_639_1=user_language)
+                )
 
-                plans = (
-                    Plan.objects.filter(general_filters)
+                plans_queryset = (
+                    Plan.objects.filter(language_filters)
                     .select_related("language")
                     .order_by("sort_order")
-                    .all()
                 )
 
-                # store the result in cache with general key
-                cache.set(general_cache_key, plans, cache_time)
-                return plans
-        else:
-            # if no language is set, fetch general plans
-            # use cache key for general plans
-            general_cache_key = f"plans_site_{site_id}_type_{plan_type if plan_type else 'all'}_lang_general"
-
-            # attempt to retrieve general plans from cache
-            cached_general_plans = cache.get(general_cache_key)
-
-            if cached_general_plans is not None:
-                return cached_general_plans
+                # check if any plans exist before evaluating the queryset,
+                # None is not cached so the general plans are used instead
+                if plans_queryset.exists():
+                    return plans_queryset.all()
 
-            general_filters = base_filters & Q(language__isnull=True)
+                return None
 
-            plans = (
-                Plan.objects.filter(general_filters)
-                .select_related("language")
-                .order_by("sort_order")
-                .all()
+            plans = CacheHelper.get_or_compute(
+                cache_key,
+                query_language_plans,
+                timeout=cache_time,
+                local=True,
             )
 
-            # store the result in cache
-            cache.set(general_cache_key, plans, cache_time)
-            return plans
+            if plans is not None:
+                return plans
+
+        # if no language is set or no plans exist for it, fetch general plans
+        return CacheHelper.get_or_compute(
+            general_cache_key,
+            query_general_plans,
+            timeout=cache_time,
+            local=True,
+        )
 
     @staticmethod
     def get_item_by_token(token, customer):
@@ -4,9 +4,10 @@ from django.utils.translation import gettext_lazy as _
 
 from apps.system_log import models
 from pyaa.helpers.status import StatusHelper
+from pyaa.mixins import StreamingExportAdminMixin
 
 
-class SystemLogAdmin(admin.ModelAdmin):
+class SystemLogAdmin(StreamingExportAdminMixin, admin.ModelAdmin):
     list_display = (
         "id",
         "level_badge",
@@ -48,6 +49,15 @@ class SystemLogAdmin(admin.ModelAdmin):
 
     autocomplete_fields = ["customer"]
 
+    export_fields = (
+        "id",
+        "level",
+        "category",
+        "customer__user__email",
+        "description",
+        "created_at",
+    )
+
     fieldsets = (
         (
             _("admin.fieldsets.general"),
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from pyaa.helpers.count import CountHelper
+
+
+class Command(BaseCommand):
+    help = "Refresh the database statistics used to estimate the counts of big tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database alias to analyze",
+        )
+
+    def handle(self, *args, **options):
+        CountHelper.update_statistics(options["database"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Analyzed the {options['database']} database")
+        )
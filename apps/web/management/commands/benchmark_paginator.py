@@ -0,0 +1,111 @@
+import pickle
+import time
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from pyaa.helpers.cache import CacheHelper
+from pyaa.utils.cached_paginator import (
+    PAGINATOR_STORAGE_OBJECTS,
+    PAGINATOR_STORAGE_PKS,
+    Paginator,
+)
+
+BENCHMARK_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "benchmark-paginator",
+    }
+}
+
+
+class Command(BaseCommand):
+    help = "Compare cache size and hit latency of the paginator storage modes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            default="shop.CreditLog",
+            help="Model to paginate, as app_label.ModelName (default: shop.CreditLog)",
+        )
+
+        parser.add_argument(
+            "--select-related",
+            nargs="*",
+            default=[],
+            help="Relations to select with each page (e.g. customer site)",
+        )
+
+        parser.add_argument(
+            "--per-page",
+            type=int,
+            default=10,
+            help="Objects per page (default: 10)",
+        )
+
+        parser.add_argument(
+            "--pages",
+            type=int,
+            default=10,
+            help="Pages to cache (default: 10)",
+        )
+
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=100,
+            help="Cache hits measured per page (default: 100)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options["model"])
+        except (LookupError, ValueError):
+            raise CommandError(f"Model '{options['model']}' not found")
+
+        queryset = model.objects.order_by("-pk")
+
+        if options["select_related"]:
+            queryset = queryset.select_related(*options["select_related"])
+
+        # a real in-memory cache, so the dummy cache of dev settings is not measured
+        with override_settings(CACHES=BENCHMARK_CACHES, CACHE_LOCAL_ENABLED=False):
+            for storage in (PAGINATOR_STORAGE_OBJECTS, PAGINATOR_STORAGE_PKS):
+                self.benchmark(queryset, storage, options)
+
+    def benchmark(self, queryset, storage, options):
+        cache.clear()
+
+        paginator = Paginator(
+            queryset,
+            options["per_page"],
+            cache_key="benchmark-paginator",
+            cache_storage=storage,
+        )
+
+        pages = range(1, min(options["pages"], paginator.num_pages) + 1)
+        size = 0
+
+        for number in pages:
+            paginator.page(number)
+            entry = cache.get(paginator.build_cache_key(number))
+            size += len(pickle.dumps(entry, pickle.HIGHEST_PROTOCOL))
+
+        started_at = time.perf_counter()
+
+        for _ in range(options["iterations"]):
+            for number in pages:
+                list(paginator.page(number))
+
+        elapsed = time.perf_counter() - started_at
+        hits = len(pages) * options["iterations"]
+
+        cache.clear()
+        CacheHelper.reset_stats()
+
+        self.stdout.write(
+            f"{storage}: {len(pages)} pages, {size} bytes cached, "
+            f"{elapsed / hits * 1000:.3f} ms per hit"
+        )
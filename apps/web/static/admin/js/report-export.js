@@ -0,0 +1,36 @@
+// polls the status of a report export and opens the file when it is ready
+(function () {
+    const container = document.querySelector('.report-export');
+
+    if (!container) {
+        return;
+    }
+
+    const statusUrl = container.dataset.statusUrl;
+    const downloadUrl = container.dataset.downloadUrl;
+    const pollInterval = parseInt(container.dataset.pollInterval, 10) || 2000;
+
+    function show(name) {
+        container.querySelectorAll('p').forEach((element) => {
+            element.hidden = !element.classList.contains(`report-export-${name}`);
+        });
+    }
+
+    function poll() {
+        fetch(statusUrl, { credentials: 'same-origin' })
+            .then((response) => response.json())
+            .then((data) => {
+                if (data.status === 'done') {
+                    show('done');
+                    window.location.href = downloadUrl;
+                } else if (data.status === 'failed') {
+                    show('failed');
+                } else {
+                    setTimeout(poll, pollInterval);
+                }
+            })
+            .catch(() => setTimeout(poll, pollInterval));
+    }
+
+    poll();
+})();
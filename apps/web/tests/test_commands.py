@@ -0,0 +1,46 @@
+from io import StringIO
+
+from django.contrib.sites.models import Site
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from pyaa.helpers.count import CountHelper
+
+
+class BenchmarkPaginatorCommandTest(TestCase):
+    def test_reports_both_storage_modes(self):
+        for i in range(5):
+            Site.objects.create(domain=f"site{i}.example.com", name=f"site {i}")
+
+        out = StringIO()
+        call_command(
+            "benchmark_paginator",
+            "--model=sites.Site",
+            "--per-page=2",
+            "--iterations=2",
+            stdout=out,
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith("objects: 3 pages"))
+        self.assertTrue(lines[1].startswith("pks: 3 pages"))
+
+    def test_unknown_model_raises_error(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark_paginator", "--model=unknown.Model")
+
+
+class AnalyzeDatabaseCommandTest(TestCase):
+    def test_refreshes_count_estimates(self):
+        for i in range(5):
+            Site.objects.create(domain=f"site{i}.example.com", name=f"site {i}")
+
+        out = StringIO()
+        call_command("analyze_database", stdout=out)
+
+        self.assertEqual(
+            CountHelper.get_estimate(Site.objects.all()), Site.objects.count()
+        )
+        self.assertIn("Analyzed the default database", out.getvalue())
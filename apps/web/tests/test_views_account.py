@@ -12,10 +12,11 @@ from apps.customer.enums import CustomerGender
 from apps.customer.models import Customer
 from apps.language import models as language_models
 from apps.shop.enums import (
+    ObjectType,
     PaymentGatewayCancelAction,
     SubscriptionStatus,
 )
-from apps.shop.models import Subscription
+from apps.shop.models import CreditLog, Subscription
 
 User = get_user_model()
 
@@ -366,6 +367,67 @@ class AccountListViewsTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "pages/account/credits.html")
 
+    def test_credits_paginates_with_cursor(self):
+        for amount in range(1, 13):
+            CreditLog.objects.create(
+                customer=self.customer,
+                object_id=0,
+                object_type=ObjectType.GENERAL,
+                amount=amount,
+                site=self.customer.site,
+            )
+
+        response = self.client.get(reverse("account_credits"))
+        page_obj = response.context["page_obj"]
+
+        self.assertEqual(len(page_obj), 10)
+        self.assertTrue(page_obj.has_next())
+
+        response = self.client.get(
+            reverse("account_credits"), {"cursor": page_obj.next_cursor}
+        )
+        page_obj = response.context["page_obj"]
+
+        self.assertEqual([log.amount for log in page_obj], [2, 1])
+        self.assertFalse(page_obj.has_next())
+        self.assertTrue(page_obj.has_previous())
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "account-views-tests",
+            }
+        }
+    )
+    def test_credits_cache_is_per_customer_and_invalidated_on_write(self):
+        other_user, other_customer = create_customer(email="other@example.com")
+
+        def create_log(customer, amount):
+            with self.captureOnCommitCallbacks(execute=True):
+                CreditLog.objects.create(
+                    customer=customer,
+                    object_id=0,
+                    object_type=ObjectType.GENERAL,
+                    amount=amount,
+                    site=customer.site,
+                )
+
+        create_log(self.customer, 5)
+        create_log(other_customer, 7)
+
+        response = self.client.get(reverse("account_credits"))
+        self.assertEqual([log.amount for log in response.context["page_obj"]], [5])
+
+        self.client.force_login(other_user)
+        response = self.client.get(reverse("account_credits"))
+        self.assertEqual([log.amount for log in response.context["page_obj"]], [7])
+
+        create_log(other_customer, 9)
+
+        response = self.client.get(reverse("account_credits"))
+        self.assertEqual([log.amount for log in response.context["page_obj"]], [9, 7])
+
     def test_credit_purchases_renders(self):
         response = self.client.get(reverse("account_credit_purchases"))
         self.assertEqual(response.status_code, 200)
@@ -93,3 +93,60 @@ class BannerTrackViewTest(TestCase):
     def test_track_view_access_requires_post(self):
         response = self.client.get(reverse("banner_track_view_access"))
         self.assertEqual(response.status_code, 405)
+
+    def test_track_accesses_returns_result_per_token(self):
+        other = Banner.objects.create(
+            site=self.site,
+            language=self.language,
+            title="Other Banner",
+            image="other.jpg",
+            zone=BannerZone.HOME,
+            sort_order=2,
+            active=True,
+        )
+
+        token = str(self.banner.token)
+
+        # one banner query, the banner lock, one lookup and one insert in a savepoint
+        with self.assertNumQueries(6):
+            response = self._post(
+                "banner_track_accesses",
+                {
+                    "accesses": [
+                        {"token": token, "type": "view"},
+                        {"token": str(other.token), "type": "view"},
+                        {"token": token, "type": "view"},
+                        {"token": token, "type": "click"},
+                        {"token": "invalid", "type": "view"},
+                        {"token": token, "type": "invalid"},
+                    ]
+                },
+            )
+
+        self.assertEqual(response.status_code, 200)
+
+        results = response.json()["results"]
+        self.assertEqual(
+            [result["success"] for result in results],
+            [True, True, False, True, False, False],
+        )
+        self.assertEqual(results[4]["error"], "Banner not found")
+        self.assertEqual(results[5]["error"], "Invalid access type")
+        self.assertEqual(BannerAccess.objects.count(), 3)
+
+    def test_track_accesses_invalid_payload(self):
+        for payload in ({}, {"accesses": []}, {"accesses": ["token"]}, []):
+            response = self._post("banner_track_accesses", payload)
+            self.assertEqual(response.status_code, 400)
+
+    @override_settings(BANNER_ACCESS_BATCH_LIMIT=1)
+    def test_track_accesses_too_many(self):
+        token = str(self.banner.token)
+
+        response = self._post(
+            "banner_track_accesses",
+            {"accesses": [{"token": token, "type": "view"}] * 2},
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Too many accesses")
@@ -78,3 +78,32 @@ class ContentViewsTest(TestCase):
         )
 
         self.assertRedirects(response, reverse("home"))
+
+    def test_content_by_tag_sends_validators(self):
+        response = self.client.get(
+            reverse("content_by_tag", kwargs={"content_tag": "first-post"})
+        )
+
+        self.assertTrue(response.has_header("ETag"))
+        self.assertTrue(response.has_header("Last-Modified"))
+
+    def test_content_by_tag_not_modified_skips_render(self):
+        url = reverse("content_by_tag", kwargs={"content_tag": "first-post"})
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, headers={"if-none-match": etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertTemplateNotUsed(response, "pages/content/view.html")
+
+    def test_content_by_tag_is_modified_after_update(self):
+        url = reverse("content_by_tag", kwargs={"content_tag": "first-post"})
+        etag = self.client.get(url)["ETag"]
+
+        self.content.title = "Updated Post"
+        self.content.save()
+
+        response = self.client.get(url, headers={"if-none-match": etag})
+
+        self.assertEqual(response.status_code, 200)
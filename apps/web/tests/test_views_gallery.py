@@ -1,10 +1,11 @@
 from django.contrib.sites.models import Site
 from django.core.cache import cache
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from apps.gallery.models import Gallery, GalleryPhoto
 from apps.language import models as language_models
+from pyaa.helpers.cache import CacheHelper
 
 
 class GalleryViewsTest(TestCase):
@@ -41,6 +42,35 @@ class GalleryViewsTest(TestCase):
         self.assertTemplateUsed(response, "pages/gallery/index.html")
         self.assertIn("page_obj", response.context)
 
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "gallery-views-tests",
+            }
+        }
+    )
+    def test_gallery_index_page_is_cached_until_gallery_changes(self):
+        try:
+            first = self.client.get(reverse("gallery_index"))
+            second = self.client.get(reverse("gallery_index"))
+
+            self.assertEqual(first["X-Page-Cache"], "MISS")
+            self.assertEqual(second["X-Page-Cache"], "HIT")
+            self.assertEqual(second.content, first.content)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.gallery.title = "Renamed Gallery"
+                self.gallery.save()
+
+            third = self.client.get(reverse("gallery_index"))
+
+            self.assertEqual(third["X-Page-Cache"], "MISS")
+            self.assertContains(third, "Renamed Gallery")
+        finally:
+            cache.clear()
+            CacheHelper.clear_local()
+
     def test_gallery_by_id_renders(self):
         response = self.client.get(
             reverse("gallery_by_id", kwargs={"gallery_id": self.gallery.id})
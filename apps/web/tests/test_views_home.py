@@ -1,10 +1,17 @@
+from datetime import timedelta
+from unittest.mock import patch
+
 from django.contrib.sites.models import Site
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
 from apps.banner.enums import BannerZone
 from apps.banner.models import Banner
+from apps.banner.schedule import banner_schedule_index
 from apps.language import models as language_models
+from pyaa.helpers.cache import CacheHelper
 
 
 class HomeIndexViewTest(TestCase):
@@ -32,6 +39,67 @@ class HomeIndexViewTest(TestCase):
         self.assertIn("banners", response.context)
         self.assertIn(self.banner, list(response.context["banners"]))
 
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "home-views-tests",
+            }
+        }
+    )
+    def test_home_page_is_cached_until_banner_changes(self):
+        try:
+            first = self.client.get(reverse("home"))
+            second = self.client.get(reverse("home"))
+
+            self.assertEqual(first["X-Page-Cache"], "MISS")
+            self.assertEqual(second["X-Page-Cache"], "HIT")
+            self.assertEqual(second.content, first.content)
+
+            # the newsletter form fetches its token, the page holds none
+            self.assertNotContains(first, "csrfmiddlewaretoken")
+            self.assertContains(first, reverse("newsletter_token"))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.banner.title = "Renamed Banner"
+                self.banner.save()
+
+            third = self.client.get(reverse("home"))
+
+            self.assertEqual(third["X-Page-Cache"], "MISS")
+        finally:
+            cache.clear()
+            CacheHelper.clear_local()
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "home-views-tests",
+            }
+        },
+        PAGE_CACHE_TIMEOUT=300,
+    )
+    def test_home_page_expires_when_a_banner_starts(self):
+        Banner.objects.create(
+            title="Scheduled Banner",
+            image="scheduled_banner.jpg",
+            zone=BannerZone.HOME,
+            active=True,
+            start_at=timezone.now() + timedelta(seconds=60),
+        )
+
+        try:
+            with patch.object(CacheHelper, "set", wraps=CacheHelper.set) as mock_set:
+                self.client.get(reverse("home"))
+
+            self.assertLessEqual(mock_set.call_args.kwargs["timeout"], 61)
+            self.assertGreater(mock_set.call_args.kwargs["timeout"], 0)
+        finally:
+            cache.clear()
+            CacheHelper.clear_local()
+            banner_schedule_index.clear()
+
 
 class SetLanguageViewTest(TestCase):
     @override_settings(
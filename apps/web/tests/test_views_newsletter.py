@@ -1,8 +1,12 @@
+import uuid
 from unittest.mock import patch
 
 from django.test import TestCase
 from django.urls import reverse
 
+from apps.newsletter.helpers import NewsletterHelper
+from apps.newsletter.models import NewsletterEntry
+
 
 class NewsletterSubscribeViewTest(TestCase):
     def test_get_renders_form(self):
@@ -12,6 +16,13 @@ class NewsletterSubscribeViewTest(TestCase):
         self.assertTemplateUsed(response, "pages/newsletter/subscribe.html")
         self.assertIn("form", response.context)
 
+    def test_get_prefills_email(self):
+        response = self.client.get(
+            reverse("newsletter_subscribe"), {"email": "user@example.com"}
+        )
+
+        self.assertEqual(response.context["form"]["email"].value(), "user@example.com")
+
     @patch("apps.web.views.newsletter.NewsletterHelper.subscribe")
     def test_post_valid_subscribes_and_redirects(self, mock_subscribe):
         response = self.client.post(
@@ -21,7 +32,7 @@ class NewsletterSubscribeViewTest(TestCase):
 
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response.url, reverse("newsletter_success"))
-        mock_subscribe.assert_called_once_with("user@example.com")
+        mock_subscribe.assert_called_once_with("user@example.com", language="en")
 
     @patch("apps.web.views.newsletter.NewsletterHelper.subscribe")
     def test_post_invalid_rerenders_form(self, mock_subscribe):
@@ -35,9 +46,72 @@ class NewsletterSubscribeViewTest(TestCase):
         mock_subscribe.assert_not_called()
 
 
+class NewsletterTokenViewTest(TestCase):
+    def test_returns_csrf_token_and_cookie(self):
+        response = self.client.get(reverse("newsletter_token"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["token"])
+        self.assertIn("csrftoken", response.cookies)
+        self.assertIn("no-cache", response["Cache-Control"])
+
+    def test_post_with_fetched_token_subscribes(self):
+        client = self.client_class(enforce_csrf_checks=True)
+        token = client.get(reverse("newsletter_token")).json()["token"]
+
+        with patch("apps.web.views.newsletter.NewsletterHelper.subscribe"):
+            response = client.post(
+                reverse("newsletter_subscribe"),
+                {"email": "user@example.com", "csrfmiddlewaretoken": token},
+            )
+
+        self.assertEqual(response.status_code, 302)
+
+
 class NewsletterSuccessViewTest(TestCase):
     def test_success_page_renders(self):
         response = self.client.get(reverse("newsletter_success"))
 
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "pages/newsletter/success.html")
+
+
+class NewsletterUnsubscribeViewTest(TestCase):
+    def setUp(self):
+        self.entry = NewsletterEntry.objects.create(email="user@example.com")
+        self.url = reverse("newsletter_unsubscribe", kwargs={"token": self.entry.token})
+
+    def test_get_asks_to_confirm(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "pages/newsletter/unsubscribe.html")
+        self.assertContains(response, "user@example.com")
+
+        self.entry.refresh_from_db()
+        self.assertIsNone(self.entry.unsubscribed_at)
+
+    def test_one_click_post_unsubscribes_without_csrf_token(self):
+        client = self.client_class(enforce_csrf_checks=True)
+
+        response = client.post(self.url, {"List-Unsubscribe": "One-Click"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "pages/newsletter/unsubscribed.html")
+
+        self.entry.refresh_from_db()
+        self.assertIsNotNone(self.entry.unsubscribed_at)
+
+    def test_unknown_token_is_not_found(self):
+        response = self.client.post(
+            reverse("newsletter_unsubscribe", kwargs={"token": uuid.uuid4()})
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_subscribing_again_clears_the_unsubscription(self):
+        NewsletterHelper.unsubscribe(self.entry)
+        NewsletterHelper.subscribe("user@example.com")
+
+        self.entry.refresh_from_db()
+        self.assertIsNone(self.entry.unsubscribed_at)
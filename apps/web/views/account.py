@@ -32,7 +32,7 @@ from apps.shop.helpers import ShopHelper
 from apps.shop.models import CreditLog, CreditPurchase, ProductPurchase, Subscription
 from pyaa.decorators.customer import customer_required
 from pyaa.helpers.request import RequestHelper
-from pyaa.utils.cached_paginator import Paginator
+from pyaa.utils.cached_paginator import CursorPaginator, Paginator
 
 
 def account_login_view(request):
@@ -253,21 +253,22 @@ def account_delete_view(request):
 def account_subscriptions_view(request):
     subscriptions = Subscription.objects.filter(
         customer=request.customer,
-    ).order_by("-id")
+    )
 
-    # get the page parameter from request
-    page = request.GET.get("page", 1)
+    # get the cursor parameter from request
+    cursor = request.GET.get("cursor")
 
-    # setup paginator with cache key
-    paginator = Paginator(
+    # setup keyset paginator, deep pages cost the same as the first one
+    paginator = CursorPaginator(
         subscriptions,
         per_page=10,
+        ordering="-id",
         cache_key="account-subscriptions",
-        cache_timeout=0,
+        cache_timeout=300,
     )
 
     # get the page object
-    page_obj = paginator.get_page(page)
+    page_obj = paginator.get_page(cursor)
 
     return render(
         request,
@@ -300,21 +301,22 @@ def account_subscription_cancel_view(request, token):
 def account_credits_view(request):
     credits = CreditLog.objects.filter(
         customer=request.customer,
-    ).order_by("-id")
+    )
 
-    # get the page parameter from request
-    page = request.GET.get("page", 1)
+    # get the cursor parameter from request
+    cursor = request.GET.get("cursor")
 
-    # setup paginator with cache key
-    paginator = Paginator(
+    # setup keyset paginator, deep pages cost the same as the first one
+    paginator = CursorPaginator(
         credits,
         per_page=10,
+        ordering="-id",
         cache_key="account-credits",
-        cache_timeout=0,
+        cache_timeout=300,
     )
 
     # get the page object
-    page_obj = paginator.get_page(page)
+    page_obj = paginator.get_page(cursor)
 
     return render(
         request,
@@ -335,12 +337,12 @@ def account_credit_purchases_view(request):
     # get the page parameter from request
     page = request.GET.get("page", 1)
 
-    # setup paginator with cache key
+    # setup paginator, the key varies by query so customers never share pages
     paginator = Paginator(
         purchases,
         per_page=10,
         cache_key="account-credit-purchases",
-        cache_timeout=0,
+        cache_timeout=300,
     )
 
     # get the page object
@@ -365,12 +367,12 @@ def account_product_purchases_view(request):
     # get the page parameter from request
     page = request.GET.get("page", 1)
 
-    # setup paginator with cache key
+    # setup paginator, the key varies by query so customers never share pages
     paginator = Paginator(
         purchases,
         per_page=10,
         cache_key="account-product-purchases",
-        cache_timeout=0,
+        cache_timeout=300,
     )
 
     # get the page object
@@ -1,5 +1,6 @@
 import json
 
+from django.conf import settings
 from django.http import JsonResponse
 from django.urls import path
 from django.views.decorators.csrf import csrf_exempt
@@ -51,6 +52,35 @@ def track_click_access(request):
     return JsonResponse({"success": tracked})
 
 
+@csrf_exempt
+@require_POST
+def track_accesses(request):
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid payload"}, status=400)
+
+    accesses = data.get("accesses") if isinstance(data, dict) else None
+
+    if not accesses or not isinstance(accesses, list):
+        return JsonResponse({"error": "Accesses are required"}, status=400)
+
+    if len(accesses) > settings.BANNER_ACCESS_BATCH_LIMIT:
+        return JsonResponse({"error": "Too many accesses"}, status=400)
+
+    if not all(isinstance(access, dict) for access in accesses):
+        return JsonResponse({"error": "Invalid payload"}, status=400)
+
+    results = BannerHelper.track_banner_tokens(
+        [(access.get("token"), access.get("type")) for access in accesses],
+        lambda banner, access_type: BannerHelper.build_banner_access(
+            request, banner, access_type
+        ),
+    )
+
+    return JsonResponse({"results": results})
+
+
 urlpatterns = [
     path(
         "banner/track-view-access/",
@@ -62,4 +92,9 @@ urlpatterns = [
         track_click_access,
         name="banner_track_click_access",
     ),
+    path(
+        "banner/track-accesses/",
+        track_accesses,
+        name="banner_track_accesses",
+    ),
 ]
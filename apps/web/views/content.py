@@ -2,7 +2,10 @@ from django.shortcuts import redirect, render
 from django.urls import path
 
 from apps.content.helpers import ContentHelper
-from apps.content.models import ContentCategory
+from apps.content.models import Content, ContentCategory
+from apps.language.models import Language
+from pyaa.decorators.cache import anonymous_cache_page
+from pyaa.decorators.conditional import conditional_page
 from pyaa.utils.cached_paginator import Paginator
 
 
@@ -48,6 +51,15 @@ def content_by_id_view(request, content_id):
     )
 
 
+def get_content_by_tag_querysets(request, content_tag):
+    return [
+        Content.objects.filter(tag=content_tag),
+        ContentCategory.objects.filter(contents__tag=content_tag),
+    ]
+
+
+@conditional_page(get_content_by_tag_querysets)
+@anonymous_cache_page(Content, ContentCategory, Language)
 def content_by_tag_view(request, content_tag):
     content = ContentHelper.get_content(content_tag=content_tag)
 
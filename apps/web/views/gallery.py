@@ -2,9 +2,14 @@ from django.shortcuts import redirect, render
 from django.urls import path
 
 from apps.gallery.helpers import GalleryHelper
+from apps.gallery.models import Gallery, GalleryPhoto
+from apps.language.models import Language
+from pyaa.decorators.cache import anonymous_cache_page
+from pyaa.decorators.conditional import conditional_page
 from pyaa.utils.cached_paginator import Paginator
 
 
+@anonymous_cache_page(Gallery, GalleryPhoto, Language)
 def gallery_index_view(request):
     page_number = request.GET.get("page", 1)
     gallery_list = GalleryHelper.get_gallery_list()
@@ -53,6 +58,15 @@ def gallery_by_id_view(request, gallery_id):
     )
 
 
+def get_gallery_by_tag_querysets(request, gallery_tag):
+    return [
+        Gallery.objects.filter(tag=gallery_tag),
+        GalleryPhoto.objects.filter(gallery__tag=gallery_tag),
+    ]
+
+
+# photos have no updated_at, so their table tag catches edits
+@conditional_page(get_gallery_by_tag_querysets, tags=[GalleryPhoto])
 def gallery_by_tag_view(request, gallery_tag):
     gallery = GalleryHelper.get_gallery(gallery_tag=gallery_tag)
 
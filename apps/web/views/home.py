@@ -6,8 +6,19 @@ from django.utils.translation import check_for_language
 
 from apps.banner.enums import BannerZone
 from apps.banner.helpers import BannerHelper
+from apps.banner.models import Banner
+from apps.language.models import Language
+from pyaa.decorators.cache import anonymous_cache_page
 
 
+def get_home_page_timeout(response):
+    # the page expires when a banner of the zone starts or ends
+    return min(
+        settings.PAGE_CACHE_TIMEOUT, BannerHelper.get_banners_timeout(BannerZone.HOME)
+    )
+
+
+@anonymous_cache_page(Banner, Language, timeout=get_home_page_timeout)
 def home_index_view(request):
     banners = BannerHelper.get_banners(BannerZone.HOME)
 
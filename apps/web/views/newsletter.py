@@ -1,8 +1,14 @@
-from django.shortcuts import redirect, render
+from django.http import JsonResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import path
+from django.utils import translation
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_exempt
 
 from apps.newsletter.forms import NewsletterForm
 from apps.newsletter.helpers import NewsletterHelper
+from apps.newsletter.models import NewsletterEntry
 
 
 def newsletter_subscribe_view(request):
@@ -10,10 +16,11 @@ def newsletter_subscribe_view(request):
         form = NewsletterForm(request.POST)
         if form.is_valid():
             email = form.cleaned_data["email"]
-            NewsletterHelper.subscribe(email)
+            NewsletterHelper.subscribe(email, language=translation.get_language())
             return redirect("newsletter_success")
     else:
-        form = NewsletterForm()
+        # the cached pages send the email here when the token cannot be fetched
+        form = NewsletterForm(initial={"email": request.GET.get("email", "")})
 
     return render(
         request,
@@ -24,6 +31,14 @@ def newsletter_subscribe_view(request):
     )
 
 
+@never_cache
+def newsletter_token_view(request):
+    """
+    Returns the csrf token of the subscribe forms of cached pages.
+    """
+    return JsonResponse({"token": get_token(request)})
+
+
 def newsletter_success_view(request):
     return render(
         request,
@@ -31,15 +46,52 @@ def newsletter_success_view(request):
     )
 
 
+@csrf_exempt
+@never_cache
+def newsletter_unsubscribe_view(request, token):
+    """
+    Asks to confirm the unsubscribe link of a campaign email and unsubscribes on post.
+    The post is also the one click unsubscribe of the mail clients, which has no
+    csrf token, the secret token of the link authorizes it.
+    """
+    entry = get_object_or_404(NewsletterEntry, token=token)
+
+    if request.method == "POST":
+        NewsletterHelper.unsubscribe(entry)
+
+        return render(
+            request,
+            "pages/newsletter/unsubscribed.html",
+        )
+
+    return render(
+        request,
+        "pages/newsletter/unsubscribe.html",
+        {
+            "entry": entry,
+        },
+    )
+
+
 urlpatterns = [
     path(
         "newsletter/subscribe/",
         newsletter_subscribe_view,
         name="newsletter_subscribe",
     ),
+    path(
+        "newsletter/token/",
+        newsletter_token_view,
+        name="newsletter_token",
+    ),
     path(
         "newsletter/success/",
         newsletter_success_view,
         name="newsletter_success",
     ),
+    path(
+        "newsletter/unsubscribe/<uuid:token>/",
+        newsletter_unsubscribe_view,
+        name="newsletter_unsubscribe",
+    ),
 ]
@@ -18,16 +18,21 @@ from apps.shop.enums import (
 )
 from apps.shop.forms import CheckoutForm
 from apps.shop.helpers import ShopHelper
+from apps.language.models import Language
 from apps.shop.models import (
     CreditPurchase,
     Plan,
     Product,
+    ProductFile,
     ProductPurchase,
     Subscription,
 )
+from pyaa.decorators.cache import anonymous_cache_page
+from pyaa.decorators.conditional import conditional_page
 from pyaa.utils.cached_paginator import Paginator
 
 
+@anonymous_cache_page(Product)
 def shop_products_view(request):
     # get the current site
     current_site = Site.objects.get_current()
@@ -59,6 +64,7 @@ def shop_products_view(request):
     return render(request, "pages/shop/product/index.html", context)
 
 
+@anonymous_cache_page(Plan, Language)
 def shop_plans_view(request, plan_type):
     customer = None
 
@@ -316,6 +322,14 @@ def shop_payment_pending_view(request, token):
     return render(request, "pages/shop/payment/pending.html", context)
 
 
+def get_product_details_querysets(request, product_token, slug=None):
+    return [
+        Product.objects.filter(token=product_token),
+        ProductFile.objects.filter(product__token=product_token),
+    ]
+
+
+@conditional_page(get_product_details_querysets)
 def shop_product_details_view(request, product_token, slug=None):
     # get the current site
     current_site = Site.objects.get_current()
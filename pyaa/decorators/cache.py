@@ -0,0 +1,127 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.http import HttpResponse
+from django.utils import translation
+
+from pyaa.helpers.cache import CacheHelper
+
+PAGE_CACHE_KEY_PREFIX = "page"
+PAGE_CACHE_HEADER = "X-Page-Cache"
+
+# headers added by middlewares on every response, they are never replayed
+PAGE_CACHE_SKIPPED_HEADERS = {"set-cookie", "vary"}
+
+
+def anonymous_cache_page(*tags, timeout=None):
+    """
+    Decorator for public views that caches the whole response for anonymous visitors.
+
+    Pages are keyed by path, query string, language and site, and invalidated with the
+    given tags (models or tag names) when the related models are written.
+    Requests of authenticated users and responses using the csrf token, cookies,
+    session or messages are never cached.
+    The X-Page-Cache header tells if the response was a HIT or a MISS.
+    The timeout is in seconds, PAGE_CACHE_TIMEOUT by default, or a callable returning
+    it for the rendered response, a response is not cached when it returns 0.
+    """
+    tags = [tag if isinstance(tag, str) else CacheHelper.model_tag(tag) for tag in tags]
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+
+            key = build_page_cache_key(request)
+            cached = CacheHelper.get(key)
+
+            if cached is not None:
+                return build_cached_response(cached)
+
+            # read before rendering, so a write made meanwhile outdates the page
+            versions = CacheHelper.get_tag_versions(tags)
+            response = view_func(request, *args, **kwargs)
+
+            if request.method == "GET" and is_cacheable_response(request, response):
+                page_timeout = timeout(response) if callable(timeout) else timeout
+
+                if page_timeout is None:
+                    page_timeout = settings.PAGE_CACHE_TIMEOUT
+
+                if page_timeout > 0:
+                    CacheHelper.set(
+                        key,
+                        (response.content, response.status_code, get_headers(response)),
+                        timeout=page_timeout,
+                        tags=tags,
+                        versions=versions,
+                    )
+
+                response[PAGE_CACHE_HEADER] = "MISS"
+
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def is_cacheable_request(request):
+    if request.method not in ("GET", "HEAD"):
+        return False
+
+    if request.user.is_authenticated:
+        return False
+
+    # pending messages are rendered into the page of this visitor only
+    return len(get_messages(request)) == 0
+
+
+def is_cacheable_response(request, response):
+    if response.status_code != 200 or response.streaming:
+        return False
+
+    if response.cookies or response.has_header("Cache-Control"):
+        return False
+
+    # a page holding a csrf token must not be served to other visitors
+    if request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+        return False
+
+    session = getattr(request, "session", None)
+
+    if session is not None and session.modified:
+        return False
+
+    return len(get_messages(request)) == 0
+
+
+def build_page_cache_key(request):
+    query = sorted(request.GET.lists())
+    page = f"{request.path}?{query!r}"
+    digest = hashlib.md5(page.encode(), usedforsecurity=False).hexdigest()
+
+    return f"{PAGE_CACHE_KEY_PREFIX}:{settings.SITE_ID}:{translation.get_language()}:{digest}"
+
+
+def get_headers(response):
+    return [
+        (name, value)
+        for name, value in response.items()
+        if name.lower() not in PAGE_CACHE_SKIPPED_HEADERS
+    ]
+
+
+def build_cached_response(cached):
+    content, status, headers = cached
+    response = HttpResponse(content, status=status)
+
+    for name, value in headers:
+        response[name] = value
+
+    response[PAGE_CACHE_HEADER] = "HIT"
+
+    return response
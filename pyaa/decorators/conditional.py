@@ -0,0 +1,60 @@
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils import translation
+from django.utils.cache import get_conditional_response
+
+from pyaa.helpers.cache import CacheHelper
+from pyaa.helpers.conditional import ConditionalHelper
+
+
+def conditional_page(get_querysets, tags=None):
+    """
+    Decorator that adds ETag and Last-Modified to a view and answers conditional
+    GET requests with 304 before the view runs, skipping its queries and render.
+
+    get_querysets receives the view arguments and returns the querysets the page is
+    built from. The etag also varies on language, site and user.
+    """
+    tags = [
+        tag if isinstance(tag, str) else CacheHelper.model_tag(tag)
+        for tag in tags or []
+    ]
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            # pending messages must be rendered, so the page is always built
+            if request.method not in ("GET", "HEAD") or len(get_messages(request)):
+                return view_func(request, *args, **kwargs)
+
+            etag, last_modified = ConditionalHelper.get_validators(
+                get_querysets(request, *args, **kwargs),
+                tags=tags,
+                extra=[translation.get_language(), settings.SITE_ID, request.user.pk],
+            )
+
+            headers = ConditionalHelper.get_headers(etag, last_modified)
+
+            response = get_conditional_response(
+                request,
+                etag=etag,
+                last_modified=int(last_modified.timestamp()) if last_modified else None,
+            )
+
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+
+                # redirects and errors are not validated
+                if response.status_code != 200:
+                    return response
+
+            for name, value in headers.items():
+                response.headers.setdefault(name, value)
+
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+from fastapi import Request
+from ipware import get_client_ip
+
+
+def get_client_meta(request: Request) -> dict:
+    """
+    Returns the headers and client address of the asgi scope in the django META
+    format, so the client is read with the same rules as in django views.
+    """
+    meta = {"REMOTE_ADDR": request.client.host if request.client else ""}
+
+    for name, value in request.scope.get("headers", []):
+        key = name.decode("latin-1").upper().replace("-", "_")
+        meta[f"HTTP_{key}"] = value.decode("latin-1")
+
+    return meta
+
+
+def get_client_ip_address(request: Request) -> str | None:
+    # same proxy header precedence as ipware in django views (e.g. x-forwarded-for)
+    client_ip, _ = get_client_ip(SimpleNamespace(META=get_client_meta(request)))
+    return client_ip
+
+
+def get_client_country_code(request: Request) -> str | None:
+    # country code from cloudflare header
+    return request.headers.get("cf-ipcountry")
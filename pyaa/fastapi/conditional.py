@@ -0,0 +1,34 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import translation
+from fastapi import Request, Response, status
+
+from pyaa.helpers.conditional import ConditionalHelper
+
+
+async def get_not_modified_response(
+    request: Request, response: Response, querysets, tags=None
+):
+    """
+    Returns a 304 response when the client copy is still fresh, so the route can skip
+    its queries. Otherwise adds ETag and Last-Modified to the route response and returns None.
+    """
+    etag, last_modified = await sync_to_async(ConditionalHelper.get_validators)(
+        querysets,
+        tags=tags,
+        extra=[translation.get_language(), settings.SITE_ID, request.url.query],
+    )
+
+    headers = ConditionalHelper.get_headers(etag, last_modified)
+
+    if ConditionalHelper.is_not_modified(
+        request.headers.get("if-none-match"),
+        request.headers.get("if-modified-since"),
+        etag,
+        last_modified,
+    ):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+
+    return None
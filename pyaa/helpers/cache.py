@@ -0,0 +1,508 @@
+import math
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+CACHE_TAG_KEY_PREFIX = "cache-tag"
+CACHE_LOCAL_GENERATION_KEY = "cache-local-generation"
+CACHE_LOCK_KEY_PREFIX = "cache-lock"
+CACHE_LOCK_POLL_INTERVAL = 0.05
+
+
+class CacheEntry:
+    """
+    Envelope stored in the cache for tagged values.
+    Keeps the tag versions seen when the value was computed, when it expires
+    and how long it took to compute (used for early refresh).
+    """
+
+    __slots__ = ("value", "versions", "expires_at", "duration")
+
+    def __init__(self, value, versions, expires_at=None, duration=0):
+        self.value = value
+        self.versions = versions
+        self.expires_at = expires_at
+        self.duration = duration
+
+    def __getstate__(self):
+        return (self.value, self.versions, self.expires_at, self.duration)
+
+    def __setstate__(self, state):
+        self.value, self.versions, self.expires_at, self.duration = state
+
+    def is_expired(self, now=None):
+        if self.expires_at is None:
+            return False
+
+        return (now or time.time()) >= self.expires_at
+
+    def should_refresh(self, beta, now=None):
+        """
+        Probabilistic early expiration: the closer to expiry and the slower the
+        computation, the more likely a caller refreshes the value ahead of time.
+        """
+        if self.expires_at is None:
+            return False
+
+        now = now or time.time()
+        jitter = self.duration * beta * -math.log(1.0 - random.random())
+
+        return now + jitter >= self.expires_at
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with a short ttl.
+    Values are shared between threads of the worker, so they must be treated as read-only.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.generation = None
+        self.synced_at = None
+
+    def get(self, key):
+        with self.lock:
+            item = self.entries.get(key)
+
+            if item is None:
+                return False, None
+
+            value, expires_at = item
+
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return False, None
+
+            self.entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value, timeout, max_entries):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + timeout)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_cache = LocalCache()
+cache_stats = {}
+cache_stats_lock = threading.Lock()
+
+
+class CacheHelper:
+    @staticmethod
+    def model_tag(model, pk=None):
+        """
+        Returns the tag for a model table or, when pk is given, for a single row.
+        """
+        tag = model._meta.label_lower
+
+        if pk is not None:
+            tag = f"{tag}:{pk}"
+
+        return tag
+
+    @staticmethod
+    def build_tag_key(tag):
+        return f"{CACHE_TAG_KEY_PREFIX}:{tag}"
+
+    @staticmethod
+    def get_tag_cache():
+        """
+        Returns the cache of the tag versions, which should not cull its keys.
+        """
+        return caches[settings.CACHE_TAG_ALIAS]
+
+    @staticmethod
+    def get_tag_versions(tags):
+        """
+        Returns the current version of each tag.
+        Tags without a version (never invalidated or evicted) get a new one, so
+        entries stored before the version was lost never match it again.
+        """
+        if not tags:
+            return {}
+
+        tag_cache = CacheHelper.get_tag_cache()
+        keys = {tag: CacheHelper.build_tag_key(tag) for tag in tags}
+        versions = tag_cache.get_many(list(keys.values()))
+        missing = [key for key in keys.values() if key not in versions]
+
+        if missing:
+            version = time.time_ns()
+
+            # add keeps a version written meanwhile by another worker
+            for key in missing:
+                tag_cache.add(key, version, timeout=None)
+
+            versions.update(tag_cache.get_many(missing))
+
+        return {tag: versions.get(key) for tag, key in keys.items()}
+
+    @staticmethod
+    def get_generation():
+        return CacheHelper.get_tag_cache().get(CACHE_LOCAL_GENERATION_KEY)
+
+    @staticmethod
+    def invalidate_tags(*tags):
+        """
+        Bumps the version of the given tags, so every entry depending on them becomes a miss.
+        """
+        if not tags:
+            return
+
+        # a nanosecond timestamp is unique enough across workers
+        version = time.time_ns()
+
+        versions = {CacheHelper.build_tag_key(tag): version for tag in tags}
+        versions[CACHE_LOCAL_GENERATION_KEY] = version
+
+        CacheHelper.get_tag_cache().set_many(versions, timeout=None)
+
+        # other workers notice the new generation on their next sync
+        local_cache.clear()
+        local_cache.generation = version
+
+    @staticmethod
+    def get(key, default=None, local=False):
+        """
+        Returns the cached value for key if none of its tags changed since it was stored.
+        With local, the in-process tier is checked first and filled on shared hits.
+        """
+        namespace = CacheHelper.get_namespace(key)
+        local = local and CacheHelper.is_local_enabled()
+
+        if local:
+            CacheHelper.sync_local()
+            found, value = local_cache.get(key)
+
+            if found:
+                CacheHelper.record_stat(namespace, "local_hits")
+                return value
+
+        entry = cache.get(key)
+
+        if not isinstance(entry, CacheEntry) or not CacheHelper.is_valid(entry):
+            CacheHelper.record_stat(namespace, "misses")
+            return default
+
+        if local:
+            CacheHelper.set_local(key, entry.value)
+
+        CacheHelper.record_stat(namespace, "shared_hits")
+        return entry.value
+
+    @staticmethod
+    def set(
+        key, value, timeout=None, tags=None, local=False, duration=0, versions=None
+    ):
+        """
+        Stores value under key, recording the version of the given tags.
+        The entry is kept for an extra stale timeout, so get_or_compute can serve it
+        while a single caller recomputes it.
+
+        Pass the versions read before computing the value, so an invalidation
+        made while it was computed outdates it. They are read now by default.
+        """
+        if timeout is None:
+            timeout = settings.CACHE_TAGGED_TIMEOUT
+
+        if versions is None:
+            versions = CacheHelper.get_tag_versions(tags)
+        entry = CacheEntry(value, versions, time.time() + timeout, duration)
+
+        cache.set(key, entry, timeout + settings.CACHE_STALE_TIMEOUT)
+
+        if local and CacheHelper.is_local_enabled():
+            CacheHelper.set_local(key, value, timeout)
+
+    @staticmethod
+    def is_valid(entry):
+        """
+        Returns True if the entry is not expired and none of its tags changed.
+        """
+        if entry.is_expired():
+            return False
+
+        if entry.versions:
+            current_versions = CacheHelper.get_tag_versions(entry.versions.keys())
+
+            if current_versions != entry.versions:
+                return False
+
+        return True
+
+    @staticmethod
+    def get_or_compute(key, compute, timeout=None, tags=None, local=False):
+        """
+        Returns the cached value for key or computes and stores it.
+
+        Only the caller holding the lock key recomputes a missing or stale value,
+        everyone else gets the stale value meanwhile (or waits for the fresh one
+        when there is nothing to serve). Values are also refreshed before expiry
+        with a probability that grows as expiry approaches.
+
+        The lock is taken with cache.add, which is atomic on the redis, memcached
+        and database backends. The file based cache of the prod settings checks and
+        writes the file without a lock, so there single-flight is best-effort and a
+        few callers may recompute the same value at once.
+
+        timeout and tags may be callables receiving the computed value.
+        None is never stored, and values cached without an envelope are served as they are.
+        """
+        namespace = CacheHelper.get_namespace(key)
+
+        # a zero timeout means caching is disabled for this call
+        if timeout == 0:
+            return compute()
+
+        local = local and CacheHelper.is_local_enabled()
+
+        if local:
+            CacheHelper.sync_local()
+            found, value = local_cache.get(key)
+
+            if found:
+                CacheHelper.record_stat(namespace, "local_hits")
+                return value
+
+        entry = cache.get(key)
+
+        if entry is not None and not isinstance(entry, CacheEntry):
+            CacheHelper.record_stat(namespace, "shared_hits")
+            return entry
+
+        if (
+            entry is not None
+            and CacheHelper.is_valid(entry)
+            and not entry.should_refresh(settings.CACHE_EARLY_REFRESH_BETA)
+        ):
+            if local:
+                CacheHelper.set_local(key, entry.value)
+
+            CacheHelper.record_stat(namespace, "shared_hits")
+            return entry.value
+
+        # not atomic on the file based cache, two callers may both get the lock
+        lock_key = f"{CACHE_LOCK_KEY_PREFIX}:{key}"
+        locked = cache.add(lock_key, 1, settings.CACHE_LOCK_TIMEOUT)
+
+        if not locked:
+            # another caller is recomputing, serve what we have
+            if entry is not None:
+                CacheHelper.record_stat(namespace, "stale_hits")
+                return entry.value
+
+            value = CacheHelper.wait_for(key, lock_key)
+
+            if value is not None:
+                CacheHelper.record_stat(namespace, "shared_hits")
+                return value
+
+        CacheHelper.record_stat(namespace, "misses")
+
+        try:
+            # the versions are read before computing, so an invalidation made
+            # meanwhile outdates the value
+            outdated = False
+
+            if callable(tags):
+                generation = CacheHelper.get_generation()
+            else:
+                versions = CacheHelper.get_tag_versions(tags)
+
+            started_at = time.monotonic()
+            value = compute()
+            duration = time.monotonic() - started_at
+
+            if value is not None and callable(tags):
+                tags = tags(value)
+                versions = CacheHelper.get_tag_versions(tags)
+
+                # tags known only after computing are checked against the
+                # generation, bumped by every invalidation
+                outdated = CacheHelper.get_generation() != generation
+
+            if value is not None and not outdated:
+                if callable(timeout):
+                    timeout = timeout(value)
+
+                CacheHelper.set(
+                    key,
+                    value,
+                    timeout=timeout,
+                    tags=tags,
+                    local=local,
+                    duration=duration,
+                    versions=versions,
+                )
+        finally:
+            if locked:
+                cache.delete(lock_key)
+
+        return value
+
+    @staticmethod
+    def wait_for(key, lock_key):
+        """
+        Waits until the lock holder stores a fresh value or releases the lock.
+        """
+        deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+
+        while time.monotonic() < deadline:
+            time.sleep(CACHE_LOCK_POLL_INTERVAL)
+
+            entry = cache.get(key)
+
+            if isinstance(entry, CacheEntry) and CacheHelper.is_valid(entry):
+                return entry.value
+
+            if cache.get(lock_key) is None:
+                break
+
+        return None
+
+    @staticmethod
+    def is_local_enabled():
+        # a dummy shared cache means caching is disabled, so the local tier is too
+        return settings.CACHE_LOCAL_ENABLED and not isinstance(
+            caches["default"], DummyCache
+        )
+
+    @staticmethod
+    def set_local(key, value, timeout=None):
+        local_timeout = settings.CACHE_LOCAL_TIMEOUT
+
+        if timeout is not None:
+            local_timeout = min(local_timeout, timeout)
+
+        local_cache.set(key, value, local_timeout, settings.CACHE_LOCAL_MAX_ENTRIES)
+
+    @staticmethod
+    def sync_local():
+        """
+        Clears the local tier when another worker invalidated tags.
+        The shared generation is read at most once per sync interval.
+        """
+        now = time.monotonic()
+
+        if (
+            local_cache.synced_at is not None
+            and now - local_cache.synced_at < settings.CACHE_LOCAL_SYNC_INTERVAL
+        ):
+            return
+
+        generation = CacheHelper.get_generation()
+
+        if generation != local_cache.generation:
+            local_cache.clear()
+            local_cache.generation = generation
+
+        local_cache.synced_at = now
+
+    @staticmethod
+    def clear_local():
+        local_cache.clear()
+        local_cache.generation = None
+        local_cache.synced_at = None
+
+    @staticmethod
+    def get_namespace(key):
+        return re.split(r"[-_:]", key, maxsplit=1)[0]
+
+    @staticmethod
+    def record_stat(namespace, name):
+        with cache_stats_lock:
+            stats = cache_stats.setdefault(
+                namespace,
+                {"local_hits": 0, "shared_hits": 0, "stale_hits": 0, "misses": 0},
+            )
+            stats[name] += 1
+
+    @staticmethod
+    def get_stats():
+        """
+        Returns the hit counters and hit ratio of each namespace in this worker.
+        """
+        result = {}
+
+        with cache_stats_lock:
+            for namespace, stats in cache_stats.items():
+                hits = stats["local_hits"] + stats["shared_hits"] + stats["stale_hits"]
+                total = hits + stats["misses"]
+
+                result[namespace] = {
+                    **stats,
+                    "hit_ratio": hits / total if total else 0.0,
+                }
+
+        return result
+
+    @staticmethod
+    def reset_stats():
+        with cache_stats_lock:
+            cache_stats.clear()
+
+    @staticmethod
+    def watch_model(model, parents=None):
+        """
+        Invalidates the table and row tags of model on every save and delete.
+        Use parents with foreign key names to also invalidate the related rows,
+        e.g. a photo change invalidates the gallery that holds it.
+        """
+        label = model._meta.label_lower
+        parents = parents or []
+
+        def invalidate(sender, instance, **kwargs):
+            tags = [
+                CacheHelper.model_tag(sender),
+                CacheHelper.model_tag(sender, instance.pk),
+            ]
+
+            for parent in parents:
+                field = sender._meta.get_field(parent)
+                parent_pk = getattr(instance, field.attname)
+
+                if parent_pk is not None:
+                    tags.append(CacheHelper.model_tag(field.related_model, parent_pk))
+
+            # invalidate after commit, so readers cannot cache uncommitted state again
+            transaction.on_commit(lambda: CacheHelper.invalidate_tags(*tags))
+
+        post_save.connect(
+            invalidate,
+            sender=model,
+            weak=False,
+            dispatch_uid=f"cache-tag-save-{label}",
+        )
+
+        post_delete.connect(
+            invalidate,
+            sender=model,
+            weak=False,
+            dispatch_uid=f"cache-tag-delete-{label}",
+        )
+
+
+def clear_local_cache_on_setting_changed(setting, **kwargs):
+    if setting.startswith("CACHE"):
+        CacheHelper.clear_local()
+
+
+setting_changed.connect(clear_local_cache_on_setting_changed)
@@ -0,0 +1,74 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+
+from pyaa.helpers.cache import CacheHelper
+
+
+class ConditionalHelper:
+    @staticmethod
+    def get_validators(querysets, tags=None, extra=None):
+        """
+        Returns the etag and last modified date of a response built from the querysets.
+
+        Each queryset costs one aggregate query (count, max pk and max updated_at),
+        so added, deleted and updated rows change the etag. Tag versions (bumped by
+        CacheHelper.watch_model) cover models without updated_at, and extra holds the
+        request values the response varies on (language, site, user).
+        """
+        last_modified = None
+        parts = []
+
+        for queryset in querysets:
+            aggregates = {"count": Count("pk"), "max_pk": Max("pk")}
+
+            if any(f.name == "updated_at" for f in queryset.model._meta.fields):
+                aggregates["last_modified"] = Max("updated_at")
+
+            result = queryset.order_by().aggregate(**aggregates)
+            value = result.get("last_modified")
+
+            if value and (last_modified is None or value > last_modified):
+                last_modified = value
+
+            parts.append(f"{result['count']}:{result['max_pk']}:{value}")
+
+        versions = CacheHelper.get_tag_versions(tags)
+
+        parts.extend(f"{tag}:{version}" for tag, version in sorted(versions.items()))
+        parts.extend(str(value) for value in extra or [])
+
+        digest = hashlib.md5("|".join(parts).encode(), usedforsecurity=False)
+
+        return quote_etag(digest.hexdigest()), last_modified
+
+    @staticmethod
+    def get_headers(etag, last_modified):
+        headers = {"ETag": etag}
+
+        if last_modified:
+            headers["Last-Modified"] = http_date(last_modified.timestamp())
+
+        return headers
+
+    @staticmethod
+    def is_not_modified(if_none_match, if_modified_since, etag, last_modified):
+        """
+        Returns True if the client copy is still fresh.
+        If-None-Match takes precedence over If-Modified-Since.
+        """
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return "*" in etags or etag.removeprefix("W/") in [
+                value.removeprefix("W/") for value in etags
+            ]
+
+        if if_modified_since and last_modified:
+            modified_since = parse_http_date_safe(if_modified_since)
+            return (
+                modified_since is not None
+                and int(last_modified.timestamp()) <= modified_since
+            )
+
+        return False
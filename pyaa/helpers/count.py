@@ -0,0 +1,119 @@
+import json
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import DatabaseError, connections, transaction
+
+
+class CountHelper:
+    @staticmethod
+    def get_count(queryset, threshold=None):
+        """
+        Returns the number of rows of a queryset, estimated for big tables.
+
+        The estimate comes from the database statistics (sqlite_stat1, pg_class,
+        information_schema or the postgresql planner), refreshed by the
+        analyze_database command. Querysets without an estimate, or estimated
+        below the threshold, are counted exactly.
+        """
+        if threshold is None:
+            threshold = settings.COUNT_ESTIMATE_THRESHOLD
+
+        estimate = CountHelper.get_estimate(queryset)
+
+        if estimate is None or estimate < threshold:
+            return queryset.count()
+
+        return estimate
+
+    @staticmethod
+    def get_estimate(queryset):
+        """
+        Returns the estimated number of rows of a queryset or None when there is no estimate.
+        """
+        query = queryset.query
+
+        # sliced, distinct, grouped and combined queries are not table sized
+        if (
+            query.is_sliced
+            or query.distinct
+            or query.combinator
+            or query.group_by is not None
+        ):
+            return None
+
+        connection = connections[queryset.db]
+
+        try:
+            # a savepoint, so a failed statistics query does not break the transaction
+            with transaction.atomic(using=queryset.db):
+                if not query.where:
+                    return CountHelper.get_table_estimate(
+                        connection, queryset.model._meta.db_table
+                    )
+
+                if connection.vendor == "postgresql":
+                    return CountHelper.get_planner_estimate(connection, queryset)
+        except (DatabaseError, EmptyResultSet):
+            # missing statistics (e.g. analyze never ran) or a query that matches nothing
+            return None
+
+        return None
+
+    @staticmethod
+    def get_table_estimate(connection, table):
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                # filled by ANALYZE, the first number of stat is the table row count
+                cursor.execute(
+                    "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table]
+                )
+                row = cursor.fetchone()
+                return int(row[0].split()[0]) if row else None
+            elif connection.vendor == "postgresql":
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [table]
+                )
+                row = cursor.fetchone()
+                # reltuples is -1 for tables never vacuumed or analyzed
+                return int(row[0]) if row and row[0] >= 0 else None
+            elif connection.vendor == "mysql":
+                cursor.execute(
+                    "SELECT table_rows FROM information_schema.tables "
+                    "WHERE table_schema = DATABASE() AND table_name = %s",
+                    [table],
+                )
+                row = cursor.fetchone()
+                return int(row[0]) if row and row[0] is not None else None
+
+        return None
+
+    @staticmethod
+    def update_statistics(using="default"):
+        """
+        Refreshes the database statistics the estimates are read from.
+        """
+        connection = connections[using]
+
+        with connection.cursor() as cursor:
+            if connection.vendor == "mysql":
+                for table in connection.introspection.table_names(cursor):
+                    cursor.execute(f"ANALYZE TABLE {connection.ops.quote_name(table)}")
+                    cursor.fetchall()
+            else:
+                # sqlite and postgresql analyze every table
+                cursor.execute("ANALYZE")
+
+    @staticmethod
+    def get_planner_estimate(connection, queryset):
+        sql, params = queryset.query.sql_with_params()
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+
+        # psycopg decodes json columns, other drivers return text
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        return int(plan[0]["Plan"]["Plan Rows"])
@@ -26,6 +26,37 @@ class EmailHelper:
         """
         Sends an email with both HTML and plain text versions.
         """
+        email = EmailHelper.build_email(
+            subject,
+            to,
+            template,
+            context,
+            attachments,
+            from_email,
+            reply_to,
+            language,
+        )
+
+        # send email
+        email.send(fail_silently=False)
+        logger.info(f"Email sent successfully to {to}")
+
+    @staticmethod
+    def build_email(
+        subject,
+        to,
+        template,
+        context=None,
+        attachments=None,
+        from_email=None,
+        reply_to=None,
+        language=None,
+        connection=None,
+    ):
+        """
+        Renders the template and returns the email message with both HTML and
+        plain text versions.
+        """
         if language:
             with translation.override(language):
                 subject = str(subject)
@@ -48,6 +79,7 @@ class EmailHelper:
             from_email=from_email,
             to=to,
             reply_to=reply_to,
+            connection=connection,
         )
 
         # attach the html alternative version
@@ -62,9 +94,7 @@ class EmailHelper:
                     attachment["mimetype"],
                 )
 
-        # send email
-        email.send(fail_silently=False)
-        logger.info(f"Email sent successfully to {to}")
+        return email
 
     @staticmethod
     def html_to_text(html):
@@ -92,11 +122,33 @@ class EmailHelper:
         from_email=None,
         reply_to=None,
         language=None,
+        group_key=None,
     ):
         """
         Sends an email asynchronously using Django Q.
         Uses the same format and parameters as the send email method.
+
+        With the batch delivery, the email is queued in the current transaction
+        and sent with other queued emails over one connection after commit, see
+        MailerHelper. Emails with the same group key sent within a short window
+        are coalesced into one email.
         """
+        if settings.EMAIL_DELIVERY == "batch":
+            # imported here, the mailer app builds its emails with this helper
+            from apps.mailer.helpers import MailerHelper
+
+            return MailerHelper.queue(
+                subject=subject,
+                to=to,
+                template=template,
+                context=context,
+                attachments=attachments,
+                from_email=from_email,
+                reply_to=reply_to,
+                language=language,
+                group_key=group_key,
+            )
+
         # schedule the email sending task for asynchronous execution
         task_id = async_task(
             EmailHelper.send_email,
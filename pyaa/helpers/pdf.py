@@ -0,0 +1,161 @@
+import atexit
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+import weasyprint
+from django.conf import settings
+from django.template import Context, Template
+from weasyprint.text.fonts import FontConfiguration
+
+logger = logging.getLogger(__name__)
+
+
+class PdfRenderer:
+    """
+    Weasyprint state of a process: the font configuration and the parsed stylesheets.
+
+    Stylesheets are django templates rendered with font_path, parsed once and
+    reused by every pdf rendered in the process.
+    """
+
+    def __init__(self):
+        self.font_config = None
+        self.stylesheets = {}
+        self.lock = threading.Lock()
+
+    def get_stylesheet(self, path):
+        path = str(path)
+
+        with self.lock:
+            if self.font_config is None:
+                self.font_config = FontConfiguration()
+
+            stylesheet = self.stylesheets.get(path)
+
+            if stylesheet is None:
+                with open(path, encoding="utf-8") as file:
+                    css = Template(file.read()).render(
+                        Context({"font_path": settings.PDF_FONT_PATH})
+                    )
+
+                stylesheet = self.stylesheets[path] = weasyprint.CSS(
+                    string=css, font_config=self.font_config
+                )
+
+        return stylesheet
+
+    def preload(self):
+        for path in settings.PDF_STYLESHEETS:
+            self.get_stylesheet(path)
+
+    def render(self, html, stylesheets):
+        stylesheets = [self.get_stylesheet(path) for path in stylesheets]
+
+        return weasyprint.HTML(string=html).write_pdf(
+            stylesheets=stylesheets,
+            font_config=self.font_config,
+        )
+
+
+pdf_renderer = PdfRenderer()
+
+
+def init_pdf_worker():
+    # spawn and forkserver workers start without the django apps loaded
+    django.setup()
+
+    # parse the stylesheets and fonts before the first pdf is requested
+    pdf_renderer.preload()
+
+
+def get_pdf_worker_context():
+    # forked workers inherit the loaded apps, forkserver is the default since python 3.14
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+
+    return multiprocessing.get_context()
+
+
+def render_pdf_in_worker(html, stylesheets):
+    return pdf_renderer.render(html, stylesheets)
+
+
+class PdfRendererPool:
+    """
+    Long-lived pool of PDF_RENDERER_POOL_SIZE worker processes.
+
+    Each worker preloads the stylesheets and fonts once, then takes html from the
+    pool queue and returns the pdf bytes. With a zero pool size, or inside daemonic
+    processes (e.g. django-q workers) that cannot have children, pdfs are rendered
+    in the calling process with the same cached stylesheets.
+
+    So the pool renders the pdfs of web requests, the report exports only with
+    REPORT_EXPORT_ASYNC off. Async exports are rendered by the django-q worker,
+    which keeps the parsed stylesheets between its tasks.
+    """
+
+    def __init__(self):
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def is_enabled(self):
+        return (
+            settings.PDF_RENDERER_POOL_SIZE > 0
+            and not multiprocessing.current_process().daemon
+        )
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=settings.PDF_RENDERER_POOL_SIZE,
+                    mp_context=get_pdf_worker_context(),
+                    initializer=init_pdf_worker,
+                )
+
+            return self.executor
+
+    def render(self, html, stylesheets):
+        if not self.is_enabled():
+            return pdf_renderer.render(html, stylesheets)
+
+        try:
+            return self.submit(html, stylesheets)
+        except BrokenProcessPool:
+            # a worker died (e.g. killed by the oom killer), start a new pool once
+            logger.warning("PDF renderer pool is broken, starting a new one")
+
+            self.shutdown()
+            return self.submit(html, stylesheets)
+
+    def submit(self, html, stylesheets):
+        future = self.get_executor().submit(render_pdf_in_worker, html, stylesheets)
+        return future.result(timeout=settings.PDF_RENDER_TIMEOUT)
+
+    def shutdown(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+pdf_renderer_pool = PdfRendererPool()
+atexit.register(pdf_renderer_pool.shutdown)
+
+
+class PdfHelper:
+    @staticmethod
+    def render(html, stylesheets=None):
+        """
+        Renders html to pdf bytes with the renderer pool.
+        Stylesheets are file paths, PDF_STYLESHEETS by default.
+        """
+        if stylesheets is None:
+            stylesheets = settings.PDF_STYLESHEETS
+
+        return pdf_renderer_pool.render(html, [str(path) for path in stylesheets])
@@ -1,8 +1,13 @@
 import re
 
+from django.conf import settings
 from django.urls import reverse
 from django.utils.html import escape
 from django.utils.safestring import mark_safe
+from django.utils.translation import gettext_lazy as _
+
+from pyaa.helpers.export import ExportHelper
+from pyaa.utils.cached_paginator import EstimatedCountPaginator
 
 
 class ReadonlyLinksMixin:
@@ -88,3 +93,55 @@ class SanitizeDigitFieldsMixin:
                 cleaned_data[field] = re.sub(r"\D", "", str(value))
 
         return cleaned_data
+
+
+class EstimatedCountAdminMixin:
+    """
+    Mixin for admins of big tables: the changelist count is estimated from the
+    database statistics and the unfiltered total count is not shown.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class StreamingExportAdminMixin:
+    """
+    Mixin that adds csv and xlsx export actions to an admin.
+
+    The selected rows are read with values_list in chunks of EXPORT_CHUNK_SIZE
+    and streamed while they are written, so the memory used does not grow with
+    the number of rows. Fields are export_fields, or the concrete model fields.
+    """
+
+    actions = ["export_as_csv", "export_as_xlsx"]
+    export_fields = None
+
+    def get_export_fields(self, request):
+        if self.export_fields is not None:
+            return list(self.export_fields)
+
+        return [field.attname for field in self.model._meta.concrete_fields]
+
+    def get_export_filename(self, request):
+        return str(self.model._meta.verbose_name_plural)
+
+    def get_export_response(self, request, queryset, format):
+        fields = self.get_export_fields(request)
+        rows = queryset.values_list(*fields).iterator(
+            chunk_size=settings.EXPORT_CHUNK_SIZE
+        )
+
+        return ExportHelper.build_response(
+            fields, rows, self.get_export_filename(request), format
+        )
+
+    def export_as_csv(self, request, queryset):
+        return self.get_export_response(request, queryset, "csv")
+
+    export_as_csv.short_description = _("admin.action.export-as-csv")
+
+    def export_as_xlsx(self, request, queryset):
+        return self.get_export_response(request, queryset, "xlsx")
+
+    export_as_xlsx.short_description = _("admin.action.export-as-xlsx")
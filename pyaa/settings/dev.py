@@ -89,6 +89,7 @@ PROJECT_APPS = [
     "apps.shop.apps.ShopAppConfig",
     "apps.banner.apps.BannerAppConfig",
     "apps.newsletter.apps.NewsletterAppConfig",
+    "apps.mailer.apps.MailerAppConfig",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + PROJECT_APPS
@@ -176,6 +177,26 @@ CACHES = {
     },
 }
 
+# cache alias of the tag versions, its keys must not be culled
+CACHE_TAG_ALIAS = "default"
+
+CACHE_TAGGED_TIMEOUT = 604800  # 7 days, entries are invalidated by tags
+CACHE_STALE_TIMEOUT = 300  # expired values served while one caller recomputes
+CACHE_LOCK_TIMEOUT = 10  # max seconds a caller holds the recompute lock
+CACHE_EARLY_REFRESH_BETA = 1.0  # higher values refresh earlier before expiry
+
+# in-process tier in front of the shared cache
+CACHE_LOCAL_ENABLED = True
+CACHE_LOCAL_TIMEOUT = 5
+CACHE_LOCAL_MAX_ENTRIES = 1000
+CACHE_LOCAL_SYNC_INTERVAL = 1  # seconds between invalidation checks
+
+# counts of tables bigger than this are estimated from database statistics
+COUNT_ESTIMATE_THRESHOLD = 100000
+
+# full page cache of anonymous visitors, pages are also invalidated by tags
+PAGE_CACHE_TIMEOUT = 300
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -261,6 +282,18 @@ STORAGES = {
     "staticfiles": {
         "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
     },
+    "archive": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {
+            "location": BASE_DIR / "archive",
+        },
+    },
+    "report": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {
+            "location": BASE_DIR / "report",
+        },
+    },
     "s3": {
         "BACKEND": "storages.backends.s3.S3Storage",
         "OPTIONS": {
@@ -326,6 +359,15 @@ EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 DEFAULT_FROM_EMAIL = "webmaster@localhost"
 DEFAULT_TO_EMAIL = "webmaster@localhost"
 
+# "batch" queues the emails and sends them in groups over one connection,
+# "task" sends each email in its own django-q task
+EMAIL_DELIVERY = "batch"
+EMAIL_BATCH_SIZE = 50  # emails sent per connection
+EMAIL_BATCH_LEASE = 300  # seconds a claimed batch is skipped by other drains
+EMAIL_MAX_ATTEMPTS = 8  # failed attempts before an email is given up
+EMAIL_RETRY_DELAY = 60  # seconds before the first retry, doubled per attempt
+EMAIL_COALESCE_WINDOW = 10  # seconds grouped emails wait for other notifications
+
 # Logging
 
 LOGGING = {
@@ -386,6 +428,84 @@ GATEWAY_FOR_PRODUCT_PURCHASE = PaymentGateway.STRIPE
 # Banner
 BANNER_ACCESS_INTERVAL = 86400  # 1 day in seconds
 
+# write-behind buffer for banner accesses, stored in batches by a background thread
+BANNER_ACCESS_BUFFER_ENABLED = False
+BANNER_ACCESS_BUFFER_SIZE = 500  # queued accesses that trigger an early flush
+BANNER_ACCESS_FLUSH_INTERVAL = 5  # seconds between flushes
+BANNER_ACCESS_FLUSH_RETRIES = 3  # retries of a failed batch, with doubled delays
+BANNER_ACCESS_BATCH_SIZE = 500  # rows per insert statement
+BANNER_ACCESS_BATCH_LIMIT = 50  # accesses per batch tracking request
+
+# dedupe store of the interval check: "database" (exists query on the access table),
+# "cache" (cache entry per banner, ip and type, needs a cache with an atomic add) or
+# "bloom" (rotating bloom filter per process, memory bounded but approximate, only
+# exact for a single long lived process)
+BANNER_ACCESS_DEDUPE = "database"
+BANNER_ACCESS_DEDUPE_CACHE_ALIAS = "default"
+BANNER_ACCESS_BLOOM_CAPACITY = 1000000  # accesses per interval
+BANNER_ACCESS_BLOOM_ERROR_RATE = 0.001  # accesses wrongly skipped as duplicates
+
+# daily access rollups read by the reports, see the rollup_banner_accesses command
+BANNER_ACCESS_ROLLUP_BATCH_SIZE = 50000  # accesses rolled up per transaction
+BANNER_ACCESS_ROLLUP_DELAY = 60  # seconds before rollup, plus the buffer flush time
+
+# rolled up accesses older than the retention are moved to gzip csv files per month
+BANNER_ACCESS_RETENTION_DAYS = 90
+BANNER_ACCESS_ARCHIVE_BATCH_SIZE = 10000  # accesses archived per transaction
+BANNER_ACCESS_ARCHIVE_STORAGE = "archive"  # storage alias, keep it private
+
+# PDF
+
+# pdfs are rendered by long-lived worker processes holding the parsed stylesheets and fonts,
+# django-q workers cannot start them and render in process (e.g. REPORT_EXPORT_ASYNC)
+PDF_RENDERER_POOL_SIZE = 2  # worker processes, 0 renders in the calling process
+PDF_RENDER_TIMEOUT = 120  # max seconds to wait for a pdf
+PDF_STYLESHEETS = [BASE_DIR / "apps/web/static/admin/css/report-pdf.css"]  # preloaded
+PDF_FONT_PATH = BASE_DIR / "apps/web/static/vendor/fonts"
+
+# Report
+
+# report data and charts are kept as snapshots per filters, until the data version changes
+REPORT_SNAPSHOT_TIMEOUT = 86400  # 1 day in seconds
+REPORT_SNAPSHOT_REFRESH_ASYNC = True  # serve outdated snapshots while rebuilding
+REPORT_SNAPSHOT_LOCK_TIMEOUT = 600  # max seconds a scheduled rebuild blocks others
+
+# charts are cached by their input data and served by url, the pdf embeds a high dpi png
+REPORT_CHART_FORMAT = "svg"  # screen charts, "svg" or "png"
+REPORT_CHART_DPI = 100  # screen png resolution
+REPORT_CHART_PDF_DPI = 300
+REPORT_CHART_TIMEOUT = 86400  # 1 day in seconds
+
+# pdf exports are rendered by django-q into a private storage, the admin polls the job
+REPORT_EXPORT_ASYNC = True
+REPORT_EXPORT_STORAGE = "report"  # storage alias, keep it private
+REPORT_EXPORT_TIMEOUT = 600  # seconds before an unfinished export is scheduled again
+REPORT_EXPORT_POLL_INTERVAL = 2  # seconds between status checks of the admin
+REPORT_EXPORT_EXPIRY = (
+    86400  # seconds an export file is kept, see delete_expired_report_exports
+)
+
+# Newsletter
+
+# emails inserted per query by the newsletter csv import
+NEWSLETTER_IMPORT_BATCH_SIZE = 1000
+
+# campaigns are sent by django-q tasks, a batch per task over one mail connection,
+# a batch must be sent within the Q_CLUSTER timeout (batch size / rate limit)
+NEWSLETTER_CAMPAIGN_BATCH_SIZE = 100
+NEWSLETTER_CAMPAIGN_RATE_LIMIT = 10  # messages per second, 0 for no limit
+NEWSLETTER_CAMPAIGN_LEASE = 300  # seconds a delivery is claimed by the task sending it
+
+# recipients refused with a transient 4xx reply are retried, then marked failed,
+# batches stopped by a connection error are retried with backoff, then paused
+NEWSLETTER_CAMPAIGN_MAX_ATTEMPTS = 5
+NEWSLETTER_CAMPAIGN_RETRY_DELAY = 600  # seconds, doubled on each batch attempt
+
+# Export
+
+# csv and xlsx exports are streamed, reading and writing this many rows at a time
+EXPORT_CHUNK_SIZE = 2000
+
 # Google Analytics
 
 GOOGLE_ANALYTICS_ID = os.getenv("APP_GOOGLE_ANALYTICS_ID", "")
@@ -11,13 +11,23 @@ DATABASES = {
     }
 }
 
+# the file based cache has no atomic add, so the single-flight recompute of
+# CacheHelper.get_or_compute is best-effort, use redis or memcached to make it strict
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
         "LOCATION": BASE_DIR / "cache",
-    }
+    },
+    # tag versions, with room enough not to be culled along with the entries
+    "tags": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache" / "tags",
+        "OPTIONS": {"MAX_ENTRIES": 1000000},
+    },
 }
 
+CACHE_TAG_ALIAS = "tags"
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -64,6 +74,14 @@ SECURE_BROWSER_XSS_FILTER = True
 
 USE_HTTPS_IN_ABSOLUTE_URLS = True
 
+# Banner
+
+BANNER_ACCESS_BUFFER_ENABLED = True
+# the interval check stays in the database: the file based cache has no atomic add,
+# and the bloom filter is per process, so it is lost when uwsgi recycles a worker
+# and each worker would record the same client once
+BANNER_ACCESS_DEDUPE = "database"
+
 # Email
 
 # EMAIL_BACKEND = "anymail.backends.amazon_ses.EmailBackend"
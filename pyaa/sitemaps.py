@@ -136,6 +136,19 @@ class PlanSitemap(Sitemap):
         return reverse("shop_plans", kwargs={"plan_type": obj.plan_type})
 
 
+def get_sitemap_querysets(request, **kwargs):
+    """
+    Returns the querysets the sitemap is built from, used to validate conditional requests.
+    """
+    return [
+        Content.objects.filter(active=True),
+        ContentCategory.objects.all(),
+        Gallery.objects.filter(active=True),
+        Product.objects.filter(active=True),
+        Plan.objects.filter(active=True),
+    ]
+
+
 # dictionary mapping sitemap names to their classes
 sitemaps = {
     "static": StaticViewSitemap,
@@ -0,0 +1,387 @@
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.gallery.models import Gallery, GalleryPhoto
+from apps.language.models import Language
+from pyaa.helpers.cache import (
+    CACHE_LOCAL_GENERATION_KEY,
+    CacheEntry,
+    CacheHelper,
+    LocalCache,
+    local_cache,
+)
+
+# the dev settings use a dummy cache, so a real in-memory cache is used here
+LOCMEM_CACHE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "cache-helper-tests",
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CacheHelperTest(TestCase):
+    fixtures = ["apps/language/fixtures/initial.json"]
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_model_tag(self):
+        self.assertEqual(CacheHelper.model_tag(Language), "language.language")
+        self.assertEqual(CacheHelper.model_tag(Language, 5), "language.language:5")
+
+    def test_get_returns_default_on_miss(self):
+        self.assertIsNone(CacheHelper.get("missing"))
+        self.assertEqual(CacheHelper.get("missing", "default"), "default")
+
+    def test_get_ignores_untagged_raw_values(self):
+        cache.set("raw", "value")
+        self.assertIsNone(CacheHelper.get("raw"))
+
+    def test_set_and_get_without_tags(self):
+        CacheHelper.set("key", "value")
+        self.assertEqual(CacheHelper.get("key"), "value")
+        self.assertIsInstance(cache.get("key"), CacheEntry)
+
+    def test_set_and_get_with_tags(self):
+        CacheHelper.set("key", "value", tags=["a", "b"])
+        self.assertEqual(CacheHelper.get("key"), "value")
+
+    def test_invalidate_tags_turns_entry_into_miss(self):
+        CacheHelper.set("key", "value", tags=["a", "b"])
+        CacheHelper.invalidate_tags("b")
+        self.assertIsNone(CacheHelper.get("key"))
+
+    def test_invalidate_unrelated_tag_keeps_entry(self):
+        CacheHelper.set("key", "value", tags=["a"])
+        CacheHelper.invalidate_tags("other")
+        self.assertEqual(CacheHelper.get("key"), "value")
+
+    def test_evicted_tag_version_invalidates_entry(self):
+        CacheHelper.invalidate_tags("a")
+        CacheHelper.set("key", "value", tags=["a"])
+
+        # losing the tag version must never resurrect an entry as fresh
+        cache.delete(CacheHelper.build_tag_key("a"))
+        self.assertIsNone(CacheHelper.get("key"))
+
+    def test_evicted_tag_never_invalidated_is_a_miss(self):
+        CacheHelper.set("key", "value", tags=["a"])
+        entry = cache.get("key")
+        CacheHelper.invalidate_tags("a")
+
+        # an entry stored before the invalidation, restored after the tag was lost
+        cache.delete(CacheHelper.build_tag_key("a"))
+        cache.set("key", entry)
+
+        self.assertIsNone(CacheHelper.get("key"))
+
+    def test_tag_versions_are_stored_on_read(self):
+        versions = CacheHelper.get_tag_versions(["a"])
+
+        self.assertIsNotNone(versions["a"])
+        self.assertEqual(CacheHelper.get_tag_versions(["a"]), versions)
+
+    def test_invalidate_tags_without_tags_is_noop(self):
+        CacheHelper.invalidate_tags()
+        self.assertEqual(CacheHelper.get_tag_versions([]), {})
+
+    def test_model_save_invalidates_table_and_row_tags(self):
+        language = Language.objects.first()
+
+        CacheHelper.set("table", "value", tags=[CacheHelper.model_tag(Language)])
+        CacheHelper.set(
+            "row", "value", tags=[CacheHelper.model_tag(Language, language.pk)]
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            language.save()
+
+        self.assertIsNone(CacheHelper.get("table"))
+        self.assertIsNone(CacheHelper.get("row"))
+
+    def test_child_save_invalidates_parent_row_tag(self):
+        gallery = Gallery.objects.create(title="Gallery", tag="gallery")
+
+        CacheHelper.set(
+            "gallery", "value", tags=[CacheHelper.model_tag(Gallery, gallery.pk)]
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            GalleryPhoto.objects.create(gallery=gallery, image="photo.jpg")
+
+        self.assertIsNone(CacheHelper.get("gallery"))
+
+    def test_model_delete_invalidates_row_tag(self):
+        gallery = Gallery.objects.create(title="Gallery", tag="gallery")
+        tag = CacheHelper.model_tag(Gallery, gallery.pk)
+
+        CacheHelper.set("gallery", "value", tags=[tag])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            gallery.delete()
+
+        self.assertIsNone(CacheHelper.get("gallery"))
+
+
+class LocalCacheTest(TestCase):
+    def test_get_missing_key(self):
+        local = LocalCache()
+        self.assertEqual(local.get("missing"), (False, None))
+
+    def test_set_and_get(self):
+        local = LocalCache()
+        local.set("key", "value", 60, 10)
+        self.assertEqual(local.get("key"), (True, "value"))
+
+    def test_expired_entry_is_a_miss(self):
+        local = LocalCache()
+        local.set("key", "value", 0, 10)
+        self.assertEqual(local.get("key"), (False, None))
+        self.assertNotIn("key", local.entries)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        local = LocalCache()
+        local.set("a", 1, 60, 2)
+        local.set("b", 2, 60, 2)
+
+        # reading "a" makes "b" the least recently used entry
+        local.get("a")
+        local.set("c", 3, 60, 2)
+
+        self.assertEqual(local.get("a"), (True, 1))
+        self.assertEqual(local.get("b"), (False, None))
+        self.assertEqual(local.get("c"), (True, 3))
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE,
+    CACHE_LOCAL_ENABLED=True,
+    CACHE_LOCAL_TIMEOUT=60,
+    CACHE_LOCAL_SYNC_INTERVAL=60,
+)
+class CacheHelperLocalTierTest(TestCase):
+    def setUp(self):
+        CacheHelper.reset_stats()
+
+    def tearDown(self):
+        cache.clear()
+        CacheHelper.clear_local()
+        CacheHelper.reset_stats()
+
+    def test_local_hit_skips_shared_cache(self):
+        CacheHelper.set("banners-home", "value", local=True)
+        CacheHelper.sync_local()
+
+        with patch("pyaa.helpers.cache.cache.get") as mock_get:
+            self.assertEqual(CacheHelper.get("banners-home", local=True), "value")
+
+        mock_get.assert_not_called()
+
+    def test_shared_hit_fills_local_tier(self):
+        CacheHelper.set("banners-home", "value")
+        self.assertEqual(local_cache.get("banners-home"), (False, None))
+
+        self.assertEqual(CacheHelper.get("banners-home", local=True), "value")
+        self.assertEqual(local_cache.get("banners-home"), (True, "value"))
+
+    def test_local_tier_is_not_used_without_local(self):
+        CacheHelper.set("banners-home", "value")
+        CacheHelper.get("banners-home")
+        self.assertEqual(local_cache.get("banners-home"), (False, None))
+
+    def test_invalidate_tags_clears_local_tier(self):
+        CacheHelper.set("banners-home", "value", tags=["a"], local=True)
+        CacheHelper.invalidate_tags("a")
+        self.assertIsNone(CacheHelper.get("banners-home", local=True))
+
+    def test_sync_clears_local_tier_on_foreign_generation(self):
+        CacheHelper.set("banners-home", "value", local=True)
+        CacheHelper.sync_local()
+
+        # another worker invalidated tags and bumped the shared generation
+        cache.set(CACHE_LOCAL_GENERATION_KEY, 123)
+        local_cache.synced_at = None
+        CacheHelper.sync_local()
+
+        self.assertEqual(local_cache.get("banners-home"), (False, None))
+        self.assertEqual(local_cache.generation, 123)
+
+    def test_sync_is_throttled_by_interval(self):
+        CacheHelper.sync_local()
+
+        with patch("pyaa.helpers.cache.cache.get") as mock_get:
+            CacheHelper.sync_local()
+
+        mock_get.assert_not_called()
+
+    @override_settings(CACHE_LOCAL_ENABLED=False)
+    def test_local_tier_disabled_by_setting(self):
+        CacheHelper.set("banners-home", "value", local=True)
+        self.assertEqual(local_cache.get("banners-home"), (False, None))
+
+    def test_stats_report_hit_ratio_per_namespace(self):
+        CacheHelper.get("banners-home", local=True)
+        CacheHelper.set("banners-home", "value")
+        CacheHelper.get("banners-home", local=True)
+        CacheHelper.get("banners-home", local=True)
+        CacheHelper.get("content-by-id-1")
+
+        stats = CacheHelper.get_stats()
+
+        self.assertEqual(
+            stats["banners"],
+            {
+                "local_hits": 1,
+                "shared_hits": 1,
+                "stale_hits": 0,
+                "misses": 1,
+                "hit_ratio": 2 / 3,
+            },
+        )
+        self.assertEqual(stats["content"]["hit_ratio"], 0.0)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, CACHE_STALE_TIMEOUT=300)
+class CacheHelperGetOrComputeTest(TestCase):
+    def setUp(self):
+        self.calls = 0
+
+    def tearDown(self):
+        cache.clear()
+        CacheHelper.clear_local()
+
+    def compute(self):
+        self.calls += 1
+        return f"value-{self.calls}"
+
+    def test_computes_and_stores_on_miss(self):
+        self.assertEqual(CacheHelper.get_or_compute("key", self.compute), "value-1")
+        self.assertEqual(CacheHelper.get_or_compute("key", self.compute), "value-1")
+        self.assertEqual(self.calls, 1)
+
+    def test_zero_timeout_always_computes(self):
+        CacheHelper.get_or_compute("key", self.compute, timeout=0)
+        CacheHelper.get_or_compute("key", self.compute, timeout=0)
+
+        self.assertEqual(self.calls, 2)
+        self.assertIsNone(cache.get("key"))
+
+    def test_none_is_not_stored(self):
+        self.assertIsNone(CacheHelper.get_or_compute("key", lambda: None))
+        self.assertIsNone(cache.get("key"))
+
+    def test_raw_values_are_served_as_they_are(self):
+        cache.set("key", [1, 2, 3])
+        self.assertEqual(CacheHelper.get_or_compute("key", self.compute), [1, 2, 3])
+        self.assertEqual(self.calls, 0)
+
+    def test_callable_timeout_and_tags_receive_value(self):
+        CacheHelper.get_or_compute(
+            "key",
+            self.compute,
+            timeout=lambda value: 60,
+            tags=lambda value: [value],
+        )
+
+        entry = cache.get("key")
+        self.assertEqual(list(entry.versions), ["value-1"])
+        self.assertAlmostEqual(entry.expires_at - time.time(), 60, delta=5)
+
+    def test_lock_is_released_after_compute(self):
+        CacheHelper.get_or_compute("key", self.compute)
+        self.assertIsNone(cache.get("cache-lock:key"))
+
+    def test_lock_is_released_when_compute_fails(self):
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            CacheHelper.get_or_compute("key", fail)
+
+        self.assertIsNone(cache.get("cache-lock:key"))
+
+    def test_stale_value_is_served_while_another_caller_recomputes(self):
+        cache.set("key", CacheEntry("stale", {}, time.time() - 1), 300)
+        cache.add("cache-lock:key", 1)
+
+        self.assertEqual(CacheHelper.get_or_compute("key", self.compute), "stale")
+        self.assertEqual(self.calls, 0)
+
+    def test_lock_holder_recomputes_expired_value(self):
+        cache.set("key", CacheEntry("stale", {}, time.time() - 1), 300)
+
+        self.assertEqual(CacheHelper.get_or_compute("key", self.compute), "value-1")
+        self.assertEqual(CacheHelper.get("key"), "value-1")
+
+    def test_invalidation_during_compute_outdates_value(self):
+        def compute():
+            # e.g. an admin commits while the rows are read
+            CacheHelper.invalidate_tags("a")
+            return self.compute()
+
+        CacheHelper.get_or_compute("key", compute, tags=["a"])
+
+        self.assertIsNone(CacheHelper.get("key"))
+        self.assertEqual(CacheHelper.get_or_compute("key", self.compute), "value-2")
+
+    def test_invalidation_during_compute_with_callable_tags(self):
+        def compute():
+            CacheHelper.invalidate_tags("value-1")
+            return self.compute()
+
+        CacheHelper.get_or_compute("key", compute, tags=lambda value: [value])
+
+        self.assertIsNone(cache.get("key"))
+
+    def test_invalidated_value_is_stale(self):
+        CacheHelper.get_or_compute("key", self.compute, tags=["a"])
+        CacheHelper.invalidate_tags("a")
+
+        self.assertEqual(CacheHelper.get_or_compute("key", self.compute), "value-2")
+
+    @override_settings(CACHE_LOCK_TIMEOUT=1)
+    def test_waits_for_lock_holder_when_nothing_to_serve(self):
+        cache.add("cache-lock:key", 1)
+
+        def store_fresh_value(seconds):
+            CacheHelper.set("key", "fresh", timeout=60)
+
+        with patch("pyaa.helpers.cache.time.sleep", side_effect=store_fresh_value):
+            value = CacheHelper.get_or_compute("key", self.compute)
+
+        self.assertEqual(value, "fresh")
+        self.assertEqual(self.calls, 0)
+
+    @override_settings(CACHE_LOCK_TIMEOUT=1)
+    def test_computes_when_lock_holder_gives_up(self):
+        cache.add("cache-lock:key", 1)
+
+        def release_lock(seconds):
+            cache.delete("cache-lock:key")
+
+        with patch("pyaa.helpers.cache.time.sleep", side_effect=release_lock):
+            value = CacheHelper.get_or_compute("key", self.compute)
+
+        self.assertEqual(value, "value-1")
+
+    def test_should_refresh_close_to_expiry(self):
+        entry = CacheEntry("value", {}, expires_at=1000.0, duration=1.0)
+
+        with patch("pyaa.helpers.cache.random.random", return_value=0.99):
+            # -log(0.01) is about 4.6 seconds of early refresh
+            self.assertTrue(entry.should_refresh(1.0, now=996.0))
+            self.assertFalse(entry.should_refresh(1.0, now=990.0))
+
+    def test_should_refresh_without_expiry(self):
+        entry = CacheEntry("value", {})
+        self.assertFalse(entry.should_refresh(1.0))
+
+
+class CacheHelperDummyCacheTest(TestCase):
+    def test_local_tier_is_disabled_with_dummy_cache(self):
+        self.assertFalse(CacheHelper.is_local_enabled())
@@ -1,13 +1,21 @@
+import array
+import time
 from unittest.mock import patch
 
+from django.contrib.sites.models import Site
 from django.core.cache import cache
 from django.http import QueryDict
 from django.test import TestCase, override_settings
 
+from pyaa.helpers.cache import CacheEntry, CacheHelper
 from pyaa.utils import cached_paginator
 from pyaa.utils.cached_paginator import (
     CachedPaginatorViewMixin,
+    PAGINATOR_STORAGE_PKS,
+    CursorPage,
+    CursorPaginator,
     Paginator,
+    paginate_cursor_object_list,
     paginate_object_list,
 )
 
@@ -76,7 +84,7 @@ class PaginatorTest(TestCase):
         page = paginator.page(1)
 
         self.assertEqual(list(page.object_list), list(range(1, 11)))
-        self.assertEqual(list(cache.get(key)), list(range(1, 11)))
+        self.assertEqual(list(cache.get(key).value), list(range(1, 11)))
 
     def test_page_returns_cached_object_list_on_hit(self):
         paginator = Paginator(self.object_list, 10, cache_key="key")
@@ -96,7 +104,7 @@ class PaginatorTest(TestCase):
         key = paginator.build_cache_key_total("total_number")
 
         self.assertEqual(paginator.count, 100)
-        self.assertEqual(cache.get(key), 100)
+        self.assertEqual(cache.get(key).value, 100)
 
     def test_count_reads_from_cache(self):
         paginator = Paginator(self.object_list, 10, cache_key="key")
@@ -114,11 +122,210 @@ class PaginatorTest(TestCase):
         cache.clear()
         self.assertEqual(paginator.count, 100)
 
+    def test_count_serves_stale_total_while_another_caller_recomputes(self):
+        paginator = Paginator(self.object_list, 10, cache_key="key")
+        key = paginator.build_cache_key_total("total_number")
+        cache.set(key, CacheEntry(42, {}, time.time() - 1), 600)
+        cache.add(f"cache-lock:{key}", 1)
+
+        self.assertEqual(paginator.count, 42)
+
+    def test_page_recomputes_expired_page_once(self):
+        paginator = Paginator(self.object_list, 10, cache_key="key")
+        key = paginator.build_cache_key(1)
+        cache.set(key, CacheEntry(["stale"], {}, time.time() - 1), 300)
+
+        page = paginator.page(1)
+
+        self.assertEqual(list(page.object_list), list(range(1, 11)))
+        self.assertIsNone(cache.get(f"cache-lock:{key}"))
+
+    def test_zero_cache_timeout_skips_cache(self):
+        paginator = Paginator(
+            self.object_list, 10, cache_key="key", cache_timeout=0, count_timeout=0
+        )
+
+        paginator.page(1)
+
+        self.assertIsNone(cache.get(paginator.build_cache_key(1)))
+        self.assertIsNone(cache.get(paginator.build_cache_key_total("total_number")))
+
     def test_num_pages_uses_cached_count(self):
         paginator = Paginator(self.object_list, 10, cache_key="key")
         self.assertEqual(paginator.num_pages, 10)
 
 
+@override_settings(CACHES=LOCMEM_CACHE)
+class PaginatorQueryKeyTest(TestCase):
+    def setUp(self):
+        for i in range(4):
+            Site.objects.create(domain=f"site{i}.example.com", name=f"site {i % 2}")
+
+    def tearDown(self):
+        cache.clear()
+        CacheHelper.clear_local()
+
+    def test_list_keys_have_no_query_digest(self):
+        paginator = Paginator(list(range(10)), 5, cache_key="key")
+        self.assertIsNone(paginator.query_digest)
+        self.assertIsNone(paginator.cache_tags)
+
+    def test_differently_filtered_querysets_use_different_keys(self):
+        first = Paginator(Site.objects.filter(name="site 0"), 5, cache_key="sites")
+        second = Paginator(Site.objects.filter(name="site 1"), 5, cache_key="sites")
+
+        self.assertNotEqual(first.build_cache_key(1), second.build_cache_key(1))
+        self.assertNotEqual(
+            first.build_cache_key_total("total_number"),
+            second.build_cache_key_total("total_number"),
+        )
+        self.assertEqual([site.name for site in second.page(1)], ["site 1"] * 2)
+
+    def test_same_queryset_uses_same_key(self):
+        first = Paginator(Site.objects.filter(name="site 0"), 5, cache_key="sites")
+        second = Paginator(Site.objects.filter(name="site 0"), 5, cache_key="sites")
+
+        self.assertEqual(first.build_cache_key(1), second.build_cache_key(1))
+
+    def test_empty_queryset_has_a_digest(self):
+        paginator = Paginator(Site.objects.filter(pk__in=[]), 5, cache_key="sites")
+        self.assertIsNotNone(paginator.query_digest)
+
+    def test_model_write_invalidates_cached_pages(self):
+        queryset = Site.objects.order_by("id")
+        Paginator(queryset, 10, cache_key="sites").page(1)
+
+        with self.assertNumQueries(0):
+            Paginator(queryset, 10, cache_key="sites").page(1)
+
+        CacheHelper.invalidate_tags(CacheHelper.model_tag(Site))
+
+        with self.assertNumQueries(2):
+            paginator = Paginator(queryset, 10, cache_key="sites")
+            self.assertEqual(len(paginator.page(1)), 5)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PaginatorPkStorageTest(TestCase):
+    def setUp(self):
+        for i in range(12):
+            Site.objects.create(domain=f"site{i}.example.com", name=f"site {i}")
+
+        self.queryset = Site.objects.order_by("-id")
+        self.ids = list(self.queryset.values_list("id", flat=True))
+
+    def tearDown(self):
+        cache.clear()
+        CacheHelper.clear_local()
+
+    def test_list_falls_back_to_object_storage(self):
+        paginator = Paginator(
+            list(range(10)), 5, cache_key="key", cache_storage=PAGINATOR_STORAGE_PKS
+        )
+        self.assertEqual(paginator.cache_storage, "objects")
+
+    def test_caches_packed_primary_keys(self):
+        paginator = Paginator(
+            self.queryset, 5, cache_key="sites", cache_storage=PAGINATOR_STORAGE_PKS
+        )
+        page = paginator.page(2)
+
+        entry = cache.get(paginator.build_cache_key(2))
+        self.assertIsInstance(entry.value, array.array)
+        self.assertEqual(list(entry.value), self.ids[5:10])
+        self.assertEqual([site.id for site in page], self.ids[5:10])
+
+    def test_hit_hydrates_with_one_query(self):
+        paginator = Paginator(
+            self.queryset, 5, cache_key="sites", cache_storage=PAGINATOR_STORAGE_PKS
+        )
+        paginator.page(1)
+
+        with self.assertNumQueries(1):
+            page = paginator.page(1)
+
+        self.assertEqual([site.id for site in page], self.ids[:5])
+
+    def test_hydration_skips_deleted_rows(self):
+        paginator = Paginator(
+            self.queryset, 5, cache_key="sites", cache_storage=PAGINATOR_STORAGE_PKS
+        )
+        paginator.page(1)
+
+        # delete without invalidating, like a write that lands between two reads
+        Site.objects.filter(id=self.ids[0])._raw_delete(Site.objects.db)
+
+        page = paginator.page(1)
+        self.assertEqual([site.id for site in page], self.ids[1:5])
+
+    def test_storage_is_part_of_the_key(self):
+        objects = Paginator(self.queryset, 5, cache_key="sites")
+        pks = Paginator(
+            self.queryset, 5, cache_key="sites", cache_storage=PAGINATOR_STORAGE_PKS
+        )
+
+        self.assertNotEqual(objects.build_cache_key(1), pks.build_cache_key(1))
+
+    def test_cursor_paginator_caches_primary_keys(self):
+        paginator = CursorPaginator(
+            self.queryset,
+            5,
+            cache_key="sites",
+            cache_timeout=60,
+            cache_storage=PAGINATOR_STORAGE_PKS,
+        )
+        first = paginator.page()
+
+        rows, has_more = cache.get(paginator.build_cache_key(None)).value
+        self.assertIsInstance(rows, array.array)
+        self.assertTrue(has_more)
+
+        with self.assertNumQueries(1):
+            page = paginator.page()
+
+        self.assertEqual([site.id for site in page], self.ids[:5])
+        self.assertEqual(page.next_cursor, first.next_cursor)
+
+    def test_view_mixin_passes_storage(self):
+        class View(CachedPaginatorViewMixin):
+            cache_storage = PAGINATOR_STORAGE_PKS
+
+            def get_cache_key(self):
+                return "view-key"
+
+        paginator = View().get_paginator(self.queryset, 5)
+        self.assertEqual(paginator.cache_storage, PAGINATOR_STORAGE_PKS)
+
+
+class PaginatorEstimateCountTest(TestCase):
+    def setUp(self):
+        for i in range(4):
+            Site.objects.create(domain=f"site{i}.example.com", name=f"site {i}")
+
+    @override_settings(COUNT_ESTIMATE_THRESHOLD=1)
+    def test_count_uses_estimate(self):
+        paginator = Paginator(
+            Site.objects.all(), 2, cache_key="sites", estimate_count=True
+        )
+
+        with patch(
+            "pyaa.utils.cached_paginator.CountHelper.get_count", return_value=1000
+        ) as get_count:
+            self.assertEqual(paginator.count, 1000)
+
+        get_count.assert_called_once()
+
+    def test_count_is_exact_by_default(self):
+        paginator = Paginator(Site.objects.all(), 2, cache_key="sites")
+        self.assertFalse(paginator.estimate_count)
+        self.assertEqual(paginator.count, 5)
+
+    def test_list_count_is_never_estimated(self):
+        paginator = Paginator(list(range(7)), 2, cache_key="k", estimate_count=True)
+        self.assertFalse(paginator.estimate_count)
+        self.assertEqual(paginator.count, 7)
+
+
 class CachedPaginatorViewMixinTest(TestCase):
     def tearDown(self):
         cache.clear()
@@ -236,3 +443,139 @@ class PaginateObjectListTest(TestCase):
         self.assertNotIn("paginator_page_first", ids)
         self.assertNotIn("paginator_page_next", ids)
         self.assertEqual(result["object_list"], page)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CursorPaginatorTest(TestCase):
+    def setUp(self):
+        for i in range(24):
+            Site.objects.create(domain=f"site{i}.example.com", name=f"site {i % 3}")
+
+        self.ids = list(Site.objects.order_by("-id").values_list("id", flat=True))
+
+    def tearDown(self):
+        cache.clear()
+
+    def ids_of(self, page):
+        return [site.id for site in page]
+
+    def test_primary_key_is_appended_to_ordering(self):
+        paginator = CursorPaginator(Site.objects.all(), 10, ordering="-name")
+        self.assertEqual(paginator.ordering, ("-name", "-id"))
+
+    def test_first_page(self):
+        paginator = CursorPaginator(Site.objects.all(), 10)
+        page = paginator.page()
+
+        self.assertIsInstance(page, CursorPage)
+        self.assertEqual(self.ids_of(page), self.ids[:10])
+        self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+
+    def test_walks_forward_and_backward(self):
+        paginator = CursorPaginator(Site.objects.all(), 10)
+
+        second = paginator.page(paginator.page().next_cursor)
+        third = paginator.page(second.next_cursor)
+
+        self.assertEqual(self.ids_of(second), self.ids[10:20])
+        self.assertEqual(self.ids_of(third), self.ids[20:])
+        self.assertFalse(third.has_next())
+        self.assertTrue(third.has_previous())
+
+        back = paginator.page(third.previous_cursor)
+        self.assertEqual(self.ids_of(back), self.ids[10:20])
+        self.assertTrue(back.has_next())
+        self.assertTrue(back.has_previous())
+
+        first = paginator.page(back.previous_cursor)
+        self.assertEqual(self.ids_of(first), self.ids[:10])
+        self.assertFalse(first.has_previous())
+
+    def test_ties_are_broken_by_primary_key(self):
+        paginator = CursorPaginator(Site.objects.all(), 7, ordering="name")
+        expected = list(
+            Site.objects.order_by("name", "id").values_list("id", flat=True)
+        )
+
+        ids = []
+        page = paginator.page()
+
+        while True:
+            ids.extend(self.ids_of(page))
+
+            if not page.has_next():
+                break
+
+            page = paginator.page(page.next_cursor)
+
+        self.assertEqual(ids, expected)
+
+    def test_no_count_query(self):
+        paginator = CursorPaginator(Site.objects.all(), 10)
+        cursor = paginator.page().next_cursor
+
+        with self.assertNumQueries(1):
+            paginator.page(cursor)
+
+    def test_tampered_cursor_returns_first_page(self):
+        paginator = CursorPaginator(Site.objects.all(), 10)
+
+        page = paginator.page("invalid-cursor")
+
+        self.assertEqual(self.ids_of(page), self.ids[:10])
+
+    def test_cached_page_skips_query(self):
+        paginator = CursorPaginator(
+            Site.objects.all(), 10, cache_key="sites", cache_timeout=60
+        )
+        paginator.page()
+
+        with self.assertNumQueries(0):
+            page = paginator.page()
+
+        self.assertEqual(self.ids_of(page), self.ids[:10])
+
+    def test_cache_key_varies_by_query(self):
+        first = CursorPaginator(Site.objects.filter(name="site 0"), 10, cache_key="k")
+        second = CursorPaginator(Site.objects.filter(name="site 1"), 10, cache_key="k")
+
+        self.assertNotEqual(first.build_cache_key(None), second.build_cache_key(None))
+
+    def test_view_mixin_paginates_with_cursor(self):
+        class View(CachedPaginatorViewMixin):
+            cursor_ordering = "-id"
+
+            def get_cache_key(self):
+                return "view-key"
+
+        view = View()
+        view.request = type("Request", (), {"GET": QueryDict()})()
+
+        paginator, page, object_list, is_paginated = view.paginate_queryset(
+            Site.objects.all(), 10
+        )
+
+        self.assertIsInstance(paginator, CursorPaginator)
+        self.assertEqual(self.ids_of(object_list), self.ids[:10])
+        self.assertTrue(is_paginated)
+
+    def test_paginate_cursor_object_list(self):
+        paginator = CursorPaginator(Site.objects.all(), 10)
+        page = paginator.page(paginator.page().next_cursor)
+
+        query_string = QueryDict(mutable=True)
+        query_string["foo"] = "bar"
+
+        result = paginate_cursor_object_list(query_string, page)
+
+        ids = [entry["id"] for entry in result["paginator_list"]]
+        self.assertEqual(
+            ids, ["paginator_page_first", "paginator_page_prev", "paginator_page_next"]
+        )
+        self.assertEqual(result["paginator_list"][0]["link"], "foo=bar")
+        self.assertIn("cursor=", result["paginator_list"][2]["link"])
+
+    def test_paginate_cursor_object_list_requires_cursor_page(self):
+        with self.assertRaises(AssertionError):
+            paginate_cursor_object_list(QueryDict(mutable=True), [1, 2, 3])
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.contrib.sites.models import Site
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.http import http_date
+
+from apps.content.models import ContentCategory
+from pyaa.helpers.conditional import ConditionalHelper
+
+
+class ConditionalHelperTest(TestCase):
+    def setUp(self):
+        self.category = ContentCategory.objects.create(name="News", tag="news")
+
+    def get_validators(self, extra=None):
+        return ConditionalHelper.get_validators(
+            [ContentCategory.objects.all()], extra=extra
+        )
+
+    def test_last_modified_is_max_updated_at(self):
+        etag, last_modified = self.get_validators()
+
+        self.assertTrue(etag.startswith('"'))
+        self.assertEqual(last_modified, self.category.updated_at)
+
+    def test_models_without_updated_at_have_no_last_modified(self):
+        etag, last_modified = ConditionalHelper.get_validators([Site.objects.all()])
+
+        self.assertIsNotNone(etag)
+        self.assertIsNone(last_modified)
+
+    def test_etag_changes_on_update(self):
+        etag, _ = self.get_validators()
+
+        ContentCategory.objects.filter(pk=self.category.pk).update(
+            updated_at=self.category.updated_at + timedelta(seconds=1)
+        )
+
+        self.assertNotEqual(self.get_validators()[0], etag)
+
+    def test_etag_changes_on_delete(self):
+        ContentCategory.objects.create(name="Other", tag="other")
+        etag, last_modified = self.get_validators()
+
+        # the oldest row is deleted, so max(updated_at) stays the same
+        self.category.delete()
+
+        self.assertEqual(self.get_validators()[1], last_modified)
+        self.assertNotEqual(self.get_validators()[0], etag)
+
+    def test_etag_varies_on_extra(self):
+        self.assertNotEqual(
+            self.get_validators(extra=["en"])[0], self.get_validators(extra=["pt"])[0]
+        )
+
+    def test_is_not_modified_with_matching_etag(self):
+        self.assertTrue(ConditionalHelper.is_not_modified('"abc"', None, '"abc"', None))
+        self.assertTrue(ConditionalHelper.is_not_modified("*", None, '"abc"', None))
+        self.assertFalse(
+            ConditionalHelper.is_not_modified('"other"', None, '"abc"', None)
+        )
+
+    def test_if_none_match_takes_precedence(self):
+        now = timezone.now()
+
+        self.assertFalse(
+            ConditionalHelper.is_not_modified(
+                '"other"', http_date(now.timestamp()), '"abc"', now
+            )
+        )
+
+    def test_is_not_modified_since(self):
+        now = timezone.now()
+
+        self.assertTrue(
+            ConditionalHelper.is_not_modified(
+                None, http_date(now.timestamp()), '"abc"', now
+            )
+        )
+        self.assertFalse(
+            ConditionalHelper.is_not_modified(
+                None, http_date((now - timedelta(hours=1)).timestamp()), '"abc"', now
+            )
+        )
+        self.assertFalse(
+            ConditionalHelper.is_not_modified(None, "invalid", '"abc"', now)
+        )
@@ -0,0 +1,59 @@
+from unittest.mock import patch
+
+from django.contrib.sites.models import Site
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+
+from pyaa.helpers.count import CountHelper
+
+
+def analyze():
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+class CountHelperTest(TestCase):
+    def setUp(self):
+        for i in range(9):
+            Site.objects.create(domain=f"site{i}.example.com", name=f"site {i}")
+
+    def test_get_estimate_reads_table_statistics(self):
+        analyze()
+
+        # new rows are not seen until the statistics are refreshed
+        Site.objects.create(domain="new.example.com", name="new")
+
+        self.assertEqual(CountHelper.get_estimate(Site.objects.all()), 10)
+
+    def test_get_estimate_without_statistics_returns_none(self):
+        with patch.object(CountHelper, "get_table_estimate", side_effect=DatabaseError):
+            self.assertIsNone(CountHelper.get_estimate(Site.objects.all()))
+
+    def test_get_estimate_of_filtered_queryset_on_sqlite_returns_none(self):
+        analyze()
+        self.assertIsNone(CountHelper.get_estimate(Site.objects.filter(name="x")))
+
+    def test_get_estimate_of_sliced_queryset_returns_none(self):
+        analyze()
+        self.assertIsNone(CountHelper.get_estimate(Site.objects.all()[:5]))
+
+    def test_get_count_uses_estimate_above_threshold(self):
+        analyze()
+        Site.objects.create(domain="new.example.com", name="new")
+
+        with self.assertNumQueries(3):
+            # savepoint, statistics query and savepoint release
+            self.assertEqual(CountHelper.get_count(Site.objects.all(), threshold=5), 10)
+
+    def test_get_count_is_exact_below_threshold(self):
+        analyze()
+        Site.objects.create(domain="new.example.com", name="new")
+
+        self.assertEqual(CountHelper.get_count(Site.objects.all(), threshold=50), 11)
+
+    @override_settings(COUNT_ESTIMATE_THRESHOLD=5)
+    def test_get_count_is_exact_for_filtered_queryset(self):
+        analyze()
+
+        count = CountHelper.get_count(Site.objects.filter(name__startswith="site"))
+        self.assertEqual(count, 9)
@@ -1,11 +1,19 @@
+from unittest.mock import patch
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.sites.models import Site
+from django.core.cache import cache
 from django.http import HttpResponse
-from django.test import RequestFactory, TestCase
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import translation
 
 from apps.customer.models import Customer
+from pyaa.decorators.cache import anonymous_cache_page
 from pyaa.decorators.customer import customer_required
+from pyaa.helpers.cache import CacheHelper
 
 User = get_user_model()
 
@@ -55,3 +63,149 @@ class CustomerRequiredDecoratorTest(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.content.decode(), str(customer.id))
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "page-cache-tests",
+        }
+    }
+)
+class AnonymousCachePageDecoratorTest(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.calls = 0
+
+        @anonymous_cache_page("page-test")
+        def view(request):
+            self.calls += 1
+
+            if "csrf" in request.GET:
+                get_token(request)
+
+            status = 404 if "missing" in request.GET else 200
+            return HttpResponse(f"call {self.calls}", status=status)
+
+        self.view = view
+
+    def tearDown(self):
+        cache.clear()
+        CacheHelper.clear_local()
+
+    def get(self, path="/page", user=None, **extra):
+        request = self.factory.get(path, **extra)
+        request.user = user or AnonymousUser()
+        return self.view(request)
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.get()
+        second = self.get()
+
+        self.assertEqual(first["X-Page-Cache"], "MISS")
+        self.assertEqual(second["X-Page-Cache"], "HIT")
+        self.assertEqual(second.content, b"call 1")
+        self.assertEqual(second["Content-Type"], first["Content-Type"])
+        self.assertEqual(self.calls, 1)
+
+    def test_query_order_does_not_change_the_key(self):
+        self.get("/page?a=1&b=2")
+        response = self.get("/page?b=2&a=1")
+
+        self.assertEqual(response["X-Page-Cache"], "HIT")
+
+    def test_different_query_is_a_different_page(self):
+        self.get("/page?page=1")
+        response = self.get("/page?page=2")
+
+        self.assertEqual(response["X-Page-Cache"], "MISS")
+        self.assertEqual(self.calls, 2)
+
+    def test_language_is_part_of_the_key(self):
+        with translation.override("en"):
+            self.get()
+
+        with translation.override("pt"):
+            response = self.get()
+
+        self.assertEqual(response["X-Page-Cache"], "MISS")
+
+    def test_authenticated_user_is_never_cached(self):
+        user = User.objects.create_user(
+            email="cached@example.com", password="pass", site=Site.objects.get_current()
+        )
+
+        self.get(user=user)
+        response = self.get(user=user)
+
+        self.assertFalse(response.has_header("X-Page-Cache"))
+        self.assertEqual(self.calls, 2)
+
+    def test_response_with_csrf_token_is_not_cached(self):
+        self.get("/page?csrf=1")
+        self.get("/page?csrf=1")
+
+        self.assertEqual(self.calls, 2)
+
+    def test_error_response_is_not_cached(self):
+        self.get("/page?missing=1")
+        self.get("/page?missing=1")
+
+        self.assertEqual(self.calls, 2)
+
+    def test_post_is_not_cached(self):
+        request = self.factory.post("/page")
+        request.user = AnonymousUser()
+
+        self.view(request)
+        response = self.get()
+
+        self.assertEqual(response["X-Page-Cache"], "MISS")
+
+    def test_tag_invalidation_expires_page(self):
+        self.get()
+        CacheHelper.invalidate_tags("page-test")
+
+        response = self.get()
+
+        self.assertEqual(response["X-Page-Cache"], "MISS")
+        self.assertEqual(self.calls, 2)
+
+    def test_hits_and_misses_are_reported(self):
+        CacheHelper.reset_stats()
+
+        self.get()
+        self.get()
+
+        stats = CacheHelper.get_stats()["page"]
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["shared_hits"], 1)
+
+    def test_timeout_defaults_to_the_page_cache_timeout(self):
+        with patch.object(CacheHelper, "set") as mock_set:
+            self.get()
+
+        self.assertEqual(
+            mock_set.call_args.kwargs["timeout"], settings.PAGE_CACHE_TIMEOUT
+        )
+
+    def test_timeout_can_depend_on_the_response(self):
+        @anonymous_cache_page(
+            "page-test", timeout=lambda response: len(response.content)
+        )
+        def view(request):
+            return HttpResponse(request.GET.get("content", ""))
+
+        for content, timeout in (("abc", 3), ("", None)):
+            request = self.factory.get("/page", {"content": content})
+            request.user = AnonymousUser()
+
+            with patch.object(CacheHelper, "set") as mock_set:
+                view(request)
+
+            if timeout:
+                self.assertEqual(mock_set.call_args.kwargs["timeout"], timeout)
+            else:
+                # a timeout of 0 is not cached
+                mock_set.assert_not_called()
@@ -90,6 +90,7 @@ class EmailHelperSendEmailTest(TestCase):
         self.assertEqual(len(mail.outbox), 1)
 
     @patch("pyaa.helpers.email.async_task", return_value="task-123")
+    @override_settings(EMAIL_DELIVERY="task")
     def test_send_email_async_schedules_task(self, mock_async_task):
         task_id = EmailHelper.send_email_async(
             subject="Subject",
@@ -99,3 +100,15 @@ class EmailHelperSendEmailTest(TestCase):
 
         self.assertEqual(task_id, "task-123")
         mock_async_task.assert_called_once()
+
+    @patch("apps.mailer.helpers.MailerHelper.queue", return_value="queued-email")
+    @override_settings(EMAIL_DELIVERY="batch")
+    def test_send_email_async_queues_batch_email(self, mock_queue):
+        result = EmailHelper.send_email_async(
+            subject="Subject",
+            to=["user@example.com"],
+            template="emails/dummy.html",
+        )
+
+        self.assertEqual(result, "queued-email")
+        mock_queue.assert_called_once()
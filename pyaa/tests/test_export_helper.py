@@ -0,0 +1,104 @@
+import datetime
+import io
+import zipfile
+from xml.etree import ElementTree
+
+from django.http import StreamingHttpResponse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from pyaa.helpers.export import ExportHelper
+
+SHEET_NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+class ExportHelperTest(TestCase):
+    def read_sheet(self, content):
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertIn("xl/workbook.xml", archive.namelist())
+            sheet = ElementTree.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+
+        rows = []
+
+        for row in sheet.iterfind("s:sheetData/s:row", SHEET_NS):
+            cells = []
+
+            for cell in row.iterfind("s:c", SHEET_NS):
+                if cell.get("t") == "inlineStr":
+                    cells.append(cell.find("s:is/s:t", SHEET_NS).text or "")
+                else:
+                    cells.append(cell.find("s:v", SHEET_NS).text)
+
+            rows.append(cells)
+
+        return rows
+
+    def test_format_value(self):
+        self.assertEqual(ExportHelper.format_value(None), "")
+        self.assertEqual(ExportHelper.format_value(5), 5)
+        self.assertEqual(
+            ExportHelper.format_value(datetime.date(2025, 1, 2)), "2025-01-02"
+        )
+
+        value = timezone.make_aware(datetime.datetime(2025, 1, 2, 10, 30))
+        self.assertEqual(ExportHelper.format_value(value), "2025-01-02 10:30:00")
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_csv_is_streamed_in_chunks(self):
+        rows = ((i, f"user{i}@example.com", None) for i in range(5))
+
+        chunks = list(ExportHelper.stream_csv(["id", "email", "name"], rows))
+        content = b"".join(chunks).decode("utf-8")
+
+        self.assertEqual(len(chunks), 3)
+        self.assertTrue(content.startswith("\ufeffid,email,name\r\n"))
+        self.assertIn("4,user4@example.com,\r\n", content)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_rows_are_read_while_streaming(self):
+        read = []
+
+        def rows():
+            for i in range(4):
+                read.append(i)
+                yield [i]
+
+        stream = ExportHelper.stream_xlsx(["id"], rows())
+        next(stream)
+
+        self.assertEqual(read, [0, 1])
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_xlsx_is_a_valid_workbook(self):
+        rows = [
+            [1, "first <a&b>", True],
+            [2, "bad\x01char", None],
+            [3, 1.5, False],
+        ]
+
+        content = b"".join(ExportHelper.stream_xlsx(["id", "name", "active"], rows))
+
+        self.assertEqual(
+            self.read_sheet(content),
+            [
+                ["id", "name", "active"],
+                ["1", "first <a&b>", "1"],
+                ["2", "badchar", ""],
+                ["3", "1.5", "0"],
+            ],
+        )
+
+    def test_build_response(self):
+        response = ExportHelper.build_response(["id"], [[1]], "entries", "xlsx")
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(
+            response["Content-Type"],
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="entries.xlsx"'
+        )
+        self.assertEqual(
+            self.read_sheet(b"".join(response.streaming_content)), [["id"], ["1"]]
+        )
@@ -1,11 +1,22 @@
 from django import forms
+from django.contrib.auth import get_user_model
 from django.contrib.admin.sites import AdminSite
 from django.contrib.sites.models import Site
 from django.test import RequestFactory, TestCase
 
+from apps.customer.models import Customer
+from apps.shop.admin import CreditLogAdmin, EventLogAdmin, SubscriptionAdmin
+from apps.shop.enums import ObjectType
+from apps.shop.models import CreditLog
 from apps.site.admin import SiteProfileAdmin
 from apps.site.models import SiteProfile
-from pyaa.mixins import ReadonlyLinksMixin, SanitizeDigitFieldsMixin
+from pyaa.mixins import (
+    EstimatedCountAdminMixin,
+    ReadonlyLinksMixin,
+    SanitizeDigitFieldsMixin,
+    StreamingExportAdminMixin,
+)
+from pyaa.utils.cached_paginator import EstimatedCountPaginator
 
 
 class SanitizeForm(SanitizeDigitFieldsMixin, forms.Form):
@@ -58,3 +69,62 @@ class ReadonlyLinksMixinTest(TestCase):
         second = self.admin.get_readonly_fields(self.request, self.profile)
 
         self.assertIs(first, second)
+
+
+class EstimatedCountAdminMixinTest(TestCase):
+    def test_log_admins_use_estimated_counts(self):
+        for admin_class in (CreditLogAdmin, EventLogAdmin, SubscriptionAdmin):
+            self.assertTrue(issubclass(admin_class, EstimatedCountAdminMixin))
+
+    def test_changelist_paginator_estimates_count(self):
+        admin = CreditLogAdmin(CreditLog, AdminSite())
+        request = RequestFactory().get("/admin")
+
+        paginator = admin.get_paginator(request, CreditLog.objects.order_by("-id"), 100)
+
+        self.assertIsInstance(paginator, EstimatedCountPaginator)
+        self.assertFalse(admin.show_full_result_count)
+        self.assertEqual(paginator.count, 0)
+
+
+class StreamingExportAdminMixinTest(TestCase):
+    fixtures = ["apps/language/fixtures/initial.json"]
+
+    def setUp(self):
+        self.admin = CreditLogAdmin(CreditLog, AdminSite())
+        self.request = RequestFactory().get("/admin")
+        self.site = Site.objects.get_current()
+
+    def test_log_admins_have_export_actions(self):
+        for admin_class in (CreditLogAdmin, EventLogAdmin):
+            self.assertTrue(issubclass(admin_class, StreamingExportAdminMixin))
+            self.assertIn("export_as_xlsx", admin_class.actions)
+
+    def test_export_streams_values_of_export_fields(self):
+        user = get_user_model().objects.create_user(
+            email="customer@example.com", password="pass", site=self.site
+        )
+        customer = Customer.objects.create(user=user, site=self.site, language_id=1)
+
+        CreditLog.objects.create(
+            site=self.site,
+            customer=customer,
+            object_type=ObjectType.BONUS,
+            object_id=7,
+            amount=10,
+        )
+
+        response = self.admin.export_as_csv(self.request, CreditLog.objects.all())
+        content = b"".join(response.streaming_content).decode("utf-8")
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn(",".join(CreditLogAdmin.export_fields), content)
+        self.assertIn(f"{ObjectType.BONUS},7,customer@example.com,10,False", content)
+
+    def test_default_export_fields_are_concrete_fields(self):
+        class ExportAdmin(StreamingExportAdminMixin, SiteProfileAdmin):
+            pass
+
+        admin = ExportAdmin(SiteProfile, AdminSite())
+
+        self.assertIn("site_id", admin.get_export_fields(self.request))
@@ -0,0 +1,123 @@
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import Mock, patch
+
+from django.test import SimpleTestCase, override_settings
+
+from pyaa.helpers.pdf import (
+    PdfHelper,
+    PdfRenderer,
+    init_pdf_worker,
+    pdf_renderer_pool,
+)
+
+
+class PdfRendererTest(SimpleTestCase):
+    def setUp(self):
+        file = tempfile.NamedTemporaryFile(
+            "w", suffix=".css", delete=False, encoding="utf-8"
+        )
+        file.write("src: url('file://{{ font_path }}/font.ttf');")
+        file.close()
+
+        self.path = file.name
+        self.addCleanup(os.unlink, self.path)
+
+    @override_settings(PDF_FONT_PATH="/fonts")
+    def test_stylesheets_are_rendered_and_parsed_once(self):
+        renderer = PdfRenderer()
+
+        with patch("pyaa.helpers.pdf.weasyprint.CSS") as css:
+            first = renderer.get_stylesheet(self.path)
+            second = renderer.get_stylesheet(self.path)
+
+        self.assertIs(first, second)
+        css.assert_called_once_with(
+            string="src: url('file:///fonts/font.ttf');",
+            font_config=renderer.font_config,
+        )
+
+    def test_render_uses_the_cached_stylesheets(self):
+        renderer = PdfRenderer()
+
+        with patch("pyaa.helpers.pdf.weasyprint") as weasyprint:
+            weasyprint.HTML.return_value.write_pdf.return_value = b"%PDF"
+            pdf = renderer.render("<p>PDF</p>", [self.path])
+
+        self.assertEqual(pdf, b"%PDF")
+        weasyprint.HTML.return_value.write_pdf.assert_called_once_with(
+            stylesheets=[renderer.stylesheets[self.path]],
+            font_config=renderer.font_config,
+        )
+
+
+class PdfRendererPoolTest(SimpleTestCase):
+    def tearDown(self):
+        pdf_renderer_pool.shutdown()
+
+    @override_settings(PDF_RENDERER_POOL_SIZE=1)
+    def test_renders_in_worker_processes(self):
+        if multiprocessing.current_process().daemon:
+            self.skipTest("daemonic processes cannot start the pool")
+
+        pdf = PdfHelper.render("<p>PDF</p>")
+
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        self.assertIsNotNone(pdf_renderer_pool.executor)
+
+    @override_settings(PDF_RENDERER_POOL_SIZE=1)
+    def test_workers_are_forked_with_the_loaded_apps(self):
+        with patch("pyaa.helpers.pdf.ProcessPoolExecutor") as executor:
+            pdf_renderer_pool.get_executor()
+
+        context = executor.call_args.kwargs["mp_context"]
+        self.assertEqual(context.get_start_method(), "fork")
+
+        pdf_renderer_pool.executor = None
+
+    def test_worker_initializer_sets_up_django(self):
+        with (
+            patch("pyaa.helpers.pdf.django.setup") as setup,
+            patch("pyaa.helpers.pdf.pdf_renderer.preload") as preload,
+        ):
+            init_pdf_worker()
+
+        setup.assert_called_once_with()
+        preload.assert_called_once_with()
+
+    @override_settings(PDF_RENDERER_POOL_SIZE=0)
+    def test_zero_pool_size_renders_in_process(self):
+        with patch("pyaa.helpers.pdf.pdf_renderer.render", return_value=b"%PDF"):
+            self.assertEqual(PdfHelper.render("<p>PDF</p>"), b"%PDF")
+
+        self.assertIsNone(pdf_renderer_pool.executor)
+
+    @override_settings(PDF_RENDERER_POOL_SIZE=1)
+    def test_daemonic_processes_render_in_process(self):
+        process = Mock(daemon=True)
+
+        with (
+            patch(
+                "pyaa.helpers.pdf.multiprocessing.current_process", return_value=process
+            ),
+            patch("pyaa.helpers.pdf.pdf_renderer.render", return_value=b"%PDF"),
+        ):
+            self.assertEqual(PdfHelper.render("<p>PDF</p>"), b"%PDF")
+
+        self.assertIsNone(pdf_renderer_pool.executor)
+
+    @override_settings(PDF_RENDERER_POOL_SIZE=1)
+    def test_broken_pool_is_replaced(self):
+        with (
+            patch.object(pdf_renderer_pool, "is_enabled", return_value=True),
+            patch.object(
+                pdf_renderer_pool,
+                "submit",
+                side_effect=[BrokenProcessPool(), b"%PDF"],
+            ) as submit,
+        ):
+            self.assertEqual(PdfHelper.render("<p>PDF</p>"), b"%PDF")
+
+        self.assertEqual(submit.call_count, 2)
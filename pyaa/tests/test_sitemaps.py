@@ -223,3 +223,26 @@ class SitemapsRegistryTest(TestCase):
                 "plans",
             },
         )
+
+
+class SitemapViewTest(TestCase):
+    def test_sitemap_answers_conditional_request(self):
+        response = self.client.get("/sitemap.xml")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header("ETag"))
+
+        response = self.client.get(
+            "/sitemap.xml", headers={"if-none-match": response["ETag"]}
+        )
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_sitemap_changes_when_content_is_added(self):
+        etag = self.client.get("/sitemap.xml")["ETag"]
+
+        ContentCategory.objects.create(name="News", tag="news")
+
+        response = self.client.get("/sitemap.xml", headers={"if-none-match": etag})
+
+        self.assertEqual(response.status_code, 200)
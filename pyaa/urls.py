@@ -22,6 +22,7 @@ from django.contrib.sitemaps.views import sitemap
 from django.urls import path, re_path
 
 from apps.web.urls import urlpatterns as web_urlpatterns
+from pyaa.decorators.conditional import conditional_page
 
 from . import sitemaps, views
 
@@ -45,7 +46,7 @@ urlpatterns = [
     ),
     path(
         "sitemap.xml",
-        sitemap,
+        conditional_page(sitemaps.get_sitemap_querysets)(sitemap),
         {"sitemaps": sitemaps.sitemaps},
         name="django.contrib.sitemaps.views.sitemap",
     ),
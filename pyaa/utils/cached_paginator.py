@@ -1,9 +1,18 @@
 import abc
+import array
+import collections.abc
+import hashlib
 
 from django.conf import settings
-from django.core.cache import cache
+from django.core import signing
+from django.core.exceptions import EmptyResultSet, ValidationError
 from django.core.paginator import Page
 from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+from pyaa.helpers.cache import CacheHelper
+from pyaa.helpers.count import CountHelper
 
 PAGINATOR_TOTAL_PAGES = getattr(settings, "PAGINATOR_TOTAL_PAGES", 10)
 PAGINATOR_TEMPLATE = getattr(settings, "PAGINATOR_TEMPLATE", "partials/paginator.html")
@@ -17,6 +26,73 @@ PAGINATOR_NEXT_VERBOSE = getattr(settings, "PAGINATOR_NEXT_VERBOSE", "Next")
 PAGINATOR_LAST_CLASS = getattr(settings, "PAGINATOR_LAST_CLASS", "last")
 PAGINATOR_LAST_VERBOSE = getattr(settings, "PAGINATOR_LAST_VERBOSE", "Last")
 PAGINATOR_PAGE_PARAMETER = getattr(settings, "PAGINATOR_PAGE_PARAMETER", "page")
+PAGINATOR_CURSOR_PARAMETER = getattr(settings, "PAGINATOR_CURSOR_PARAMETER", "cursor")
+PAGINATOR_CURSOR_SALT = "pyaa.utils.cached_paginator.cursor"
+PAGINATOR_STORAGE_OBJECTS = "objects"
+PAGINATOR_STORAGE_PKS = "pks"
+PAGINATOR_CACHE_STORAGE = getattr(
+    settings, "PAGINATOR_CACHE_STORAGE", PAGINATOR_STORAGE_OBJECTS
+)
+
+
+def get_query_digest(object_list):
+    """
+    Returns a digest of the compiled sql and params of a queryset, so paginators of
+    differently filtered querysets (e.g. one per customer) never share cache entries.
+    Returns None for plain lists.
+    """
+    if not isinstance(object_list, QuerySet):
+        return None
+
+    try:
+        sql, params = object_list.query.get_compiler(using=object_list.db).as_sql()
+    except EmptyResultSet:
+        sql, params = "empty", ()
+
+    query = f"{sql}:{params!r}"
+
+    return hashlib.md5(query.encode(), usedforsecurity=False).hexdigest()
+
+
+def get_query_tags(object_list):
+    """
+    Returns the table tag of the queryset model, bumped by CacheHelper.watch_model on writes.
+    """
+    if not isinstance(object_list, QuerySet):
+        return None
+
+    return [CacheHelper.model_tag(object_list.model)]
+
+
+def get_cache_storage(object_list, cache_storage):
+    # only querysets can be hydrated back from primary keys
+    if cache_storage == PAGINATOR_STORAGE_PKS and isinstance(object_list, QuerySet):
+        return PAGINATOR_STORAGE_PKS
+
+    return PAGINATOR_STORAGE_OBJECTS
+
+
+def pack_pks(objects):
+    """
+    Returns the primary keys of objects in a compact form to be cached.
+    Integer keys are packed into a signed 64-bit array.
+    """
+    pks = [obj.pk for obj in objects]
+
+    if all(isinstance(pk, int) for pk in pks):
+        return array.array("q", pks)
+
+    return tuple(pks)
+
+
+def hydrate_pks(queryset, pks):
+    """
+    Loads the objects of the given primary keys with a single query, keeping their order.
+    Rows deleted since the keys were cached are skipped.
+    """
+    objects = queryset.order_by().in_bulk(list(pks))
+
+    return [objects[pk] for pk in pks if pk in objects]
 
 
 class Paginator(DjangoPaginator):
@@ -33,49 +109,314 @@ class Paginator(DjangoPaginator):
         count_timeout=600,
         orphans=0,
         allow_empty_first_page=True,
+        cache_storage=PAGINATOR_CACHE_STORAGE,
+        estimate_count=False,
     ):
         super().__init__(object_list, per_page, orphans, allow_empty_first_page)
         self.cache_key = cache_key.replace(" ", "_")
+        self.query_digest = get_query_digest(object_list)
+        self.cache_tags = get_query_tags(object_list)
+        self.cache_storage = get_cache_storage(object_list, cache_storage)
         self.cache_timeout = cache_timeout
         self._cached_num_pages = None
         self._cached_num_objects = None
         self.count_timeout = count_timeout or cache_timeout
+        self.estimate_count = estimate_count and isinstance(object_list, QuerySet)
 
     def page(self, number):
         number = self.validate_number(number)
-        cached_object_list = cache.get(self.build_cache_key(number))
 
-        if cached_object_list is not None:
-            return Page(cached_object_list, number, self)
+        # only one caller runs the page query when the cached page expires
+        object_list = CacheHelper.get_or_compute(
+            self.build_cache_key(number),
+            lambda: self.compute_object_list(number),
+            timeout=self.cache_timeout,
+            tags=self.cache_tags,
+        )
+
+        if self.cache_storage == PAGINATOR_STORAGE_PKS:
+            object_list = hydrate_pks(self.object_list, object_list)
+
+        return Page(object_list, number, self)
+
+    def compute_object_list(self, number):
+        object_list = super().page(number).object_list
+
+        if self.cache_storage == PAGINATOR_STORAGE_PKS:
+            return pack_pks(object_list)
+
+        return object_list
 
-        page = super().page(number)
-        cache.set(self.build_cache_key(number), page.object_list, self.cache_timeout)
-        return page
+    def get_cache_key_prefix(self):
+        if self.query_digest:
+            return f"{self.cache_key}:{self.query_digest}:{self.cache_storage}"
+
+        return self.cache_key
 
     def build_cache_key(self, page_number):
-        return f"{self.cache_key}:{self.per_page}:{page_number}:{self.cache_timeout}:{self.count_timeout}"
+        return f"{self.get_cache_key_prefix()}:{self.per_page}:{page_number}:{self.cache_timeout}:{self.count_timeout}"
 
     def build_cache_key_total(self, key):
-        return f"{self.cache_key}:{key}:{self.cache_timeout}:{self.count_timeout}"
+        return f"{self.get_cache_key_prefix()}:{key}:{self.cache_timeout}:{self.count_timeout}"
 
     @property
     def count(self):
         if self._cached_num_objects is None:
             key = self.build_cache_key_total("total_number")
-            _total = cache.get(key)
-            if _total is None:
-                _total = super().count
-                cache.set(key, _total, self.count_timeout)
-            self._cached_num_objects = _total
+            self._cached_num_objects = CacheHelper.get_or_compute(
+                key,
+                self.compute_count,
+                timeout=self.count_timeout,
+                tags=self.cache_tags,
+            )
         return self._cached_num_objects
 
+    def compute_count(self):
+        if self.estimate_count:
+            return CountHelper.get_count(self.object_list)
+
+        return super().count
+
+
+class EstimatedCountPaginator(DjangoPaginator):
+    """
+    A paginator that estimates the count of big tables instead of counting every row.
+    Used by the admin changelists of log tables.
+    """
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            return CountHelper.get_count(self.object_list)
+
+        return super().count
+
+
+class CursorPage(collections.abc.Sequence):
+    """
+    A page of a cursor paginator, with opaque cursors to the next and previous pages.
+    """
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self)} objects>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    A keyset paginator: pages are filtered by the ordering values of the last row seen
+    instead of an offset, so every page costs the same and no count query is made.
+
+    The ordering fields must not be null, and the primary key is appended to break ties.
+    """
+
+    def __init__(
+        self,
+        object_list,
+        per_page,
+        ordering="-id",
+        cache_key=None,
+        cache_timeout=0,
+        cache_storage=PAGINATOR_CACHE_STORAGE,
+    ):
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+
+        pk_name = object_list.model._meta.pk.name
+        fields = [field.lstrip("-") for field in ordering]
+
+        if pk_name not in fields and "pk" not in fields:
+            ordering = (*ordering, f"-{pk_name}" if ordering[-1][0] == "-" else pk_name)
+
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.cache_key = cache_key.replace(" ", "_") if cache_key else None
+        self.cache_timeout = cache_timeout
+        self.cache_storage = get_cache_storage(object_list, cache_storage)
+
+    def page(self, cursor=None):
+        """
+        Returns the page after (or before) the given cursor.
+        A missing, tampered or stale cursor returns the first page.
+        """
+        direction, values = self.decode_cursor(cursor)
+
+        if self.cache_key and self.cache_timeout:
+            rows, has_more = CacheHelper.get_or_compute(
+                self.build_cache_key(cursor),
+                lambda: self.compute_cached_rows(direction, values),
+                timeout=self.cache_timeout,
+                tags=get_query_tags(self.object_list),
+            )
+
+            if self.cache_storage == PAGINATOR_STORAGE_PKS:
+                rows = hydrate_pks(self.object_list, rows)
+        else:
+            rows, has_more = self.compute_rows(direction, values)
+
+        if direction == "previous":
+            next_cursor = self.encode_cursor("next", rows[-1]) if rows else None
+            previous_cursor = (
+                self.encode_cursor("previous", rows[0]) if has_more else None
+            )
+        else:
+            next_cursor = self.encode_cursor("next", rows[-1]) if has_more else None
+            previous_cursor = (
+                self.encode_cursor("previous", rows[0])
+                if values is not None and rows
+                else None
+            )
+
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+    def get_page(self, cursor=None):
+        return self.page(cursor)
+
+    def compute_cached_rows(self, direction, values):
+        rows, has_more = self.compute_rows(direction, values)
+
+        if self.cache_storage == PAGINATOR_STORAGE_PKS:
+            rows = pack_pks(rows)
+
+        return rows, has_more
+
+    def compute_rows(self, direction, values):
+        reverse = direction == "previous"
+        queryset = self.object_list.order_by(*self.get_ordering(reverse))
+
+        if values is not None:
+            queryset = queryset.filter(self.build_filter(values, reverse))
+
+        # one extra row tells whether there is another page in this direction
+        rows = list(queryset[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+
+        if reverse:
+            rows.reverse()
+
+        return rows, has_more
+
+    def get_ordering(self, reverse=False):
+        if not reverse:
+            return self.ordering
+
+        return tuple(
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        )
+
+    def build_filter(self, values, reverse=False):
+        """
+        Builds the lexicographic condition (a > x) or (a = x and b > y) ...
+        for the ordering fields, flipping the comparison for descending fields.
+        """
+        condition = Q()
+
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip("-")
+            descending = field.startswith("-") != reverse
+            lookup = "lt" if descending else "gt"
+
+            term = Q(**{f"{name}__{lookup}": values[index]})
+
+            for previous_field, value in zip(self.ordering[:index], values):
+                term &= Q(**{previous_field.lstrip("-"): value})
+
+            condition |= term
+
+        return condition
+
+    def get_values(self, obj):
+        values = []
+
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip("-"))
+
+            if not isinstance(value, (int, float, str, bool)):
+                value = str(value)
+
+            values.append(value)
+
+        return values
+
+    def encode_cursor(self, direction, obj):
+        return signing.dumps(
+            [direction, self.get_values(obj)],
+            salt=PAGINATOR_CURSOR_SALT,
+            compress=True,
+        )
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return "next", None
+
+        try:
+            direction, values = signing.loads(cursor, salt=PAGINATOR_CURSOR_SALT)
+        except (signing.BadSignature, TypeError, ValueError):
+            return "next", None
+
+        if direction not in ("next", "previous") or len(values) != len(self.ordering):
+            return "next", None
+
+        try:
+            values = [
+                self.get_field(field).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except ValidationError:
+            return "next", None
+
+        return direction, values
+
+    def get_field(self, field):
+        name = field.lstrip("-")
+        opts = self.object_list.model._meta
+
+        return opts.pk if name == "pk" else opts.get_field(name)
+
+    def build_cache_key(self, cursor):
+        digest = get_query_digest(self.object_list.order_by(*self.ordering))
+
+        # signed cursors are long, keep the key short for backends like memcached
+        if cursor:
+            cursor = hashlib.md5(cursor.encode(), usedforsecurity=False).hexdigest()
+
+        return f"{self.cache_key}:{digest}:{self.cache_storage}:{self.per_page}:{cursor or 'first'}:{self.cache_timeout}"
+
 
 class CachedPaginatorViewMixin(abc.ABC):
     """
     A Class Based View Mixin to use cached paginator instead of Django's stock one.
+    Set cursor_ordering (e.g. "-id") to paginate with cursors instead of page numbers.
     """
 
     paginator_class = Paginator
+    cursor_paginator_class = CursorPaginator
+    cursor_ordering = None
+    cache_storage = PAGINATOR_CACHE_STORAGE
+    estimate_count = False
     paginate_by = 10
 
     @abc.abstractmethod
@@ -88,6 +429,17 @@ class CachedPaginatorViewMixin(abc.ABC):
         cache_timeout = getattr(self, "cache_timeout", 60)
         count_timeout = getattr(self, "count_timeout", 3600)
 
+        if self.cursor_ordering:
+            return self.cursor_paginator_class(
+                queryset,
+                per_page,
+                ordering=self.cursor_ordering,
+                cache_key=self.get_cache_key(),
+                cache_timeout=cache_timeout,
+                cache_storage=self.cache_storage,
+                **kwargs,
+            )
+
         return self.paginator_class(
             queryset,
             per_page,
@@ -96,9 +448,20 @@ class CachedPaginatorViewMixin(abc.ABC):
             cache_key=self.get_cache_key(),
             cache_timeout=cache_timeout,
             count_timeout=count_timeout,
+            cache_storage=self.cache_storage,
+            estimate_count=self.estimate_count,
             **kwargs,
         )
 
+    def paginate_queryset(self, queryset, page_size):
+        if not self.cursor_ordering:
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = self.get_paginator(queryset, page_size)
+        page = paginator.page(self.request.GET.get(PAGINATOR_CURSOR_PARAMETER))
+
+        return (paginator, page, page.object_list, page.has_other_pages())
+
 
 def paginate_object_list(query_string, object_list):
     assert isinstance(
@@ -175,3 +538,48 @@ def paginate_object_list(query_string, object_list):
         )
 
     return {"object_list": object_list, "paginator_list": paginator_list}
+
+
+def paginate_cursor_object_list(query_string, object_list):
+    assert isinstance(
+        object_list, CursorPage
+    ), "The object_list should be a page of cursor paginator object"
+
+    paginator_list = []
+
+    if object_list.has_previous():
+        query_string.pop(PAGINATOR_CURSOR_PARAMETER, None)
+        paginator_list.append(
+            {
+                "verbose_name": PAGINATOR_FIRST_VERBOSE,
+                "cursor": None,
+                "class": PAGINATOR_FIRST_CLASS,
+                "id": f"{PAGINATOR_ID_PREFIX}_first",
+                "link": query_string.urlencode(),
+            }
+        )
+
+        query_string[PAGINATOR_CURSOR_PARAMETER] = object_list.previous_cursor
+        paginator_list.append(
+            {
+                "verbose_name": PAGINATOR_PREVIOUS_VERBOSE,
+                "cursor": object_list.previous_cursor,
+                "class": PAGINATOR_PREVIOUS_CLASS,
+                "id": f"{PAGINATOR_ID_PREFIX}_prev",
+                "link": query_string.urlencode(),
+            }
+        )
+
+    if object_list.has_next():
+        query_string[PAGINATOR_CURSOR_PARAMETER] = object_list.next_cursor
+        paginator_list.append(
+            {
+                "verbose_name": PAGINATOR_NEXT_VERBOSE,
+                "cursor": object_list.next_cursor,
+                "class": PAGINATOR_NEXT_CLASS,
+                "id": f"{PAGINATOR_ID_PREFIX}_next",
+                "link": query_string.urlencode(),
+            }
+        )
+
+    return {"object_list": object_list, "paginator_list": paginator_list}